@@ -3,20 +3,27 @@ Analytics Service - ETL Package (S2-15)
 """
 from .jobs import (
     ETLOrchestrator,
+    TenantETLReport,
     SessionDurationETL,
+    SessionColumns,
     MasteryProgressETL, 
     WeeklyActiveLearnersETL,
     IEPProgressETL,
     DifferentialPrivacyEngine,
     PrivacyAnonimizer
 )
+from .loader import BulkUpsertLoader, LoadResult
 
 __all__ = [
     "ETLOrchestrator",
+    "TenantETLReport",
     "SessionDurationETL",
+    "SessionColumns",
     "MasteryProgressETL",
     "WeeklyActiveLearnersETL", 
     "IEPProgressETL",
     "DifferentialPrivacyEngine",
-    "PrivacyAnonimizer"
+    "PrivacyAnonimizer",
+    "BulkUpsertLoader",
+    "LoadResult"
 ]
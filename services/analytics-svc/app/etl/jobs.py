@@ -4,7 +4,11 @@ Extract, Transform, Load jobs for converting raw events to anonymized aggregates
 """
 import hashlib
 import logging
+import multiprocessing
+import os
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from uuid import UUID, uuid4
@@ -12,14 +16,15 @@ from decimal import Decimal
 from collections import defaultdict, Counter
 
 import numpy as np
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, func, and_, or_, text
 
 from ..models import (
     SessionAggregate, MasteryAggregate, WeeklyActiveAggregate, 
     IEPProgressAggregate, ETLJobRun, AggregationLevel, 
     PrivacyLevel, MetricType
 )
+from .loader import BulkUpsertLoader, LoadResult
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +81,41 @@ class DifferentialPrivacyEngine:
         # For averages, sensitivity is range_size / count
         sensitivity = range_size / max(1, count)
         return self.add_laplace_noise(total / max(1, count), sensitivity)
+    
+    def add_laplace_noise_array(self, values: np.ndarray, sensitivity=None) -> np.ndarray:
+        """Vectorized add_laplace_noise; sensitivity may be a scalar or per-value array."""
+        if sensitivity is None:
+            sensitivity = self.sensitivity
+        
+        scale = np.asarray(sensitivity, dtype=np.float64) / self.epsilon
+        noise = np.random.laplace(0.0, scale, size=len(values))
+        
+        return np.maximum(0.0, values + noise)
+    
+    def add_gaussian_noise_array(self, values: np.ndarray, sensitivity=None) -> np.ndarray:
+        """Vectorized add_gaussian_noise."""
+        if sensitivity is None:
+            sensitivity = self.sensitivity
+        
+        sigma = np.asarray(sensitivity, dtype=np.float64) * np.sqrt(2 * np.log(1.25 / self.delta)) / self.epsilon
+        noise = np.random.normal(0.0, sigma, size=len(values))
+        
+        return np.maximum(0.0, values + noise)
+    
+    def add_noise_to_counts(self, counts: np.ndarray, method: str = "laplace") -> np.ndarray:
+        """Vectorized add_noise_to_count."""
+        counts = np.asarray(counts, dtype=np.float64)
+        if method == "laplace":
+            noisy_counts = self.add_laplace_noise_array(counts, sensitivity=1.0)
+        else:
+            noisy_counts = self.add_gaussian_noise_array(counts, sensitivity=1.0)
+        
+        return np.rint(noisy_counts).astype(np.int64)
+    
+    def add_noise_to_averages(self, totals: np.ndarray, counts: np.ndarray, range_size: float) -> np.ndarray:
+        """Vectorized add_noise_to_average."""
+        counts = np.maximum(1, counts)
+        return self.add_laplace_noise_array(totals / counts, range_size / counts)
 
 
 class PrivacyAnonimizer:
@@ -126,6 +166,47 @@ class PrivacyAnonimizer:
         return [group for group in groups if group.get("count", 0) >= k]
 
 
+class SessionColumns:
+    """
+    Column-oriented batch of raw sessions for vectorized aggregation.
+    
+    Learners are dictionary-encoded: ``learner_codes[i]`` indexes into
+    ``learner_ids`` so grouping works on integers, never on UUID objects.
+    """
+    
+    def __init__(
+        self,
+        tenant_id: UUID,
+        learner_ids: List[UUID],
+        learner_codes: np.ndarray,
+        days: np.ndarray,
+        durations: np.ndarray
+    ):
+        self.tenant_id = tenant_id
+        self.learner_ids = learner_ids
+        self.learner_codes = np.asarray(learner_codes, dtype=np.int64)
+        self.days = np.asarray(days, dtype="datetime64[D]")
+        self.durations = np.asarray(durations)
+    
+    def __len__(self) -> int:
+        return len(self.learner_codes)
+    
+    @classmethod
+    def from_records(cls, raw_sessions: List[Dict]) -> "SessionColumns":
+        """Build columns from extract_raw_sessions-style dicts in one pass."""
+        codes: Dict[UUID, int] = {}
+        learner_codes = np.fromiter(
+            (codes.setdefault(s["learner_id"], len(codes)) for s in raw_sessions),
+            dtype=np.int64,
+            count=len(raw_sessions)
+        )
+        days = np.array([s["session_start"].date() for s in raw_sessions], dtype="datetime64[D]")
+        durations = np.array([s["duration_minutes"] for s in raw_sessions])
+        tenant_id = raw_sessions[0]["tenant_id"] if raw_sessions else None
+        
+        return cls(tenant_id, list(codes), learner_codes, days, durations)
+
+
 class SessionDurationETL:
     """ETL job for session duration aggregates."""
     
@@ -134,6 +215,7 @@ class SessionDurationETL:
         self.privacy_level = privacy_level
         self.dp_engine = DifferentialPrivacyEngine(epsilon=1.0) if privacy_level.name.startswith("DP") else None
         self.anonymizer = PrivacyAnonimizer()
+        self.loader = BulkUpsertLoader(db)
     
     def extract_raw_sessions(self, start_date: date, end_date: date, tenant_id: UUID) -> List[Dict]:
         """
@@ -166,135 +248,151 @@ class SessionDurationETL:
     
     def transform_to_aggregates(self, raw_sessions: List[Dict], aggregation_level: AggregationLevel) -> List[Dict]:
         """Transform raw sessions into privacy-aware aggregates."""
-        aggregates = []
+        if not raw_sessions:
+            return []
         
-        if aggregation_level == AggregationLevel.INDIVIDUAL:
-            # Per-learner daily aggregates
-            learner_daily = defaultdict(lambda: defaultdict(list))
-            
-            for session in raw_sessions:
-                learner_id = session["learner_id"]
-                session_date = session["session_start"].date()
-                duration = session["duration_minutes"]
-                
-                learner_daily[learner_id][session_date].append(duration)
-            
-            for learner_id, daily_sessions in learner_daily.items():
-                for session_date, durations in daily_sessions.items():
-                    if len(durations) == 0:
-                        continue
-                    
-                    # Calculate basic statistics
-                    total_sessions = len(durations)
-                    avg_duration = sum(durations) / len(durations)
-                    median_duration = np.median(durations)
-                    max_duration = max(durations)
-                    total_duration = sum(durations)
-                    
-                    # Apply differential privacy noise if enabled
-                    if self.dp_engine and self.privacy_level != PrivacyLevel.ANONYMIZED:
-                        total_sessions = self.dp_engine.add_noise_to_count(total_sessions)
-                        avg_duration = self.dp_engine.add_noise_to_average(total_duration, total_sessions, 480)  # 8-hour max
-                        total_duration = self.dp_engine.add_laplace_noise(total_duration, sensitivity=480)
-                    
-                    aggregates.append({
-                        "tenant_id": raw_sessions[0]["tenant_id"],
-                        "learner_id_hash": self.anonymizer.hash_learner_id(learner_id),
-                        "date_bucket": session_date,
-                        "total_sessions": max(0, total_sessions),
-                        "avg_duration_minutes": max(0, avg_duration),
-                        "median_duration_minutes": max(0, median_duration),
-                        "max_duration_minutes": max_duration,
-                        "total_duration_minutes": max(0, total_duration),
-                        "aggregation_level": aggregation_level,
-                        "privacy_level": self.privacy_level,
-                        "noise_epsilon": self.dp_engine.epsilon if self.dp_engine else None,
-                        "cohort_size": 1
-                    })
+        columns = SessionColumns.from_records(raw_sessions)
+        return self.transform_columns(columns, [aggregation_level]).get(aggregation_level, [])
+    
+    def transform_columns(
+        self,
+        columns: SessionColumns,
+        aggregation_levels: Optional[List[AggregationLevel]] = None
+    ) -> Dict[AggregationLevel, List[Dict]]:
+        """
+        Build daily aggregates for each requested level from a single sort.
+        
+        Sessions are ordered by (day, learner, duration) once; learner-day
+        groups are then contiguous runs with ascending durations and
+        tenant-day groups are coarser runs of the same order.
+        """
+        if aggregation_levels is None:
+            aggregation_levels = [AggregationLevel.INDIVIDUAL, AggregationLevel.TENANT]
+        if not len(columns):
+            return {level: [] for level in aggregation_levels}
         
-        elif aggregation_level == AggregationLevel.TENANT:
-            # Tenant-wide daily aggregates
-            daily_sessions = defaultdict(list)
+        days = columns.days.astype(np.int64)
+        order = np.lexsort((columns.durations, columns.learner_codes, days))
+        sorted_days = days[order]
+        sorted_learners = columns.learner_codes[order]
+        sorted_durations = columns.durations[order]
+        
+        day_changes = sorted_days[1:] != sorted_days[:-1]
+        results = {}
+        
+        if AggregationLevel.INDIVIDUAL in aggregation_levels:
+            # Per-learner daily aggregates
+            starts = np.flatnonzero(np.concatenate(([True], day_changes | (sorted_learners[1:] != sorted_learners[:-1]))))
+            counts, totals, maxima, medians = self._group_stats(sorted_durations, starts, durations_sorted=True)
             
-            for session in raw_sessions:
-                session_date = session["session_start"].date()
-                duration = session["duration_minutes"]
-                daily_sessions[session_date].append(duration)
+            learner_hashes = [self.anonymizer.hash_learner_id(learner_id) for learner_id in columns.learner_ids]
+            results[AggregationLevel.INDIVIDUAL] = self._aggregate_rows(
+                columns.tenant_id,
+                [learner_hashes[code] for code in sorted_learners[starts].tolist()],
+                sorted_days[starts],
+                counts, totals, maxima, medians,
+                total_sensitivity=480,  # 8-hour max
+                aggregation_level=AggregationLevel.INDIVIDUAL,
+                cohort_size=1
+            )
+        
+        if AggregationLevel.TENANT in aggregation_levels:
+            # Tenant-wide daily aggregates; the cohort is every learner in the batch
+            starts = np.flatnonzero(np.concatenate(([True], day_changes)))
+            counts, totals, maxima, medians = self._group_stats(sorted_durations, starts, durations_sorted=False)
+            cohort_size = int(np.count_nonzero(np.bincount(columns.learner_codes)))
             
-            for session_date, durations in daily_sessions.items():
-                if len(durations) == 0:
-                    continue
-                
-                total_sessions = len(durations)
-                avg_duration = sum(durations) / len(durations)
-                median_duration = np.median(durations)
-                max_duration = max(durations)
-                total_duration = sum(durations)
-                
-                # Apply DP noise for tenant-level data
-                if self.dp_engine and self.privacy_level != PrivacyLevel.ANONYMIZED:
-                    total_sessions = self.dp_engine.add_noise_to_count(total_sessions)
-                    avg_duration = self.dp_engine.add_noise_to_average(total_duration, total_sessions, 480)
-                    total_duration = self.dp_engine.add_laplace_noise(total_duration)
-                
-                aggregates.append({
-                    "tenant_id": raw_sessions[0]["tenant_id"],
-                    "learner_id_hash": None,  # Tenant-wide aggregate
-                    "date_bucket": session_date,
-                    "total_sessions": max(0, total_sessions),
-                    "avg_duration_minutes": max(0, avg_duration),
-                    "median_duration_minutes": max(0, median_duration),
-                    "max_duration_minutes": max_duration,
-                    "total_duration_minutes": max(0, total_duration),
-                    "aggregation_level": aggregation_level,
-                    "privacy_level": self.privacy_level,
-                    "noise_epsilon": self.dp_engine.epsilon if self.dp_engine else None,
-                    "cohort_size": len(set(s["learner_id"] for s in raw_sessions))
-                })
+            results[AggregationLevel.TENANT] = self._aggregate_rows(
+                columns.tenant_id,
+                None,  # Tenant-wide aggregate
+                sorted_days[starts],
+                counts, totals, maxima, medians,
+                total_sensitivity=None,
+                aggregation_level=AggregationLevel.TENANT,
+                cohort_size=cohort_size
+            )
+        
+        return results
+    
+    @staticmethod
+    def _group_stats(values: np.ndarray, starts: np.ndarray, durations_sorted: bool) -> Tuple[np.ndarray, ...]:
+        """Return (counts, totals, maxima, medians) for the runs beginning at starts."""
+        ends = np.append(starts[1:], len(values))
+        counts = ends - starts
+        totals = np.add.reduceat(values, starts)
+        
+        if durations_sorted:
+            maxima = values[ends - 1]
+            medians = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+        else:
+            maxima = np.maximum.reduceat(values, starts)
+            medians = np.array([np.median(values[start:end]) for start, end in zip(starts, ends)])
         
-        return aggregates
+        return counts, totals, maxima, medians
     
-    def load_aggregates(self, aggregates: List[Dict]) -> int:
-        """Load aggregates into database with upsert logic."""
-        loaded_count = 0
-        
-        for agg_data in aggregates:
-            try:
-                # Check if aggregate already exists
-                existing = self.db.query(SessionAggregate).filter(
-                    and_(
-                        SessionAggregate.tenant_id == agg_data["tenant_id"],
-                        SessionAggregate.learner_id_hash == agg_data["learner_id_hash"],
-                        SessionAggregate.date_bucket == agg_data["date_bucket"],
-                        SessionAggregate.aggregation_level == agg_data["aggregation_level"]
-                    )
-                ).first()
-                
-                if existing:
-                    # Update existing record
-                    for key, value in agg_data.items():
-                        if hasattr(existing, key):
-                            setattr(existing, key, value)
-                    existing.updated_at = datetime.utcnow()
-                else:
-                    # Create new record
-                    aggregate = SessionAggregate(**agg_data)
-                    self.db.add(aggregate)
-                
-                loaded_count += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to load session aggregate: {e}")
-                continue
+    def _aggregate_rows(
+        self,
+        tenant_id: UUID,
+        learner_hashes: Optional[List[str]],
+        date_buckets: np.ndarray,
+        counts: np.ndarray,
+        totals: np.ndarray,
+        maxima: np.ndarray,
+        medians: np.ndarray,
+        total_sensitivity: Optional[float],
+        aggregation_level: AggregationLevel,
+        cohort_size: int
+    ) -> List[Dict]:
+        """Apply DP noise to whole columns and emit one aggregate dict per group."""
+        if self.dp_engine and self.privacy_level != PrivacyLevel.ANONYMIZED:
+            noisy_counts = self.dp_engine.add_noise_to_counts(counts)
+            averages = self.dp_engine.add_noise_to_averages(totals, noisy_counts, 480)
+            totals = self.dp_engine.add_laplace_noise_array(totals, sensitivity=total_sensitivity)
+            counts = np.maximum(0, noisy_counts)
+        else:
+            averages = totals / counts
         
-        self.db.commit()
-        return loaded_count
+        noise_epsilon = self.dp_engine.epsilon if self.dp_engine else None
+        if learner_hashes is None:
+            learner_hashes = [None] * len(counts)
+        
+        return [
+            {
+                "tenant_id": tenant_id,
+                "learner_id_hash": learner_hash,
+                "date_bucket": date_bucket,
+                "total_sessions": total_sessions,
+                "avg_duration_minutes": max(0, avg_duration),
+                "median_duration_minutes": max(0, median_duration),
+                "max_duration_minutes": max_duration,
+                "total_duration_minutes": max(0, total_duration),
+                "aggregation_level": aggregation_level,
+                "privacy_level": self.privacy_level,
+                "noise_epsilon": noise_epsilon,
+                "cohort_size": cohort_size
+            }
+            for learner_hash, date_bucket, total_sessions, avg_duration, median_duration, max_duration, total_duration
+            in zip(
+                learner_hashes,
+                date_buckets.astype("datetime64[D]").tolist(),
+                counts.tolist(),
+                averages.tolist(),
+                medians.tolist(),
+                maxima.tolist(),
+                totals.tolist()
+            )
+        ]
+    
+    def load_aggregates(self, aggregates: List[Dict]) -> LoadResult:
+        """Upsert aggregates in chunks keyed on uq_session_agg_unique."""
+        return self.loader.upsert(SessionAggregate, aggregates)
     
     def run_etl(self, start_date: date, end_date: date, tenant_id: UUID) -> ETLJobRun:
         """Execute complete ETL pipeline for session duration."""
         job_run = ETLJobRun(
             job_name=f"session_duration_etl_{tenant_id}",
             job_type=MetricType.SESSION_DURATION,
+            tenant_id=tenant_id,
             started_at=datetime.utcnow(),
             status="running",
             privacy_level_used=self.privacy_level,
@@ -308,20 +406,21 @@ class SessionDurationETL:
         try:
             # Extract
             raw_sessions = self.extract_raw_sessions(start_date, end_date, tenant_id)
-            job_run.records_processed = len(raw_sessions)
             
-            # Transform
-            individual_aggregates = self.transform_to_aggregates(raw_sessions, AggregationLevel.INDIVIDUAL)
-            tenant_aggregates = self.transform_to_aggregates(raw_sessions, AggregationLevel.TENANT)
+            # Transform - both levels share one columnar sort
+            aggregates = self.transform_columns(SessionColumns.from_records(raw_sessions))
             
-            all_aggregates = individual_aggregates + tenant_aggregates
+            all_aggregates = aggregates[AggregationLevel.INDIVIDUAL] + aggregates[AggregationLevel.TENANT]
             
             # Load
-            loaded_count = self.load_aggregates(all_aggregates)
+            load_result = self.load_aggregates(all_aggregates)
             
             # Update job status
-            job_run.records_created = loaded_count
+            job_run.records_processed = len(raw_sessions)
+            job_run.records_created = load_result.inserted
+            job_run.records_updated = load_result.updated
             job_run.status = "completed"
+            job_run.high_water_mark = job_run.data_end_date
             job_run.completed_at = datetime.utcnow()
             job_run.processing_time_seconds = (job_run.completed_at - job_run.started_at).total_seconds()
             
@@ -343,6 +442,7 @@ class MasteryProgressETL:
         self.privacy_level = privacy_level
         self.dp_engine = DifferentialPrivacyEngine(epsilon=0.5) if privacy_level.name.startswith("DP") else None
         self.anonymizer = PrivacyAnonimizer()
+        self.loader = BulkUpsertLoader(db)
     
     def extract_assessment_events(self, start_date: date, end_date: date, tenant_id: UUID) -> List[Dict]:
         """Extract assessment completion events."""
@@ -445,6 +545,7 @@ class MasteryProgressETL:
         job_run = ETLJobRun(
             job_name=f"mastery_progress_etl_{tenant_id}",
             job_type=MetricType.MASTERY_SCORE,
+            tenant_id=tenant_id,
             started_at=datetime.utcnow(),
             status="running",
             privacy_level_used=self.privacy_level,
@@ -461,35 +562,13 @@ class MasteryProgressETL:
             aggregates = self.transform_mastery_aggregates(assessments)
             
             # Load
-            loaded_count = 0
-            for agg_data in aggregates:
-                try:
-                    existing = self.db.query(MasteryAggregate).filter(
-                        and_(
-                            MasteryAggregate.tenant_id == agg_data["tenant_id"],
-                            MasteryAggregate.learner_id_hash == agg_data["learner_id_hash"],
-                            MasteryAggregate.subject_id == agg_data["subject_id"],
-                            MasteryAggregate.date_bucket == agg_data["date_bucket"]
-                        )
-                    ).first()
-                    
-                    if existing:
-                        for key, value in agg_data.items():
-                            if hasattr(existing, key):
-                                setattr(existing, key, value)
-                        existing.updated_at = datetime.utcnow()
-                    else:
-                        mastery_agg = MasteryAggregate(**agg_data)
-                        self.db.add(mastery_agg)
-                    
-                    loaded_count += 1
-                except Exception as e:
-                    logger.error(f"Failed to load mastery aggregate: {e}")
-                    continue
+            load_result = self.loader.upsert(MasteryAggregate, aggregates)
             
             job_run.records_processed = len(assessments)
-            job_run.records_created = loaded_count
+            job_run.records_created = load_result.inserted
+            job_run.records_updated = load_result.updated
             job_run.status = "completed"
+            job_run.high_water_mark = job_run.data_end_date
             job_run.completed_at = datetime.utcnow()
             job_run.processing_time_seconds = (job_run.completed_at - job_run.started_at).total_seconds()
             
@@ -511,12 +590,14 @@ class WeeklyActiveLearnersETL:
         self.privacy_level = privacy_level
         self.dp_engine = DifferentialPrivacyEngine(epsilon=2.0) if privacy_level.name.startswith("DP") else None
         self.anonymizer = PrivacyAnonimizer()
+        self.loader = BulkUpsertLoader(db)
     
     def run_etl(self, week_start: date, tenant_id: UUID) -> ETLJobRun:
         """Execute weekly active learners ETL."""
         job_run = ETLJobRun(
             job_name=f"weekly_active_etl_{tenant_id}",
             job_type=MetricType.WEEKLY_ACTIVE,
+            tenant_id=tenant_id,
             started_at=datetime.utcnow(),
             status="running",
             privacy_level_used=self.privacy_level,
@@ -569,26 +650,13 @@ class WeeklyActiveLearnersETL:
                 "total_population": total_active
             }
             
-            # Upsert logic
-            existing = self.db.query(WeeklyActiveAggregate).filter(
-                and_(
-                    WeeklyActiveAggregate.tenant_id == tenant_id,
-                    WeeklyActiveAggregate.week_start_date == week_start
-                )
-            ).first()
-            
-            if existing:
-                for key, value in aggregate_data.items():
-                    if hasattr(existing, key):
-                        setattr(existing, key, value)
-                existing.updated_at = datetime.utcnow()
-            else:
-                weekly_agg = WeeklyActiveAggregate(**aggregate_data)
-                self.db.add(weekly_agg)
+            load_result = self.loader.upsert(WeeklyActiveAggregate, [aggregate_data])
             
             job_run.records_processed = 1
-            job_run.records_created = 1
+            job_run.records_created = load_result.inserted
+            job_run.records_updated = load_result.updated
             job_run.status = "completed"
+            job_run.high_water_mark = job_run.data_end_date
             job_run.completed_at = datetime.utcnow()
             job_run.processing_time_seconds = (job_run.completed_at - job_run.started_at).total_seconds()
             
@@ -610,12 +678,14 @@ class IEPProgressETL:
         self.privacy_level = privacy_level
         self.dp_engine = DifferentialPrivacyEngine(epsilon=0.3) if privacy_level.name.startswith("DP") else None
         self.anonymizer = PrivacyAnonimizer()
+        self.loader = BulkUpsertLoader(db)
     
     def run_etl(self, start_date: date, end_date: date, tenant_id: UUID) -> ETLJobRun:
         """Execute IEP progress ETL."""
         job_run = ETLJobRun(
             job_name=f"iep_progress_etl_{tenant_id}",
             job_type=MetricType.IEP_PROGRESS,
+            tenant_id=tenant_id,
             started_at=datetime.utcnow(),
             status="running",
             privacy_level_used=self.privacy_level,
@@ -677,35 +747,13 @@ class IEPProgressETL:
                 })
             
             # Load aggregates
-            loaded_count = 0
-            for agg_data in aggregates:
-                try:
-                    existing = self.db.query(IEPProgressAggregate).filter(
-                        and_(
-                            IEPProgressAggregate.tenant_id == agg_data["tenant_id"],
-                            IEPProgressAggregate.learner_id_hash == agg_data["learner_id_hash"],
-                            IEPProgressAggregate.iep_goal_category == agg_data["iep_goal_category"],
-                            IEPProgressAggregate.date_bucket == agg_data["date_bucket"]
-                        )
-                    ).first()
-                    
-                    if existing:
-                        for key, value in agg_data.items():
-                            if hasattr(existing, key):
-                                setattr(existing, key, value)
-                        existing.updated_at = datetime.utcnow()
-                    else:
-                        iep_agg = IEPProgressAggregate(**agg_data)
-                        self.db.add(iep_agg)
-                    
-                    loaded_count += 1
-                except Exception as e:
-                    logger.error(f"Failed to load IEP aggregate: {e}")
-                    continue
+            load_result = self.loader.upsert(IEPProgressAggregate, aggregates)
             
             job_run.records_processed = len(aggregates)
-            job_run.records_created = loaded_count
+            job_run.records_created = load_result.inserted
+            job_run.records_updated = load_result.updated
             job_run.status = "completed"
+            job_run.high_water_mark = job_run.data_end_date
             job_run.completed_at = datetime.utcnow()
             job_run.processing_time_seconds = (job_run.completed_at - job_run.started_at).total_seconds()
             
@@ -719,12 +767,187 @@ class IEPProgressETL:
         return job_run
 
 
+DAILY_ETL_JOBS = {
+    MetricType.SESSION_DURATION: SessionDurationETL,
+    MetricType.MASTERY_SCORE: MasteryProgressETL,
+    MetricType.IEP_PROGRESS: IEPProgressETL,
+}
+
+
+class TenantETLReport:
+    """Per-tenant outcome of a scheduled ETL run, assembled from pool results."""
+    
+    def __init__(self, tenant_id: UUID):
+        self.tenant_id = tenant_id
+        self.jobs: List[Dict[str, Any]] = []
+    
+    @property
+    def wall_time_seconds(self) -> float:
+        """Elapsed time from the tenant's first job starting to its last job finishing."""
+        if not self.jobs:
+            return 0.0
+        return max(job["finished_at"] for job in self.jobs) - min(job["started_at"] for job in self.jobs)
+    
+    @property
+    def status(self) -> str:
+        if any(job["status"] == "failed" for job in self.jobs):
+            return "failed"
+        if all(job["status"] == "up_to_date" for job in self.jobs):
+            return "up_to_date"
+        return "completed"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tenant_id": str(self.tenant_id),
+            "status": self.status,
+            "wall_time_seconds": round(self.wall_time_seconds, 3),
+            "jobs": self.jobs
+        }
+
+
+# Per-process session factory, created once by the pool initializer
+_worker_session_factory = None
+
+
+def _init_etl_worker(database_url: str) -> None:
+    """Give each pool worker its own engine holding at most one connection."""
+    global _worker_session_factory
+    engine = create_engine(database_url, pool_size=1, max_overflow=0, pool_pre_ping=True)
+    _worker_session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _run_scheduled_job(
+    tenant_id: UUID,
+    job_type: MetricType,
+    end_date: date,
+    start_date: Optional[date],
+    privacy_level: PrivacyLevel,
+    full_refresh: bool
+) -> Dict[str, Any]:
+    """Pool task: run one (tenant, job) incrementally in the worker's own session."""
+    started_at = time.time()
+    db = _worker_session_factory()
+    try:
+        job_run = ETLOrchestrator(db).run_incremental(
+            tenant_id, job_type, end_date, start_date, privacy_level, full_refresh
+        )
+        result = {
+            "job_type": job_type.value,
+            "status": job_run.status if job_run else "up_to_date",
+            "job_id": str(job_run.id) if job_run else None,
+            "data_start_date": job_run.data_start_date.isoformat() if job_run else None,
+            "data_end_date": job_run.data_end_date.isoformat() if job_run else None,
+            "records_processed": job_run.records_processed if job_run else 0,
+            "error_message": job_run.error_message if job_run else None
+        }
+    finally:
+        db.close()
+    result.update(started_at=started_at, finished_at=time.time())
+    return result
+
+
 class ETLOrchestrator:
     """Orchestrates all ETL jobs for analytics processing."""
     
     def __init__(self, db: Session):
         self.db = db
     
+    def get_watermark(self, tenant_id: UUID, job_type: MetricType) -> Optional[date]:
+        """Latest data date already covered by a completed run of this job for this tenant."""
+        return self.db.query(func.max(ETLJobRun.high_water_mark)).filter(
+            and_(
+                ETLJobRun.tenant_id == tenant_id,
+                ETLJobRun.job_type == job_type,
+                ETLJobRun.status == "completed"
+            )
+        ).scalar()
+    
+    def run_incremental(
+        self,
+        tenant_id: UUID,
+        job_type: MetricType,
+        end_date: date,
+        start_date: Optional[date] = None,
+        privacy_level: PrivacyLevel = PrivacyLevel.ANONYMIZED,
+        full_refresh: bool = False
+    ) -> Optional[ETLJobRun]:
+        """
+        Run one daily job from the day after its watermark through end_date.
+        
+        Without a watermark the range starts at start_date (default end_date).
+        Returns None when the watermark already covers end_date.
+        """
+        range_start = start_date or end_date
+        watermark = None if full_refresh else self.get_watermark(tenant_id, job_type)
+        if watermark is not None:
+            range_start = max(start_date or date.min, watermark + timedelta(days=1))
+        
+        if range_start > end_date:
+            logger.info(f"{job_type.value} for tenant {tenant_id} is up to date through {watermark}")
+            return None
+        
+        etl = DAILY_ETL_JOBS[job_type](self.db, privacy_level)
+        return etl.run_etl(range_start, end_date, tenant_id)
+    
+    def run_tenants(
+        self,
+        tenant_ids: List[UUID],
+        end_date: date,
+        job_types: Optional[List[MetricType]] = None,
+        start_date: Optional[date] = None,
+        privacy_level: PrivacyLevel = PrivacyLevel.ANONYMIZED,
+        max_workers: Optional[int] = None,
+        full_refresh: bool = False
+    ) -> List[TenantETLReport]:
+        """
+        Scheduler mode: fan (tenant, job) pairs out across a process pool.
+        
+        Each worker opens its own engine against this session's database with
+        a single pooled connection, so max_workers (ETL_MAX_WORKERS) also caps
+        the number of concurrent database connections. Jobs run incrementally
+        from their stored watermark unless full_refresh is set.
+        """
+        job_types = job_types or list(DAILY_ETL_JOBS)
+        max_workers = max_workers or int(os.getenv("ETL_MAX_WORKERS", min(4, os.cpu_count() or 1)))
+        database_url = self.db.get_bind().url.render_as_string(hide_password=False)
+        reports = {tenant_id: TenantETLReport(tenant_id) for tenant_id in tenant_ids}
+        
+        logger.info(f"Scheduling {len(tenant_ids) * len(job_types)} ETL jobs for {len(tenant_ids)} tenants "
+                    f"through {end_date} on {max_workers} workers")
+        
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_etl_worker,
+            initargs=(database_url,)
+        ) as pool:
+            futures = {
+                pool.submit(
+                    _run_scheduled_job, tenant_id, job_type, end_date, start_date, privacy_level, full_refresh
+                ): (tenant_id, job_type)
+                for tenant_id in tenant_ids
+                for job_type in job_types
+            }
+            for future in as_completed(futures):
+                tenant_id, job_type = futures[future]
+                try:
+                    reports[tenant_id].jobs.append(future.result())
+                except Exception as e:
+                    logger.error(f"{job_type.value} ETL for tenant {tenant_id} failed in worker: {e}")
+                    now = time.time()
+                    reports[tenant_id].jobs.append({
+                        "job_type": job_type.value,
+                        "status": "failed",
+                        "job_id": None,
+                        "error_message": str(e),
+                        "started_at": now,
+                        "finished_at": now
+                    })
+        
+        for report in reports.values():
+            logger.info(f"Tenant {report.tenant_id} ETL {report.status} in {report.wall_time_seconds:.2f}s")
+        return list(reports.values())
+    
     def run_daily_etl(self, target_date: date, tenant_id: UUID, privacy_level: PrivacyLevel = PrivacyLevel.ANONYMIZED) -> List[ETLJobRun]:
         """Run all daily ETL jobs for a tenant."""
         logger.info(f"Starting daily ETL for {target_date}, tenant {tenant_id}, privacy level {privacy_level}")
@@ -0,0 +1,196 @@
+"""
+Analytics Service - Bulk Aggregate Loader (S2-15)
+Chunked INSERT ... ON CONFLICT DO UPDATE for aggregate tables
+"""
+import logging
+import os
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from sqlalchemy import UniqueConstraint, and_, bindparam, or_, select, tuple_, update, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Stay under the bind-parameter ceiling (SQLite 32766, Postgres 65535)
+MAX_PARAMS_PER_STATEMENT = 30000
+
+UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+class LoadResult:
+    """Row counts reported by a bulk load."""
+
+    def __init__(self, inserted: int = 0, updated: int = 0, failed: int = 0, chunks: int = 0):
+        self.inserted = inserted
+        self.updated = updated
+        self.failed = failed
+        self.chunks = chunks
+
+    @property
+    def loaded(self) -> int:
+        return self.inserted + self.updated
+
+    def __add__(self, other: "LoadResult") -> "LoadResult":
+        return LoadResult(
+            self.inserted + other.inserted,
+            self.updated + other.updated,
+            self.failed + other.failed,
+            self.chunks + other.chunks
+        )
+
+    def __repr__(self) -> str:
+        return (f"LoadResult(inserted={self.inserted}, updated={self.updated}, "
+                f"failed={self.failed}, chunks={self.chunks})")
+
+
+class BulkUpsertLoader:
+    """
+    Upsert aggregate rows keyed on the model's unique constraint.
+
+    Rows are written in chunks, one transaction per chunk, with a single
+    multi-row ``INSERT ... ON CONFLICT DO UPDATE`` on Postgres and SQLite.
+    Rows whose key contains NULL (tenant-wide aggregates have no
+    learner_id_hash) never conflict under SQL NULL semantics, so they and
+    any other dialect go through a select-then-merge path that still costs
+    one lookup per chunk rather than one per row.
+    """
+
+    def __init__(self, db: Session, chunk_size: Optional[int] = None):
+        self.db = db
+        self.chunk_size = chunk_size or int(os.getenv("ETL_LOAD_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+
+    def upsert(self, model, rows: List[Dict[str, Any]], conflict_columns: Optional[Sequence[str]] = None) -> LoadResult:
+        """Insert or update rows of model; a failed chunk is rolled back and counted, not raised."""
+        result = LoadResult()
+        if not rows:
+            return result
+
+        table = model.__table__
+        conflict_columns = list(conflict_columns or self._conflict_columns(table))
+        dialect = self.db.get_bind().dialect.name
+        upsert_insert = UPSERT_DIALECTS.get(dialect)
+
+        # One statement may not touch the same key twice; the last row wins
+        rows = list({tuple(row.get(column) for column in conflict_columns): row for row in rows}.values())
+
+        keyed_rows, null_key_rows = [], []
+        for row in rows:
+            if any(row.get(column) is None for column in conflict_columns):
+                null_key_rows.append(row)
+            else:
+                keyed_rows.append(row)
+
+        chunk_size = max(1, min(self.chunk_size, MAX_PARAMS_PER_STATEMENT // max(1, len(rows[0]) + 3)))
+
+        for rows_group, use_upsert in ((keyed_rows, upsert_insert is not None), (null_key_rows, False)):
+            for start in range(0, len(rows_group), chunk_size):
+                chunk = rows_group[start:start + chunk_size]
+                try:
+                    if use_upsert:
+                        inserted = self._upsert_chunk(upsert_insert, table, chunk, conflict_columns, dialect)
+                    else:
+                        inserted = self._merge_chunk(table, chunk, conflict_columns)
+                    self.db.commit()
+                    result += LoadResult(inserted, len(chunk) - inserted, 0, 1)
+                except Exception as e:
+                    self.db.rollback()
+                    result += LoadResult(0, 0, len(chunk), 1)
+                    logger.error(f"Failed to load {len(chunk)} {table.name} rows: {e}")
+
+        logger.info(f"Loaded {table.name}: {result}")
+        return result
+
+    @staticmethod
+    def _conflict_columns(table) -> List[str]:
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                return [column.name for column in constraint.columns]
+        raise ValueError(f"{table.name} has no unique constraint to upsert on")
+
+    @staticmethod
+    def _update_columns(table, row: Dict[str, Any], conflict_columns: Sequence[str]) -> List[str]:
+        return [
+            column for column in row
+            if column in table.c and column not in conflict_columns and column not in ("id", "created_at")
+        ]
+
+    def _upsert_chunk(self, upsert_insert, table, chunk: List[Dict], conflict_columns: List[str], dialect: str) -> int:
+        """One executemany upsert; returns how many rows were new.
+
+        The statement is built without embedded values so it compiles once
+        and is served from the statement cache for every later chunk; the
+        driver batches the parameter sets (insertmanyvalues on Postgres).
+        """
+        stmt = upsert_insert(table)
+        set_ = {column: stmt.excluded[column] for column in self._update_columns(table, chunk[0], conflict_columns)}
+        if "updated_at" in table.c:
+            set_["updated_at"] = datetime.utcnow()
+        stmt = stmt.on_conflict_do_update(index_elements=conflict_columns, set_=set_)
+
+        if dialect == "postgresql":
+            # xmax is zero only on freshly inserted tuples
+            rows = self.db.execute(stmt.returning(literal_column("xmax = 0")), chunk).scalars().all()
+            return sum(1 for inserted in rows if inserted)
+
+        existing = self._count_existing(table, chunk, conflict_columns)
+        self.db.execute(stmt, chunk)
+        return len(chunk) - existing
+
+    def _count_existing(self, table, chunk: List[Dict], conflict_columns: List[str]) -> int:
+        key_columns = [table.c[column] for column in conflict_columns]
+        keys = {tuple(row[column] for column in conflict_columns) for row in chunk}
+        return len(self.db.execute(
+            select(*key_columns).where(tuple_(*key_columns).in_(list(keys)))
+        ).all())
+
+    def _merge_chunk(self, table, chunk: List[Dict], conflict_columns: List[str]) -> int:
+        """Select existing keys once, then bulk insert new rows and bulk update the rest."""
+        key_columns = [table.c[column] for column in conflict_columns]
+
+        def key_match(row: Dict) -> Any:
+            return and_(*[
+                column.is_(None) if row.get(column.name) is None else column == row[column.name]
+                for column in key_columns
+            ])
+
+        existing: Dict[Tuple, Any] = {
+            tuple(found[1:]): found[0]
+            for found in self.db.execute(
+                select(table.c.id, *key_columns).where(or_(*[key_match(row) for row in chunk]))
+            ).all()
+        }
+
+        update_columns = self._update_columns(table, chunk[0], conflict_columns)
+        if "updated_at" in table.c and "updated_at" not in update_columns:
+            update_columns.append("updated_at")
+        now = datetime.utcnow()
+
+        inserts, updates = [], []
+        for row in chunk:
+            row_id = existing.get(tuple(row.get(column) for column in conflict_columns))
+            if row_id is None:
+                inserts.append(row)
+            else:
+                params = {f"b_{column}": row.get(column) for column in update_columns}
+                params["b_updated_at"] = row.get("updated_at", now)
+                params["b_id"] = row_id
+                updates.append(params)
+
+        if updates:
+            # Bind names must not collide with column names in an UPDATE ... SET
+            self.db.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values({column: bindparam(f"b_{column}") for column in update_columns}),
+                updates
+            )
+        if inserts:
+            self.db.execute(table.insert(), inserts)
+        return len(inserts)
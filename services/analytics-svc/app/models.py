@@ -221,6 +221,7 @@ class ETLJobRun(Base):
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
     job_name = Column(String(100), nullable=False, index=True)
     job_type = Column(Enum(MetricType), nullable=False)
+    tenant_id = Column(PG_UUID(as_uuid=True), nullable=True)
     
     # Execution details
     started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -242,11 +243,15 @@ class ETLJobRun(Base):
     data_start_date = Column(Date, nullable=True)
     data_end_date = Column(Date, nullable=True)
     
+    # Incremental processing: last data date covered by a completed run
+    high_water_mark = Column(Date, nullable=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     
     __table_args__ = (
         Index("ix_etl_job_name_status", "job_name", "status"),
         Index("ix_etl_job_started", "started_at"),
+        Index("ix_etl_job_tenant_watermark", "tenant_id", "job_type", "status", "high_water_mark"),
     )
 
 
@@ -387,6 +392,7 @@ class ETLJobStatus(BaseModel):
     
     privacy_level: str = Field(..., description="Privacy level applied")
     epsilon_used: Optional[float] = Field(None, description="DP epsilon budget used")
+    high_water_mark: Optional[date] = Field(None, description="Last data date covered by this run")
     
     error_message: Optional[str] = Field(None, description="Error message if failed")
 
@@ -433,6 +433,7 @@ async def get_etl_jobs(
                 processing_time_seconds=job.processing_time_seconds,
                 privacy_level=job.privacy_level_used.value,
                 epsilon_used=job.epsilon_budget_used,
+                high_water_mark=job.high_water_mark,
                 error_message=job.error_message
             ))
         
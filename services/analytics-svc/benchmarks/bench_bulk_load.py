@@ -0,0 +1,134 @@
+"""
+Aggregate load benchmark
+
+Loads N session aggregate rows (default 1M) twice - a fresh insert and a
+re-run that updates every row - comparing the previous per-row
+SELECT ... first() plus add/setattr loop with the chunked
+INSERT ... ON CONFLICT DO UPDATE loader. Runs against a temporary SQLite
+file unless --database-url points at Postgres.
+
+Usage:
+    python benchmarks/bench_bulk_load.py [--rows N] [--chunk-size N] [--legacy-rows N] [--database-url URL]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import and_, create_engine  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+from app.etl import BulkUpsertLoader, PrivacyAnonimizer  # noqa: E402
+from app.models import AggregationLevel, Base, PrivacyLevel, SessionAggregate  # noqa: E402
+
+
+def legacy_load(db: Session, aggregates: List[Dict]) -> int:
+    """Reference copy of the previous per-row upsert loop"""
+    loaded_count = 0
+    for agg_data in aggregates:
+        existing = db.query(SessionAggregate).filter(
+            and_(
+                SessionAggregate.tenant_id == agg_data["tenant_id"],
+                SessionAggregate.learner_id_hash == agg_data["learner_id_hash"],
+                SessionAggregate.date_bucket == agg_data["date_bucket"],
+                SessionAggregate.aggregation_level == agg_data["aggregation_level"]
+            )
+        ).first()
+        if existing:
+            for key, value in agg_data.items():
+                if hasattr(existing, key):
+                    setattr(existing, key, value)
+            existing.updated_at = datetime.utcnow()
+        else:
+            db.add(SessionAggregate(**agg_data))
+        loaded_count += 1
+    db.commit()
+    return loaded_count
+
+
+def make_rows(count: int, days: int = 30) -> List[Dict]:
+    tenant_id = uuid4()
+    learners = [PrivacyAnonimizer.hash_learner_id(uuid4()) for _ in range(-(-count // days))]
+    return [
+        {
+            "tenant_id": tenant_id,
+            "learner_id_hash": learners[i // days],
+            "date_bucket": date(2025, 1, 1) + timedelta(days=i % days),
+            "aggregation_level": AggregationLevel.INDIVIDUAL,
+            "total_sessions": 3,
+            "total_duration_minutes": 90.0,
+            "avg_duration_minutes": 30.0,
+            "median_duration_minutes": 30.0,
+            "max_duration_minutes": 45.0,
+            "privacy_level": PrivacyLevel.ANONYMIZED,
+            "noise_epsilon": None,
+            "cohort_size": 1
+        }
+        for i in range(count)
+    ]
+
+
+def timed(label: str, fn, rows: int) -> float:
+    start = time.perf_counter()
+    outcome = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f} s  ({rows / elapsed:9.0f} rows/s)  {outcome}")
+    return elapsed
+
+
+def fresh_session(url: str) -> Session:
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False)()
+
+
+def run(url: str, args) -> None:
+    rows = make_rows(args.rows)
+
+    with fresh_session(url) as db:
+        print(f"dialect: {db.get_bind().dialect.name}, rows: {len(rows)}, chunk size: {args.chunk_size}")
+        loader = BulkUpsertLoader(db, chunk_size=args.chunk_size)
+        bulk_insert = timed("bulk upsert (insert)", lambda: loader.upsert(SessionAggregate, rows), len(rows))
+        bulk_update = timed("bulk upsert (update)", lambda: loader.upsert(SessionAggregate, rows), len(rows))
+    db.get_bind().dispose()
+
+    if args.legacy_rows:
+        sample = rows[:args.legacy_rows]
+        with fresh_session(url) as db:
+            legacy_insert = timed("per-row loop (insert)", lambda: legacy_load(db, sample), len(sample))
+            legacy_update = timed("per-row loop (update)", lambda: legacy_load(db, sample), len(sample))
+            Base.metadata.drop_all(bind=db.get_bind())
+        db.get_bind().dispose()
+        scale = len(rows) / len(sample)
+        print(f"speedup (per-row loop extrapolated to {len(rows)} rows): "
+              f"insert {legacy_insert * scale / bulk_insert:.1f}x, update {legacy_update * scale / bulk_update:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--legacy-rows", type=int, default=50_000,
+                        help="rows to time the per-row loop on (0 to skip); the rate is extrapolated")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    if args.database_url:
+        run(args.database_url, args)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        run(f"sqlite:///{os.path.join(tmp, 'bench.db')}", args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+SessionDurationETL transform benchmark
+
+Compares the previous dict/defaultdict transform (np.median per group and a
+distinct-learner recount per tenant day) with the columnar transform on the
+same sessions, then times the columnar path alone at 10M sessions.
+
+Usage:
+    python benchmarks/bench_session_etl.py [--sessions N] [--legacy-sessions N] [--dp]
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+from uuid import uuid4
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.etl.jobs import SessionColumns, SessionDurationETL  # noqa: E402
+from app.models import AggregationLevel, PrivacyLevel  # noqa: E402
+
+START = date(2025, 1, 1)
+
+
+def legacy_transform(etl: SessionDurationETL, raw_sessions: List[Dict], aggregation_level: AggregationLevel) -> List[Dict]:
+    """Reference copy of the previous grouping loops (no DP branch)"""
+    aggregates = []
+    if aggregation_level == AggregationLevel.INDIVIDUAL:
+        learner_daily = defaultdict(lambda: defaultdict(list))
+        for session in raw_sessions:
+            learner_daily[session["learner_id"]][session["session_start"].date()].append(session["duration_minutes"])
+        for learner_id, daily_sessions in learner_daily.items():
+            for session_date, durations in daily_sessions.items():
+                aggregates.append({
+                    "learner_id_hash": etl.anonymizer.hash_learner_id(learner_id),
+                    "date_bucket": session_date,
+                    "total_sessions": len(durations),
+                    "avg_duration_minutes": sum(durations) / len(durations),
+                    "median_duration_minutes": np.median(durations),
+                    "max_duration_minutes": max(durations),
+                    "total_duration_minutes": sum(durations),
+                    "cohort_size": 1
+                })
+    else:
+        daily_sessions = defaultdict(list)
+        for session in raw_sessions:
+            daily_sessions[session["session_start"].date()].append(session["duration_minutes"])
+        for session_date, durations in daily_sessions.items():
+            aggregates.append({
+                "learner_id_hash": None,
+                "date_bucket": session_date,
+                "total_sessions": len(durations),
+                "avg_duration_minutes": sum(durations) / len(durations),
+                "median_duration_minutes": np.median(durations),
+                "max_duration_minutes": max(durations),
+                "total_duration_minutes": sum(durations),
+                "cohort_size": len(set(s["learner_id"] for s in raw_sessions))
+            })
+    return aggregates
+
+
+def make_columns(sessions: int, learners: int, days: int, rng: np.random.Generator) -> SessionColumns:
+    return SessionColumns(
+        tenant_id=uuid4(),
+        learner_ids=[uuid4() for _ in range(learners)],
+        learner_codes=rng.integers(0, learners, sessions),
+        days=np.datetime64(START) + rng.integers(0, days, sessions),
+        durations=np.maximum(1, rng.lognormal(3.0, 0.8, sessions).astype(np.int64))
+    )
+
+
+def to_records(columns: SessionColumns) -> List[Dict]:
+    start_of_day = datetime.min.time()
+    return [
+        {
+            "learner_id": columns.learner_ids[code],
+            "tenant_id": columns.tenant_id,
+            "session_start": datetime.combine(day, start_of_day) + timedelta(hours=9),
+            "duration_minutes": duration
+        }
+        for code, day, duration in zip(
+            columns.learner_codes.tolist(), columns.days.tolist(), columns.durations.tolist()
+        )
+    ]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=10_000_000)
+    parser.add_argument("--legacy-sessions", type=int, default=1_000_000)
+    parser.add_argument("--learners", type=int, default=25_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--dp", action="store_true", help="apply DP_LOW noise in the columnar runs")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    privacy_level = PrivacyLevel.DP_LOW if args.dp else PrivacyLevel.ANONYMIZED
+    etl = SessionDurationETL(None, privacy_level)
+    print(f"learners: {args.learners}, days: {args.days}, privacy: {privacy_level.value}")
+
+    # Same sessions through both paths
+    columns = make_columns(args.legacy_sessions, args.learners, args.days, rng)
+    raw_sessions = to_records(columns)
+    levels = (AggregationLevel.INDIVIDUAL, AggregationLevel.TENANT)
+    legacy_rows, legacy_s = timed(
+        lambda sessions: [legacy_transform(etl, sessions, level) for level in levels], raw_sessions
+    )
+    columnar_rows, columnar_s = timed(
+        lambda sessions: etl.transform_columns(SessionColumns.from_records(sessions)), raw_sessions
+    )
+    assert [len(rows) for rows in legacy_rows] == [len(columnar_rows[level]) for level in levels]
+    print(f"{args.legacy_sessions:>10} sessions  legacy dicts   {legacy_s:7.2f} s")
+    print(f"{args.legacy_sessions:>10} sessions  columnar       {columnar_s:7.2f} s  "
+          f"({legacy_s / columnar_s:.1f}x, includes from_records)")
+    del raw_sessions, legacy_rows, columnar_rows
+
+    columns = make_columns(args.sessions, args.learners, args.days, rng)
+    rows, elapsed = timed(lambda: etl.transform_columns(columns))
+    print(f"{args.sessions:>10} sessions  columnar       {elapsed:7.2f} s  "
+          f"({args.sessions / elapsed / 1e6:.1f}M sessions/s, "
+          f"{len(rows[AggregationLevel.INDIVIDUAL])} learner-day + {len(rows[AggregationLevel.TENANT])} tenant-day rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ This module implements the Three Parameter Logistic (3PL) IRT model for:
 """
 
 import math
+import time
 import numpy as np
 from typing import List, Tuple, Optional, Dict, Any
 from scipy.optimize import minimize_scalar, fsolve
@@ -338,6 +339,232 @@ class IRTEngine:
         
         return current_level, confidence
 
+class ItemBank:
+    """
+    A subject's item pool held as parallel NumPy parameter arrays.
+    
+    Items keep their original dicts so selection can hand back the same
+    payload the scalar engine returns. An optional theta-grid x item
+    information table lets selection interpolate instead of evaluating
+    the model for every item.
+    """
+    
+    def __init__(self, items: List[Dict[str, Any]]):
+        """
+        Build parameter arrays from item dicts.
+        
+        Args:
+            items: Items with 'id', 'difficulty', 'discrimination' and optional 'guessing'
+        """
+        self.items = list(items)
+        self.ids = [item['id'] for item in self.items]
+        self.positions = {item_id: i for i, item_id in enumerate(self.ids)}
+        self.difficulty = np.fromiter((item['difficulty'] for item in self.items), dtype=float, count=len(self.items))
+        self.discrimination = np.fromiter((item['discrimination'] for item in self.items), dtype=float, count=len(self.items))
+        self.guessing = np.fromiter((item.get('guessing') or 0.0 for item in self.items), dtype=float, count=len(self.items))
+        
+        self.theta_grid: Optional[np.ndarray] = None
+        self.information_table: Optional[np.ndarray] = None
+        self.loaded_at = time.monotonic()
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def mask_used(self, used_items: List[str]) -> np.ndarray:
+        """Boolean mask of items not yet administered."""
+        available = np.ones(len(self.items), dtype=bool)
+        used = [self.positions[item_id] for item_id in used_items if item_id in self.positions]
+        available[used] = False
+        return available
+
+class VectorizedIRTEngine(IRTEngine):
+    """
+    NumPy-backed 3PL engine operating on whole item banks at once.
+    
+    Probability and information follow IRTEngine exactly (including the
+    0.01/0.99 probability clamp), so item selection matches the scalar
+    engine; ability is estimated on a quadrature grid by EAP or by a grid
+    search refined with Newton-Raphson (MLE).
+    """
+    
+    def __init__(self, quadrature_points: int = 81, table_points: int = 161, estimator: str = "mle",
+                 bank_ttl_seconds: float = 300.0):
+        """
+        Initialize vectorized engine.
+        
+        Args:
+            quadrature_points: Theta grid size for likelihood evaluation
+            table_points: Theta grid size for precomputed information tables
+            estimator: "mle" (grid + Newton-Raphson) or "eap" (posterior mean, N(0,1) prior)
+            bank_ttl_seconds: Age after which a cached subject bank is reloaded
+        """
+        super().__init__()
+        if estimator not in ("mle", "eap"):
+            raise ValueError(f"Unknown estimator: {estimator}")
+        
+        self.estimator = estimator
+        self.quadrature = np.linspace(self.min_theta, self.max_theta, quadrature_points)
+        self.log_prior = norm.logpdf(self.quadrature)
+        self.table_grid = np.linspace(self.min_theta, self.max_theta, table_points)
+        self.newton_iterations = 8
+        self.bank_ttl_seconds = bank_ttl_seconds
+        self.banks: Dict[str, ItemBank] = {}
+    
+    # Item banks
+    
+    def load_bank(self, subject: str, items: List[Dict[str, Any]], precompute: bool = True) -> ItemBank:
+        """Cache a subject's item pool as arrays, optionally with its information table."""
+        bank = ItemBank(items)
+        if precompute and len(bank):
+            self.precompute_information(bank)
+        self.banks[subject] = bank
+        self.logger.info(f"Loaded item bank for {subject}: {len(bank)} items")
+        return bank
+    
+    def get_bank(self, subject: str) -> Optional[ItemBank]:
+        """Cached bank for a subject, or None if missing or older than the TTL."""
+        bank = self.banks.get(subject)
+        if bank is None or time.monotonic() - bank.loaded_at > self.bank_ttl_seconds:
+            return None
+        return bank
+    
+    def invalidate_bank(self, subject: str) -> None:
+        """Drop a cached bank, e.g. after its items are recalibrated."""
+        self.banks.pop(subject, None)
+    
+    def precompute_information(self, bank: ItemBank) -> None:
+        """Fill the bank's theta-grid x item information table."""
+        bank.theta_grid = self.table_grid
+        bank.information_table = self.information_array(
+            self.table_grid[:, None], bank.discrimination, bank.difficulty, bank.guessing
+        )
+    
+    # Model
+    
+    def probability_array(self, theta, a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+        """3PL probabilities for broadcastable theta and parameter arrays, clamped like probability()."""
+        exponent = np.clip(-a * (theta - b), -500, 500)
+        prob = c + (1 - c) / (1 + np.exp(exponent))
+        return np.clip(prob, 0.01, 0.99)
+    
+    def information_array(self, theta, a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+        """Item information for broadcastable theta and parameter arrays, matching information()."""
+        p = self.probability_array(theta, a, b, c)
+        info = (a ** 2) * (1 - p) * ((1 - c) ** 2) / p
+        return np.where((p <= 0.01) | (p >= 0.99), 0.0, np.maximum(info, 0.0))
+    
+    def bank_information(self, theta: float, bank: ItemBank, interpolate: bool = True) -> np.ndarray:
+        """Information of every item in the bank at theta, from the table when available."""
+        if interpolate and bank.information_table is not None:
+            grid = bank.theta_grid
+            position = (min(max(theta, grid[0]), grid[-1]) - grid[0]) / (grid[1] - grid[0])
+            lower = min(int(position), len(grid) - 2)
+            weight = position - lower
+            table = bank.information_table
+            return (1 - weight) * table[lower] + weight * table[lower + 1]
+        return self.information_array(theta, bank.discrimination, bank.difficulty, bank.guessing)
+    
+    # Item selection
+    
+    def select_from_bank(self, theta: float, bank: ItemBank, used_items: List[str],
+                         interpolate: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Select the maximum-information unused item from a bank.
+        
+        Args:
+            theta: Current ability estimate
+            bank: Item bank for the subject
+            used_items: Already administered item IDs
+            interpolate: Use the precomputed information table if present
+            
+        Returns:
+            Next optimal item or None if the bank is exhausted
+        """
+        available = bank.mask_used(used_items)
+        if not available.any():
+            return None
+        
+        info = np.where(available, self.bank_information(theta, bank, interpolate), -1.0)
+        best = int(np.argmax(info))
+        self.logger.debug(f"Selected item {bank.ids[best]} with info={info[best]:.3f}")
+        return bank.items[best]
+    
+    def select_next_item(self, theta: float, item_pool: List[Dict[str, Any]],
+                         used_items: List[str]) -> Optional[Dict[str, Any]]:
+        """Drop-in replacement for IRTEngine.select_next_item evaluated in one vectorized call."""
+        if not item_pool:
+            return None
+        return self.select_from_bank(theta, ItemBank(item_pool), used_items, interpolate=False)
+    
+    # Ability estimation
+    
+    @staticmethod
+    def _response_arrays(responses: List[Tuple[bool, IRTParameters]]) -> Tuple[np.ndarray, ...]:
+        correct = np.array([bool(is_correct) for is_correct, _ in responses])
+        a = np.array([params.discrimination for _, params in responses], dtype=float)
+        b = np.array([params.difficulty for _, params in responses], dtype=float)
+        c = np.array([params.guessing for _, params in responses], dtype=float)
+        return correct, a, b, c
+    
+    def log_likelihood_grid(self, correct: np.ndarray, a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+        """Log-likelihood at every quadrature point, matching likelihood()."""
+        p = self.probability_array(self.quadrature[:, None], a, b, c)
+        return np.where(correct, np.log(np.maximum(0.001, p)), np.log(np.maximum(0.001, 1 - p))).sum(axis=1)
+    
+    def estimate_ability(self, responses: List[Tuple[bool, IRTParameters]],
+                         initial_theta: float = 0.0) -> Tuple[float, float]:
+        """
+        Estimate ability from responses on the quadrature grid.
+        
+        Args:
+            responses: List of (is_correct, item_params) tuples
+            initial_theta: Returned unchanged when there are no responses
+            
+        Returns:
+            Tuple of (theta_estimate, standard_error)
+        """
+        if not responses:
+            return initial_theta, self.default_se
+        
+        correct, a, b, c = self._response_arrays(responses)
+        log_likelihood = self.log_likelihood_grid(correct, a, b, c)
+        
+        if self.estimator == "eap":
+            log_posterior = log_likelihood + self.log_prior
+            weights = np.exp(log_posterior - log_posterior.max())
+            weights /= weights.sum()
+            theta_est = float(weights @ self.quadrature)
+            se = float(np.sqrt(weights @ (self.quadrature - theta_est) ** 2))
+        else:
+            theta_est = self._newton_raphson(float(self.quadrature[np.argmax(log_likelihood)]), correct, a, b, c)
+            total_info = float(self.information_array(theta_est, a, b, c).sum())
+            se = 1.0 / math.sqrt(total_info) if total_info > 0 else self.default_se
+        
+        self.logger.debug(f"Ability estimated: theta={theta_est:.3f}, SE={se:.3f}")
+        return theta_est, se
+    
+    def _newton_raphson(self, theta: float, correct: np.ndarray, a: np.ndarray,
+                        b: np.ndarray, c: np.ndarray) -> float:
+        """Refine a grid maximum of the clamped 3PL log-likelihood, staying within the theta bounds."""
+        step_limit = self.quadrature[1] - self.quadrature[0]
+        u = correct.astype(float)
+        for _ in range(self.newton_iterations):
+            logistic = 1 / (1 + np.exp(np.clip(-a * (theta - b), -500, 500)))
+            p = c + (1 - c) * logistic
+            # Clamped items contribute a flat likelihood, as in likelihood()
+            dp = np.where((p < 0.01) | (p > 0.99), 0.0, (1 - c) * a * logistic * (1 - logistic))
+            p = np.clip(p, 0.01, 0.99)
+            gradient = np.sum((u - p) * dp / (p * (1 - p)))
+            # Expected (Fisher) information keeps the step well defined
+            fisher = np.sum(dp ** 2 / (p * (1 - p)))
+            if fisher <= 0:
+                break
+            step = max(-step_limit, min(step_limit, gradient / fisher))
+            theta = max(self.min_theta, min(self.max_theta, theta + step))
+            if abs(step) < 1e-6:
+                break
+        return float(theta)
+
 class ItemCalibration:
     """Utilities for calibrating item parameters using response data."""
     
@@ -14,6 +14,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Security
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+import os
 import uuid
 import logging
 
@@ -27,7 +28,7 @@ from app.schemas import (
     AdaptiveAnswerResponse, NextQuestionResponse, AssessmentReportResponse,
     ItemCalibrationRequest, ItemCalibrationResponse, ErrorResponse
 )
-from app.logic_irt import IRTEngine, IRTParameters, ItemCalibration
+from app.logic_irt import VectorizedIRTEngine, IRTParameters, ItemCalibration
 from app.dependencies import get_current_user, get_admin_user
 from app.events import publish_assessment_event
 
@@ -36,8 +37,11 @@ admin_router = APIRouter(prefix="/admin", tags=["Administration"])
 
 logger = logging.getLogger(__name__)
 
-# Initialize IRT engine
-irt_engine = IRTEngine()
+# Initialize IRT engine; subject item banks are cached as parameter arrays
+irt_engine = VectorizedIRTEngine(
+    estimator=os.getenv("IRT_ESTIMATOR", "mle"),
+    bank_ttl_seconds=float(os.getenv("IRT_BANK_TTL_SECONDS", "300"))
+)
 calibration_service = ItemCalibration()
 
 @router.post("/start", response_model=AdaptiveStartResponse)
@@ -435,6 +439,7 @@ async def calibrate_items(
                 question.difficulty = params.difficulty
                 question.discrimination = params.discrimination
                 question.guessing = params.guessing
+                irt_engine.invalidate_bank(question.subject)
                 
                 calibrated_count += 1
                 
@@ -476,31 +481,33 @@ async def select_next_question(session_id: str, db: Session) -> Optional[Dict[st
     ).all()
     used_ids = [q[0] for q in used_questions]
     
-    # Get available questions for this subject
-    available_questions = db.query(QuestionBank).filter(
-        QuestionBank.subject == session.subject,
-        QuestionBank.is_active == True,
-        ~QuestionBank.id.in_(used_ids)
-    ).all()
-    
-    if not available_questions:
-        return None
-    
-    # Convert to item pool format
-    item_pool = []
-    for q in available_questions:
-        item_pool.append({
-            'id': q.id,
-            'difficulty': q.difficulty,
-            'discrimination': q.discrimination,
-            'guessing': q.guessing,
-            'content': q.content,
-            'options': q.options,
-            'estimated_time_seconds': q.estimated_time_seconds
-        })
+    # Load the subject's active questions once; later selections reuse the arrays
+    bank = irt_engine.get_bank(session.subject)
+    if bank is None:
+        questions = db.query(QuestionBank).filter(
+            QuestionBank.subject == session.subject,
+            QuestionBank.is_active == True
+        ).all()
+        
+        if not questions:
+            return None
+        
+        # Convert to item pool format
+        item_pool = []
+        for q in questions:
+            item_pool.append({
+                'id': q.id,
+                'difficulty': q.difficulty,
+                'discrimination': q.discrimination,
+                'guessing': q.guessing,
+                'content': q.content,
+                'options': q.options,
+                'estimated_time_seconds': q.estimated_time_seconds
+            })
+        bank = irt_engine.load_bank(session.subject, item_pool)
     
     # Select optimal item
-    optimal_item = irt_engine.select_next_item(session.current_theta, item_pool, used_ids)
+    optimal_item = irt_engine.select_from_bank(session.current_theta, bank, used_ids)
     return optimal_item
 
 async def get_next_question_internal(session_id: str, db: Session) -> NextQuestionResponse:
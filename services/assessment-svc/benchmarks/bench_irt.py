@@ -0,0 +1,100 @@
+"""
+Adaptive step latency benchmark (select next item + re-estimate ability)
+
+For item pools of 1K-100K items, times one adaptive step - choosing the
+maximum-information item and estimating theta from the responses so far -
+with the scalar IRTEngine and with VectorizedIRTEngine on a cached bank
+(direct evaluation and interpolated information table, MLE and EAP).
+
+Usage:
+    python benchmarks/bench_irt.py [--sizes 1000,10000,100000] [--responses N] [--repeats N]
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.logic_irt import IRTEngine, IRTParameters, VectorizedIRTEngine  # noqa: E402
+
+
+def make_pool(size: int, rng: np.random.Generator):
+    difficulty = rng.normal(0.0, 1.2, size)
+    discrimination = rng.uniform(0.5, 2.5, size)
+    guessing = rng.uniform(0.0, 0.25, size)
+    return [
+        {"id": f"item-{i}", "difficulty": float(b), "discrimination": float(a), "guessing": float(c)}
+        for i, (a, b, c) in enumerate(zip(discrimination, difficulty, guessing))
+    ]
+
+
+def time_steps(step, repeats: int) -> float:
+    """Median latency of one adaptive step in milliseconds"""
+    samples = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        step(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--responses", type=int, default=8, help="answers already given in the session")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = np.random.default_rng(0)
+    scalar = IRTEngine()
+    mle = VectorizedIRTEngine()
+    eap = VectorizedIRTEngine(estimator="eap")
+
+    print(f"{'pool':>8} {'scalar':>10} {'vec direct':>11} {'vec table':>10} {'vec eap':>9} "
+          f"{'speedup':>8} {'bank load':>10}   (median ms per select + estimate)")
+    for size in (int(s) for s in args.sizes.split(",")):
+        pool = make_pool(size, rng)
+        sample = random.Random(size).sample(pool, args.responses)
+        responses = [
+            (random.random() < 0.6, IRTParameters(item["difficulty"], item["discrimination"], item["guessing"]))
+            for item in sample
+        ]
+        used = [item["id"] for item in sample]
+        thetas = np.linspace(-2.0, 2.0, args.repeats)
+
+        start = time.perf_counter()
+        bank = mle.load_bank("bench", pool)
+        load_ms = (time.perf_counter() - start) * 1000
+        eap.banks["bench"] = bank
+
+        scalar_ms = time_steps(lambda i: (
+            scalar.select_next_item(thetas[i], pool, used),
+            scalar.estimate_ability(responses, thetas[i])
+        ), max(3, args.repeats // 4))
+        direct_ms = time_steps(lambda i: (
+            mle.select_from_bank(thetas[i], bank, used, interpolate=False),
+            mle.estimate_ability(responses, thetas[i])
+        ), args.repeats)
+        table_ms = time_steps(lambda i: (
+            mle.select_from_bank(thetas[i], bank, used),
+            mle.estimate_ability(responses, thetas[i])
+        ), args.repeats)
+        eap_ms = time_steps(lambda i: (
+            eap.select_from_bank(thetas[i], bank, used),
+            eap.estimate_ability(responses, thetas[i])
+        ), args.repeats)
+
+        print(f"{size:>8} {scalar_ms:>10.2f} {direct_ms:>11.2f} {table_ms:>10.2f} {eap_ms:>9.2f} "
+              f"{scalar_ms / table_ms:>7.0f}x {load_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,11 @@ Audit Logger Module
 Core audit logging functionality with who/what/when/why tracking
 """
 
+import base64
 import hashlib
+import json
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID, uuid4
 
 import structlog
@@ -14,10 +16,133 @@ from .models import (
     AuditEvent, AuditEventType, AuditSeverity, DataAccessLog, AuditQuery, AuditReport,
     UserRole, DataClassification
 )
-from .database import get_db_pool, log_audit_event, log_data_access
+from .database import AUDIT_EVENT_COLUMNS, get_db_pool, log_audit_event, log_data_access
+from .summary import summarize_events
 
 logger = structlog.get_logger()
 
+# Always selected: the pagination key, AuditEvent's required fields and
+# the small columns whose model defaults would otherwise be misleading
+EVENT_KEY_COLUMNS = ("id", "timestamp", "event_type", "severity", "tenant_id", "action", "resource", "outcome")
+
+
+def encode_cursor(timestamp: datetime, event_id: UUID, sort_order: str) -> str:
+    """Opaque cursor for the page after (timestamp, id)"""
+    
+    payload = json.dumps({"t": timestamp.isoformat(), "i": str(event_id), "o": sort_order})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_order: str) -> Tuple[datetime, UUID]:
+    """(timestamp, id) of the last event on the previous page"""
+    
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        timestamp, event_id = datetime.fromisoformat(payload["t"]), UUID(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    if payload.get("o") != sort_order:
+        raise ValueError("Pagination cursor was issued for a different sort order")
+    return timestamp, event_id
+
+
+def build_event_query(query: AuditQuery) -> Tuple[str, List[Any]]:
+    """
+    SQL and parameters for an audit event query.
+    
+    Timestamp-sorted queries page by keyset on (timestamp, id) when a
+    cursor is given and fetch one extra row to tell whether another page
+    follows; other sorts (and page numbers without a cursor) use OFFSET.
+    """
+    
+    where_conditions = []
+    params: List[Any] = []
+    
+    def param(value: Any) -> str:
+        params.append(value)
+        return f"${len(params)}"
+    
+    # Tenant first: every composite index leads with it
+    if query.tenant_id:
+        where_conditions.append(f"tenant_id = {param(query.tenant_id)}")
+    
+    # Time range filter
+    if query.start_date:
+        where_conditions.append(f"timestamp >= {param(query.start_date)}")
+    if query.end_date:
+        where_conditions.append(f"timestamp <= {param(query.end_date)}")
+    
+    # Event type, severity, actor and target filters
+    if query.event_types:
+        where_conditions.append(f"event_type = ANY({param([getattr(et, 'value', et) for et in query.event_types])})")
+    if query.severities:
+        where_conditions.append(f"severity = ANY({param([getattr(s, 'value', s) for s in query.severities])})")
+    if query.actor_ids:
+        where_conditions.append(f"actor_id = ANY({param(query.actor_ids)})")
+    if query.target_ids:
+        where_conditions.append(f"target_id = ANY({param(query.target_ids)})")
+    
+    # Search filter (served by the trigram indexes)
+    if query.search_term:
+        term = query.search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        placeholder = param(f"%{term}%")
+        where_conditions.append(
+            f"(action ILIKE {placeholder} OR resource ILIKE {placeholder} OR reason ILIKE {placeholder})"
+        )
+    
+    direction = "DESC" if query.sort_order == "desc" else "ASC"
+    keyset = query.sort_by == "timestamp"
+    if keyset and query.cursor:
+        timestamp, event_id = decode_cursor(query.cursor, query.sort_order)
+        comparison = "<" if direction == "DESC" else ">"
+        where_conditions.append(f"(timestamp, id) {comparison} ({param(timestamp)}, {param(event_id)})")
+    
+    # Projection
+    if query.fields:
+        requested = set(EVENT_KEY_COLUMNS) | set(query.fields)
+        columns = [column for column in AUDIT_EVENT_COLUMNS if column in requested]
+    else:
+        columns = list(AUDIT_EVENT_COLUMNS)
+    
+    sql = f"SELECT {', '.join(columns)} FROM audit_events"
+    if where_conditions:
+        sql += " WHERE " + " AND ".join(where_conditions)
+    
+    # id breaks ties so pages are stable
+    if keyset:
+        sql += f" ORDER BY timestamp {direction}, id {direction}"
+        sql += f" LIMIT {param(query.page_size + 1)}"
+    else:
+        sql += f" ORDER BY {query.sort_by} {direction}, id {direction}"
+        sql += f" LIMIT {param(query.page_size)}"
+    if not query.cursor and query.page > 1:
+        sql += f" OFFSET {param((query.page - 1) * query.page_size)}"
+    
+    return sql, params
+
+
+def row_to_event(row) -> AuditEvent:
+    """AuditEvent from a (possibly projected) audit_events row"""
+    
+    event_data = dict(row)
+    # Convert string enums back to enum objects
+    event_data['event_type'] = AuditEventType(event_data['event_type'])
+    event_data['severity'] = AuditSeverity(event_data['severity'])
+    if event_data.get('actor_type'):
+        event_data['actor_type'] = UserRole(event_data['actor_type'])
+    if event_data.get('target_classification'):
+        event_data['target_classification'] = DataClassification(event_data['target_classification'])
+    if event_data.get('actor_ip') is not None:
+        event_data['actor_ip'] = str(event_data['actor_ip'])
+    if isinstance(event_data.get('metadata'), str):
+        event_data['metadata'] = json.loads(event_data['metadata'])
+    for column in ('metadata', 'retention_days'):
+        if event_data.get(column) is None:
+            event_data.pop(column, None)
+    
+    return AuditEvent(**event_data)
+
 
 class AuditLogger:
     """Centralized audit logging with comprehensive tracking"""
@@ -143,6 +268,8 @@ class AuditLogger:
         if sql_query:
             sql_query_hash = hashlib.sha256(sql_query.encode()).hexdigest()[:64]
         
+        severity = self._get_severity_for_data_access(data_classification, operation)
+        
         # Log data access
         log_id = await log_data_access(
             user_id=user_id,
@@ -161,7 +288,8 @@ class AuditLogger:
             ip_address=ip_address,
             records_affected=records_affected,
             success=success,
-            error_message=error_message
+            error_message=error_message,
+            severity=severity
         )
         
         # Also create corresponding audit event
@@ -173,7 +301,7 @@ class AuditLogger:
             action=f"data_{operation}",
             resource=data_type,
             outcome="success" if success else "failure",
-            severity=self._get_severity_for_data_access(data_classification, operation),
+            severity=severity,
             actor_id=user_id,
             actor_type=user_role,
             actor_email=user_email,
@@ -237,94 +365,29 @@ class AuditLogger:
     async def query_events(self, query: AuditQuery) -> List[AuditEvent]:
         """Query audit events with filters"""
         
-        pool = await get_db_pool()
-        
-        # Build SQL query
-        where_conditions = []
-        params = []
-        param_count = 0
-        
-        # Time range filter
-        if query.start_date:
-            param_count += 1
-            where_conditions.append(f"timestamp >= ${param_count}")
-            params.append(query.start_date)
-        
-        if query.end_date:
-            param_count += 1
-            where_conditions.append(f"timestamp <= ${param_count}")
-            params.append(query.end_date)
-        
-        # Event type filter
-        if query.event_types:
-            param_count += 1
-            where_conditions.append(f"event_type = ANY(${param_count})")
-            params.append([et.value for et in query.event_types])
-        
-        # Severity filter
-        if query.severities:
-            param_count += 1
-            where_conditions.append(f"severity = ANY(${param_count})")
-            params.append([s.value for s in query.severities])
-        
-        # Actor filter
-        if query.actor_ids:
-            param_count += 1
-            where_conditions.append(f"actor_id = ANY(${param_count})")
-            params.append(query.actor_ids)
-        
-        # Target filter
-        if query.target_ids:
-            param_count += 1
-            where_conditions.append(f"target_id = ANY(${param_count})")
-            params.append(query.target_ids)
-        
-        # Tenant filter
-        if query.tenant_id:
-            param_count += 1
-            where_conditions.append(f"tenant_id = ${param_count}")
-            params.append(query.tenant_id)
-        
-        # Search filter
-        if query.search_term:
-            param_count += 1
-            where_conditions.append(f"(action ILIKE ${param_count} OR resource ILIKE ${param_count} OR reason ILIKE ${param_count})")
-            params.append(f"%{query.search_term}%")
+        events, _ = await self.query_event_page(query)
+        return events
+    
+    async def query_event_page(self, query: AuditQuery) -> Tuple[List[AuditEvent], Optional[str]]:
+        """
+        Query a page of audit events.
         
-        # Build complete query
-        base_query = "SELECT * FROM audit_events"
-        if where_conditions:
-            base_query += " WHERE " + " AND ".join(where_conditions)
+        Returns the events and, when sorted by timestamp and more events
+        follow, the cursor for the next page.
+        """
         
-        # Add sorting
-        base_query += f" ORDER BY {query.sort_by} {query.sort_order.upper()}"
+        pool = await get_db_pool()
+        sql, params = build_event_query(query)
         
-        # Add pagination
-        param_count += 1
-        base_query += f" LIMIT ${param_count}"
-        params.append(query.page_size)
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(sql, *params)
         
-        param_count += 1
-        base_query += f" OFFSET ${param_count}"
-        params.append((query.page - 1) * query.page_size)
+        next_cursor = None
+        if query.sort_by == "timestamp" and len(rows) > query.page_size:
+            rows = rows[:query.page_size]
+            next_cursor = encode_cursor(rows[-1]['timestamp'], rows[-1]['id'], query.sort_order)
         
-        async with pool.acquire() as conn:
-            rows = await conn.fetch(base_query, *params)
-            
-            events = []
-            for row in rows:
-                event_data = dict(row)
-                # Convert string enums back to enum objects
-                event_data['event_type'] = AuditEventType(event_data['event_type'])
-                event_data['severity'] = AuditSeverity(event_data['severity'])
-                if event_data['actor_type']:
-                    event_data['actor_type'] = UserRole(event_data['actor_type'])
-                if event_data['target_classification']:
-                    event_data['target_classification'] = DataClassification(event_data['target_classification'])
-                
-                events.append(AuditEvent(**event_data))
-            
-            return events
+        return [row_to_event(row) for row in rows[:query.page_size]], next_cursor
     
     async def generate_summary_report(
         self,
@@ -332,176 +395,17 @@ class AuditLogger:
         start_date: datetime,
         end_date: datetime
     ) -> AuditReport:
-        """Generate comprehensive audit summary report"""
+        """
+        Generate comprehensive audit summary report.
+        
+        All audit_events metrics come from one grouped query over the
+        hourly rollups, scanning raw events only at the range edges.
+        """
         
         pool = await get_db_pool()
         
         async with pool.acquire() as conn:
-            
-            # Total events
-            total_events = await conn.fetchval(
-                """
-                SELECT COUNT(*) FROM audit_events 
-                WHERE tenant_id = $1 AND timestamp BETWEEN $2 AND $3
-                """,
-                tenant_id, start_date, end_date
-            )
-            
-            # Events by type
-            events_by_type_rows = await conn.fetch(
-                """
-                SELECT event_type, COUNT(*) as count 
-                FROM audit_events 
-                WHERE tenant_id = $1 AND timestamp BETWEEN $2 AND $3
-                GROUP BY event_type
-                ORDER BY count DESC
-                """,
-                tenant_id, start_date, end_date
-            )
-            events_by_type = {row['event_type']: row['count'] for row in events_by_type_rows}
-            
-            # Events by severity
-            events_by_severity_rows = await conn.fetch(
-                """
-                SELECT severity, COUNT(*) as count 
-                FROM audit_events 
-                WHERE tenant_id = $1 AND timestamp BETWEEN $2 AND $3
-                GROUP BY severity
-                ORDER BY count DESC
-                """,
-                tenant_id, start_date, end_date
-            )
-            events_by_severity = {row['severity']: row['count'] for row in events_by_severity_rows}
-            
-            # Unique actors
-            unique_actors = await conn.fetchval(
-                """
-                SELECT COUNT(DISTINCT actor_id) FROM audit_events 
-                WHERE tenant_id = $1 AND timestamp BETWEEN $2 AND $3 AND actor_id IS NOT NULL
-                """,
-                tenant_id, start_date, end_date
-            )
-            
-            # Failed events
-            failed_events = await conn.fetchval(
-                """
-                SELECT COUNT(*) FROM audit_events 
-                WHERE tenant_id = $1 AND timestamp BETWEEN $2 AND $3 AND outcome IN ('failure', 'error')
-                """,
-                tenant_id, start_date, end_date
-            )
-            
-            # Top actors
-            top_actors_rows = await conn.fetch(
-                """
-                SELECT actor_id, actor_email, COUNT(*) as event_count
-                FROM audit_events 
-                WHERE tenant_id = $1 AND timestamp BETWEEN $2 AND $3 AND actor_id IS NOT NULL
-                GROUP BY actor_id, actor_email
-                ORDER BY event_count DESC
-                LIMIT 10
-                """,
-                tenant_id, start_date, end_date
-            )
-            top_actors = [
-                {
-                    "actor_id": str(row['actor_id']),
-                    "actor_email": row['actor_email'],
-                    "event_count": row['event_count']
-                }
-                for row in top_actors_rows
-            ]
-            
-            # Top resources
-            top_resources_rows = await conn.fetch(
-                """
-                SELECT resource, COUNT(*) as access_count
-                FROM audit_events 
-                WHERE tenant_id = $1 AND timestamp BETWEEN $2 AND $3
-                GROUP BY resource
-                ORDER BY access_count DESC
-                LIMIT 10
-                """,
-                tenant_id, start_date, end_date
-            )
-            top_resources = [
-                {
-                    "resource": row['resource'],
-                    "access_count": row['access_count']
-                }
-                for row in top_resources_rows
-            ]
-            
-            # Risk events (high/critical severity)
-            risk_events_rows = await conn.fetch(
-                """
-                SELECT id, timestamp, event_type, action, resource, severity, outcome
-                FROM audit_events 
-                WHERE tenant_id = $1 AND timestamp BETWEEN $2 AND $3 
-                AND severity IN ('high', 'critical')
-                ORDER BY timestamp DESC
-                LIMIT 50
-                """,
-                tenant_id, start_date, end_date
-            )
-            risk_events = [
-                {
-                    "id": str(row['id']),
-                    "timestamp": row['timestamp'].isoformat(),
-                    "event_type": row['event_type'],
-                    "action": row['action'],
-                    "resource": row['resource'],
-                    "severity": row['severity'],
-                    "outcome": row['outcome']
-                }
-                for row in risk_events_rows
-            ]
-            
-            # Compliance metrics
-            access_reviews_completed = await conn.fetchval(
-                """
-                SELECT COUNT(*) FROM access_reviews 
-                WHERE tenant_id = $1 AND completed_at BETWEEN $2 AND $3
-                """,
-                tenant_id, start_date, end_date
-            )
-            
-            support_sessions_approved = await conn.fetchval(
-                """
-                SELECT COUNT(*) FROM support_sessions 
-                WHERE tenant_id = $1 AND approved_at BETWEEN $2 AND $3
-                """,
-                tenant_id, start_date, end_date
-            )
-            
-            policy_violations = await conn.fetchval(
-                """
-                SELECT COUNT(*) FROM audit_events 
-                WHERE tenant_id = $1 AND timestamp BETWEEN $2 AND $3 
-                AND event_type = 'permission_denied' AND severity IN ('high', 'critical')
-                """,
-                tenant_id, start_date, end_date
-            )
-        
-        report = AuditReport(
-            tenant_id=tenant_id,
-            report_type="summary",
-            period_start=start_date,
-            period_end=end_date,
-            total_events=total_events,
-            events_by_type=events_by_type,
-            events_by_severity=events_by_severity,
-            unique_actors=unique_actors,
-            failed_events=failed_events,
-            top_actors=top_actors,
-            top_resources=top_resources,
-            risk_events=risk_events,
-            access_reviews_completed=access_reviews_completed,
-            support_sessions_approved=support_sessions_approved,
-            policy_violations=policy_violations
-        )
-        
-        return report
+            return await summarize_events(conn, tenant_id, start_date, end_date)
     
     def _get_severity_for_data_access(
         self, 
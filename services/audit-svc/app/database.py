@@ -3,15 +3,17 @@ Database Connection and Audit Event Storage
 PostgreSQL connection management for audit service
 """
 
+import json
 import os
 from datetime import datetime
-from typing import Optional, Dict, Any
-from uuid import UUID
+from typing import Optional, Dict, Any, Sequence
+from uuid import UUID, uuid4
 
 import asyncpg
 import structlog
 from asyncpg import Pool
 
+from .ingest import get_ingest_queue
 from .models import AuditEvent, AuditEventType, AuditSeverity, UserRole
 
 logger = structlog.get_logger()
@@ -19,6 +21,159 @@ logger = structlog.get_logger()
 # Global connection pool
 _pool: Optional[Pool] = None
 
+# Column order of rows written by log_audit_event / log_data_access
+AUDIT_EVENT_COLUMNS = (
+    "id", "timestamp", "event_type", "severity",
+    "actor_id", "actor_type", "actor_email", "actor_ip", "actor_user_agent",
+    "target_id", "target_type", "target_classification",
+    "tenant_id", "session_id", "request_id",
+    "action", "resource", "outcome", "reason", "metadata", "retention_days"
+)
+
+DATA_ACCESS_LOG_COLUMNS = (
+    "id", "timestamp", "user_id", "user_role", "user_email",
+    "data_type", "data_id", "data_classification",
+    "operation", "endpoint", "sql_query_hash",
+    "purpose", "justification", "tenant_id", "session_id", "ip_address",
+    "records_affected", "success", "error_message"
+)
+
+AUDIT_TABLES = {
+    "audit_events": AUDIT_EVENT_COLUMNS,
+    "data_access_logs": DATA_ACCESS_LOG_COLUMNS,
+}
+
+# Indexes for AuditLogger.query_events: (tenant_id, filter, timestamp, id)
+# serves each filter with keyset pagination in either direction, and the
+# trigram indexes serve ILIKE '%term%' search. Added to existing databases
+# by migrations/001_audit_query_indexes.py.
+AUDIT_QUERY_INDEXES = {
+    "idx_audit_events_tenant_ts_id": "audit_events (tenant_id, timestamp, id)",
+    "idx_audit_events_tenant_type_ts_id": "audit_events (tenant_id, event_type, timestamp, id)",
+    "idx_audit_events_tenant_severity_ts_id": "audit_events (tenant_id, severity, timestamp, id)",
+    "idx_audit_events_tenant_actor_ts_id": "audit_events (tenant_id, actor_id, timestamp, id)",
+    "idx_audit_events_tenant_target_ts_id": "audit_events (tenant_id, target_id, timestamp, id)",
+}
+
+AUDIT_SEARCH_INDEXES = {
+    "idx_audit_events_action_trgm": "audit_events USING GIN (action gin_trgm_ops)",
+    "idx_audit_events_resource_trgm": "audit_events USING GIN (resource gin_trgm_ops)",
+    "idx_audit_events_reason_trgm": "audit_events USING GIN (reason gin_trgm_ops)",
+}
+
+# Hourly rollups of audit_events for summary reports (app/summary.py).
+# A statement-level insert trigger folds each inserted batch into them,
+# so a COPY of 500 events costs one upsert per touched rollup row.
+# Hours are UTC. Added to existing databases, with a backfill, by
+# migrations/002_audit_summary_rollups.py.
+AUDIT_ROLLUP_TABLES = (
+    "audit_event_rollups_hourly",
+    "audit_actor_rollups_hourly",
+    "audit_resource_rollups_hourly",
+)
+
+AUDIT_ROLLUP_TRIGGER = "audit_events_rollup"
+
+# Folds the audit events in {source} into the rollups. Rows are upserted
+# in key order so concurrent batches lock rollup rows in the same order
+# and cannot deadlock.
+AUDIT_ROLLUP_UPSERT = """
+    INSERT INTO audit_event_rollups_hourly AS r
+        (tenant_id, hour, event_type, severity, failed, event_count)
+    SELECT tenant_id, date_trunc('hour', timestamp AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+           event_type, severity, outcome IN ('failure', 'error'), COUNT(*)
+    FROM {source}
+    GROUP BY 1, 2, 3, 4, 5
+    ORDER BY 1, 2, 3, 4, 5
+    ON CONFLICT (tenant_id, hour, event_type, severity, failed)
+    DO UPDATE SET event_count = r.event_count + EXCLUDED.event_count;
+    
+    INSERT INTO audit_actor_rollups_hourly AS r
+        (tenant_id, hour, actor_id, actor_email, actor_email_at, event_count)
+    SELECT tenant_id, date_trunc('hour', timestamp AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+           actor_id,
+           (array_agg(actor_email ORDER BY timestamp DESC) FILTER (WHERE actor_email IS NOT NULL))[1],
+           MAX(timestamp) FILTER (WHERE actor_email IS NOT NULL),
+           COUNT(*)
+    FROM {source}
+    WHERE actor_id IS NOT NULL
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    ON CONFLICT (tenant_id, hour, actor_id)
+    DO UPDATE SET event_count = r.event_count + EXCLUDED.event_count,
+                  actor_email = CASE
+                      WHEN r.actor_email_at IS NULL OR EXCLUDED.actor_email_at > r.actor_email_at
+                      THEN COALESCE(EXCLUDED.actor_email, r.actor_email)
+                      ELSE r.actor_email
+                  END,
+                  actor_email_at = GREATEST(r.actor_email_at, EXCLUDED.actor_email_at);
+    
+    INSERT INTO audit_resource_rollups_hourly AS r
+        (tenant_id, hour, resource, event_count)
+    SELECT tenant_id, date_trunc('hour', timestamp AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+           resource, COUNT(*)
+    FROM {source}
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+    ON CONFLICT (tenant_id, hour, resource)
+    DO UPDATE SET event_count = r.event_count + EXCLUDED.event_count;
+"""
+
+AUDIT_ROLLUP_DDL = """
+    CREATE TABLE IF NOT EXISTS audit_event_rollups_hourly (
+        tenant_id UUID NOT NULL,
+        hour TIMESTAMPTZ NOT NULL,
+        event_type VARCHAR(50) NOT NULL,
+        severity VARCHAR(20) NOT NULL,
+        failed BOOLEAN NOT NULL,
+        event_count BIGINT NOT NULL,
+        PRIMARY KEY (tenant_id, hour, event_type, severity, failed)
+    );
+    
+    CREATE TABLE IF NOT EXISTS audit_actor_rollups_hourly (
+        tenant_id UUID NOT NULL,
+        hour TIMESTAMPTZ NOT NULL,
+        actor_id UUID NOT NULL,
+        actor_email VARCHAR(255),
+        actor_email_at TIMESTAMPTZ,
+        event_count BIGINT NOT NULL,
+        PRIMARY KEY (tenant_id, hour, actor_id)
+    );
+    
+    CREATE TABLE IF NOT EXISTS audit_resource_rollups_hourly (
+        tenant_id UUID NOT NULL,
+        hour TIMESTAMPTZ NOT NULL,
+        resource VARCHAR(100) NOT NULL,
+        event_count BIGINT NOT NULL,
+        PRIMARY KEY (tenant_id, hour, resource)
+    );
+    
+    CREATE OR REPLACE FUNCTION audit_events_rollup() RETURNS trigger AS $$
+    BEGIN
+        """ + AUDIT_ROLLUP_UPSERT.format(source="new_events") + """
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    
+    DROP TRIGGER IF EXISTS audit_events_rollup ON audit_events;
+    CREATE TRIGGER audit_events_rollup
+        AFTER INSERT ON audit_events
+        REFERENCING NEW TABLE AS new_events
+        FOR EACH STATEMENT EXECUTE FUNCTION audit_events_rollup();
+"""
+
+
+def get_db_config() -> Dict[str, Any]:
+    """Database connection settings from environment"""
+    
+    return {
+        "host": os.getenv("POSTGRES_HOST", "localhost"),
+        "port": int(os.getenv("POSTGRES_PORT", "5432")),
+        "database": os.getenv("POSTGRES_DB", "aivo_audit"),
+        "user": os.getenv("POSTGRES_USER", "audit_user"),
+        "password": os.getenv("POSTGRES_PASSWORD", "audit_password"),
+    }
+
 
 async def init_db_pool() -> Pool:
     """Initialize database connection pool"""
@@ -30,11 +185,7 @@ async def init_db_pool() -> Pool:
     
     # Database configuration from environment
     db_config = {
-        "host": os.getenv("POSTGRES_HOST", "localhost"),
-        "port": int(os.getenv("POSTGRES_PORT", "5432")),
-        "database": os.getenv("POSTGRES_DB", "aivo_audit"),
-        "user": os.getenv("POSTGRES_USER", "audit_user"),
-        "password": os.getenv("POSTGRES_PASSWORD", "audit_password"),
+        **get_db_config(),
         "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "5")),
         "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "20")),
         "command_timeout": int(os.getenv("DB_COMMAND_TIMEOUT", "30")),
@@ -82,6 +233,8 @@ async def create_audit_tables(conn: asyncpg.Connection):
     
     logger.info("Creating audit database tables")
     
+    fresh = await conn.fetchval("SELECT to_regclass('audit_events') IS NULL")
+    
     # Audit events table
     await conn.execute("""
         CREATE TABLE IF NOT EXISTS audit_events (
@@ -333,9 +486,92 @@ async def create_audit_tables(conn: asyncpg.Connection):
         CREATE INDEX IF NOT EXISTS idx_support_sessions_token_expires_at ON support_sessions(token_expires_at);
     """)
     
+    if fresh:
+        # Cheap on an empty table; existing tables get them from the migration
+        await create_query_indexes(conn, concurrently=False)
+    else:
+        missing = await missing_query_indexes(conn)
+        if missing:
+            logger.warning(
+                "Audit query indexes missing, run migrations/001_audit_query_indexes.py",
+                missing=missing
+            )
+    
+    if fresh:
+        await install_summary_rollups(conn, backfill=False)
+    elif not await summary_rollups_installed(conn):
+        logger.warning(
+            "Audit summary rollups missing, run migrations/002_audit_summary_rollups.py"
+        )
+    
     logger.info("Audit database tables created successfully")
 
 
+async def missing_query_indexes(conn: asyncpg.Connection) -> list:
+    """Query and search indexes that do not exist (or are invalid)"""
+    
+    names = list(AUDIT_QUERY_INDEXES) + list(AUDIT_SEARCH_INDEXES)
+    existing = await conn.fetch(
+        """
+        SELECT c.relname FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+        WHERE c.relname = ANY($1) AND i.indisvalid
+        """,
+        names
+    )
+    found = {row["relname"] for row in existing}
+    return [name for name in names if name not in found]
+
+
+async def create_query_indexes(conn: asyncpg.Connection, concurrently: bool = True):
+    """Create the audit query indexes, one statement at a time"""
+    
+    search_indexes = AUDIT_SEARCH_INDEXES
+    try:
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except asyncpg.PostgresError as e:
+        logger.warning("pg_trgm unavailable, audit search will scan", error=str(e))
+        search_indexes = {}
+    
+    invalid = set(await missing_query_indexes(conn))
+    for name, definition in {**AUDIT_QUERY_INDEXES, **search_indexes}.items():
+        if concurrently and name in invalid:
+            # A failed concurrent build leaves an invalid index behind
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        mode = "CONCURRENTLY " if concurrently else ""
+        logger.info("Creating audit query index", index=name)
+        await conn.execute(f"CREATE INDEX {mode}IF NOT EXISTS {name} ON {definition}")
+
+
+async def summary_rollups_installed(conn: asyncpg.Connection) -> bool:
+    """Whether the rollup trigger is maintaining the hourly rollups"""
+    
+    return await conn.fetchval(
+        "SELECT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = $1 AND tgrelid = 'audit_events'::regclass)",
+        AUDIT_ROLLUP_TRIGGER
+    )
+
+
+async def install_summary_rollups(conn: asyncpg.Connection, backfill: bool = True):
+    """
+    Create the hourly rollup tables and their trigger.
+    
+    With backfill, audit_events is locked against inserts while the
+    rollups are rebuilt from it, so no event is counted twice or missed;
+    queued events wait in the ingest queue meanwhile.
+    """
+    
+    async with conn.transaction():
+        if backfill:
+            await conn.execute("LOCK TABLE audit_events IN SHARE ROW EXCLUSIVE MODE")
+        await conn.execute(AUDIT_ROLLUP_DDL)
+        if not backfill:
+            return
+        
+        logger.info("Backfilling audit summary rollups")
+        await conn.execute(f"TRUNCATE {', '.join(AUDIT_ROLLUP_TABLES)}")
+        await conn.execute(AUDIT_ROLLUP_UPSERT.format(source="audit_events"))
+
+
 async def log_audit_event(
     event_type: AuditEventType,
     action: str,
@@ -355,12 +591,15 @@ async def log_audit_event(
     request_id: Optional[str] = None,
     reason: Optional[str] = None,
     metadata: Optional[Dict[str, Any]] = None,
-    pool: Optional[Pool] = None
+    pool: Optional[Pool] = None,
+    durable: Optional[bool] = None
 ) -> UUID:
-    """Log an audit event to the database"""
+    """
+    Log an audit event to the database.
     
-    if pool is None:
-        pool = await get_db_pool()
+    Events go through the ingest queue when it is running; durable=True
+    (the default for HIGH/CRITICAL severities) waits for the commit.
+    """
     
     event = AuditEvent(
         event_type=event_type,
@@ -383,26 +622,17 @@ async def log_audit_event(
         metadata=metadata or {}
     )
     
-    async with pool.acquire() as conn:
-        await conn.execute(
-            """
-            INSERT INTO audit_events (
-                id, timestamp, event_type, severity,
-                actor_id, actor_type, actor_email, actor_ip, actor_user_agent,
-                target_id, target_type, target_classification,
-                tenant_id, session_id, request_id,
-                action, resource, outcome, reason, metadata, retention_days
-            ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21
-            )
-            """,
-            event.id, event.timestamp, event.event_type.value, event.severity.value,
-            event.actor_id, event.actor_type.value if event.actor_type else None, 
-            event.actor_email, event.actor_ip, event.actor_user_agent,
-            event.target_id, event.target_type, event.target_classification.value if event.target_classification else None,
-            event.tenant_id, event.session_id, event.request_id,
-            event.action, event.resource, event.outcome, event.reason, event.metadata, event.retention_days
-        )
+    # AuditEvent stores enum values (use_enum_values)
+    row = (
+        event.id, event.timestamp, event.event_type, event.severity,
+        event.actor_id, event.actor_type,
+        event.actor_email, event.actor_ip, event.actor_user_agent,
+        event.target_id, event.target_type, event.target_classification,
+        event.tenant_id, event.session_id, event.request_id,
+        event.action, event.resource, event.outcome, event.reason, json.dumps(event.metadata, default=str),
+        event.retention_days
+    )
+    await _write_audit_row("audit_events", row, event.severity, durable, pool)
     
     logger.debug("Audit event logged", event_id=str(event.id), event_type=event_type.value, action=action)
     return event.id
@@ -426,35 +656,50 @@ async def log_data_access(
     records_affected: int = 0,
     success: bool = True,
     error_message: Optional[str] = None,
-    pool: Optional[Pool] = None
+    pool: Optional[Pool] = None,
+    severity: Optional[AuditSeverity] = None,
+    durable: Optional[bool] = None
 ) -> UUID:
-    """Log sensitive data access"""
-    
-    if pool is None:
-        pool = await get_db_pool()
+    """Log sensitive data access (queued like log_audit_event)"""
     
-    from uuid import uuid4
     log_id = uuid4()
+    row = (
+        log_id, datetime.utcnow(), user_id, user_role.value, user_email,
+        data_type, data_id, data_classification,
+        operation, endpoint, sql_query_hash,
+        purpose, justification, tenant_id, session_id, ip_address,
+        records_affected, success, error_message
+    )
+    await _write_audit_row(
+        "data_access_logs", row, severity.value if severity else None, durable, pool
+    )
     
+    logger.debug("Data access logged", log_id=str(log_id), user_id=str(user_id), data_type=data_type, operation=operation)
+    return log_id
+
+
+async def _write_audit_row(
+    table: str,
+    row: Sequence[Any],
+    severity: Optional[str],
+    durable: Optional[bool],
+    pool: Optional[Pool]
+):
+    """Queue a row for batched writing, or insert it inline"""
+    
+    queue = get_ingest_queue()
+    if queue is not None and pool is None:
+        if durable is None:
+            durable = queue.requires_sync(severity)
+        await queue.submit(table, row, durable=durable)
+        return
+    
+    if pool is None:
+        pool = await get_db_pool()
+    columns = AUDIT_TABLES[table]
+    placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
     async with pool.acquire() as conn:
         await conn.execute(
-            """
-            INSERT INTO data_access_logs (
-                id, timestamp, user_id, user_role, user_email,
-                data_type, data_id, data_classification,
-                operation, endpoint, sql_query_hash,
-                purpose, justification, tenant_id, session_id, ip_address,
-                records_affected, success, error_message
-            ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19
-            )
-            """,
-            log_id, datetime.utcnow(), user_id, user_role.value, user_email,
-            data_type, data_id, data_classification,
-            operation, endpoint, sql_query_hash,
-            purpose, justification, tenant_id, session_id, ip_address,
-            records_affected, success, error_message
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            *row
         )
-    
-    logger.debug("Data access logged", log_id=str(log_id), user_id=str(user_id), data_type=data_type, operation=operation)
-    return log_id
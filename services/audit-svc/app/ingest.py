@@ -0,0 +1,486 @@
+"""
+Audit Event Ingestion Queue
+Buffered, batched writes of audit events and data access logs
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import asyncpg
+import structlog
+
+logger = structlog.get_logger()
+
+# Tables the queue can write, with their column order
+Columns = Tuple[str, ...]
+
+
+@dataclass
+class IngestConfig:
+    """Audit ingestion settings"""
+
+    enabled: bool = True
+    # A batch is written once it reaches batch_size records or the oldest
+    # queued record has waited flush_interval seconds
+    batch_size: int = 500
+    flush_interval: float = 0.2
+    # Producers wait for space once max_queue_size records are queued
+    max_queue_size: int = 100_000
+    # Severities whose callers wait until their event is committed
+    sync_severities: FrozenSet[str] = frozenset({"high", "critical"})
+    # Append-only journal of queued records, replayed on startup
+    journal_path: Optional[str] = None
+    journal_fsync: bool = True
+    retry_backoff: float = 0.5
+    max_retry_backoff: float = 30.0
+    drain_timeout: float = 10.0
+    latency_sample_size: int = 2048
+
+    @classmethod
+    def from_env(cls) -> "IngestConfig":
+        """Load settings from AUDIT_INGEST_* environment variables"""
+
+        sync_severities = os.getenv("AUDIT_INGEST_SYNC_SEVERITIES", "high,critical")
+        return cls(
+            enabled=os.getenv("AUDIT_INGEST_ENABLED", "true").lower() in ("1", "true", "yes"),
+            batch_size=int(os.getenv("AUDIT_INGEST_BATCH_SIZE", "500")),
+            flush_interval=float(os.getenv("AUDIT_INGEST_FLUSH_INTERVAL", "0.2")),
+            max_queue_size=int(os.getenv("AUDIT_INGEST_MAX_QUEUE_SIZE", "100000")),
+            sync_severities=frozenset(s.strip().lower() for s in sync_severities.split(",") if s.strip()),
+            journal_path=os.getenv("AUDIT_INGEST_JOURNAL_PATH") or None,
+            journal_fsync=os.getenv("AUDIT_INGEST_JOURNAL_FSYNC", "true").lower() in ("1", "true", "yes"),
+            drain_timeout=float(os.getenv("AUDIT_INGEST_DRAIN_TIMEOUT", "10")),
+        )
+
+
+@dataclass
+class _Record:
+    seq: int
+    table: str
+    values: Tuple[Any, ...]
+    replayed: bool = False
+    committed: Optional[asyncio.Future] = None
+
+
+@dataclass
+class _LatencyWindow:
+    """Most recent latencies in milliseconds"""
+
+    samples: Deque[float] = field(default_factory=deque)
+    size: int = 2048
+
+    def add(self, value_ms: float):
+        self.samples.append(value_ms)
+        if len(self.samples) > self.size:
+            self.samples.popleft()
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {
+            "p50": round(ordered[int(last * 0.50)], 3),
+            "p95": round(ordered[int(last * 0.95)], 3),
+            "p99": round(ordered[int(last * 0.99)], 3),
+            "max": round(ordered[last], 3),
+        }
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    return str(value)
+
+
+def _decode_value(obj: Dict[str, Any]) -> Any:
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+class AuditJournal:
+    """
+    Append-only journal backing the in-memory queue.
+
+    Every queued record is appended before the producer returns; after a
+    batch is committed its last sequence number is written to a checkpoint
+    file. On startup records past the checkpoint are replayed, and the
+    journal is truncated whenever the queue drains.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.checkpoint_path = f"{path}.checkpoint"
+        self.fsync = fsync
+        self._file = None
+        self._dirty = False
+
+    def open(self) -> Tuple[int, List[Tuple[int, str, Tuple[Any, ...]]]]:
+        """Open the journal; returns the checkpoint and uncommitted records"""
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        checkpoint = self._read_checkpoint()
+        pending = []
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        entry = json.loads(line, object_hook=_decode_value)
+                    except ValueError:
+                        # Torn write from a crash mid-append
+                        continue
+                    if entry["seq"] > checkpoint:
+                        pending.append((entry["seq"], entry["table"], tuple(entry["values"])))
+        self._file = open(self.path, "a", encoding="utf-8")
+        return checkpoint, pending
+
+    def append(self, seq: int, table: str, values: Sequence[Any]):
+        self._file.write(json.dumps({"seq": seq, "table": table, "values": list(values)}, default=_encode_value) + "\n")
+        self._file.flush()
+        self._dirty = True
+
+    def sync(self):
+        """fsync appended records (called once per flush cycle)"""
+
+        if self._dirty and self.fsync:
+            os.fsync(self._file.fileno())
+        self._dirty = False
+
+    def checkpoint(self, seq: int, drained: bool):
+        """Record that everything up to seq is committed"""
+
+        if drained:
+            # Nothing left to replay: start a fresh journal
+            self._file.truncate(0)
+            self._file.seek(0)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as checkpoint:
+            checkpoint.write(str(seq))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def _read_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as checkpoint:
+                return int(checkpoint.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+
+class AuditIngestQueue:
+    """
+    Buffers audit records in memory and writes them in batches.
+
+    A background flusher COPYs each batch into its tables in one
+    transaction, so a busy service costs one round trip per batch rather
+    than one per event. Callers that need durability (HIGH/CRITICAL
+    events) await the commit of the batch carrying their record; queuing
+    one wakes the flusher immediately, durable records are written ahead
+    of queued ordinary ones, and concurrent durable events share a
+    commit. Batches that fail on bad data fall back to row-by-row
+    inserts so one bad record cannot block the queue; connection failures
+    are retried with back-off.
+    """
+
+    def __init__(
+        self,
+        get_pool: Callable[[], Awaitable[Any]],
+        tables: Dict[str, Columns],
+        config: Optional[IngestConfig] = None
+    ):
+        self.get_pool = get_pool
+        self.tables = tables
+        self.config = config or IngestConfig()
+        self.journal = AuditJournal(self.config.journal_path, self.config.journal_fsync) \
+            if self.config.journal_path else None
+
+        # Durable records have their own lane and are written first, so
+        # they never wait behind a backlog of ordinary events
+        self._queue: Deque[_Record] = deque()
+        self._durable: Deque[_Record] = deque()
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._durable_waiting = 0
+        self._flusher: Optional[asyncio.Task] = None
+        self._running = False
+
+        self._flush_latency = _LatencyWindow(size=self.config.latency_sample_size)
+        self._commit_wait = _LatencyWindow(size=self.config.latency_sample_size)
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "batch_failures": 0,
+            "rejected_records": 0,
+            "replayed": 0,
+            "backpressure_waits": 0,
+            "max_queue_depth": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue) + len(self._durable)
+
+    def requires_sync(self, severity: Optional[str]) -> bool:
+        return severity is not None and severity.lower() in self.config.sync_severities
+
+    async def start(self):
+        """Replay journaled records and start the background flusher"""
+
+        if self._running:
+            return
+        if self.journal is not None:
+            checkpoint, pending = self.journal.open()
+            # Sequence numbers continue past the checkpoint even if the journal was truncated
+            self._seq = max(self._seq, checkpoint)
+            for seq, table, values in pending:
+                self._queue.append(_Record(seq, table, values, replayed=True))
+                self._seq = max(self._seq, seq)
+            self.stats["replayed"] = len(self._queue)
+            if self._queue:
+                logger.warning("Replaying journaled audit records", count=len(self._queue))
+        self._running = True
+        self._flusher = asyncio.create_task(self._run())
+        logger.info("Audit ingest queue started", batch_size=self.config.batch_size,
+                    journal=self.config.journal_path)
+
+    async def stop(self):
+        """Flush what is queued (up to drain_timeout) and stop the flusher"""
+
+        if self._flusher is None:
+            return
+        self._running = False
+        self._wakeup.set()
+        self._not_full.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._flusher), timeout=self.config.drain_timeout)
+        except asyncio.TimeoutError:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        self._flusher = None
+
+        if self.depth:
+            if self.journal is not None:
+                logger.warning("Audit records left in journal for replay", count=self.depth)
+            else:
+                logger.error("Audit records lost on shutdown", count=self.depth)
+            for record in (*self._durable, *self._queue):
+                if record.committed is not None and not record.committed.done():
+                    record.committed.set_exception(RuntimeError("Audit ingest queue stopped before commit"))
+        if self.journal is not None:
+            self.journal.close()
+        logger.info("Audit ingest queue stopped", written=self.stats["written"])
+
+    async def submit(self, table: str, values: Sequence[Any], durable: bool = False):
+        """Queue a record; with durable=True, return once it is committed"""
+
+        if table not in self.tables:
+            raise ValueError(f"Unknown audit table: {table}")
+        while self.depth >= self.config.max_queue_size and self._running:
+            self.stats["backpressure_waits"] += 1
+            self._not_full.clear()
+            self._wakeup.set()
+            await self._not_full.wait()
+        if not self._running:
+            raise RuntimeError("Audit ingest queue is not running")
+
+        self._seq += 1
+        record = _Record(self._seq, table, tuple(values))
+        if self.journal is not None:
+            self.journal.append(record.seq, table, record.values)
+        if durable:
+            record.committed = asyncio.get_running_loop().create_future()
+            self._durable_waiting += 1
+
+        (self._durable if durable else self._queue).append(record)
+        self.stats["enqueued"] += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.depth)
+        if durable or self.depth >= self.config.batch_size:
+            self._wakeup.set()
+
+        if record.committed is not None:
+            started = time.perf_counter()
+            await record.committed
+            self._commit_wait.add((time.perf_counter() - started) * 1000)
+
+    async def flush(self):
+        """Write everything queued so far"""
+
+        if not self.depth or not self._running:
+            return
+        # Durable records are written first, so the newest record of the
+        # ordinary lane (if any) is the last one to commit
+        last = self._queue[-1] if self._queue else self._durable[-1]
+        marker = last.committed
+        if marker is None:
+            marker = asyncio.get_running_loop().create_future()
+            last.committed = marker
+            self._durable_waiting += 1
+        self._wakeup.set()
+        await asyncio.shield(marker)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queue_depth": self.depth,
+            "durable_waiting": self._durable_waiting,
+            "flush_latency_ms": self._flush_latency.summary(),
+            "commit_wait_ms": self._commit_wait.summary(),
+        }
+
+    async def _run(self):
+        backoff = self.config.retry_backoff
+        while self._running or self.depth:
+            if self._running and self.depth < self.config.batch_size and not self._durable_waiting:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.config.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+
+            batch = [self._durable.popleft() for _ in range(min(self.config.batch_size, len(self._durable)))]
+            durable_count = len(batch)
+            batch += [self._queue.popleft() for _ in range(min(self.config.batch_size - durable_count, len(self._queue)))]
+            if not batch:
+                continue
+            if self.depth < self.config.max_queue_size:
+                self._not_full.set()
+            if self.journal is not None:
+                self.journal.sync()
+
+            try:
+                await self._write_batch(batch)
+                backoff = self.config.retry_backoff
+            except Exception as e:
+                self.stats["batch_failures"] += 1
+                logger.error("Audit batch write failed, retrying", error=str(e), records=len(batch),
+                             retry_in=backoff)
+                self._durable.extendleft(reversed(batch[:durable_count]))
+                self._queue.extendleft(reversed(batch[durable_count:]))
+                if not self._running and not self._retry_on_stop():
+                    return
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.config.max_retry_backoff)
+                continue
+
+            if self.journal is not None:
+                self._checkpoint()
+            for record in batch:
+                if record.committed is not None:
+                    self._durable_waiting -= 1
+                    if not record.committed.done():
+                        record.committed.set_result(None)
+
+    def _checkpoint(self):
+        # Each lane is in sequence order, so everything before the oldest
+        # queued record is committed; durable records committed ahead of
+        # older ordinary ones are replayed idempotently after a crash
+        heads = [lane[0].seq for lane in (self._queue, self._durable) if lane]
+        if heads:
+            self.journal.checkpoint(min(heads) - 1, drained=False)
+        else:
+            self.journal.checkpoint(self._seq, drained=True)
+
+    def _retry_on_stop(self) -> bool:
+        # While draining, keep retrying only if someone is waiting on a commit
+        return self._durable_waiting > 0
+
+    async def _write_batch(self, batch: List[_Record]):
+        started = time.perf_counter()
+        by_table: Dict[str, List[Tuple[Any, ...]]] = {}
+        replayed: Dict[str, List[Tuple[Any, ...]]] = {}
+        for record in batch:
+            (replayed if record.replayed else by_table).setdefault(record.table, []).append(record.values)
+
+        pool = await self.get_pool()
+        async with pool.acquire() as conn:
+            try:
+                async with conn.transaction():
+                    for table, rows in by_table.items():
+                        await conn.copy_records_to_table(table, records=rows, columns=list(self.tables[table]))
+                    for table, rows in replayed.items():
+                        # Replayed records may already have been committed before a crash
+                        await conn.executemany(self._insert_sql(table, on_conflict=True), rows)
+            except (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError) as e:
+                logger.warning("Audit batch rejected, writing records individually", error=str(e))
+                await self._write_rows_individually(conn, batch)
+
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+        self._flush_latency.add((time.perf_counter() - started) * 1000)
+
+    async def _write_rows_individually(self, conn, batch: List[_Record]):
+        for record in batch:
+            try:
+                await conn.execute(self._insert_sql(record.table, on_conflict=True), *record.values)
+            except (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError) as e:
+                self.stats["rejected_records"] += 1
+                logger.error("Audit record rejected", table=record.table, error=str(e),
+                             record_id=str(record.values[0]))
+
+    def _insert_sql(self, table: str, on_conflict: bool = False) -> str:
+        columns = self.tables[table]
+        placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        if on_conflict:
+            sql += " ON CONFLICT (id) DO NOTHING"
+        return sql
+
+
+# Global ingest queue
+_ingest_queue: Optional[AuditIngestQueue] = None
+
+
+def get_ingest_queue() -> Optional[AuditIngestQueue]:
+    """Running ingest queue, or None when events are written inline"""
+
+    if _ingest_queue is not None and _ingest_queue.running:
+        return _ingest_queue
+    return None
+
+
+async def start_ingest_queue(
+    get_pool: Callable[[], Awaitable[Any]],
+    tables: Dict[str, Columns],
+    config: Optional[IngestConfig] = None
+) -> Optional[AuditIngestQueue]:
+    """Start the global ingest queue (unless disabled)"""
+
+    global _ingest_queue
+
+    config = config or IngestConfig.from_env()
+    if not config.enabled:
+        logger.info("Audit ingest queue disabled, writing events inline")
+        return None
+    if _ingest_queue is None:
+        _ingest_queue = AuditIngestQueue(get_pool, tables, config)
+    await _ingest_queue.start()
+    return _ingest_queue
+
+
+async def stop_ingest_queue():
+    """Drain and stop the global ingest queue"""
+
+    global _ingest_queue
+
+    if _ingest_queue is not None:
+        await _ingest_queue.stop()
+        _ingest_queue = None
@@ -16,7 +16,8 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from .database import init_db_pool, close_db_pool, get_db_pool
+from .database import init_db_pool, close_db_pool, get_db_pool, AUDIT_TABLES
+from .ingest import start_ingest_queue, stop_ingest_queue, get_ingest_queue
 from .routes import router as audit_router
 from .models import AuditEvent, AuditEventType, AuditSeverity, UserRole
 
@@ -58,6 +59,9 @@ async def lifespan(app: FastAPI):
         logger.error("Failed to initialize database", error=str(e))
         raise
     
+    # Start batched audit ingestion
+    await start_ingest_queue(get_db_pool, AUDIT_TABLES)
+    
     # Log startup audit event
     try:
         from .audit_logger import AuditLogger
@@ -100,6 +104,8 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("Failed to log shutdown event", error=str(e))
     
+    # Flush queued audit events before the pool goes away
+    await stop_ingest_queue()
     await close_db_pool()
     logger.info("Database pool closed")
 
@@ -338,6 +344,7 @@ async def metrics():
             "critical_events_24h": critical_events,
             "active_support_sessions": active_sessions,
             "pending_access_reviews": pending_reviews,
+            "ingest": ingest_stats(),
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -345,10 +352,20 @@ async def metrics():
         logger.error("Metrics collection failed", error=str(e))
         return {
             "error": "Failed to collect metrics",
+            "ingest": ingest_stats(),
             "timestamp": datetime.utcnow().isoformat()
         }
 
 
+def ingest_stats() -> dict:
+    """Queue depth and flush latency of the audit ingest queue"""
+    
+    queue = get_ingest_queue()
+    if queue is None:
+        return {"enabled": False}
+    return {"enabled": True, **queue.get_stats()}
+
+
 if __name__ == "__main__":
     import time
     import asyncio
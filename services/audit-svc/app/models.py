@@ -334,13 +334,43 @@ class AuditQuery(BaseModel):
     # Search
     search_term: Optional[str] = None
     
-    # Pagination
+    # Pagination: pass the previous page's next_cursor to continue with
+    # keyset pagination on (timestamp, id); page is the OFFSET fallback
+    cursor: Optional[str] = None
     page: int = Field(default=1, ge=1)
     page_size: int = Field(default=50, ge=1, le=1000)
     
+    # Projection: event columns to return (None: all). id, timestamp,
+    # severity, outcome and the required event fields are always returned.
+    fields: Optional[List[str]] = None
+    
     # Sorting
     sort_by: str = "timestamp"
     sort_order: str = "desc"  # asc, desc
+    
+    @validator('sort_by')
+    def validate_sort_by(cls, v):
+        if v not in AUDIT_QUERY_SORT_COLUMNS:
+            raise ValueError(f"sort_by must be one of {', '.join(AUDIT_QUERY_SORT_COLUMNS)}")
+        return v
+    
+    @validator('sort_order')
+    def validate_sort_order(cls, v):
+        if v.lower() not in ("asc", "desc"):
+            raise ValueError("sort_order must be asc or desc")
+        return v.lower()
+    
+    @validator('fields')
+    def validate_fields(cls, v):
+        if v is not None:
+            unknown = set(v) - set(AuditEvent.__fields__)
+            if unknown:
+                raise ValueError(f"Unknown audit event fields: {', '.join(sorted(unknown))}")
+        return v
+
+
+# Columns audit queries may sort by
+AUDIT_QUERY_SORT_COLUMNS = ("timestamp", "event_type", "severity", "action", "resource", "outcome")
 
 
 class AuditReport(BaseModel):
@@ -10,7 +10,7 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 
 import structlog
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, Response
 from fastapi.security import HTTPAuthorizationCredentials
 
 from .models import (
@@ -87,11 +87,20 @@ async def query_audit_events(
     actor_id: Optional[UUID] = Query(None),
     target_id: Optional[UUID] = Query(None),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[List[str]] = Query(None, description="Event fields to return"),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=1000),
+    response: Response = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """Query audit events with filters"""
+    """
+    Query audit events with filters.
+    
+    Newest first. When more events follow, the X-Next-Cursor response
+    header holds the cursor for the next page; prefer it to page numbers,
+    which get slower the deeper they go.
+    """
     
     try:
         audit_logger = AuditLogger()
@@ -105,11 +114,15 @@ async def query_audit_events(
             target_ids=[target_id] if target_id else None,
             tenant_id=current_user["tenant_id"],
             search_term=search,
+            cursor=cursor,
+            fields=fields,
             page=page,
             page_size=page_size
         )
         
-        events = await audit_logger.query_events(query)
+        events, next_cursor = await audit_logger.query_event_page(query)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         # Log the audit query itself
         await audit_logger.log_event(
@@ -127,6 +140,9 @@ async def query_audit_events(
         
         return events
         
+    except ValueError as e:
+        # Invalid cursor or fields
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("Failed to query audit events", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to query audit events")
@@ -0,0 +1,246 @@
+"""
+Audit Summary Engine
+Single-pass audit summary reports over hourly rollups
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import asyncpg
+import structlog
+
+from .database import summary_rollups_installed
+from .models import AuditReport
+
+logger = structlog.get_logger()
+
+HOUR = timedelta(hours=1)
+TOP_N = 10
+RISK_EVENT_LIMIT = 50
+RISK_SEVERITIES = ("high", "critical")
+
+# Set once the rollup trigger has been seen; it is never removed at runtime
+_rollups_installed = False
+
+
+def rollup_window(start_date: datetime, end_date: datetime) -> Tuple[datetime, datetime]:
+    """
+    Whole UTC hours [first, last) inside [start_date, end_date].
+
+    The report reads these hours from the rollups and scans raw events
+    only in [start_date, first) and [last, end_date]. Returns an empty
+    window (start_date, start_date) when no whole hour fits.
+    """
+
+    def floor_hour(value: datetime) -> datetime:
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.replace(minute=0, second=0, microsecond=0)
+
+    first = floor_hour(start_date)
+    if first != start_date:
+        first += HOUR
+    last = floor_hour(end_date)
+    if first >= last:
+        return start_date, start_date
+    return first, last
+
+
+def build_summary_query(use_rollups: bool) -> str:
+    """
+    One statement computing every audit_events metric of the report.
+
+    Parameters: $1 tenant, $2/$3 report range, $4/$5 rollup window. The
+    raw edge rows are read once (a CTE referenced several times is
+    materialized) and unioned with the rollup rows of each dimension.
+    Rows come back tagged with their dimension: 'count' rows per
+    (event_type, severity, failed), then the top actors, each with the
+    email of their most recent event, and resources.
+    """
+
+    def rollup(select: str, table: str) -> str:
+        if not use_rollups:
+            return ""
+        return f"""
+            {select} FROM {table}
+            WHERE tenant_id = $1 AND hour >= $4 AND hour < $5
+            UNION ALL"""
+
+    return f"""
+        WITH edges AS (
+            SELECT event_type, severity, outcome IN ('failure', 'error') AS failed,
+                   actor_id, actor_email, timestamp, resource
+            FROM audit_events
+            WHERE tenant_id = $1
+            AND ((timestamp >= $2 AND timestamp < $4) OR (timestamp >= $5 AND timestamp <= $3))
+        ),
+        counts AS ({rollup("SELECT event_type, severity, failed, event_count", "audit_event_rollups_hourly")}
+            SELECT event_type, severity, failed, 1 AS event_count FROM edges
+        ),
+        actors AS ({rollup("SELECT actor_id, actor_email, actor_email_at, event_count", "audit_actor_rollups_hourly")}
+            SELECT actor_id, actor_email, timestamp AS actor_email_at, 1 AS event_count
+            FROM edges WHERE actor_id IS NOT NULL
+        ),
+        actor_totals AS (
+            SELECT actor_id,
+                   (array_agg(actor_email ORDER BY actor_email_at DESC)
+                        FILTER (WHERE actor_email IS NOT NULL))[1] AS actor_email,
+                   SUM(event_count) AS event_count,
+                   COUNT(*) OVER () AS unique_actors
+            FROM actors
+            GROUP BY actor_id
+        ),
+        resources AS ({rollup("SELECT resource, event_count", "audit_resource_rollups_hourly")}
+            SELECT resource, 1 AS event_count FROM edges
+        )
+        SELECT 'count' AS dimension, event_type, severity, failed,
+               NULL::uuid AS actor_id, NULL::text AS actor_email, NULL::text AS resource,
+               SUM(event_count)::bigint AS event_count, NULL::bigint AS unique_actors
+        FROM counts
+        GROUP BY event_type, severity, failed
+        UNION ALL
+        (SELECT 'actor', NULL, NULL, NULL, actor_id, actor_email, NULL, event_count::bigint, unique_actors
+         FROM actor_totals
+         ORDER BY event_count DESC, actor_id
+         LIMIT {TOP_N})
+        UNION ALL
+        (SELECT 'resource', NULL, NULL, NULL, NULL, NULL, resource, SUM(event_count)::bigint, NULL
+         FROM resources
+         GROUP BY resource
+         ORDER BY 8 DESC, resource
+         LIMIT {TOP_N})
+    """
+
+
+RISK_EVENTS_QUERY = f"""
+    SELECT id, timestamp, event_type, action, resource, severity, outcome
+    FROM audit_events
+    WHERE tenant_id = $1 AND timestamp BETWEEN $2 AND $3
+    AND severity IN ('high', 'critical')
+    ORDER BY timestamp DESC
+    LIMIT {RISK_EVENT_LIMIT}
+"""
+
+COMPLIANCE_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM access_reviews
+         WHERE tenant_id = $1 AND completed_at BETWEEN $2 AND $3) AS access_reviews_completed,
+        (SELECT COUNT(*) FROM support_sessions
+         WHERE tenant_id = $1 AND approved_at BETWEEN $2 AND $3) AS support_sessions_approved
+"""
+
+
+def assemble_report(
+    tenant_id: UUID,
+    start_date: datetime,
+    end_date: datetime,
+    summary_rows: Sequence[Any],
+    risk_rows: Sequence[Any],
+    compliance: Optional[Any]
+) -> AuditReport:
+    """AuditReport from the summary, risk event and compliance rows"""
+
+    total_events = 0
+    failed_events = 0
+    policy_violations = 0
+    unique_actors = 0
+    events_by_type: Dict[str, int] = {}
+    events_by_severity: Dict[str, int] = {}
+    top_actors: List[Dict[str, Any]] = []
+    top_resources: List[Dict[str, Any]] = []
+
+    for row in summary_rows:
+        count = row['event_count']
+        if row['dimension'] == 'count':
+            total_events += count
+            events_by_type[row['event_type']] = events_by_type.get(row['event_type'], 0) + count
+            events_by_severity[row['severity']] = events_by_severity.get(row['severity'], 0) + count
+            if row['failed']:
+                failed_events += count
+            if row['event_type'] == 'permission_denied' and row['severity'] in RISK_SEVERITIES:
+                policy_violations += count
+        elif row['dimension'] == 'actor':
+            unique_actors = row['unique_actors']
+            top_actors.append({
+                "actor_id": str(row['actor_id']),
+                "actor_email": row['actor_email'],
+                "event_count": count
+            })
+        elif row['dimension'] == 'resource':
+            top_resources.append({
+                "resource": row['resource'],
+                "access_count": count
+            })
+
+    risk_events = [
+        {
+            "id": str(row['id']),
+            "timestamp": row['timestamp'].isoformat(),
+            "event_type": row['event_type'],
+            "action": row['action'],
+            "resource": row['resource'],
+            "severity": row['severity'],
+            "outcome": row['outcome']
+        }
+        for row in risk_rows
+    ]
+
+    return AuditReport(
+        tenant_id=tenant_id,
+        report_type="summary",
+        period_start=start_date,
+        period_end=end_date,
+        total_events=total_events,
+        events_by_type=dict(sorted(events_by_type.items(), key=lambda item: -item[1])),
+        events_by_severity=dict(sorted(events_by_severity.items(), key=lambda item: -item[1])),
+        unique_actors=unique_actors,
+        failed_events=failed_events,
+        top_actors=top_actors,
+        top_resources=top_resources,
+        risk_events=risk_events,
+        access_reviews_completed=compliance['access_reviews_completed'] if compliance else 0,
+        support_sessions_approved=compliance['support_sessions_approved'] if compliance else 0,
+        policy_violations=policy_violations
+    )
+
+
+async def summarize_events(
+    conn: asyncpg.Connection,
+    tenant_id: UUID,
+    start_date: datetime,
+    end_date: datetime
+) -> AuditReport:
+    """
+    Audit summary report for a tenant and time range.
+
+    Whole hours come from the rollups; raw events are scanned only at
+    the edges of the range, or over all of it while the rollups are not
+    installed yet.
+    """
+
+    global _rollups_installed
+
+    if not _rollups_installed:
+        _rollups_installed = bool(await summary_rollups_installed(conn))
+
+    if _rollups_installed:
+        first_hour, last_hour = rollup_window(start_date, end_date)
+    else:
+        first_hour, last_hour = start_date, start_date
+
+    summary_rows = await conn.fetch(
+        build_summary_query(_rollups_installed),
+        tenant_id, start_date, end_date, first_hour, last_hour
+    )
+    risk_rows = await conn.fetch(RISK_EVENTS_QUERY, tenant_id, start_date, end_date)
+    compliance = await conn.fetchrow(COMPLIANCE_QUERY, tenant_id, start_date, end_date)
+
+    logger.debug(
+        "Audit summary computed",
+        tenant_id=str(tenant_id),
+        rollup_hours=int((last_hour - first_hour) / HOUR),
+        rollups=_rollups_installed
+    )
+
+    return assemble_report(tenant_id, start_date, end_date, summary_rows, risk_rows, compliance)
@@ -0,0 +1,136 @@
+"""
+Audit event query benchmark for deep pages
+
+Loads a synthetic audit_events table (one large tenant plus noise from
+other tenants) into an in-memory SQLite database and times fetching
+pages 1, 100 and 10,000 of the tenant's events, newest first. SQLite
+stands in for PostgreSQL here: both must walk and discard every row
+before an OFFSET, while a keyset predicate on (timestamp, id) seeks
+straight to the page through the composite index. Compares the previous
+query (SELECT *, LIMIT/OFFSET, single-column indexes) with the SQL that
+build_event_query generates (keyset cursor, projected columns, indexes
+from AUDIT_QUERY_INDEXES).
+
+Usage:
+    python benchmarks/bench_audit_query.py [--events N] [--page-size S] [--repeat R]
+"""
+
+import argparse
+import logging
+import os
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.audit_logger import build_event_query, encode_cursor  # noqa: E402
+from app.database import AUDIT_EVENT_COLUMNS, AUDIT_QUERY_INDEXES  # noqa: E402
+from app.models import AuditQuery  # noqa: E402
+
+PAGES = (1, 100, 10_000)
+LIST_FIELDS = ["actor_email", "target_type"]
+
+
+def load_events(conn: sqlite3.Connection, events: int, tenant_id: UUID):
+    conn.execute(f"CREATE TABLE audit_events ({', '.join(AUDIT_EVENT_COLUMNS)})")
+    # Indexes the service created before this change
+    for column in ("timestamp", "tenant_id", "event_type", "actor_id", "severity"):
+        conn.execute(f"CREATE INDEX idx_audit_events_{column} ON audit_events({column})")
+
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    other_tenants = [str(uuid4()) for _ in range(10)]
+    batch = []
+    for i in range(events):
+        # 80% of events belong to the large tenant
+        tenant = str(tenant_id) if rng.random() < 0.8 else rng.choice(other_tenants)
+        batch.append((
+            str(uuid4()), (start + timedelta(seconds=i * 3)).isoformat(), "data_read", rng.choice(["low", "medium"]),
+            str(uuid4()), "teacher", f"teacher{i % 500}@school.org", "10.0.0.1", "Mozilla/5.0 (X11; Linux x86_64)",
+            str(uuid4()), "student_record", "confidential",
+            tenant, str(uuid4()), str(uuid4()),
+            "api_access", "api_endpoint", "success", None,
+            '{"method": "GET", "path": "/api/v1/learners", "status_code": 200, "duration_ms": 12.5}', 2555
+        ))
+        if len(batch) == 50_000:
+            conn.executemany(f"INSERT INTO audit_events VALUES ({', '.join('?' * len(AUDIT_EVENT_COLUMNS))})", batch)
+            batch = []
+    if batch:
+        conn.executemany(f"INSERT INTO audit_events VALUES ({', '.join('?' * len(AUDIT_EVENT_COLUMNS))})", batch)
+    conn.commit()
+
+
+def to_sqlite(sql: str, params):
+    """$n placeholders to ?n; UUIDs and datetimes to their stored text form"""
+    values = [str(p) if isinstance(p, UUID) else p.isoformat() if isinstance(p, datetime) else p for p in params]
+    return re.sub(r"\$(\d+)", r"?\1", sql), values
+
+
+def legacy_query(tenant_id: UUID, page: int, page_size: int):
+    """Reference copy of the previous query: SELECT *, ORDER BY timestamp, LIMIT/OFFSET"""
+    return ("SELECT * FROM audit_events WHERE tenant_id = ?1 ORDER BY timestamp DESC LIMIT ?2 OFFSET ?3",
+            [str(tenant_id), page_size, (page - 1) * page_size])
+
+
+def timed(conn: sqlite3.Connection, sql: str, params, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    assert rows
+    return statistics.median(samples)
+
+
+def run(args) -> None:
+    tenant_id = uuid4()
+    conn = sqlite3.connect(":memory:")
+    load_started = time.perf_counter()
+    load_events(conn, args.events, tenant_id)
+    tenant_events = conn.execute("SELECT COUNT(*) FROM audit_events WHERE tenant_id = ?", [str(tenant_id)]).fetchone()[0]
+    print(f"events: {args.events} ({tenant_events} for the queried tenant), page size {args.page_size}, "
+          f"loaded in {time.perf_counter() - load_started:.1f} s")
+
+    legacy = {page: timed(conn, *legacy_query(tenant_id, page, args.page_size), args.repeat) for page in PAGES}
+
+    for name, definition in AUDIT_QUERY_INDEXES.items():
+        conn.execute(f"CREATE INDEX {name} ON {definition}")
+    conn.execute("ANALYZE")
+
+    keyset = {}
+    for page in PAGES:
+        cursor = None
+        if page > 1:
+            # Cursor handed out with the previous page (not timed)
+            timestamp, event_id = conn.execute(
+                "SELECT timestamp, id FROM audit_events WHERE tenant_id = ?1 "
+                "ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?2",
+                [str(tenant_id), (page - 1) * args.page_size - 1]
+            ).fetchone()
+            cursor = encode_cursor(datetime.fromisoformat(timestamp), UUID(event_id), "desc")
+        query = AuditQuery(tenant_id=tenant_id, cursor=cursor, fields=LIST_FIELDS, page_size=args.page_size)
+        keyset[page] = timed(conn, *to_sqlite(*build_event_query(query)), args.repeat)
+
+    print(f"{'page':>8} {'previous (OFFSET)':>20} {'keyset cursor':>16}")
+    for page in PAGES:
+        print(f"{page:>8} {legacy[page]:>17.2f} ms {keyset[page]:>13.2f} ms  ({legacy[page] / keyset[page]:.0f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=800_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Audit ingestion benchmark for chatty request paths
+
+Simulates concurrent API requests that each log one audit event (5%
+HIGH/CRITICAL) against a stub asyncpg pool. The stub charges a network
+round trip per statement, a WAL flush per commit and a per-row cost
+(separately for INSERT and COPY), and limits concurrent connections
+like the real pool. Compares the previous path - one INSERT per event awaited
+in the request - with the ingest queue (batched COPY, durable waits for
+HIGH/CRITICAL only). Reports events/sec and the latency that logging
+adds to each request.
+
+Usage:
+    python benchmarks/bench_ingest.py [--events N] [--concurrency C] [--rtt-ms MS] [--commit-ms MS] [--pool-size P]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import structlog
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import AUDIT_TABLES, log_audit_event  # noqa: E402
+from app.ingest import IngestConfig, start_ingest_queue, stop_ingest_queue  # noqa: E402
+from app.models import AuditEventType, AuditSeverity  # noqa: E402
+
+
+class StubConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    @asynccontextmanager
+    async def transaction(self):
+        await asyncio.sleep(self.pool.rtt)  # BEGIN
+        yield
+        await asyncio.sleep(self.pool.rtt + self.pool.commit_cost)  # COMMIT
+
+    async def execute(self, sql, *args):
+        # Autocommit: every statement pays its own commit
+        self.pool.statements += 1
+        await asyncio.sleep(self.pool.rtt + self.pool.insert_row_cost + self.pool.commit_cost)
+
+    async def executemany(self, sql, rows):
+        self.pool.statements += 1
+        await asyncio.sleep(self.pool.rtt + self.pool.insert_row_cost * len(rows))
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.pool.statements += 1
+        await asyncio.sleep(self.pool.rtt + self.pool.copy_row_cost * len(records))
+
+
+class StubPool:
+    """asyncpg pool stand-in with modelled round trips and a connection limit"""
+
+    def __init__(self, size: int, rtt: float, commit_cost: float, insert_row_cost: float, copy_row_cost: float):
+        self.connections = asyncio.Semaphore(size)
+        self.rtt = rtt
+        self.commit_cost = commit_cost
+        self.insert_row_cost = insert_row_cost
+        self.copy_row_cost = copy_row_cost
+        self.statements = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self.connections:
+            yield StubConnection(self)
+
+
+def severity_for(i: int) -> AuditSeverity:
+    if i % 20 == 0:
+        return AuditSeverity.HIGH
+    return AuditSeverity.LOW if i % 2 else AuditSeverity.MEDIUM
+
+
+async def legacy_log_audit_event(pool: StubPool, severity: AuditSeverity, tenant_id):
+    """Reference copy of the previous path: one INSERT per event, awaited inline"""
+    async with pool.acquire() as conn:
+        await conn.execute("INSERT INTO audit_events (...) VALUES (...)", uuid4(), severity.value, tenant_id)
+
+
+async def drive(events: int, concurrency: int, log_one) -> dict:
+    """Run events through concurrency request workers; returns per-call latencies"""
+    latencies = []
+    counter = iter(range(events))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await log_one(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            # The rest of the request yields to the event loop at least once
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    latencies.sort()
+    return {
+        "elapsed": time.perf_counter() - start,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)],
+    }
+
+
+async def run(args) -> None:
+    rtt = args.rtt_ms / 1000
+    tenant_id = uuid4()
+
+    def make_pool():
+        return StubPool(args.pool_size, rtt, args.commit_ms / 1000, args.insert_row_us / 1e6, args.copy_row_us / 1e6)
+
+    print(f"events: {args.events}, concurrent requests: {args.concurrency}, pool: {args.pool_size}, "
+          f"round trip {args.rtt_ms} ms, commit {args.commit_ms} ms")
+
+    pool = make_pool()
+    legacy = await drive(args.events, args.concurrency,
+                         lambda i: legacy_log_audit_event(pool, severity_for(i), tenant_id))
+    legacy_rate = args.events / legacy["elapsed"]
+    print(f"{'previous (inline INSERT)':<26} {legacy_rate:9.0f} events/s  request p50 {legacy['p50']:7.2f} ms  "
+          f"p99 {legacy['p99']:7.2f} ms  ({pool.statements} statements)")
+
+    pool = make_pool()
+
+    async def get_pool():
+        return pool
+
+    queue = await start_ingest_queue(get_pool, AUDIT_TABLES, IngestConfig(batch_size=args.batch_size))
+    result = await drive(args.events, args.concurrency, lambda i: log_audit_event(
+        event_type=AuditEventType.DATA_READ, action="api_access", resource="api_endpoint",
+        severity=severity_for(i), tenant_id=tenant_id
+    ))
+    await queue.flush()
+    elapsed = result["elapsed"]
+    stats = queue.get_stats()
+    await stop_ingest_queue()
+    rate = args.events / elapsed
+    print(f"{'ingest queue (COPY)':<26} {rate:9.0f} events/s  request p50 {result['p50']:7.2f} ms  "
+          f"p99 {result['p99']:7.2f} ms  ({pool.statements} statements, {stats['batches']} batches)  "
+          f"({rate / legacy_rate:.1f}x)")
+    print(f"{'':<26} flush p50 {stats['flush_latency_ms']['p50']:.2f} ms  p99 {stats['flush_latency_ms']['p99']:.2f} ms"
+          f"  durable wait p50 {stats['commit_wait_ms']['p50']:.2f} ms  max queue depth {stats['max_queue_depth']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    parser.add_argument("--commit-ms", type=float, default=1.0)
+    parser.add_argument("--insert-row-us", type=float, default=100.0)
+    parser.add_argument("--copy-row-us", type=float, default=10.0)
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# AIVO Audit Service - Database Migration 001
+# Composite and trigram indexes for audit event queries
+
+"""
+Adds the indexes used by keyset-paginated audit event queries.
+
+- (tenant_id, timestamp, id), plus (tenant_id, <filter>, timestamp, id)
+  for event_type, severity, actor_id and target_id
+- pg_trgm GIN indexes on action, resource and reason for search_term
+
+Indexes are built CONCURRENTLY, one statement at a time, so inserts into
+audit_events continue while they build. Re-running is safe: existing
+indexes are skipped and invalid leftovers of an interrupted build are
+rebuilt.
+
+Usage:
+    python migrations/001_audit_query_indexes.py [--drop]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+import asyncpg
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import (  # noqa: E402
+    AUDIT_QUERY_INDEXES,
+    AUDIT_SEARCH_INDEXES,
+    create_query_indexes,
+    get_db_config
+)
+
+
+async def upgrade(conn: asyncpg.Connection):
+    """Apply migration - create audit query indexes."""
+
+    await create_query_indexes(conn, concurrently=True)
+    await conn.execute("ANALYZE audit_events")
+
+
+async def downgrade(conn: asyncpg.Connection):
+    """Revert migration - drop audit query indexes."""
+
+    for name in list(AUDIT_QUERY_INDEXES) + list(AUDIT_SEARCH_INDEXES):
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+async def main(drop: bool):
+    # No statement timeout: index builds on large tables take a while
+    conn = await asyncpg.connect(**get_db_config(), command_timeout=None)
+    try:
+        await (downgrade(conn) if drop else upgrade(conn))
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audit query index migration")
+    parser.add_argument("--drop", action="store_true", help="drop the indexes instead")
+    asyncio.run(main(parser.parse_args().drop))
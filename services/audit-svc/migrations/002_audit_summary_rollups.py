@@ -0,0 +1,66 @@
+# AIVO Audit Service - Database Migration 002
+# Hourly rollups for audit summary reports
+
+"""
+Adds the hourly rollup tables behind audit summary reports.
+
+- audit_event_rollups_hourly: counts per (event_type, severity, failed)
+- audit_actor_rollups_hourly: counts per actor
+- audit_resource_rollups_hourly: counts per resource
+- audit_events_rollup: statement-level insert trigger maintaining them
+
+The rollups are backfilled from audit_events in the same transaction as
+the trigger is created, with inserts into audit_events blocked until it
+commits (the ingest queue holds new events meanwhile). Re-running
+rebuilds the rollups from scratch.
+
+Usage:
+    python migrations/002_audit_summary_rollups.py [--drop]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+import asyncpg
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import (  # noqa: E402
+    AUDIT_ROLLUP_TABLES,
+    AUDIT_ROLLUP_TRIGGER,
+    get_db_config,
+    install_summary_rollups
+)
+
+
+async def upgrade(conn: asyncpg.Connection):
+    """Apply migration - create and backfill summary rollups."""
+
+    await install_summary_rollups(conn, backfill=True)
+    await conn.execute(f"ANALYZE {', '.join(AUDIT_ROLLUP_TABLES)}")
+
+
+async def downgrade(conn: asyncpg.Connection):
+    """Revert migration - drop summary rollups."""
+
+    async with conn.transaction():
+        await conn.execute(f"DROP TRIGGER IF EXISTS {AUDIT_ROLLUP_TRIGGER} ON audit_events")
+        await conn.execute(f"DROP FUNCTION IF EXISTS {AUDIT_ROLLUP_TRIGGER}()")
+        await conn.execute(f"DROP TABLE IF EXISTS {', '.join(AUDIT_ROLLUP_TABLES)}")
+
+
+async def main(drop: bool):
+    # No statement timeout: the backfill reads all of audit_events
+    conn = await asyncpg.connect(**get_db_config(), command_timeout=None)
+    try:
+        await (downgrade(conn) if drop else upgrade(conn))
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audit summary rollup migration")
+    parser.add_argument("--drop", action="store_true", help="drop the rollups instead")
+    asyncio.run(main(parser.parse_args().drop))
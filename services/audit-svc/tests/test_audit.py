@@ -158,15 +158,22 @@ class TestAuditLogger:
         
         # Mock database responses
         mock_conn = mock_db_pool.acquire.return_value.__aenter__.return_value
-        mock_conn.fetchval.side_effect = [100, 5, 2, 1, 0]  # Various counts
+        mock_conn.fetchval.return_value = True  # Rollups installed
+        
+        def count_row(event_type, severity, failed, count):
+            return {'dimension': 'count', 'event_type': event_type, 'severity': severity,
+                    'failed': failed, 'event_count': count}
+        
         mock_conn.fetch.side_effect = [
-            [{'event_type': 'data_read', 'count': 50}, {'event_type': 'login_success', 'count': 30}],
-            [{'severity': 'medium', 'count': 70}, {'severity': 'low', 'count': 30}],
-            [{'actor_id': uuid4(), 'actor_email': 'user@aivo.com', 'event_count': 20}],
-            [{'resource': 'student_data', 'access_count': 40}],
+            [count_row('data_read', 'medium', False, 50), count_row('login_success', 'low', False, 30),
+             count_row('login_failure', 'medium', True, 2), count_row('data_write', 'medium', False, 18),
+             {'dimension': 'actor', 'actor_id': uuid4(), 'actor_email': 'user@aivo.com',
+              'event_count': 20, 'unique_actors': 5},
+             {'dimension': 'resource', 'resource': 'student_data', 'event_count': 40}],
             [{'id': uuid4(), 'timestamp': datetime.utcnow(), 'event_type': 'permission_denied', 
               'action': 'unauthorized_access', 'resource': 'admin_panel', 'severity': 'high', 'outcome': 'failure'}]
         ]
+        mock_conn.fetchrow.return_value = {'access_reviews_completed': 1, 'support_sessions_approved': 0}
         
         report = await audit_logger.generate_summary_report(
             tenant_id=tenant_id,
@@ -0,0 +1,101 @@
+"""
+AIVO Audit Service - Audit Query Tests
+S1-13 Implementation - Keyset pagination for audit event queries
+
+Tests the audit event query builder:
+- Cursors page by (timestamp, id) instead of OFFSET
+- Only requested columns (plus the key columns) are selected
+- Search terms are LIKE-escaped; sort columns are whitelisted
+- query_event_page returns a next cursor only when more events follow
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from pydantic import ValidationError
+
+from app.audit_logger import AuditLogger, build_event_query, decode_cursor, encode_cursor
+from app.models import AuditEventType, AuditQuery
+
+
+def test_cursor_pages_by_keyset():
+    tenant_id = uuid4()
+    last_id = uuid4()
+    last_timestamp = datetime(2025, 3, 1, 12, 0, 0)
+    cursor = encode_cursor(last_timestamp, last_id, "desc")
+
+    sql, params = build_event_query(AuditQuery(tenant_id=tenant_id, cursor=cursor, page=7, page_size=50))
+
+    assert "(timestamp, id) < ($2, $3)" in sql
+    assert sql.endswith("ORDER BY timestamp DESC, id DESC LIMIT $4")
+    assert "OFFSET" not in sql
+    assert params == [tenant_id, last_timestamp, last_id, 51]
+
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "asc")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", "desc")
+
+
+def test_projection_and_offset_fallback():
+    sql, params = build_event_query(AuditQuery(
+        tenant_id=uuid4(), fields=["actor_email"], sort_by="severity", sort_order="asc", page=3, page_size=20
+    ))
+
+    columns = sql[len("SELECT "):sql.index(" FROM")].split(", ")
+    assert "actor_email" in columns and "metadata" not in columns
+    assert {"id", "timestamp", "event_type", "tenant_id"} <= set(columns)
+    assert "ORDER BY severity ASC, id ASC LIMIT $2 OFFSET $3" in sql
+    assert params[1:] == [20, 40]
+
+
+def test_search_escaped_and_sort_whitelisted():
+    sql, params = build_event_query(AuditQuery(search_term="100%_done", event_types=[AuditEventType.DATA_READ]))
+
+    assert "action ILIKE $2 OR resource ILIKE $2 OR reason ILIKE $2" in sql
+    assert params == [["data_read"], "%100\\%\\_done%", 51]
+
+    with pytest.raises(ValidationError):
+        AuditQuery(sort_by="timestamp; DROP TABLE audit_events")
+    with pytest.raises(ValidationError):
+        AuditQuery(fields=["password"])
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def fetch(self, sql, *params):
+        self.queries.append((sql, params))
+        return self.rows[:params[-1]]
+
+
+@pytest.mark.asyncio
+async def test_next_cursor_only_when_more_events_follow():
+    tenant_id = uuid4()
+    start = datetime(2025, 3, 1)
+    rows = [
+        {"id": uuid4(), "timestamp": start - timedelta(minutes=i), "event_type": "data_read", "severity": "low",
+         "tenant_id": tenant_id, "action": "view", "resource": "lessons", "outcome": "success",
+         "metadata": '{"path": "/lessons"}'}
+        for i in range(5)
+    ]
+
+    with patch('app.audit_logger.get_db_pool', return_value=FakePool(rows)):
+        logger = AuditLogger()
+        events, cursor = await logger.query_event_page(AuditQuery(tenant_id=tenant_id, page_size=3))
+        assert [event.id for event in events] == [row["id"] for row in rows[:3]]
+        assert events[0].metadata == {"path": "/lessons"}
+        assert decode_cursor(cursor, "desc") == (rows[2]["timestamp"], rows[2]["id"])
+
+        events, cursor = await logger.query_event_page(AuditQuery(tenant_id=tenant_id, page_size=5))
+        assert len(events) == 5
+        assert cursor is None
@@ -0,0 +1,132 @@
+"""
+AIVO Audit Service - Audit Summary Tests
+S1-13 Implementation - Single-pass summary reports over hourly rollups
+
+Tests the audit summary engine:
+- Whole hours of a range are read from rollups, edges from raw events
+- Without rollups the whole range is scanned in one statement
+- Actors are reported with their most recently seen email
+- Report metrics are assembled from the tagged summary rows
+"""
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app import database, summary
+from app.summary import build_summary_query, rollup_window, summarize_events
+
+
+def test_rollup_window_covers_whole_hours_only():
+    start = datetime(2025, 3, 1, 9, 15)
+    end = datetime(2025, 3, 2, 17, 40)
+    assert rollup_window(start, end) == (datetime(2025, 3, 1, 10), datetime(2025, 3, 2, 17))
+
+    # Aligned bounds need no edge scan on the left
+    assert rollup_window(datetime(2025, 3, 1, 9), end)[0] == datetime(2025, 3, 1, 9)
+
+    # Less than a whole hour: empty window, everything is an edge
+    short_start = datetime(2025, 3, 1, 9, 15)
+    assert rollup_window(short_start, short_start + timedelta(minutes=50)) == (short_start, short_start)
+
+    # Hours are UTC
+    ist = timezone(timedelta(hours=5, minutes=30))
+    first, last = rollup_window(datetime(2025, 3, 1, 9, 0, tzinfo=ist), datetime(2025, 3, 1, 12, 0, tzinfo=ist))
+    assert first == datetime(2025, 3, 1, 4, 0, tzinfo=timezone.utc)
+    assert last == datetime(2025, 3, 1, 6, 0, tzinfo=timezone.utc)
+
+
+def test_summary_query_reads_rollups_only_when_installed():
+    with_rollups = build_summary_query(True)
+    for table in ("audit_event_rollups_hourly", "audit_actor_rollups_hourly", "audit_resource_rollups_hourly"):
+        assert table in with_rollups
+    assert with_rollups.count("FROM audit_events") == 1
+
+    without_rollups = build_summary_query(False)
+    assert "rollups_hourly" not in without_rollups
+    assert without_rollups.count("FROM audit_events") == 1
+
+
+def test_actor_email_is_the_latest_seen():
+    for query in (build_summary_query(True), build_summary_query(False)):
+        assert "MAX(actor_email)" not in query
+        assert "array_agg(actor_email ORDER BY actor_email_at DESC)" in query
+
+    assert "MAX(actor_email)" not in database.AUDIT_ROLLUP_UPSERT
+    assert "array_agg(actor_email ORDER BY timestamp DESC)" in database.AUDIT_ROLLUP_UPSERT
+    assert "actor_email_at TIMESTAMPTZ" in database.AUDIT_ROLLUP_DDL
+
+
+class FakeConnection:
+    def __init__(self, installed, summary_rows, risk_rows=()):
+        self.installed = installed
+        self.summary_rows = summary_rows
+        self.risk_rows = list(risk_rows)
+        self.fetches = []
+
+    async def fetchval(self, sql, *params):
+        return self.installed
+
+    async def fetch(self, sql, *params):
+        self.fetches.append((sql, params))
+        return self.summary_rows if len(self.fetches) == 1 else self.risk_rows
+
+    async def fetchrow(self, sql, *params):
+        return {"access_reviews_completed": 2, "support_sessions_approved": 1}
+
+
+def count_row(event_type, severity, failed, count):
+    return {"dimension": "count", "event_type": event_type, "severity": severity,
+            "failed": failed, "event_count": count}
+
+
+@pytest.mark.asyncio
+async def test_report_assembled_from_single_summary_query(monkeypatch):
+    monkeypatch.setattr(summary, "_rollups_installed", False)
+    tenant_id = uuid4()
+    actor_id = uuid4()
+    start = datetime(2025, 1, 1, 0, 30)
+    end = datetime(2025, 12, 31, 23, 59)
+    conn = FakeConnection(True, [
+        count_row("data_read", "low", False, 900),
+        count_row("permission_denied", "high", True, 7),
+        count_row("permission_denied", "medium", True, 3),
+        count_row("login_failure", "medium", True, 10),
+        {"dimension": "actor", "actor_id": actor_id, "actor_email": "teacher@school.org",
+         "event_count": 600, "unique_actors": 42},
+        {"dimension": "resource", "resource": "gradebook", "event_count": 800},
+    ])
+
+    report = await summarize_events(conn, tenant_id, start, end)
+
+    summary_sql, params = conn.fetches[0]
+    assert "audit_event_rollups_hourly" in summary_sql
+    assert params == (tenant_id, start, end, datetime(2025, 1, 1, 1), datetime(2025, 12, 31, 23))
+
+    assert report.total_events == 920
+    assert report.events_by_type == {"data_read": 900, "login_failure": 10, "permission_denied": 10}
+    assert report.events_by_severity == {"low": 900, "medium": 13, "high": 7}
+    assert report.failed_events == 20
+    assert report.policy_violations == 7
+    assert report.unique_actors == 42
+    assert report.top_actors == [{"actor_id": str(actor_id), "actor_email": "teacher@school.org", "event_count": 600}]
+    assert report.top_resources == [{"resource": "gradebook", "access_count": 800}]
+    assert report.access_reviews_completed == 2
+    assert report.support_sessions_approved == 1
+
+
+@pytest.mark.asyncio
+async def test_without_rollups_whole_range_is_scanned(monkeypatch):
+    monkeypatch.setattr(summary, "_rollups_installed", False)
+    start = datetime(2025, 1, 1)
+    end = datetime(2025, 2, 1)
+    conn = FakeConnection(False, [])
+
+    report = await summarize_events(conn, uuid4(), start, end)
+
+    summary_sql, params = conn.fetches[0]
+    assert "rollups_hourly" not in summary_sql
+    assert params[3:] == (start, start)
+    assert report.total_events == 0
+    assert report.unique_actors == 0
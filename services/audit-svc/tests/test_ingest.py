@@ -0,0 +1,199 @@
+"""
+AIVO Audit Service - Ingest Queue Tests
+S1-13 Implementation - Batched audit event ingestion
+
+Tests the buffered audit ingest queue:
+- Records are COPYed in size-bounded batches
+- Durable (HIGH/CRITICAL) submits return only once committed
+- Journaled records survive a failed shutdown and are replayed idempotently
+- A rejected batch falls back to row-by-row inserts
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import asyncpg
+import pytest
+
+from app.database import AUDIT_TABLES, log_audit_event
+from app.ingest import AuditIngestQueue, IngestConfig, start_ingest_queue, stop_ingest_queue
+from app.models import AuditEventType, AuditSeverity
+
+
+class FakeConnection:
+    """Records writes; optionally fails or rejects rows"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def copy_records_to_table(self, table, records, columns):
+        await asyncio.sleep(self.pool.delay)
+        if self.pool.fail:
+            raise ConnectionError("database unavailable")
+        if any(row[0] in self.pool.bad_ids for row in records):
+            raise asyncpg.DataError("invalid input value")
+        self.pool.copies.append((table, list(records)))
+
+    async def executemany(self, sql, rows):
+        if self.pool.fail:
+            raise ConnectionError("database unavailable")
+        self.pool.statements.append((sql, list(rows)))
+
+    async def execute(self, sql, *args):
+        if args[0] in self.pool.bad_ids:
+            raise asyncpg.DataError("invalid input value")
+        self.pool.statements.append((sql, [args]))
+
+
+class FakePool:
+    def __init__(self, delay: float = 0.0, fail: bool = False, bad_ids=()):
+        self.delay = delay
+        self.fail = fail
+        self.bad_ids = set(bad_ids)
+        self.copies = []
+        self.statements = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+    def rows(self):
+        return [row for _, rows in self.copies for row in rows] + \
+            [row for _, rows in self.statements for row in rows]
+
+
+def make_queue(pool, **overrides) -> AuditIngestQueue:
+    async def get_pool():
+        return pool
+
+    config = IngestConfig(**{"retry_backoff": 0.01, "drain_timeout": 1.0, **overrides})
+    return AuditIngestQueue(get_pool, {"data_access_logs": AUDIT_TABLES["data_access_logs"]}, config)
+
+
+def make_row(record_id=None):
+    return (record_id or uuid4(),) + (None,) * (len(AUDIT_TABLES["data_access_logs"]) - 1)
+
+
+@pytest.mark.asyncio
+async def test_records_written_in_size_bounded_batches():
+    pool = FakePool()
+    queue = make_queue(pool, batch_size=500, flush_interval=5.0)
+    await queue.start()
+
+    rows = [make_row() for _ in range(1200)]
+    for row in rows:
+        await queue.submit("data_access_logs", row)
+    await queue.flush()
+    await queue.stop()
+
+    assert [len(records) for _, records in pool.copies] == [500, 500, 200]
+    assert pool.rows() == rows
+    stats = queue.get_stats()
+    assert stats["written"] == 1200
+    assert stats["queue_depth"] == 0
+    assert stats["flush_latency_ms"]["p50"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_durable_submits_wait_for_shared_commit():
+    pool = FakePool(delay=0.05)
+    queue = make_queue(pool, flush_interval=5.0)
+    await queue.start()
+
+    await queue.submit("data_access_logs", make_row())
+    start = asyncio.get_running_loop().time()
+    await asyncio.gather(*(queue.submit("data_access_logs", make_row(), durable=True) for _ in range(20)))
+    elapsed = asyncio.get_running_loop().time() - start
+
+    # Committed without waiting for flush_interval, in a single batch
+    assert elapsed < 1.0
+    assert len(pool.rows()) == 21
+    assert len(pool.copies) == 1
+    assert queue.get_stats()["durable_waiting"] == 0
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_journal_replays_unwritten_records(tmp_path):
+    journal_path = str(tmp_path / "audit.journal")
+    down = FakePool(fail=True)
+    queue = make_queue(down, journal_path=journal_path, journal_fsync=False, drain_timeout=0.1)
+    await queue.start()
+    rows = [make_row() for _ in range(5)]
+    for row in rows:
+        await queue.submit("data_access_logs", row)
+    await queue.stop()
+    assert down.rows() == []
+
+    up = FakePool()
+    queue = make_queue(up, journal_path=journal_path, journal_fsync=False)
+    await queue.start()
+    await queue.submit("data_access_logs", make_row())
+    await queue.flush()
+    await queue.stop()
+
+    # Replayed rows are inserted idempotently, new rows are COPYed
+    replayed_sql, replayed_rows = up.statements[0]
+    assert "ON CONFLICT (id) DO NOTHING" in replayed_sql
+    assert [str(row[0]) for row in replayed_rows] == [str(row[0]) for row in rows]
+    assert len(up.copies[0][1]) == 1
+    assert queue.stats["replayed"] == 5
+
+    # Everything committed: nothing replays on the next start
+    queue = make_queue(FakePool(), journal_path=journal_path, journal_fsync=False)
+    await queue.start()
+    assert queue.depth == 0
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_rejected_batch_falls_back_to_row_inserts():
+    bad_id = uuid4()
+    pool = FakePool(bad_ids=[bad_id])
+    queue = make_queue(pool)
+    await queue.start()
+
+    for record_id in (uuid4(), bad_id, uuid4()):
+        await queue.submit("data_access_logs", make_row(record_id))
+    await queue.flush()
+    await queue.stop()
+
+    assert len(pool.statements) == 2
+    assert queue.stats["rejected_records"] == 1
+
+
+@pytest.mark.asyncio
+async def test_high_severity_events_are_durable():
+    pool = FakePool()
+
+    async def get_pool():
+        return pool
+
+    queue = await start_ingest_queue(get_pool, AUDIT_TABLES, IngestConfig(flush_interval=5.0))
+    try:
+        await log_audit_event(
+            event_type=AuditEventType.PERMISSION_DENIED,
+            action="export_records",
+            resource="student_records",
+            severity=AuditSeverity.HIGH,
+            tenant_id=uuid4()
+        )
+        # Returned only after the commit
+        assert len(pool.copies) == 1
+
+        await log_audit_event(
+            event_type=AuditEventType.DATA_READ,
+            action="view_lesson",
+            resource="lessons",
+            severity=AuditSeverity.LOW,
+            tenant_id=uuid4()
+        )
+        assert queue.depth == 1
+    finally:
+        await stop_ingest_queue()
+    assert len(pool.rows()) == 2
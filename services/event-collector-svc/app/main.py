@@ -39,35 +39,32 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Event Collector Service S2-14")
     
     # Initialize Kafka writer
-    kafka_config = {
+    acks = os.getenv('KAFKA_ACKS', 'all')
+    writer_config = {
         'bootstrap_servers': os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'localhost:9092'),
         'topic': os.getenv('KAFKA_TOPIC', 'events'),
+        'dlq_topic': os.getenv('DLQ_TOPIC', 'events-dlq'),
         'client_id': os.getenv('KAFKA_CLIENT_ID', 'event-collector-svc'),
-        'max_retries': int(os.getenv('KAFKA_MAX_RETRIES', '3')),
-        'retry_backoff_ms': int(os.getenv('KAFKA_RETRY_BACKOFF_MS', '100')),
+        'retries': int(os.getenv('KAFKA_MAX_RETRIES', '3')),
         'request_timeout_ms': int(os.getenv('KAFKA_REQUEST_TIMEOUT_MS', '30000')),
         'compression_type': os.getenv('KAFKA_COMPRESSION_TYPE', 'gzip'),
-        'acks': os.getenv('KAFKA_ACKS', 'all'),
-        'max_in_flight_requests_per_connection': int(os.getenv('KAFKA_MAX_IN_FLIGHT', '1'))
-    }
-    
-    buffer_config = {
+        'acks': acks if acks == 'all' else int(acks),
+        'linger_ms': int(os.getenv('KAFKA_LINGER_MS', '10')),
+        'batch_size': int(os.getenv('KAFKA_BATCH_SIZE', '16384')),
+        'max_in_flight_requests_per_connection': int(os.getenv('KAFKA_MAX_IN_FLIGHT', '1')),
+        'max_in_flight_events': int(os.getenv('MAX_IN_FLIGHT_EVENTS', '10000')),
+        'ack_timeout_seconds': float(os.getenv('KAFKA_ACK_TIMEOUT_SECONDS', '10')),
+        'send_workers': int(os.getenv('KAFKA_SEND_WORKERS', '4')),
         'buffer_dir': os.getenv('BUFFER_DIR', './data/buffer'),
-        'max_buffer_size_mb': int(os.getenv('MAX_BUFFER_SIZE_MB', '100')),
-        'batch_size': int(os.getenv('BUFFER_BATCH_SIZE', '100'))
-    }
-    
-    dlq_config = {
-        'dlq_topic': os.getenv('DLQ_TOPIC', 'events-dlq'),
-        'poison_pill_threshold': int(os.getenv('POISON_PILL_THRESHOLD', '3'))
+        'buffer_max_age_minutes': int(os.getenv('BUFFER_MAX_AGE_MINUTES', '30')),
+        'buffer_max_bytes': int(os.getenv('MAX_BUFFER_SIZE_MB', '100')) * 1024 * 1024,
+        'buffer_segment_bytes': int(os.getenv('BUFFER_SEGMENT_MB', '16')) * 1024 * 1024,
+        'buffer_fsync_policy': os.getenv('BUFFER_FSYNC_POLICY', 'interval')
     }
     
     try:
-        kafka_writer = KafkaEventWriter(
-            kafka_config=kafka_config,
-            buffer_config=buffer_config,
-            dlq_config=dlq_config
-        )
+        kafka_writer = KafkaEventWriter(**writer_config)
+        await kafka_writer.initialize()
         kafka_writer._start_time = time.time()  # Track uptime
         
         # Set global writer in router
@@ -87,7 +84,7 @@ async def lifespan(app: FastAPI):
     
     if kafka_writer:
         try:
-            await kafka_writer.close()
+            await kafka_writer.shutdown()
             logger.info("Kafka writer closed successfully")
         except Exception as e:
             logger.error(f"Error closing Kafka writer: {e}")
@@ -153,7 +150,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     
     return JSONResponse(
         status_code=exc.status_code,
-        content=error_response.model_dump()
+        content=error_response.model_dump(),
+        headers=exc.headers
     )
 
 
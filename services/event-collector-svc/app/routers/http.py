@@ -15,7 +15,7 @@ from ..schemas import (
     EventBatchRequest, EventBatchResponse, BaseEvent,
     HealthResponse, MetricsResponse
 )
-from ..writer import KafkaEventWriter
+from ..writer import KafkaEventWriter, BackpressureError
 
 logger = logging.getLogger(__name__)
 
@@ -138,6 +138,13 @@ async def collect_events(
                     content=response.model_dump()
                 )
                 
+        except BackpressureError as e:
+            logger.warning(f"Rejecting batch {batch_id}: {e}")
+            raise HTTPException(
+                status_code=429,
+                detail="Too many events awaiting Kafka acknowledgement, retry later",
+                headers={"Retry-After": str(e.retry_after_seconds)}
+            )
         except Exception as e:
             logger.error(f"Failed to process event batch: {e}")
             raise HTTPException(status_code=500, detail="Internal processing error")
@@ -242,6 +249,12 @@ async def generate_test_events(
             "throughput_eps": count / (processing_time / 1000) if processing_time > 0 else 0
         }
         
+    except BackpressureError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_seconds)}
+        )
     except Exception as e:
         logger.error(f"Test event generation failed: {e}")
         raise HTTPException(status_code=500, detail="Test generation failed")
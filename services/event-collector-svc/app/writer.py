@@ -4,10 +4,14 @@ Handles event writing to Kafka with backpressure, buffering, and DLQ support
 """
 import asyncio
 import json
-import gzip
 import os
+import struct
+import threading
 import time
-from typing import List, Dict, Any, Optional, Tuple
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, List, Dict, Any, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
 from uuid import UUID, uuid4
 from pathlib import Path
@@ -16,106 +20,364 @@ import logging
 from kafka import KafkaProducer
 from kafka.errors import KafkaError, KafkaTimeoutError, NoBrokersAvailable
 import aiofiles
-import aiofiles.os
+from pydantic import BaseModel
 
-from .schemas import BaseEvent, EventBatchRequest, EventPriority
+from .schemas import BaseEvent
 
 logger = logging.getLogger(__name__)
 
 
+class BackpressureError(Exception):
+    """Raised when accepting a batch would exceed the in-flight event limit."""
+
+    def __init__(self, in_flight: int, limit: int, retry_after_seconds: int = 1):
+        self.in_flight = in_flight
+        self.limit = limit
+        self.retry_after_seconds = retry_after_seconds
+        super().__init__(f"{in_flight} events awaiting Kafka acks (limit {limit})")
+
+
+def _resolve_ack(ack: asyncio.Future, metadata: Any) -> None:
+    if not ack.done():
+        ack.set_result(metadata)
+
+
+def _reject_ack(ack: asyncio.Future, error: BaseException) -> None:
+    if not ack.done():
+        ack.set_exception(error)
+
+
+class _BufferedBatch(BaseModel):
+    """Record payload stored in the disk buffer log."""
+    batch_id: UUID
+    events: List[BaseEvent]
+
+
+class WALPosition(NamedTuple):
+    """Replay position: byte offset within a segment plus a running record index."""
+    segment: int
+    offset: int
+    index: int
+
+
 class DiskBuffer:
-    """Disk-based buffer for events when Kafka is unavailable."""
+    """
+    Segmented write-ahead log for events when Kafka is unavailable.
+    
+    Each batch is appended as one length-prefixed, CRC-checked record to the
+    active segment, which rolls over at ``segment_max_bytes``. Replay streams
+    records in order from a persisted cursor, and segments are deleted once
+    the cursor has moved past them. A torn record at the tail of the active
+    segment (crash mid-append) is truncated on open.
+    """
+    
+    RECORD_HEADER = struct.Struct(">IIQ")  # payload length, crc32, written-at epoch ms
+    SEGMENT_SUFFIX = ".wal"
+    CURSOR_FILE = "cursor.json"
+    FSYNC_POLICIES = ("always", "interval", "never")
     
-    def __init__(self, buffer_dir: str = "/tmp/event-buffer", max_age_minutes: int = 30):
+    def __init__(
+        self,
+        buffer_dir: str = "/tmp/event-buffer",
+        max_age_minutes: int = 30,
+        segment_max_bytes: int = 16 * 1024 * 1024,  # 16MB
+        max_buffer_bytes: Optional[int] = None,
+        fsync_policy: str = "interval",
+        fsync_interval_seconds: float = 1.0,
+        replay_chunk_bytes: int = 1024 * 1024  # 1MB
+    ):
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {self.FSYNC_POLICIES}, got {fsync_policy!r}")
+        
         self.buffer_dir = Path(buffer_dir)
         self.max_age = timedelta(minutes=max_age_minutes)
+        self.segment_max_bytes = segment_max_bytes
+        self.max_buffer_bytes = max_buffer_bytes
+        self.fsync_policy = fsync_policy
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self.replay_chunk_bytes = replay_chunk_bytes
         self.buffer_dir.mkdir(parents=True, exist_ok=True)
         
-    async def write_batch(self, events: List[BaseEvent], batch_id: UUID) -> bool:
-        """Write event batch to disk buffer."""
+        # Appends come from executor threads; replay reads never take the lock
+        # and only read up to the last fully written byte of the active segment
+        self._lock = threading.Lock()
+        self._active_file = None
+        self._active_segment = 0
+        self._active_size = 0
+        self._segment_sizes: Dict[int, int] = {}
+        self._next_index = 0
+        self._last_fsync = time.monotonic()
+        self.cursor = WALPosition(0, 0, 0)
+        
+        self.expired_records = 0
+        self.corrupted_records = 0
+        
+        self._recover()
+    
+    # Recovery
+    
+    def _segment_path(self, segment: int) -> Path:
+        return self.buffer_dir / f"{segment:010d}{self.SEGMENT_SUFFIX}"
+    
+    def _list_segments(self) -> List[int]:
+        return sorted(
+            int(path.stem) for path in self.buffer_dir.glob(f"*{self.SEGMENT_SUFFIX}")
+            if path.stem.isdigit()
+        )
+    
+    def _recover(self):
+        """Load the cursor, drop drained segments and truncate a torn tail."""
+        segments = self._list_segments()
+        cursor = self._load_cursor()
+        
+        if segments and cursor.segment < segments[0]:
+            cursor = WALPosition(segments[0], 0, cursor.index)
+        for segment in segments:
+            if segment < cursor.segment:
+                self._segment_path(segment).unlink()
+        segments = [segment for segment in segments if segment >= cursor.segment]
+        self.cursor = cursor
+        
+        pending = 0
+        for segment in segments:
+            path = self._segment_path(segment)
+            start = cursor.offset if segment == cursor.segment else 0
+            if start > path.stat().st_size:
+                # Cursor outran data that never reached disk; resume at what survived
+                start = path.stat().st_size
+                cursor = self.cursor = cursor._replace(offset=start)
+            is_last = segment == segments[-1]
+            with open(path, 'rb') as f:
+                count, valid_end = self._scan_segment(f, start, verify=is_last)
+            pending += count
+            
+            if is_last and valid_end < path.stat().st_size:
+                logger.warning(f"Truncating torn tail of buffer segment {path.name} at byte {valid_end}")
+                with open(path, 'r+b') as f:
+                    f.truncate(valid_end)
+                    os.fsync(f.fileno())
+            self._segment_sizes[segment] = path.stat().st_size
+        
+        self._next_index = cursor.index + pending
+        self._open_active(segments[-1] if segments else cursor.segment)
+        
+        if pending:
+            logger.info(f"Recovered disk buffer with {pending} pending batches in {len(segments)} segments")
+    
+    def _scan_segment(self, f, offset: int, verify: bool) -> Tuple[int, int]:
+        """Count whole records from offset; returns (count, end offset of last good record)."""
+        header_size = self.RECORD_HEADER.size
+        f.seek(offset)
+        count = 0
+        while True:
+            header = f.read(header_size)
+            if len(header) < header_size:
+                return count, offset
+            length, crc, written_ms = self.RECORD_HEADER.unpack(header)
+            if verify:
+                payload = f.read(length)
+                if len(payload) < length or self._checksum(written_ms, payload) != crc:
+                    return count, offset
+            else:
+                f.seek(length, os.SEEK_CUR)
+            offset += header_size + length
+            count += 1
+    
+    def _load_cursor(self) -> WALPosition:
         try:
-            filename = f"batch_{batch_id}_{int(time.time())}.json.gz"
-            filepath = self.buffer_dir / filename
+            with open(self.buffer_dir / self.CURSOR_FILE) as f:
+                data = json.load(f)
+            return WALPosition(int(data["segment"]), int(data["offset"]), int(data["index"]))
+        except FileNotFoundError:
+            return WALPosition(0, 0, 0)
+        except Exception as e:
+            logger.error(f"Unreadable buffer cursor, replaying from the oldest segment: {e}")
+            return WALPosition(0, 0, 0)
+    
+    def _open_active(self, segment: int):
+        if self._active_file:
+            self._sync(force=True)
+            self._active_file.close()
+        self._active_segment = segment
+        self._active_file = open(self._segment_path(segment), 'ab')
+        self._active_size = self._active_file.tell()
+        self._segment_sizes[segment] = self._active_size
+    
+    # Append
+    
+    @staticmethod
+    def _checksum(written_ms: int, payload: bytes) -> int:
+        return zlib.crc32(payload, zlib.crc32(written_ms.to_bytes(8, 'big')))
+    
+    def _sync(self, force: bool = False):
+        if self.fsync_policy == "never" and not force:
+            return
+        now = time.monotonic()
+        if force or self.fsync_policy == "always" or now - self._last_fsync >= self.fsync_interval_seconds:
+            os.fsync(self._active_file.fileno())
+            self._last_fsync = now
+    
+    def _append(self, payload: bytes) -> bool:
+        written_ms = int(time.time() * 1000)
+        record = self.RECORD_HEADER.pack(len(payload), self._checksum(written_ms, payload), written_ms) + payload
+        
+        with self._lock:
+            if self.max_buffer_bytes and self.size_bytes + len(record) > self.max_buffer_bytes:
+                logger.error(f"Disk buffer full ({self.size_bytes} bytes), refusing {len(record)} byte batch")
+                return False
             
-            # Serialize events to JSON
-            event_data = {
-                "batch_id": str(batch_id),
-                "timestamp": datetime.utcnow().isoformat(),
-                "events": [event.model_dump() for event in events]
-            }
+            if self._active_size and self._active_size + len(record) > self.segment_max_bytes:
+                self._open_active(self._active_segment + 1)
             
-            # Compress and write
-            compressed_data = gzip.compress(json.dumps(event_data).encode('utf-8'))
+            self._active_file.write(record)
+            self._active_file.flush()
+            self._sync()
             
-            async with aiofiles.open(filepath, 'wb') as f:
-                await f.write(compressed_data)
-                
-            logger.info(f"Buffered {len(events)} events to disk: {filename}")
+            self._active_size += len(record)
+            self._segment_sizes[self._active_segment] = self._active_size
+            self._next_index += 1
             return True
+    
+    async def write_batch(self, events: List[BaseEvent], batch_id: UUID) -> bool:
+        """Append event batch to the buffer log."""
+        try:
+            payload = _BufferedBatch(batch_id=batch_id, events=events).model_dump_json().encode('utf-8')
+            loop = asyncio.get_running_loop()
+            written = await loop.run_in_executor(None, self._append, payload)
+            if written:
+                logger.info(f"Buffered {len(events)} events to disk: batch {batch_id}")
+            return written
             
         except Exception as e:
             logger.error(f"Failed to write buffer batch {batch_id}: {e}")
             return False
     
-    async def read_batches(self) -> List[Tuple[UUID, List[BaseEvent]]]:
-        """Read all buffered batches that haven't expired."""
-        batches = []
-        current_time = datetime.utcnow()
+    # Replay
+    
+    def _read_chunk(self, position: WALPosition) -> Tuple[List[Tuple[WALPosition, _BufferedBatch]], WALPosition]:
+        """Read about replay_chunk_bytes of records from position; runs off the event loop."""
+        with self._lock:
+            active_segment, active_size = self._active_segment, self._active_size
         
-        try:
-            for filepath in self.buffer_dir.glob("batch_*.json.gz"):
+        segment, offset, index = position
+        if segment < active_segment and not self._segment_path(segment).exists():
+            following = [s for s in self._list_segments() if s > segment]
+            return [], WALPosition(following[0] if following else active_segment, 0, index)
+        
+        end = active_size if segment == active_segment else self._segment_path(segment).stat().st_size
+        expire_before_ms = (time.time() - self.max_age.total_seconds()) * 1000
+        header_size = self.RECORD_HEADER.size
+        records = []
+        chunk_end = offset + self.replay_chunk_bytes
+        
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            while offset < min(end, chunk_end):
+                header = f.read(header_size)
+                length, crc, written_ms = self.RECORD_HEADER.unpack(header) if len(header) == header_size else (0, 0, 0)
+                payload = f.read(length) if length else b''
+                if len(header) < header_size or len(payload) < length or self._checksum(written_ms, payload) != crc:
+                    # Lengths past a bad record can't be trusted; abandon the rest of the segment
+                    self.corrupted_records += 1
+                    logger.error(f"Corrupted record in buffer segment {segment} at byte {offset}, skipping segment tail")
+                    offset = end
+                    break
+                
+                offset += header_size + length
+                index += 1
+                if written_ms < expire_before_ms:
+                    self.expired_records += 1
+                    continue
                 try:
-                    # Check if file is too old
-                    file_time = datetime.fromtimestamp(filepath.stat().st_mtime)
-                    if current_time - file_time > self.max_age:
-                        await aiofiles.os.remove(filepath)
-                        logger.info(f"Removed expired buffer file: {filepath.name}")
-                        continue
-                    
-                    # Read and decompress
-                    async with aiofiles.open(filepath, 'rb') as f:
-                        compressed_data = await f.read()
-                    
-                    data = json.loads(gzip.decompress(compressed_data).decode('utf-8'))
-                    
-                    # Parse events
-                    batch_id = UUID(data["batch_id"])
-                    events = [BaseEvent(**event_data) for event_data in data["events"]]
-                    
-                    batches.append((batch_id, events))
-                    
+                    batch = _BufferedBatch.model_validate_json(payload)
                 except Exception as e:
-                    logger.error(f"Failed to read buffer file {filepath}: {e}")
-                    # Move corrupted file aside
-                    corrupted_path = filepath.with_suffix('.corrupted')
-                    await aiofiles.os.rename(filepath, corrupted_path)
-                    
-        except Exception as e:
-            logger.error(f"Failed to scan buffer directory: {e}")
-            
-        return batches
+                    self.corrupted_records += 1
+                    logger.error(f"Undecodable record in buffer segment {segment}: {e}")
+                    continue
+                records.append((WALPosition(segment, offset, index), batch))
+        
+        if offset >= end and segment < active_segment:
+            return records, WALPosition(segment + 1, 0, index)
+        return records, WALPosition(segment, offset, index)
     
-    async def remove_batch(self, batch_id: UUID) -> bool:
-        """Remove processed batch from buffer."""
-        try:
-            for filepath in self.buffer_dir.glob(f"batch_{batch_id}_*.json.gz"):
-                await aiofiles.os.remove(filepath)
-                logger.debug(f"Removed processed buffer file: {filepath.name}")
-                return True
-        except Exception as e:
-            logger.error(f"Failed to remove buffer batch {batch_id}: {e}")
-            return False
+    async def replay(self) -> AsyncIterator[Tuple[WALPosition, UUID, List[BaseEvent]]]:
+        """
+        Stream buffered batches in append order starting at the cursor.
+        
+        Yields (position, batch_id, events); pass position to commit() once
+        the batch is handled. Only one chunk of records is held in memory.
+        """
+        loop = asyncio.get_running_loop()
+        position = self.cursor
+        while True:
+            records, next_position = await loop.run_in_executor(None, self._read_chunk, position)
+            if not records and self.cursor == position and next_position != position:
+                # Only expired or unreadable records were skipped; nothing to hand back
+                await self.commit(next_position)
+            for record_position, batch in records:
+                yield record_position, batch.batch_id, batch.events
+            if next_position == position:
+                return
+            position = next_position
+    
+    def _commit(self, position: WALPosition):
+        tmp_path = self.buffer_dir / f"{self.CURSOR_FILE}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(position._asdict(), f)
+            if self.fsync_policy == "always":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.buffer_dir / self.CURSOR_FILE)
+        self.cursor = position
+        
+        # Drained segments go only after the cursor that covers them is durable
+        with self._lock:
+            drained = [s for s in self._segment_sizes if s < position.segment and s != self._active_segment]
+            for segment in drained:
+                self._segment_path(segment).unlink(missing_ok=True)
+                del self._segment_sizes[segment]
+    
+    async def commit(self, position: WALPosition):
+        """Persist replay progress and delete segments that are fully drained."""
+        if position.index < self.cursor.index:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._commit, position)
+    
+    # Status
+    
+    @property
+    def size_bytes(self) -> int:
+        return sum(self._segment_sizes.values())
+    
+    @property
+    def pending_batches(self) -> int:
+        return self._next_index - self.cursor.index
+    
+    async def close(self):
+        """Flush and fsync the active segment."""
+        with self._lock:
+            if self._active_file:
+                self._active_file.flush()
+                self._sync(force=True)
+                self._active_file.close()
+                self._active_file = None
     
     async def get_status(self) -> Dict[str, Any]:
         """Get buffer status for health checks."""
         try:
-            files = list(self.buffer_dir.glob("batch_*.json.gz"))
-            total_size = sum(f.stat().st_size for f in files if f.exists())
+            oldest = min(self._segment_sizes) if self._segment_sizes else None
+            oldest_path = self._segment_path(oldest) if oldest is not None else None
             
             return {
-                "buffered_batches": len(files),
-                "total_size_bytes": total_size,
-                "oldest_batch": min([f.stat().st_mtime for f in files]) if files else None,
+                "buffered_batches": self.pending_batches,
+                "total_size_bytes": self.size_bytes,
+                "segments": len(self._segment_sizes),
+                "oldest_batch": oldest_path.stat().st_mtime if self.pending_batches and oldest_path.exists() else None,
+                "cursor": self.cursor._asdict(),
+                "expired_batches": self.expired_records,
+                "corrupted_batches": self.corrupted_records,
+                "fsync_policy": self.fsync_policy,
                 "buffer_dir": str(self.buffer_dir),
                 "max_age_minutes": self.max_age.total_seconds() / 60
             }
@@ -132,11 +394,23 @@ class KafkaEventWriter:
         bootstrap_servers: str = "localhost:9092",
         topic: str = "learner_events",
         dlq_topic: str = "learner_events_dlq",
+        client_id: str = "event-collector-svc",
         max_request_size: int = 1048576,  # 1MB
         request_timeout_ms: int = 30000,  # 30 seconds
         retries: int = 3,
+        acks: Any = 'all',  # Wait for all replicas
+        compression_type: Optional[str] = 'gzip',
+        batch_size: int = 16384,  # 16KB batches
+        linger_ms: int = 10,  # Wait 10ms to batch more messages
+        max_in_flight_requests_per_connection: int = 5,
+        max_in_flight_events: int = 10000,
+        ack_timeout_seconds: float = 10.0,
+        send_workers: int = 4,
         buffer_dir: str = "/tmp/event-buffer",
-        buffer_max_age_minutes: int = 30
+        buffer_max_age_minutes: int = 30,
+        buffer_max_bytes: Optional[int] = None,
+        buffer_segment_bytes: int = 16 * 1024 * 1024,  # 16MB
+        buffer_fsync_policy: str = "interval"
     ):
         self.bootstrap_servers = bootstrap_servers
         self.topic = topic
@@ -144,18 +418,33 @@ class KafkaEventWriter:
         self.producer = None
         self.producer_config = {
             'bootstrap_servers': bootstrap_servers.split(','),
+            'client_id': client_id,
             'max_request_size': max_request_size,
             'request_timeout_ms': request_timeout_ms,
             'retries': retries,
-            'acks': 'all',  # Wait for all replicas
-            'compression_type': 'gzip',
-            'batch_size': 16384,  # 16KB batches
-            'linger_ms': 10,  # Wait 10ms to batch more messages
+            'acks': acks,
+            'compression_type': compression_type,
+            'batch_size': batch_size,
+            'linger_ms': linger_ms,
+            'max_in_flight_requests_per_connection': max_in_flight_requests_per_connection,
             'buffer_memory': 33554432,  # 32MB buffer
             'value_serializer': lambda v: json.dumps(v).encode('utf-8'),
             'key_serializer': lambda k: str(k).encode('utf-8') if k else None
         }
         
+        # Backpressure - events handed to the producer but not yet acked
+        self.max_in_flight_events = max_in_flight_events
+        self.ack_timeout_seconds = ack_timeout_seconds
+        self.in_flight_events = 0
+        self.backpressure_rejections = 0
+        
+        # kafka-python's send() can block on metadata refresh or a full
+        # accumulator, so it never runs on the event loop
+        self._send_executor = ThreadPoolExecutor(
+            max_workers=send_workers,
+            thread_name_prefix="kafka-send"
+        )
+        
         # Metrics
         self.events_processed = 0
         self.events_dlq = 0
@@ -165,7 +454,13 @@ class KafkaEventWriter:
         self.last_event_count = 0
         
         # Disk buffer
-        self.disk_buffer = DiskBuffer(buffer_dir, buffer_max_age_minutes)
+        self.disk_buffer = DiskBuffer(
+            buffer_dir,
+            buffer_max_age_minutes,
+            segment_max_bytes=buffer_segment_bytes,
+            max_buffer_bytes=buffer_max_bytes,
+            fsync_policy=buffer_fsync_policy
+        )
         
         # Connection state
         self.kafka_available = False
@@ -198,22 +493,29 @@ class KafkaEventWriter:
                 pass
         
         if self.producer:
-            self.producer.flush()
-            self.producer.close()
-            
+            await self._run_blocking(self.producer.flush)
+            await self._run_blocking(self.producer.close)
+        
+        self._send_executor.shutdown(wait=False)
+        await self.disk_buffer.close()
         logger.info("Kafka event writer shutdown")
     
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking kafka-python call on the send executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._send_executor, partial(func, *args, **kwargs))
+    
     async def _connect_kafka(self) -> bool:
         """Connect to Kafka cluster."""
         try:
             if self.producer:
-                self.producer.close()
+                await self._run_blocking(self.producer.close)
             
-            self.producer = KafkaProducer(**self.producer_config)
+            self.producer = await self._run_blocking(KafkaProducer, **self.producer_config)
             
             # Test connection by getting metadata
-            metadata = self.producer.list_topics()
-            if self.topic not in metadata:
+            partitions = await self._run_blocking(self.producer.partitions_for, self.topic)
+            if not partitions:
                 logger.warning(f"Topic {self.topic} not found in Kafka cluster")
             
             self.kafka_available = True
@@ -239,8 +541,8 @@ class KafkaEventWriter:
                 return await self._connect_kafka()
             
             # Simple health check - try to get topic metadata
-            metadata = self.producer.list_topics()
-            self.kafka_available = self.topic in metadata
+            partitions = await self._run_blocking(self.producer.partitions_for, self.topic)
+            self.kafka_available = bool(partitions)
             self.last_connection_check = current_time
             
             return self.kafka_available
@@ -276,8 +578,15 @@ class KafkaEventWriter:
         """
         Write batch of events to Kafka.
         
+        Sends are dispatched off the event loop and the batch is only
+        reported once every record has been acknowledged (or has failed),
+        so a slow broker delays this batch without stalling other requests.
+        
         Returns:
             Tuple of (accepted_count, rejected_count, dlq_event_ids)
+        
+        Raises:
+            BackpressureError: If too many events are already awaiting acks
         """
         start_time = time.time()
         accepted = 0
@@ -298,52 +607,34 @@ class KafkaEventWriter:
                 await self._write_to_dlq(events, "buffer_write_failed")
                 return 0, len(events), dlq_events
         
-        # Process events
+        valid_events = []
+        invalid_events = []
         for event in events:
-            try:
-                # Validate event
-                if not self._validate_event(event):
-                    rejected += 1
-                    dlq_events.append(event.event_id)
-                    await self._write_to_dlq([event], "validation_failed")
-                    continue
-                
-                # Serialize for Kafka
-                kafka_message = self._serialize_event(event)
-                partition_key = self._get_partition_key(event)
-                
-                # Send to Kafka
-                future = self.producer.send(
-                    self.topic,
-                    key=partition_key,
-                    value=kafka_message
-                )
-                
-                # For high priority events, wait for confirmation
-                if event.priority == EventPriority.CRITICAL:
-                    record_metadata = future.get(timeout=10)
-                    logger.debug(f"Critical event {event.event_id} written to partition {record_metadata.partition}")
-                
-                accepted += 1
-                self.kafka_writes += 1
-                
-            except KafkaTimeoutError:
-                rejected += 1
-                dlq_events.append(event.event_id)
-                await self._write_to_dlq([event], "kafka_timeout")
-                logger.error(f"Kafka timeout writing event {event.event_id}")
-                
-            except KafkaError as e:
-                rejected += 1
-                dlq_events.append(event.event_id)
-                await self._write_to_dlq([event], f"kafka_error: {str(e)}")
-                logger.error(f"Kafka error writing event {event.event_id}: {e}")
-                
-            except Exception as e:
-                rejected += 1
-                dlq_events.append(event.event_id)
-                await self._write_to_dlq([event], f"unexpected_error: {str(e)}")
-                logger.error(f"Unexpected error writing event {event.event_id}: {e}")
+            if self._validate_event(event):
+                valid_events.append(event)
+            else:
+                invalid_events.append(event)
+        
+        # Reserve capacity before any side effects so a 429 leaves nothing behind
+        self._reserve_in_flight(len(valid_events))
+        try:
+            if invalid_events:
+                rejected += len(invalid_events)
+                dlq_events.extend(event.event_id for event in invalid_events)
+                await self._write_to_dlq(invalid_events, "validation_failed")
+        except BaseException:
+            self._release_in_flight(len(valid_events))
+            raise
+        
+        # _produce releases the reservation as the producer settles each record
+        outcomes = await self._produce(valid_events)
+        
+        failed_events = await self._dead_letter_failures(valid_events, outcomes, batch_id)
+        accepted += len(valid_events) - len(failed_events)
+        rejected += len(failed_events)
+        dlq_events.extend(event.event_id for event in failed_events)
+        
+        self.kafka_writes += accepted
         
         # Update metrics
         processing_time = (time.time() - start_time) * 1000  # Convert to ms
@@ -358,6 +649,132 @@ class KafkaEventWriter:
         
         return accepted, rejected, dlq_events
     
+    def _reserve_in_flight(self, count: int):
+        """Claim in-flight capacity for a batch or reject it outright."""
+        if count and self.in_flight_events + count > self.max_in_flight_events:
+            self.backpressure_rejections += 1
+            raise BackpressureError(self.in_flight_events, self.max_in_flight_events)
+        self.in_flight_events += count
+    
+    def _release_in_flight(self, count: int = 1):
+        """Return in-flight capacity once the producer no longer holds the records."""
+        self.in_flight_events -= count
+    
+    async def _dead_letter_failures(
+        self,
+        events: List[BaseEvent],
+        outcomes: List[Any],
+        batch_id: UUID
+    ) -> List[BaseEvent]:
+        """Send events whose outcome is an exception to the DLQ; returns them."""
+        # Group failures by reason so each reason costs one DLQ message
+        failed: Dict[str, List[BaseEvent]] = {}
+        for event, outcome in zip(events, outcomes):
+            if not isinstance(outcome, BaseException):
+                continue
+            
+            if isinstance(outcome, KafkaTimeoutError):
+                reason = "kafka_timeout"
+            elif isinstance(outcome, KafkaError):
+                reason = f"kafka_error: {str(outcome)}"
+            else:
+                reason = f"unexpected_error: {str(outcome)}"
+            failed.setdefault(reason, []).append(event)
+        
+        failed_events = []
+        for reason, reason_events in failed.items():
+            failed_events.extend(reason_events)
+            await self._write_to_dlq(reason_events, reason)
+            logger.error(f"Failed writing {len(reason_events)} events from batch {batch_id}: {reason}")
+        return failed_events
+    
+    async def _produce(self, events: List[BaseEvent]) -> List[Any]:
+        """
+        Send events and wait for their acks; returns metadata or an exception per event.
+        
+        The caller has reserved in-flight capacity for ``events``. Each record
+        gives its share back from the producer's callback/errback, so records
+        still held by kafka-python after the ack wait times out keep counting.
+        """
+        if not events:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        messages = [
+            (self._get_partition_key(event), self._serialize_event(event))
+            for event in events
+        ]
+        
+        try:
+            send = self._send_executor.submit(self._send_messages, loop, messages)
+        except Exception as e:
+            self._release_in_flight(len(events))
+            return [e] * len(events)
+        
+        try:
+            record_futures = await asyncio.wrap_future(send)
+        except asyncio.CancelledError:
+            # Not started yet: nothing reached the producer
+            if send.cancel():
+                self._release_in_flight(len(events))
+            raise
+        
+        acks = [
+            future if isinstance(future, BaseException) else self._bridge_future(loop, future)
+            for future in record_futures
+        ]
+        pending = [ack for ack in acks if isinstance(ack, asyncio.Future)]
+        if pending:
+            gathered = asyncio.gather(*pending, return_exceptions=True)
+            try:
+                await asyncio.wait_for(asyncio.shield(gathered), self.ack_timeout_seconds)
+            except asyncio.TimeoutError:
+                pass
+        
+        return [self._ack_outcome(ack) for ack in acks]
+    
+    def _send_messages(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        messages: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Any]:
+        """Hand messages to the producer; runs on the send executor."""
+        def release(_):
+            loop.call_soon_threadsafe(self._release_in_flight, 1)
+        
+        futures = []
+        for key, value in messages:
+            try:
+                future = self.producer.send(self.topic, key=key, value=value)
+            except Exception as e:
+                release(e)
+                futures.append(e)
+                continue
+            future.add_callback(release)
+            future.add_errback(release)
+            futures.append(future)
+        return futures
+    
+    @staticmethod
+    def _bridge_future(loop: asyncio.AbstractEventLoop, record_future) -> asyncio.Future:
+        """Expose a kafka-python record future as an asyncio future."""
+        ack = loop.create_future()
+        record_future.add_callback(
+            lambda metadata: loop.call_soon_threadsafe(_resolve_ack, ack, metadata)
+        )
+        record_future.add_errback(
+            lambda error: loop.call_soon_threadsafe(_reject_ack, ack, error)
+        )
+        return ack
+    
+    @staticmethod
+    def _ack_outcome(ack: Any) -> Any:
+        if isinstance(ack, BaseException):
+            return ack
+        if not ack.done():
+            return KafkaTimeoutError("Timed out waiting for broker acknowledgement")
+        return ack.exception() or ack.result()
+    
     def _validate_event(self, event: BaseEvent) -> bool:
         """Validate event before sending to Kafka."""
         try:
@@ -393,7 +810,8 @@ class KafkaEventWriter:
             }
             
             if self.producer and self.kafka_available:
-                self.producer.send(
+                await self._run_blocking(
+                    self.producer.send,
                     self.dlq_topic,
                     value=dlq_message
                 )
@@ -417,27 +835,11 @@ class KafkaEventWriter:
                     await asyncio.sleep(30)  # Check every 30 seconds
                     continue
                 
-                # Read buffered batches
-                batches = await self.disk_buffer.read_batches()
-                
-                if not batches:
+                if not self.disk_buffer.pending_batches:
                     await asyncio.sleep(30)
                     continue
                 
-                logger.info(f"Processing {len(batches)} buffered batches")
-                
-                for batch_id, events in batches:
-                    try:
-                        accepted, rejected, dlq_events = await self.write_batch(events, batch_id)
-                        
-                        if accepted > 0 or rejected > 0:
-                            # Remove from buffer if processed
-                            await self.disk_buffer.remove_batch(batch_id)
-                            logger.info(f"Processed buffered batch {batch_id}: {accepted} accepted, {rejected} rejected")
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to process buffered batch {batch_id}: {e}")
-                
+                await self._replay_buffer()
                 await asyncio.sleep(10)  # Process more frequently when catching up
                 
             except asyncio.CancelledError:
@@ -446,6 +848,68 @@ class KafkaEventWriter:
                 logger.error(f"Error in buffer processor: {e}")
                 await asyncio.sleep(30)
     
+    async def _replay_buffer(self):
+        """
+        Produce buffered batches in order, committing the cursor batch by batch.
+        
+        Replay talks to the producer directly: going through write_batch would
+        re-check Kafka health per batch and could append the batch being
+        replayed back onto the log. The cursor only moves past a batch once
+        every record is acknowledged or dead-lettered; otherwise the pass stops
+        and the batch is produced again on the next one (at-least-once).
+        """
+        logger.info(f"Replaying {self.disk_buffer.pending_batches} buffered batches")
+        
+        async for position, batch_id, events in self.disk_buffer.replay():
+            if not self.kafka_available:
+                break
+            try:
+                delivered = await self._replay_batch(events, batch_id)
+            except BackpressureError:
+                # Live traffic has priority; resume from the cursor on the next pass
+                break
+            except Exception as e:
+                logger.error(f"Failed to process buffered batch {batch_id}: {e}")
+                break
+            
+            if not delivered:
+                logger.warning(f"Buffered batch {batch_id} not acknowledged yet, retrying on the next pass")
+                break
+            await self.disk_buffer.commit(position)
+    
+    async def _replay_batch(self, events: List[BaseEvent], batch_id: UUID) -> bool:
+        """Produce one buffered batch; False if any record is unacked or failed transiently."""
+        valid_events = []
+        invalid_events = []
+        for event in events:
+            if self._validate_event(event):
+                valid_events.append(event)
+            else:
+                invalid_events.append(event)
+        
+        self._reserve_in_flight(len(valid_events))
+        outcomes = await self._produce(valid_events)
+        
+        # Ack timeouts are checked by type: kafka-python before 2.1 does not
+        # mark KafkaTimeoutError as retriable
+        if any(
+            isinstance(outcome, KafkaTimeoutError) or getattr(outcome, 'retriable', False)
+            for outcome in outcomes
+        ):
+            return False
+        
+        failed_events = await self._dead_letter_failures(valid_events, outcomes, batch_id)
+        if invalid_events:
+            await self._write_to_dlq(invalid_events, "validation_failed")
+        
+        accepted = len(valid_events) - len(failed_events)
+        rejected = len(failed_events) + len(invalid_events)
+        self.kafka_writes += accepted
+        self.events_processed += accepted
+        self.events_dlq += rejected
+        logger.debug(f"Processed buffered batch {batch_id}: {accepted} accepted, {rejected} rejected")
+        return True
+    
     def get_metrics(self) -> Dict[str, Any]:
         """Get performance metrics."""
         current_time = time.time()
@@ -467,6 +931,9 @@ class KafkaEventWriter:
             'kafka_writes_total': self.kafka_writes,
             'dlq_events_total': self.events_dlq,
             'kafka_connected': self.kafka_available,
+            'in_flight_events': self.in_flight_events,
+            'max_in_flight_events': self.max_in_flight_events,
+            'backpressure_rejections_total': self.backpressure_rejections,
             'avg_processing_time_ms': avg_processing_time,
             'p99_processing_time_ms': p99_processing_time
         }
@@ -0,0 +1,148 @@
+"""
+Disk buffer spill and replay benchmark
+
+Buffers N events (default 1M) while "Kafka is down" and then replays them,
+comparing the previous one-gzip-file-per-batch buffer (directory glob,
+full rehydration, per-batch glob to delete) with the segmented WAL.
+
+Usage:
+    python benchmarks/bench_buffer.py [--events N] [--batch-size N] [--fsync POLICY] [--trace-memory]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple
+from uuid import UUID, uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.schemas import BaseEvent, EventType  # noqa: E402
+from app.writer import DiskBuffer  # noqa: E402
+
+
+class LegacyDiskBuffer:
+    """Reference copy of the previous file-per-batch buffer"""
+
+    def __init__(self, buffer_dir: str):
+        self.buffer_dir = Path(buffer_dir)
+
+    async def write_batch(self, events: List[BaseEvent], batch_id: UUID) -> bool:
+        event_data = {
+            "batch_id": str(batch_id),
+            "timestamp": datetime.utcnow().isoformat(),
+            "events": [event.model_dump(mode="json") for event in events]
+        }
+        path = self.buffer_dir / f"batch_{batch_id}_{int(time.time())}.json.gz"
+        path.write_bytes(gzip.compress(json.dumps(event_data).encode('utf-8')))
+        return True
+
+    async def read_batches(self) -> List[Tuple[UUID, List[BaseEvent]]]:
+        batches = []
+        for path in self.buffer_dir.glob("batch_*.json.gz"):
+            data = json.loads(gzip.decompress(path.read_bytes()).decode('utf-8'))
+            batches.append((UUID(data["batch_id"]), [BaseEvent(**e) for e in data["events"]]))
+        return batches
+
+    async def remove_batch(self, batch_id: UUID) -> bool:
+        for path in self.buffer_dir.glob(f"batch_{batch_id}_*.json.gz"):
+            path.unlink()
+            return True
+        return False
+
+
+def make_batch(size: int) -> List[BaseEvent]:
+    return [
+        BaseEvent(
+            event_id=uuid4(),
+            learner_id=uuid4(),
+            tenant_id=uuid4(),
+            event_type=EventType.INTERACTION,
+            timestamp=datetime.utcnow(),
+            source_service="bench",
+            event_data={"action": "click", "element": f"button_{i}", "page": "/lesson"}
+        )
+        for i in range(size)
+    ]
+
+
+async def spill(buffer, batches: int, template: List[BaseEvent]) -> float:
+    start = time.perf_counter()
+    for _ in range(batches):
+        await buffer.write_batch(template, uuid4())
+    return time.perf_counter() - start
+
+
+async def replay_legacy(buffer: LegacyDiskBuffer) -> int:
+    replayed = 0
+    for batch_id, events in await buffer.read_batches():
+        replayed += len(events)
+        await buffer.remove_batch(batch_id)
+    return replayed
+
+
+async def replay_wal(buffer: DiskBuffer) -> int:
+    replayed = 0
+    async for position, batch_id, events in buffer.replay():
+        replayed += len(events)
+        await buffer.commit(position)
+    return replayed
+
+
+async def measure(name: str, buffer, replay, batches: int, template: List[BaseEvent], trace_memory: bool):
+    spill_s = await spill(buffer, batches, template)
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    replayed = await replay(buffer)
+    replay_s = time.perf_counter() - start
+    line = (f"{name:<16} spill {spill_s:7.2f} s  replay {replay_s:7.2f} s "
+            f"({replayed / replay_s:9.0f} events/s)")
+    if trace_memory:
+        line += f"  replay peak {tracemalloc.get_traced_memory()[1] / 1e6:7.1f} MB"
+        tracemalloc.stop()
+    print(line)
+    return replay_s
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--fsync", default="interval", choices=DiskBuffer.FSYNC_POLICIES)
+    parser.add_argument("--skip-legacy", action="store_true",
+                        help="the legacy replay is quadratic in the number of batches")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="report peak replay allocations (slows both runs)")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    batches = args.events // args.batch_size
+    template = make_batch(args.batch_size)
+    print(f"events: {batches * args.batch_size}, batches: {batches} x {args.batch_size}, "
+          f"wal fsync: {args.fsync}")
+
+    with tempfile.TemporaryDirectory() as wal_dir:
+        wal_s = asyncio.run(measure(
+            "segmented wal", DiskBuffer(wal_dir, fsync_policy=args.fsync), replay_wal, batches, template, args.trace_memory
+        ))
+
+    if not args.skip_legacy:
+        with tempfile.TemporaryDirectory() as legacy_dir:
+            legacy_s = asyncio.run(measure(
+                "file per batch", LegacyDiskBuffer(legacy_dir), replay_legacy, batches, template, args.trace_memory
+            ))
+        print(f"replay speedup: {legacy_s / wal_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Kafka ingest load test against a local stub broker
+
+Offers batches to KafkaEventWriter.write_batch at a fixed rate while an
+in-process stub broker acknowledges records after a fixed latency. Compares
+the previous inline send path (synchronous producer.send plus a blocking
+future.get for CRITICAL events) with the executor-backed, gather-acked path.
+
+Usage:
+    python benchmarks/bench_ingest.py [--rate EPS] [--batches N] [--ack-ms MS]
+"""
+
+import argparse
+import asyncio
+import heapq
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import List, Tuple
+from uuid import UUID, uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from kafka.errors import KafkaError, KafkaTimeoutError  # noqa: E402
+
+from app.schemas import BaseEvent, EventPriority, EventType  # noqa: E402
+from app.writer import KafkaEventWriter  # noqa: E402
+
+
+class StubRecordFuture:
+    """Record future with kafka-python's callback and blocking get() API."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self.value = None
+
+    def add_callback(self, fn):
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return self
+        fn(self.value)
+        return self
+
+    def add_errback(self, fn):
+        return self  # the stub broker never fails a record
+
+    def get(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise KafkaTimeoutError("stub broker ack timeout")
+        return self.value
+
+    def complete(self, value):
+        with self._lock:
+            self.value = value
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(value)
+
+
+class StubBroker:
+    """Producer stand-in that acks each record ack_latency seconds after send."""
+
+    def __init__(self, ack_latency: float):
+        self.ack_latency = ack_latency
+        self._pending: List[Tuple[float, int, StubRecordFuture]] = []
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def send(self, topic, key=None, value=None):
+        future = StubRecordFuture()
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._pending, (time.perf_counter() + self.ack_latency, self._seq, future))
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        while self._running:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                due = []
+                now = time.perf_counter()
+                while self._pending and self._pending[0][0] <= now:
+                    due.append(heapq.heappop(self._pending)[2])
+                wait = self._pending[0][0] - now if self._pending and not due else None
+                if wait:
+                    self._cond.wait(wait)
+            for future in due:
+                future.complete({"partition": 0})
+
+    def partitions_for(self, topic):
+        return {0}
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+
+class LegacyWriter(KafkaEventWriter):
+    """Reference copy of the previous inline send loop"""
+
+    async def write_batch(self, events: List[BaseEvent], batch_id: UUID) -> Tuple[int, int, List[UUID]]:
+        accepted = 0
+        rejected = 0
+        for event in events:
+            if not self._validate_event(event):
+                rejected += 1
+                continue
+            try:
+                future = self.producer.send(
+                    self.topic,
+                    key=self._get_partition_key(event),
+                    value=self._serialize_event(event)
+                )
+                if event.priority == EventPriority.CRITICAL:
+                    future.get(timeout=10)
+                accepted += 1
+            except KafkaError:
+                rejected += 1
+        return accepted, rejected, []
+
+
+def make_batch(size: int, critical_every: int) -> List[BaseEvent]:
+    return [
+        BaseEvent(
+            event_id=uuid4(),
+            learner_id=uuid4(),
+            tenant_id=uuid4(),
+            event_type=EventType.INTERACTION,
+            timestamp=datetime.utcnow(),
+            priority=EventPriority.CRITICAL if i % critical_every == 0 else EventPriority.NORMAL,
+            source_service="bench",
+            event_data={"action": "click", "index": i}
+        )
+        for i in range(size)
+    ]
+
+
+async def run_load(writer: KafkaEventWriter, rate: float, batches: List[List[BaseEvent]]) -> Tuple[float, float]:
+    """Return (events/sec, p99 ingest latency ms) for batches arriving at a fixed rate
+
+    Latency is measured from each batch's scheduled arrival, so time spent
+    waiting behind a blocked event loop is counted against the writer.
+    """
+    interval = len(batches[0]) / rate
+    latencies = []
+
+    async def submit(index: int, batch: List[BaseEvent]):
+        arrival = start + index * interval
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        await writer.write_batch(batch, uuid4())
+        latencies.append((time.perf_counter() - arrival) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(submit(i, batch) for i, batch in enumerate(batches)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total_events = sum(len(batch) for batch in batches)
+    return total_events / elapsed, latencies[int(0.99 * (len(latencies) - 1))]
+
+
+async def bench(writer_cls, args, buffer_dir: str) -> Tuple[float, float]:
+    writer = writer_cls(buffer_dir=buffer_dir, max_in_flight_events=args.batches * args.batch_size)
+    writer.producer = StubBroker(args.ack_ms / 1000)
+    writer.kafka_available = True
+    writer.last_connection_check = float("inf")
+    batches = [make_batch(args.batch_size, args.critical_every) for _ in range(args.batches)]
+    try:
+        return await run_load(writer, args.rate, batches)
+    finally:
+        writer.producer.close()
+        writer._send_executor.shutdown(wait=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rate", type=float, default=10000, help="offered load in events/sec")
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--ack-ms", type=float, default=5.0)
+    parser.add_argument("--critical-every", type=int, default=20,
+                        help="mark every Nth event in a batch CRITICAL")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as buffer_dir:
+        legacy_eps, legacy_p99 = asyncio.run(bench(LegacyWriter, args, buffer_dir))
+        async_eps, async_p99 = asyncio.run(bench(KafkaEventWriter, args, buffer_dir))
+
+    print(f"offered: {args.rate:.0f} events/s, batches: {args.batches} x {args.batch_size} events, "
+          f"stub ack latency: {args.ack_ms:.1f} ms")
+    print(f"legacy inline send:  {legacy_eps:10.0f} events/s  p99 {legacy_p99:8.1f} ms")
+    print(f"executor + gather:   {async_eps:10.0f} events/s  p99 {async_p99:8.1f} ms  "
+          f"({async_eps / legacy_eps:.1f}x throughput)")
+
+
+if __name__ == "__main__":
+    main()
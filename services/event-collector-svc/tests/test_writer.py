@@ -0,0 +1,391 @@
+"""
+Event Collector Service - Kafka Writer Tests (S2-14)
+Tests for the non-blocking producer path, backpressure and the disk buffer WAL
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import List
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from kafka.errors import KafkaTimeoutError
+
+import app.routers.http as http_module
+from app.main import app
+from app.schemas import BaseEvent, EventType, EventPriority
+from app.writer import KafkaEventWriter, BackpressureError, DiskBuffer
+
+
+class StubRecordFuture:
+    """Minimal stand-in for kafka-python's FutureRecordMetadata."""
+
+    def __init__(self):
+        self._callbacks = []
+        self._errbacks = []
+        self._lock = threading.Lock()
+        self.value = None
+        self.exception = None
+        self.is_done = False
+
+    def add_callback(self, fn):
+        with self._lock:
+            if not self.is_done:
+                self._callbacks.append(fn)
+                return self
+        if self.exception is None:
+            fn(self.value)
+        return self
+
+    def add_errback(self, fn):
+        with self._lock:
+            if not self.is_done:
+                self._errbacks.append(fn)
+                return self
+        if self.exception is not None:
+            fn(self.exception)
+        return self
+
+    def complete(self, value=None, exception=None):
+        with self._lock:
+            self.value, self.exception, self.is_done = value, exception, True
+        for fn in (self._errbacks if exception is not None else self._callbacks):
+            fn(exception if exception is not None else value)
+
+
+class StubProducer:
+    """Producer whose acks are completed from a broker thread after a delay."""
+
+    def __init__(self, ack_delay: float = 0.0, fail_keys=()):
+        self.ack_delay = ack_delay
+        self.fail_keys = set(fail_keys)
+        self.sent = []
+        self.futures = []
+        self.send_threads = set()
+
+    def send(self, topic, key=None, value=None):
+        self.sent.append((topic, key, value))
+        self.send_threads.add(threading.current_thread().name)
+        future = StubRecordFuture()
+        self.futures.append(future)
+        if key in self.fail_keys:
+            outcome = {"exception": KafkaTimeoutError("broker timeout")}
+        else:
+            outcome = {"value": {"topic": topic, "partition": 0}}
+        if self.ack_delay is None:
+            return future  # never acked
+        threading.Timer(self.ack_delay, future.complete, kwargs=outcome).start()
+        return future
+
+    def partitions_for(self, topic):
+        return {0}
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_events(count: int, priority: EventPriority = EventPriority.NORMAL) -> List[BaseEvent]:
+    return [
+        BaseEvent(
+            event_id=uuid4(),
+            learner_id=uuid4(),
+            tenant_id=uuid4(),
+            event_type=EventType.INTERACTION,
+            timestamp=datetime.utcnow(),
+            priority=priority,
+            source_service="test-client",
+            event_data={"action": "click", "index": i}
+        )
+        for i in range(count)
+    ]
+
+
+def make_writer(tmp_path, producer: StubProducer, **kwargs) -> KafkaEventWriter:
+    writer = KafkaEventWriter(buffer_dir=str(tmp_path / "buffer"), **kwargs)
+    writer.producer = producer
+    writer.kafka_available = True
+    writer.last_connection_check = time.time()
+    return writer
+
+
+class TestNonBlockingWriter:
+    """Test the executor-backed send path and per-batch ack waiting."""
+
+    @pytest.mark.asyncio
+    async def test_batch_waits_for_all_acks(self, tmp_path):
+        producer = StubProducer(ack_delay=0.01)
+        writer = make_writer(tmp_path, producer)
+        events = make_events(20, EventPriority.CRITICAL)
+
+        accepted, rejected, dlq_events = await writer.write_batch(events, uuid4())
+
+        assert (accepted, rejected, dlq_events) == (20, 0, [])
+        assert writer.kafka_writes == 20
+        assert writer.in_flight_events == 0
+        assert all(name.startswith("kafka-send") for name in producer.send_threads)
+
+    @pytest.mark.asyncio
+    async def test_slow_ack_does_not_block_event_loop(self, tmp_path):
+        writer = make_writer(tmp_path, StubProducer(ack_delay=0.3))
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker_task = asyncio.create_task(ticker())
+        await writer.write_batch(make_events(5, EventPriority.CRITICAL), uuid4())
+        ticker_task.cancel()
+
+        # A blocking future.get() would have frozen the loop for the whole ack delay
+        assert ticks >= 10
+
+    @pytest.mark.asyncio
+    async def test_failed_acks_go_to_dlq(self, tmp_path):
+        events = make_events(4)
+        failing = str(events[1].learner_id)
+        producer = StubProducer(ack_delay=0.0, fail_keys=[failing])
+        writer = make_writer(tmp_path, producer)
+
+        accepted, rejected, dlq_events = await writer.write_batch(events, uuid4())
+
+        assert (accepted, rejected) == (3, 1)
+        assert dlq_events == [events[1].event_id]
+        dlq_messages = [value for topic, _, value in producer.sent if topic == writer.dlq_topic]
+        assert dlq_messages[0]["reason"] == "kafka_timeout"
+
+    @pytest.mark.asyncio
+    async def test_unacked_events_time_out(self, tmp_path):
+        writer = make_writer(tmp_path, StubProducer(ack_delay=None), ack_timeout_seconds=0.05)
+
+        accepted, rejected, dlq_events = await writer.write_batch(make_events(3), uuid4())
+
+        assert (accepted, rejected) == (0, 3)
+        # kafka-python still holds the records, so they still count against the limit
+        assert writer.in_flight_events == 3
+
+        for future in writer.producer.futures:
+            future.complete(exception=KafkaTimeoutError("expired in accumulator"))
+        await asyncio.sleep(0.01)
+        assert writer.in_flight_events == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_sends_release_in_flight(self, tmp_path):
+        producer = StubProducer()
+        events = make_events(3)
+
+        def send(topic, key=None, value=None):
+            if key == str(events[0].learner_id):
+                raise KafkaTimeoutError("metadata not available")
+            return StubProducer.send(producer, topic, key=key, value=value)
+
+        producer.send = send
+        writer = make_writer(tmp_path, producer)
+
+        accepted, rejected, _ = await writer.write_batch(events, uuid4())
+        await asyncio.sleep(0.01)
+
+        assert (accepted, rejected) == (2, 1)
+        assert writer.in_flight_events == 0
+
+    @pytest.mark.asyncio
+    async def test_in_flight_limit_raises_backpressure(self, tmp_path):
+        writer = make_writer(tmp_path, StubProducer(ack_delay=0.2), max_in_flight_events=10)
+
+        first = asyncio.create_task(writer.write_batch(make_events(8), uuid4()))
+        await asyncio.sleep(0.05)
+        assert writer.in_flight_events == 8
+
+        with pytest.raises(BackpressureError):
+            await writer.write_batch(make_events(5), uuid4())
+
+        assert (await first)[0] == 8
+        assert writer.backpressure_rejections == 1
+        assert (await writer.write_batch(make_events(5), uuid4()))[0] == 5
+
+    def test_collect_returns_429_when_saturated(self, tmp_path, monkeypatch):
+        writer = make_writer(tmp_path, StubProducer(), max_in_flight_events=0)
+        monkeypatch.setattr(http_module, "kafka_writer", writer)
+        events = [event.model_dump(mode="json") for event in make_events(2)]
+
+        response = TestClient(app).post("/api/v1/collect", json={"events": events})
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+
+
+async def drain(buffer: DiskBuffer) -> List[UUID]:
+    batch_ids = []
+    async for position, batch_id, events in buffer.replay():
+        batch_ids.append(batch_id)
+        await buffer.commit(position)
+    return batch_ids
+
+
+class TestDiskBuffer:
+    """Test the segmented write-ahead log used while Kafka is down."""
+
+    @pytest.mark.asyncio
+    async def test_replay_in_order_and_drop_drained_segments(self, tmp_path):
+        buffer = DiskBuffer(str(tmp_path), segment_max_bytes=4096, fsync_policy="never")
+        batch_ids = [uuid4() for _ in range(20)]
+        for batch_id in batch_ids:
+            assert await buffer.write_batch(make_events(3), batch_id)
+
+        assert buffer.pending_batches == 20
+        assert (await buffer.get_status())["segments"] > 1
+
+        assert await drain(buffer) == batch_ids
+        assert buffer.pending_batches == 0
+        assert len(list(tmp_path.glob("*.wal"))) == 1
+        assert await drain(buffer) == []
+
+    @pytest.mark.asyncio
+    async def test_replay_streams_events(self, tmp_path):
+        buffer = DiskBuffer(str(tmp_path))
+        events = make_events(4)
+        await buffer.write_batch(events, uuid4())
+
+        async for _, _, replayed in buffer.replay():
+            assert [e.event_id for e in replayed] == [e.event_id for e in events]
+            assert replayed[0].event_data == events[0].event_data
+
+    @pytest.mark.asyncio
+    async def test_crash_recovery_truncates_torn_tail_and_resumes_at_cursor(self, tmp_path):
+        buffer = DiskBuffer(str(tmp_path), segment_max_bytes=2048, fsync_policy="always")
+        batch_ids = [uuid4() for _ in range(10)]
+        for batch_id in batch_ids:
+            await buffer.write_batch(make_events(2), batch_id)
+
+        replayed = 0
+        async for position, _, _ in buffer.replay():
+            await buffer.commit(position)
+            replayed += 1
+            if replayed == 4:
+                break
+
+        # Crash mid-append: a header promising more payload than was written
+        active = sorted(tmp_path.glob("*.wal"))[-1]
+        with open(active, "ab") as f:
+            f.write(DiskBuffer.RECORD_HEADER.pack(500, 0, 0) + b'{"batch_id": "tor')
+        torn_size = active.stat().st_size
+        del buffer
+
+        recovered = DiskBuffer(str(tmp_path), segment_max_bytes=2048, fsync_policy="always")
+        assert active.stat().st_size < torn_size
+        assert recovered.pending_batches == 6
+
+        after_crash = uuid4()
+        await recovered.write_batch(make_events(1), after_crash)
+        assert await drain(recovered) == batch_ids[4:] + [after_crash]
+
+    @pytest.mark.asyncio
+    async def test_corrupted_record_in_sealed_segment_is_skipped(self, tmp_path):
+        buffer = DiskBuffer(str(tmp_path), segment_max_bytes=1500, fsync_policy="never")
+        batch_ids = [uuid4() for _ in range(6)]
+        for batch_id in batch_ids:
+            await buffer.write_batch(make_events(1), batch_id)
+
+        first = sorted(tmp_path.glob("*.wal"))[0]
+        data = bytearray(first.read_bytes())
+        data[DiskBuffer.RECORD_HEADER.size + 5] ^= 0xFF
+        first.write_bytes(bytes(data))
+
+        replayed = await drain(buffer)
+        assert batch_ids[0] not in replayed
+        assert replayed == [b for b in batch_ids if b in replayed]
+        assert buffer.corrupted_records == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_batches_are_skipped(self, tmp_path):
+        buffer = DiskBuffer(str(tmp_path), max_age_minutes=0)
+        await buffer.write_batch(make_events(1), uuid4())
+        await asyncio.sleep(0.01)
+
+        assert await drain(buffer) == []
+        assert buffer.expired_records == 1
+        assert buffer.pending_batches == 0
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_refuses_writes(self, tmp_path):
+        buffer = DiskBuffer(str(tmp_path), max_buffer_bytes=1024)
+        assert await buffer.write_batch(make_events(1), uuid4())
+        assert not await buffer.write_batch(make_events(5), uuid4())
+        assert buffer.pending_batches == 1
+
+    def test_rejects_unknown_fsync_policy(self, tmp_path):
+        with pytest.raises(ValueError):
+            DiskBuffer(str(tmp_path), fsync_policy="sometimes")
+
+
+class TestBufferReplay:
+    """Test replaying the disk buffer once Kafka is back."""
+
+    @staticmethod
+    async def buffer_batches(writer, count):
+        for _ in range(count):
+            await writer.disk_buffer.write_batch(make_events(2), uuid4())
+
+    @pytest.mark.asyncio
+    async def test_replay_produces_batches_and_commits_cursor(self, tmp_path):
+        producer = StubProducer(ack_delay=0.01)
+        writer = make_writer(tmp_path, producer)
+        await self.buffer_batches(writer, 3)
+
+        await writer._replay_buffer()
+
+        assert len(producer.sent) == 6
+        assert writer.disk_buffer.pending_batches == 0
+        assert writer.kafka_writes == 6
+        assert writer.in_flight_events == 0
+
+    @pytest.mark.asyncio
+    async def test_replay_never_appends_to_the_buffer(self, tmp_path, monkeypatch):
+        writer = make_writer(tmp_path, StubProducer())
+        await self.buffer_batches(writer, 3)
+
+        # A per-batch health check failing mid-replay used to re-buffer the batch
+        async def unhealthy():
+            return False
+
+        monkeypatch.setattr(writer, "_check_kafka_connection", unhealthy)
+        await writer._replay_buffer()
+
+        assert writer.disk_buffer._next_index == 3
+        assert writer.disk_buffer.pending_batches == 0
+
+    @pytest.mark.asyncio
+    async def test_unacked_batch_keeps_cursor(self, tmp_path, monkeypatch):
+        # kafka-python 2.0.2 does not mark ack timeouts as retriable
+        monkeypatch.setattr(KafkaTimeoutError, "retriable", False)
+        producer = StubProducer(ack_delay=None)
+        writer = make_writer(tmp_path, producer, ack_timeout_seconds=0.05)
+        await self.buffer_batches(writer, 2)
+
+        await writer._replay_buffer()
+
+        # Stopped at the first batch and nothing went to the DLQ
+        assert writer.disk_buffer.pending_batches == 2
+        assert len(producer.sent) == 2
+        assert writer.events_dlq == 0
+
+        writer.producer = StubProducer()
+        await writer._replay_buffer()
+        assert writer.disk_buffer.pending_batches == 0
+
+    @pytest.mark.asyncio
+    async def test_backpressure_pauses_replay(self, tmp_path):
+        writer = make_writer(tmp_path, StubProducer(), max_in_flight_events=1)
+        await self.buffer_batches(writer, 2)
+
+        await writer._replay_buffer()
+
+        assert writer.disk_buffer.pending_batches == 2
+        assert writer.in_flight_events == 0
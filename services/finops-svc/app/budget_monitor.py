@@ -8,18 +8,20 @@ alert generation for cost overruns and budget violations.
 import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
-from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, List, Optional, Tuple, Any
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple, Any
 
 from sqlalchemy import select, and_, or_, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .models import (
     Budget, BudgetAlert, UsageEvent, CostSummary,
-    BudgetType, BudgetPeriod, AlertSeverity, AlertChannel
+    BudgetPeriod, AlertSeverity, AlertChannel
 )
-from .database import get_db_session
+from .database import get_db_session, get_db_connection
 from .alerts import AlertManager
+from .config import config
+from .spend_counters import budget_scope, budget_spends, event_scopes, reconcile_spend_counters
 
 logger = logging.getLogger(__name__)
 
@@ -42,56 +44,139 @@ class BudgetMonitor:
     
     async def _check_budgets_with_session(self, session: AsyncSession) -> Dict[str, Any]:
         """Check budgets with database session."""
+        try:
+            # Get all active budgets
+            active_budgets = await self._load_active_budgets(session)
+            return await self._evaluate_budgets(active_budgets, session)
+            
+        except Exception as e:
+            logger.error(f"Budget monitoring failed: {e}")
+            return {
+                "budgets_checked": 0,
+                "alerts_triggered": 0,
+                "budgets_exceeded": 0,
+                "total_overage": Decimal('0'),
+                "errors": [f"General error: {str(e)}"]
+            }
+    
+    async def _evaluate_budgets(self, budgets: List[Budget], session: AsyncSession) -> Dict[str, Any]:
+        """
+        Evaluate budgets in one batched pass.
+        
+        Spend for every budget comes from a single spend counter query and the
+        resulting statuses are written back in a single UPDATE.
+        """
         results = {
-            "budgets_checked": 0,
+            "budgets_checked": len(budgets),
             "alerts_triggered": 0,
             "budgets_exceeded": 0,
             "total_overage": Decimal('0'),
             "errors": []
         }
         
-        try:
-            # Get all active budgets
-            query = select(Budget).where(Budget.is_active == True)
-            result = await session.execute(query)
-            active_budgets = result.scalars().all()
-            
-            results["budgets_checked"] = len(active_budgets)
-            
-            # Check each budget
-            for budget in active_budgets:
-                try:
-                    budget_status = await self._check_budget(budget, session)
-                    
-                    if budget_status["alerts_sent"] > 0:
-                        results["alerts_triggered"] += budget_status["alerts_sent"]
-                    
-                    if budget_status["is_exceeded"]:
-                        results["budgets_exceeded"] += 1
-                        results["total_overage"] += budget_status["overage_amount"]
-                    
-                    # Update budget status in database
-                    budget.current_spend = budget_status["current_spend"]
-                    budget.is_exceeded = budget_status["is_exceeded"]
-                    budget.last_alert_sent = budget_status.get("last_alert_sent")
-                    budget.last_alert_threshold = budget_status.get("last_alert_threshold")
-                    
-                except Exception as e:
-                    logger.error(f"Error checking budget {budget.id}: {e}")
-                    results["errors"].append(f"Budget {budget.id}: {str(e)}")
-            
-            await session.commit()
-            
-        except Exception as e:
-            logger.error(f"Budget monitoring failed: {e}")
-            results["errors"].append(f"General error: {str(e)}")
+        spends = await budget_spends(session, budgets)
+        updates = []
+        
+        for budget in budgets:
+            try:
+                budget_status = await self._check_budget(
+                    budget, session, current_spend=spends.get(str(budget.id), Decimal('0'))
+                )
+                
+                if budget_status["alerts_sent"] > 0:
+                    results["alerts_triggered"] += budget_status["alerts_sent"]
+                
+                if budget_status["is_exceeded"]:
+                    results["budgets_exceeded"] += 1
+                    results["total_overage"] += budget_status["overage_amount"]
+                
+                # Update budget status
+                budget.current_spend = budget_status["current_spend"]
+                budget.is_exceeded = budget_status["is_exceeded"]
+                budget.last_alert_sent = budget_status.get("last_alert_sent")
+                budget.last_alert_threshold = budget_status.get("last_alert_threshold")
+                updates.append(budget)
+                
+            except Exception as e:
+                logger.error(f"Error checking budget {budget.id}: {e}")
+                results["errors"].append(f"Budget {budget.id}: {str(e)}")
+        
+        if updates:
+            await session.execute(
+                text("""
+                    UPDATE budgets SET
+                        current_spend = u.current_spend,
+                        is_exceeded = u.is_exceeded,
+                        last_alert_sent = u.last_alert_sent,
+                        last_alert_threshold = u.last_alert_threshold,
+                        updated_at = NOW()
+                    FROM unnest(
+                        CAST(:ids AS uuid[]), CAST(:current_spends AS numeric[]),
+                        CAST(:is_exceeded AS boolean[]), CAST(:last_alert_sent AS timestamptz[]),
+                        CAST(:last_alert_threshold AS numeric[])
+                    ) AS u(id, current_spend, is_exceeded, last_alert_sent, last_alert_threshold)
+                    WHERE budgets.id = u.id
+                """),
+                {
+                    "ids": [str(budget.id) for budget in updates],
+                    "current_spends": [budget.current_spend for budget in updates],
+                    "is_exceeded": [budget.is_exceeded for budget in updates],
+                    "last_alert_sent": [budget.last_alert_sent for budget in updates],
+                    "last_alert_threshold": [budget.last_alert_threshold for budget in updates],
+                }
+            )
+        await session.commit()
         
         return results
     
-    async def _check_budget(self, budget: Budget, session: AsyncSession) -> Dict[str, Any]:
+    async def _load_active_budgets(
+        self,
+        session: AsyncSession,
+        scopes: Optional[Set[Tuple[str, str]]] = None
+    ) -> List[Budget]:
+        """Load active budgets, optionally only those charged to the given counter scopes."""
+        query = """
+            SELECT id::text AS id, budget_type, name, description,
+                   tenant_id, learner_id, service_name, model_name,
+                   amount, period, currency, start_date, end_date, is_recurring,
+                   alert_thresholds, alert_channels, alert_recipients, webhook_url,
+                   current_spend, last_alert_sent, last_alert_threshold,
+                   is_active, is_exceeded, created_at, updated_at
+            FROM budgets
+            WHERE is_active = true
+        """
+        params: Dict[str, Any] = {}
+        if scopes is not None:
+            # Scoped budgets missing their identifier count as global
+            query += """
+                AND (CASE budget_type
+                        WHEN 'tenant' THEN COALESCE(tenant_id, '*')
+                        WHEN 'learner' THEN COALESCE(learner_id, '*')
+                        WHEN 'service' THEN COALESCE(service_name, '*')
+                        WHEN 'model' THEN COALESCE(model_name, '*')
+                        ELSE '*'
+                     END) = ANY(CAST(:scope_ids AS text[]))
+            """
+            params["scope_ids"] = list({scope_id for _, scope_id in scopes})
+        
+        result = await session.execute(text(query), params)
+        budgets = []
+        for row in result.mappings():
+            budget = Budget(**{key: value for key, value in row.items() if value is not None})
+            if scopes is None or budget_scope(budget) in scopes:
+                budgets.append(budget)
+        return budgets
+    
+    async def _check_budget(
+        self,
+        budget: Budget,
+        session: AsyncSession,
+        current_spend: Optional[Decimal] = None
+    ) -> Dict[str, Any]:
         """Check a specific budget and trigger alerts if needed."""
         # Calculate current spending for the budget period
-        current_spend = await self._calculate_budget_spending(budget, session)
+        if current_spend is None:
+            current_spend = await self._calculate_budget_spending(budget, session)
         
         # Calculate percentage used
         percentage_used = (current_spend / budget.amount * 100) if budget.amount > 0 else Decimal('0')
@@ -142,30 +227,64 @@ class BudgetMonitor:
         }
     
     async def _calculate_budget_spending(self, budget: Budget, session: AsyncSession) -> Decimal:
-        """Calculate current spending for a budget within its period."""
-        # Build base query for usage events
-        query = select(func.sum(UsageEvent.calculated_cost)).where(
-            and_(
-                UsageEvent.timestamp >= budget.start_date,
-                UsageEvent.timestamp <= budget.end_date
-            )
-        )
-        
-        # Add budget-specific filters
-        if budget.budget_type == BudgetType.TENANT and budget.tenant_id:
-            query = query.where(UsageEvent.tenant_id == budget.tenant_id)
-        elif budget.budget_type == BudgetType.LEARNER and budget.learner_id:
-            query = query.where(UsageEvent.learner_id == budget.learner_id)
-        elif budget.budget_type == BudgetType.SERVICE and budget.service_name:
-            query = query.where(UsageEvent.service_name == budget.service_name)
-        elif budget.budget_type == BudgetType.MODEL and budget.model_name:
-            query = query.where(UsageEvent.model_name == budget.model_name)
-        # GLOBAL budget includes all usage events (no additional filters)
-        
-        result = await session.execute(query)
-        total_spend = result.scalar() or Decimal('0')
+        """Calculate current spending for a budget within its period (from the spend counters)."""
+        spends = await budget_spends(session, [budget])
+        return spends.get(str(budget.id), Decimal('0'))
+    
+    async def check_budget_impact(
+        self,
+        event: UsageEvent,
+        session: Optional[AsyncSession] = None
+    ) -> Dict[str, Any]:
+        """Re-evaluate the budgets a newly recorded usage event is charged to."""
+        return await self.check_budget_impact_batch([event], session)
+    
+    async def check_budget_impact_batch(
+        self,
+        events: List[UsageEvent],
+        session: Optional[AsyncSession] = None
+    ) -> Dict[str, Any]:
+        """Re-evaluate the budgets any of the recorded usage events are charged to."""
+        scopes = {scope for event in events for scope in event_scopes(event)}
+        if session:
+            return await self._evaluate_budgets(await self._load_active_budgets(session, scopes), session)
+        async with get_db_session() as db_session:
+            return await self._evaluate_budgets(await self._load_active_budgets(db_session, scopes), db_session)
+    
+    async def reconcile_spend_counters(self, lookback_days: Optional[int] = None) -> Dict[str, Any]:
+        """Verify the spend counters of recent days against the raw usage events."""
+        lookback_days = lookback_days or config.SPEND_RECONCILE_LOOKBACK_DAYS
+        last_day = datetime.now(timezone.utc).date()
+        first_day = last_day - timedelta(days=lookback_days - 1)
+        async with get_db_connection() as conn:
+            return await reconcile_spend_counters(conn, first_day, last_day)
+    
+    async def start_monitoring(self) -> None:
+        """Check all budgets periodically and reconcile the spend counters."""
+        check_interval = config.BUDGET_CHECK_INTERVAL_MINUTES * 60
+        reconcile_interval = config.SPEND_RECONCILE_INTERVAL_MINUTES * 60
+        last_reconcile = None
         
-        return total_spend.quantize(Decimal('0.000001'), rounding=ROUND_HALF_UP)
+        while True:
+            try:
+                now = asyncio.get_running_loop().time()
+                if last_reconcile is None or now - last_reconcile >= reconcile_interval:
+                    reconciliation = await self.reconcile_spend_counters()
+                    last_reconcile = now
+                    logger.info(f"Spend counter reconciliation: {reconciliation}")
+                
+                results = await self.check_all_budgets()
+                logger.info(
+                    f"Budget check: {results['budgets_checked']} budgets, "
+                    f"{results['alerts_triggered']} alerts, {results['budgets_exceeded']} exceeded"
+                )
+                await asyncio.sleep(check_interval)
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Budget monitoring loop error: {e}")
+                await asyncio.sleep(60)  # Wait before retrying
     
     async def _should_send_alert(self, budget_id: str, threshold: Decimal) -> bool:
         """Check if an alert should be sent based on cooldown periods."""
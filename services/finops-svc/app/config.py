@@ -75,6 +75,8 @@ class FinOpsConfig(BaseSettings):
     BUDGET_CHECK_INTERVAL_MINUTES: int = Field(default=15, env="BUDGET_CHECK_INTERVAL_MINUTES")
     ALERT_COOLDOWN_HOURS: int = Field(default=1, env="ALERT_COOLDOWN_HOURS")
     MAX_ALERTS_PER_BUDGET_PER_DAY: int = Field(default=10, env="MAX_ALERTS_PER_BUDGET_PER_DAY")
+    SPEND_RECONCILE_INTERVAL_MINUTES: int = Field(default=60, env="SPEND_RECONCILE_INTERVAL_MINUTES")
+    SPEND_RECONCILE_LOOKBACK_DAYS: int = Field(default=2, env="SPEND_RECONCILE_LOOKBACK_DAYS")
     
     # Cost Calculation Configuration
     DEFAULT_CURRENCY: str = Field(default="USD", env="DEFAULT_CURRENCY")
@@ -10,19 +10,98 @@ import asyncio
 import logging
 from datetime import datetime, timezone
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, List, Optional, Tuple, Any
+from operator import attrgetter
+from typing import Dict, List, Optional, Sequence, Tuple, Any
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .models import UsageEvent, ProviderPricing, ProviderType, ModelType
-from .database import get_db_session
+from .models import UsageEvent, ProviderType, ModelType
+from .database import get_db_session, log_usage_events_batch
+from .pricing_snapshot import PRICE_DIGITS, ModelRates, get_pricing_snapshot
 from .providers.openai_provider import OpenAIProvider
 from .providers.gemini_provider import GeminiProvider
 from .providers.bedrock_provider import BedrockProvider
 
 logger = logging.getLogger(__name__)
 
+COST_QUANTUM = Decimal('0.000001')
+COST_DIGITS = 6
+
+# Price units (10^-8) per cost quantum (10^-6)
+_UNITS_PER_QUANTUM = 10 ** (PRICE_DIGITS - COST_DIGITS)
+
+# Columns read by the batch path, in this order: the (provider, model_name)
+# pricing group, then the priced usage
+USAGE_COLUMNS = (
+    "provider", "model_name",
+    "input_tokens", "output_tokens", "request_count", "images_processed", "audio_minutes", "storage_gb"
+)
+
+PricingKey = Tuple[ProviderType, str]
+
+
+def _decimal_cost(
+    rates: ModelRates,
+    input_tokens: int,
+    output_tokens: int,
+    requests: int,
+    images: int,
+    audio: Decimal,
+    storage: Decimal
+) -> Decimal:
+    """Cost of one event's usage in Decimal arithmetic, rounded to 6 decimal places."""
+    total = (
+        Decimal(input_tokens or 0) * rates.input_token_price
+        + Decimal(output_tokens or 0) * rates.output_token_price
+        + Decimal(requests) * rates.request_price
+        + Decimal(images or 0) * rates.image_price
+        + (audio or Decimal('0')) * rates.audio_price
+        + (storage or Decimal('0')) * rates.storage_price
+    )
+    return total.quantize(COST_QUANTUM, rounding=ROUND_HALF_UP)
+
+
+def usage_columns(usage_events: Sequence[UsageEvent]) -> List[List[Any]]:
+    """The USAGE_COLUMNS of a batch of events, one list per column."""
+    return [list(map(attrgetter(column), usage_events)) for column in USAGE_COLUMNS]
+
+
+def price_usage_columns(
+    group_rates: Dict[PricingKey, ModelRates],
+    columns: Sequence[Sequence[Any]]
+) -> List[Optional[Decimal]]:
+    """
+    Costs of a batch from its usage columns, in one pass in event order.
+
+    group_rates holds the rates of every (provider, model) group with
+    active pricing; events of other groups get None. Token, request and
+    image counts are integers and the prices are whole 10^-8 units, so each
+    cost is computed in integer arithmetic and rounded half-up to 10^-6
+    once. The result is identical to Decimal arithmetic quantized the same
+    way. Events with audio or storage usage, and rates finer than 10^-8,
+    are priced in Decimal.
+    """
+    prices = {key: (rates, rates.units) for key, rates in group_rates.items()}
+    half = _UNITS_PER_QUANTUM // 2
+    costs: List[Optional[Decimal]] = []
+    for provider, model_name, input_tokens, output_tokens, requests, images, audio, storage in zip(*columns):
+        price = prices.get((provider, model_name))
+        if price is None:
+            costs.append(None)
+            continue
+        rates, units = price
+        if units is None or audio or storage:
+            costs.append(_decimal_cost(rates, input_tokens, output_tokens, requests, images, audio, storage))
+            continue
+        input_units, output_units, request_units, image_units = units
+        total = input_tokens * input_units + output_tokens * output_units \
+            + requests * request_units + images * image_units
+        # Half-up rounds away from zero, as Decimal's ROUND_HALF_UP does
+        quanta = (total + half) // _UNITS_PER_QUANTUM if total >= 0 else -((half - total) // _UNITS_PER_QUANTUM)
+        costs.append(Decimal(quanta).scaleb(-COST_DIGITS))
+    return costs
+
 
 class CostCalculator:
     """Main cost calculation engine for all AI providers."""
@@ -33,8 +112,6 @@ class CostCalculator:
             ProviderType.GEMINI: GeminiProvider(),
             ProviderType.BEDROCK: BedrockProvider(),
         }
-        self._pricing_cache = {}
-        self._cache_expiry = {}
     
     async def calculate_usage_cost(
         self, 
@@ -71,6 +148,11 @@ class CostCalculator:
         session: AsyncSession
     ) -> Tuple[Decimal, Dict[str, Any]]:
         """Calculate cost with database session."""
+        # Models with active pricing are priced from the snapshot, like batches
+        snapshot = await get_pricing_snapshot()
+        if snapshot.get(usage_event.provider, usage_event.model_name):
+            return await self._calculate_generic_cost(usage_event, session)
+        
         # Get provider-specific calculator
         provider_calculator = self.providers.get(usage_event.provider)
         if not provider_calculator:
@@ -147,32 +229,10 @@ class CostCalculator:
         model_name: str,
         model_type: ModelType,
         session: AsyncSession
-    ) -> Optional[ProviderPricing]:
-        """Get current pricing information for a provider/model."""
-        # Check cache first
-        cache_key = f"{provider.value}:{model_name}"
-        if cache_key in self._pricing_cache:
-            cached_pricing, cached_time = self._pricing_cache[cache_key]
-            # Cache valid for 1 hour
-            if (datetime.now(timezone.utc) - cached_time).seconds < 3600:
-                return cached_pricing
-        
-        # Query database for current pricing
-        query = select(ProviderPricing).where(
-            ProviderPricing.provider == provider,
-            ProviderPricing.model_name == model_name,
-            ProviderPricing.is_active == True,
-            ProviderPricing.effective_date <= datetime.now(timezone.utc)
-        ).order_by(ProviderPricing.effective_date.desc()).limit(1)
-        
-        result = await session.execute(query)
-        pricing = result.scalar_one_or_none()
-        
-        # Cache the result
-        if pricing:
-            self._pricing_cache[cache_key] = (pricing, datetime.now(timezone.utc))
-        
-        return pricing
+    ) -> Optional[ModelRates]:
+        """Get current pricing information for a provider/model from the pricing snapshot."""
+        snapshot = await get_pricing_snapshot()
+        return snapshot.get(provider, model_name)
     
     async def _get_fallback_cost(self, usage_event: UsageEvent) -> Decimal:
         """Get fallback cost estimation when pricing data is unavailable."""
@@ -215,44 +275,57 @@ class CostCalculator:
         usage_events: List[UsageEvent],
         session: Optional[AsyncSession] = None
     ) -> List[Tuple[UsageEvent, Decimal, Dict[str, Any]]]:
-        """Calculate costs for multiple usage events efficiently."""
-        if session:
-            return await self._calculate_batch_with_session(usage_events, session)
-        else:
-            async with get_db_session() as db_session:
-                return await self._calculate_batch_with_session(usage_events, db_session)
-    
-    async def _calculate_batch_with_session(
-        self,
-        usage_events: List[UsageEvent],
-        session: AsyncSession
-    ) -> List[Tuple[UsageEvent, Decimal, Dict[str, Any]]]:
-        """Calculate batch costs with database session."""
-        results = []
-        
-        # Group events by provider for efficient processing
-        provider_groups = {}
-        for event in usage_events:
-            if event.provider not in provider_groups:
-                provider_groups[event.provider] = []
-            provider_groups[event.provider].append(event)
+        """
+        Calculate costs for multiple usage events from the pricing snapshot.
         
-        # Process each provider group
-        for provider, events in provider_groups.items():
-            provider_calculator = self.providers.get(provider)
-            
-            if provider_calculator and hasattr(provider_calculator, 'calculate_batch_costs'):
-                # Use provider-specific batch calculation
-                batch_results = await provider_calculator.calculate_batch_costs(events, session)
-                results.extend(batch_results)
+        Events are grouped by (provider, model) to resolve rates and the
+        breakdown once per group, then priced in one pass over the batch's
+        usage columns without database access. Results are returned in input
+        order and the events of a group share one breakdown dict; models
+        without active pricing get the fallback estimate.
+        """
+        snapshot = await get_pricing_snapshot()
+        columns = usage_columns(usage_events)
+        providers, model_names = columns[0], columns[1]
+        
+        group_rates: Dict[PricingKey, ModelRates] = {}
+        breakdowns: Dict[PricingKey, Dict[str, Any]] = {}
+        for provider, model_name in dict.fromkeys(zip(providers, model_names)):
+            rates = snapshot.get(provider, model_name)
+            if rates:
+                group_rates[(provider, model_name)] = rates
+                breakdowns[(provider, model_name)] = {
+                    "calculation_method": "pricing_snapshot",
+                    "pricing_version": snapshot.version,
+                    "pricing_effective_date": rates.effective_date.isoformat()
+                }
             else:
-                # Calculate individually
-                for event in events:
-                    cost, breakdown = await self._calculate_with_session(event, session)
-                    results.append((event, cost, breakdown))
+                logger.warning(f"No pricing data for {provider}/{model_name}, using fallback estimates")
+                breakdowns[(provider, model_name)] = {"fallback": True, "reason": "no_pricing_data"}
+        
+        costs = price_usage_columns(group_rates, columns)
         
+        results = []
+        for event, provider, model_name, cost in zip(usage_events, providers, model_names, costs):
+            if cost is None:
+                cost = await self._get_fallback_cost(event)
+            results.append((event, cost, breakdowns[(provider, model_name)]))
         return results
     
+    async def calculate_event_cost(self, usage_event: UsageEvent) -> UsageEvent:
+        """Price a usage event and return it with calculated_cost set."""
+        return (await self.calculate_event_costs([usage_event]))[0]
+    
+    async def calculate_event_costs(self, usage_events: List[UsageEvent]) -> List[UsageEvent]:
+        """Price usage events in one batch and return them with calculated_cost set."""
+        for event, cost, _ in await self.calculate_batch_costs(usage_events):
+            event.calculated_cost = cost
+        return usage_events
+    
+    async def store_events_batch(self, usage_events: List[UsageEvent]) -> None:
+        """Store calculated usage events and add them to the spend counters."""
+        await log_usage_events_batch(usage_events)
+    
     async def get_cost_optimization_suggestions(
         self,
         usage_events: List[UsageEvent],
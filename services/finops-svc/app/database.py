@@ -6,9 +6,10 @@ for cost tracking, budget management, and financial operations.
 """
 
 import asyncio
+import json
 import logging
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, List, Optional
 
 import asyncpg
 from sqlalchemy import text
@@ -25,6 +26,7 @@ from .models import (
     CostOptimization
 )
 from .config import config
+from .spend_counters import apply_spend_deltas, spend_counter_deltas
 
 logger = logging.getLogger(__name__)
 
@@ -167,6 +169,18 @@ async def create_tables() -> None:
         created_at TIMESTAMPTZ DEFAULT NOW()
     );
 
+    -- Spend Counters Table (per-day spend of each budget scope, maintained
+    -- with every recorded usage event; see spend_counters.py)
+    CREATE TABLE IF NOT EXISTS spend_counters (
+        scope_type VARCHAR(20) NOT NULL,
+        scope_id VARCHAR(255) NOT NULL,
+        day DATE NOT NULL,
+        amount DECIMAL(20,6) NOT NULL DEFAULT 0,
+        event_count BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMPTZ DEFAULT NOW(),
+        PRIMARY KEY (scope_type, scope_id, day)
+    );
+
     -- Budgets Table
     CREATE TABLE IF NOT EXISTS budgets (
         id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -315,8 +329,9 @@ async def create_tables() -> None:
     );
     """
     
-    async with engine.begin() as conn:
-        await conn.execute(text(create_tables_sql))
+    # Multi-statement scripts need the simple query protocol of the raw pool
+    async with get_db_connection() as conn:
+        await conn.execute(create_tables_sql)
         logger.info("Database tables created successfully")
 
 
@@ -342,6 +357,10 @@ async def create_indexes() -> None:
     CREATE INDEX IF NOT EXISTS idx_usage_events_metadata_gin 
         ON usage_events USING gin(metadata);
     
+    -- Spend Counters Indexes (reconciliation reads whole days)
+    CREATE INDEX IF NOT EXISTS idx_spend_counters_day 
+        ON spend_counters(day);
+    
     -- Budgets Indexes
     CREATE INDEX IF NOT EXISTS idx_budgets_tenant_active 
         ON budgets(tenant_id, is_active) WHERE tenant_id IS NOT NULL;
@@ -403,11 +422,54 @@ async def create_indexes() -> None:
         ON cost_optimizations(savings_percentage DESC, status);
     """
     
-    async with engine.begin() as conn:
-        await conn.execute(text(indexes_sql))
+    async with get_db_connection() as conn:
+        await conn.execute(indexes_sql)
         logger.info("Database indexes created successfully")
 
 
+USAGE_EVENT_COLUMNS = (
+    "id", "tenant_id", "learner_id", "service_name", "session_id",
+    "provider", "model_name", "model_type",
+    "input_tokens", "output_tokens", "request_count",
+    "images_processed", "audio_minutes", "storage_gb",
+    "calculated_cost", "cost_category", "currency",
+    "processing_duration_ms", "metadata", "timestamp", "created_at"
+)
+
+
+def _usage_event_record(event: UsageEvent) -> tuple:
+    """usage_events row for an event, in USAGE_EVENT_COLUMNS order."""
+    values = event.dict()
+    values["metadata"] = json.dumps(values["metadata"] or {}, default=str)
+    return tuple(getattr(values[column], "value", values[column]) for column in USAGE_EVENT_COLUMNS)
+
+
+async def log_usage_event(event: UsageEvent) -> None:
+    """Store a usage event and add its cost to the spend counters."""
+    await log_usage_events_batch([event])
+
+
+async def log_usage_events_batch(events: List[UsageEvent]) -> None:
+    """
+    Store usage events and update the spend counters in one transaction.
+
+    The events are copied in one round trip and the counters receive one
+    upsert per (scope, day) touched by the batch.
+    """
+    if not events:
+        return
+    
+    deltas = spend_counter_deltas(events)
+    async with get_db_connection() as conn:
+        async with conn.transaction():
+            await conn.copy_records_to_table(
+                "usage_events",
+                records=[_usage_event_record(event) for event in events],
+                columns=list(USAGE_EVENT_COLUMNS)
+            )
+            await apply_spend_deltas(conn, deltas)
+
+
 async def check_database_health() -> dict:
     """Check database connection health and return status."""
     try:
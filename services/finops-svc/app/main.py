@@ -26,6 +26,7 @@ from .models import FinOpsHealth
 from .cost_calculator import CostCalculator
 from .budget_monitor import BudgetMonitor
 from .pricing_updater import PricingUpdater
+from .pricing_snapshot import refresh_pricing_snapshot
 
 # Configure structured logging
 structlog.configure(
@@ -76,6 +77,10 @@ async def lifespan(app: FastAPI):
         app_state["cost_calculator"] = CostCalculator()
         logger.info("Cost calculator initialized")
         
+        # Load the pricing snapshot used for cost calculation
+        snapshot = await refresh_pricing_snapshot()
+        logger.info("Pricing snapshot loaded", version=snapshot.version, models=len(snapshot))
+        
         # Initialize budget monitor
         app_state["budget_monitor"] = BudgetMonitor()
         logger.info("Budget monitor initialized")
@@ -0,0 +1,144 @@
+"""
+Immutable, versioned provider pricing snapshot for the FinOps service.
+
+The active provider_pricing rows are loaded once into a read-only snapshot and
+cost calculation reads prices from it without touching the database. When
+PricingUpdater saves new prices a fresh snapshot is loaded and swapped in with
+a single reference assignment, so every calculation sees exactly one version
+of the price table.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, Iterable, NamedTuple, Optional, Tuple
+
+from .database import get_db_connection
+from .models import ModelType, ProviderType
+
+logger = logging.getLogger(__name__)
+
+# provider_pricing prices have at most 8 decimal places (DECIMAL(12,8)); the
+# batch path prices events in integer units of 10^-8 USD
+PRICE_DIGITS = 8
+
+ACTIVE_PRICING_SQL = """
+    SELECT DISTINCT ON (provider, model_name)
+           provider, model_name, model_type,
+           input_token_price, output_token_price, request_price,
+           image_price, audio_price, storage_price, effective_date
+    FROM provider_pricing
+    WHERE is_active = true AND effective_date <= NOW()
+    ORDER BY provider, model_name, effective_date DESC
+"""
+
+
+def _price_units(price: Decimal) -> Optional[int]:
+    """Price in integer 10^-8 units, or None if it has more decimal places."""
+    units = price.scaleb(PRICE_DIGITS)
+    if units != units.to_integral_value():
+        return None
+    return int(units)
+
+
+class ModelRates(NamedTuple):
+    """Prices of one provider model (per token, request, image, minute and GB)."""
+    provider: ProviderType
+    model_name: str
+    model_type: ModelType
+    input_token_price: Decimal
+    output_token_price: Decimal
+    request_price: Decimal
+    image_price: Decimal
+    audio_price: Decimal
+    storage_price: Decimal
+    effective_date: datetime
+    # (input, output, request, image) prices in 10^-8 units; None when a price
+    # is finer than that and the group has to be priced in Decimal
+    units: Optional[Tuple[int, int, int, int]]
+
+    @classmethod
+    def from_row(cls, row: Any) -> "ModelRates":
+        """Rates from a provider_pricing row (missing prices are free)."""
+        prices = [
+            Decimal(row[column] or 0) for column in (
+                "input_token_price", "output_token_price", "request_price",
+                "image_price", "audio_price", "storage_price"
+            )
+        ]
+        units = tuple(_price_units(price) for price in prices[:4])
+        return cls(
+            ProviderType(row["provider"]),
+            row["model_name"],
+            ModelType(row["model_type"]),
+            *prices,
+            row["effective_date"],
+            None if None in units else units
+        )
+
+
+class PricingSnapshot:
+    """Read-only view of the active price of every provider model."""
+
+    __slots__ = ("version", "loaded_at", "_rates")
+
+    def __init__(self, version: int, rates: Iterable[ModelRates], loaded_at: Optional[datetime] = None):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "loaded_at", loaded_at or datetime.now(timezone.utc))
+        object.__setattr__(self, "_rates", MappingProxyType({
+            (rate.provider.value, rate.model_name): rate for rate in rates
+        }))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PricingSnapshot is immutable")
+
+    def __len__(self) -> int:
+        return len(self._rates)
+
+    def get(self, provider: ProviderType, model_name: str) -> Optional[ModelRates]:
+        """Rates of a provider model, if it has active pricing."""
+        return self._rates.get((getattr(provider, "value", provider), model_name))
+
+
+_snapshot: Optional[PricingSnapshot] = None
+_refresh_lock = asyncio.Lock()
+
+
+def current_pricing_snapshot() -> Optional[PricingSnapshot]:
+    """The installed snapshot, if one has been loaded."""
+    return _snapshot
+
+
+def install_pricing_snapshot(snapshot: PricingSnapshot) -> bool:
+    """Swap in a snapshot unless a newer version is already installed."""
+    global _snapshot
+    if _snapshot is not None and _snapshot.version >= snapshot.version:
+        return False
+    _snapshot = snapshot
+    return True
+
+
+async def load_pricing_snapshot(conn, version: int) -> PricingSnapshot:
+    """Snapshot of the active pricing rows (asyncpg connection)."""
+    rows = await conn.fetch(ACTIVE_PRICING_SQL)
+    return PricingSnapshot(version, [ModelRates.from_row(row) for row in rows])
+
+
+async def refresh_pricing_snapshot() -> PricingSnapshot:
+    """Load the active pricing from the database and install it as the next version."""
+    async with _refresh_lock:
+        version = _snapshot.version + 1 if _snapshot else 1
+        async with get_db_connection() as conn:
+            snapshot = await load_pricing_snapshot(conn, version)
+        install_pricing_snapshot(snapshot)
+        logger.info(f"Pricing snapshot v{snapshot.version} installed with {len(snapshot)} models")
+        return snapshot
+
+
+async def get_pricing_snapshot() -> PricingSnapshot:
+    """The installed snapshot, loading the first one on demand."""
+    if _snapshot is None:
+        return await refresh_pricing_snapshot()
+    return _snapshot
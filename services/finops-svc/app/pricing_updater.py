@@ -12,11 +12,12 @@ from decimal import Decimal
 from typing import Dict, List, Optional, Any, Tuple
 
 import aiohttp
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .models import ProviderPricing, ProviderType, ModelType
 from .database import get_db_session
+from .pricing_snapshot import refresh_pricing_snapshot
 from .config import config
 
 logger = logging.getLogger(__name__)
@@ -401,6 +402,7 @@ class PricingUpdater:
             )
             
             # Insert new pricing records
+            records = []
             for pricing in pricing_data:
                 new_pricing = ProviderPricing(
                     provider=provider,
@@ -419,9 +421,27 @@ class PricingUpdater:
                     rate_limit_tpm=pricing.get("rate_limit_tpm")
                 )
                 
-                session.add(new_pricing)
+                record = new_pricing.dict(exclude={"id", "created_at", "updated_at", "expires_date"})
+                record.update(provider=provider.value, model_type=new_pricing.model_type.value)
+                records.append(record)
                 count += 1
             
+            if records:
+                await session.execute(
+                    text("""
+                        INSERT INTO provider_pricing (
+                            provider, model_name, model_type, input_token_price, output_token_price,
+                            image_price, audio_price, request_price, storage_price, currency,
+                            effective_date, is_active, rate_limit_rpm, rate_limit_tpm
+                        ) VALUES (
+                            :provider, :model_name, :model_type, :input_token_price, :output_token_price,
+                            :image_price, :audio_price, :request_price, :storage_price, :currency,
+                            :effective_date, :is_active, :rate_limit_rpm, :rate_limit_tpm
+                        )
+                    """),
+                    records
+                )
+            
             await session.commit()
             logger.info(f"Saved {count} pricing records for {provider.value}")
             
@@ -430,6 +450,12 @@ class PricingUpdater:
             await session.rollback()
             raise
         
+        # Cost calculation switches to the new prices atomically
+        try:
+            await refresh_pricing_snapshot()
+        except Exception as e:
+            logger.error(f"Pricing saved but snapshot reload failed for {provider.value}: {e}")
+        
         return count
     
     async def get_current_pricing(
@@ -502,6 +528,29 @@ class PricingUpdater:
         
         return freshness
     
+    async def start_updates(self) -> None:
+        """
+        Background loop keeping provider pricing and the pricing snapshot current.
+        
+        Providers are updated when their pricing is older than the update
+        interval; the snapshot is reloaded every PRICING_CACHE_TTL_SECONDS so
+        prices saved by other instances are picked up too.
+        """
+        logger.info("Starting pricing updates")
+        
+        while True:
+            try:
+                await self.update_all_pricing()
+                await refresh_pricing_snapshot()
+                await asyncio.sleep(config.PRICING_CACHE_TTL_SECONDS)
+                
+            except asyncio.CancelledError:
+                logger.info("Pricing updates cancelled")
+                break
+            except Exception as e:
+                logger.error(f"Error in pricing update loop: {e}")
+                await asyncio.sleep(60)  # Wait before retrying
+    
     async def force_pricing_refresh(self, provider: Optional[ProviderType] = None) -> Dict[str, Any]:
         """Force refresh pricing for specific provider or all providers."""
         if provider:
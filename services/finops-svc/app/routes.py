@@ -115,16 +115,16 @@ async def record_usage_events_batch(
     Record multiple usage events in batch for better performance
     """
     try:
-        calculated_events = []
+        authorized_events = []
         
         for event in events:
             # Validate tenant access
             if event.tenant_id and not await verify_tenant_access(current_user, event.tenant_id):
                 continue  # Skip unauthorized events
-            
-            # Calculate cost
-            calculated_event = await calculator.calculate_event_cost(event)
-            calculated_events.append(calculated_event)
+            authorized_events.append(event)
+        
+        # Calculate costs for the whole batch
+        calculated_events = await calculator.calculate_event_costs(authorized_events)
         
         # Batch store events
         await calculator.store_events_batch(calculated_events)
@@ -0,0 +1,245 @@
+"""
+Incrementally maintained spend counters for the FinOps service.
+
+Every recorded usage event adds its cost to a per-day counter for each budget
+scope it falls in (global, tenant, learner, service and model), in the same
+transaction that stores the event. A budget's current spend is then a sum over
+the days of its period instead of a scan of usage_events, and a reconciliation
+pass periodically recomputes recent days from usage_events to repair drift.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Budget, BudgetType, UsageEvent
+
+logger = logging.getLogger(__name__)
+
+# Scope id of the single global counter per day
+GLOBAL_SCOPE_ID = "*"
+
+# (scope_type, scope_id, day)
+CounterKey = Tuple[str, str, date]
+# (amount, event_count)
+CounterValue = Tuple[Decimal, int]
+
+COST_QUANTUM = Decimal('0.000001')
+
+# Rows are upserted in key order so concurrent transactions lock counter rows
+# in the same order and cannot deadlock on each other
+UPSERT_COUNTERS_SQL = """
+    INSERT INTO spend_counters (scope_type, scope_id, day, amount, event_count, updated_at)
+    SELECT scope_type, scope_id, day, amount, event_count, NOW()
+    FROM unnest($1::text[], $2::text[], $3::date[], $4::numeric[], $5::bigint[])
+        AS d(scope_type, scope_id, day, amount, event_count)
+    ORDER BY scope_type, scope_id, day
+    ON CONFLICT (scope_type, scope_id, day) DO UPDATE SET
+        amount = spend_counters.amount + EXCLUDED.amount,
+        event_count = spend_counters.event_count + EXCLUDED.event_count,
+        updated_at = NOW()
+"""
+
+# One row per budget: sum of the counters of its scope over its days
+BUDGET_SPEND_SQL = text("""
+    SELECT b.budget_id, COALESCE(SUM(c.amount), 0) AS spend
+    FROM unnest(
+        CAST(:budget_ids AS text[]), CAST(:scope_types AS text[]), CAST(:scope_ids AS text[]),
+        CAST(:first_days AS date[]), CAST(:last_days AS date[])
+    ) AS b(budget_id, scope_type, scope_id, first_day, last_day)
+    LEFT JOIN spend_counters c
+        ON c.scope_type = b.scope_type
+        AND c.scope_id = b.scope_id
+        AND c.day BETWEEN b.first_day AND b.last_day
+    GROUP BY b.budget_id
+""")
+
+# Per-day totals of every scope, straight from usage_events
+RAW_SPEND_SQL = """
+    SELECT day, tenant_id, learner_id, service_name, model_name,
+           GROUPING(tenant_id, learner_id, service_name, model_name) AS grouping,
+           SUM(calculated_cost) AS amount, COUNT(*) AS event_count
+    FROM (
+        SELECT (timestamp AT TIME ZONE 'UTC')::date AS day,
+               tenant_id, learner_id, service_name, model_name, calculated_cost
+        FROM usage_events
+        WHERE timestamp >= $1 AND timestamp < $2
+    ) e
+    GROUP BY GROUPING SETS (
+        (day), (day, tenant_id), (day, learner_id), (day, service_name), (day, model_name)
+    )
+"""
+
+# GROUPING() bitmask of each grouping set in RAW_SPEND_SQL -> (scope type, key column)
+RAW_SPEND_SCOPES = {
+    0b1111: (BudgetType.GLOBAL.value, None),
+    0b0111: (BudgetType.TENANT.value, "tenant_id"),
+    0b1011: (BudgetType.LEARNER.value, "learner_id"),
+    0b1101: (BudgetType.SERVICE.value, "service_name"),
+    0b1110: (BudgetType.MODEL.value, "model_name"),
+}
+
+
+def usage_day(timestamp: datetime) -> date:
+    """UTC day of a timestamp (naive timestamps are UTC)."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.date()
+
+
+def event_scopes(event: UsageEvent) -> List[Tuple[str, str]]:
+    """Counter scopes a usage event is charged to."""
+    scopes = [
+        (BudgetType.GLOBAL.value, GLOBAL_SCOPE_ID),
+        (BudgetType.TENANT.value, event.tenant_id),
+        (BudgetType.SERVICE.value, event.service_name),
+        (BudgetType.MODEL.value, event.model_name),
+    ]
+    if event.learner_id:
+        scopes.append((BudgetType.LEARNER.value, event.learner_id))
+    return scopes
+
+
+def budget_scope(budget: Budget) -> Tuple[str, str]:
+    """
+    Counter scope of a budget.
+
+    A scoped budget without its scope identifier covers all usage, as the
+    unfiltered usage_events query did.
+    """
+    budget_type = BudgetType(budget.budget_type)
+    scope_id = {
+        BudgetType.TENANT: budget.tenant_id,
+        BudgetType.LEARNER: budget.learner_id,
+        BudgetType.SERVICE: budget.service_name,
+        BudgetType.MODEL: budget.model_name,
+    }.get(budget_type)
+    if scope_id:
+        return budget_type.value, scope_id
+    return BudgetType.GLOBAL.value, GLOBAL_SCOPE_ID
+
+
+def budget_days(budget: Budget, now: Optional[datetime] = None) -> Tuple[date, date]:
+    """
+    First and last UTC day counted towards a budget.
+
+    Spend is counted in whole days; an open-ended budget runs to today.
+    """
+    end = budget.end_date or now or datetime.now(timezone.utc)
+    return usage_day(budget.start_date), usage_day(end)
+
+
+def spend_counter_deltas(events: Iterable[UsageEvent]) -> Dict[CounterKey, CounterValue]:
+    """Counter increments for a batch of usage events."""
+    deltas: Dict[CounterKey, List[Any]] = defaultdict(lambda: [Decimal('0'), 0])
+    for event in events:
+        day = usage_day(event.timestamp)
+        cost = event.calculated_cost or Decimal('0')
+        for scope_type, scope_id in event_scopes(event):
+            delta = deltas[(scope_type, scope_id, day)]
+            delta[0] += cost
+            delta[1] += 1
+    return {key: (amount, count) for key, (amount, count) in deltas.items()}
+
+
+async def apply_spend_deltas(conn, deltas: Dict[CounterKey, CounterValue]) -> None:
+    """Add deltas to the counters in one statement (asyncpg connection)."""
+    if not deltas:
+        return
+    keys = list(deltas)
+    await conn.execute(
+        UPSERT_COUNTERS_SQL,
+        [key[0] for key in keys],
+        [key[1] for key in keys],
+        [key[2] for key in keys],
+        [deltas[key][0] for key in keys],
+        [deltas[key][1] for key in keys],
+    )
+
+
+async def budget_spends(
+    session: AsyncSession,
+    budgets: Sequence[Budget],
+    now: Optional[datetime] = None
+) -> Dict[str, Decimal]:
+    """Current spend of many budgets, from the counters, in one query."""
+    if not budgets:
+        return {}
+
+    columns: Dict[str, List[Any]] = {
+        "budget_ids": [], "scope_types": [], "scope_ids": [], "first_days": [], "last_days": []
+    }
+    for budget in budgets:
+        scope_type, scope_id = budget_scope(budget)
+        first_day, last_day = budget_days(budget, now)
+        columns["budget_ids"].append(str(budget.id))
+        columns["scope_types"].append(scope_type)
+        columns["scope_ids"].append(scope_id)
+        columns["first_days"].append(first_day)
+        columns["last_days"].append(last_day)
+
+    result = await session.execute(BUDGET_SPEND_SQL, columns)
+    return {
+        row.budget_id: Decimal(row.spend).quantize(COST_QUANTUM, rounding=ROUND_HALF_UP)
+        for row in result
+    }
+
+
+async def reconcile_spend_counters(conn, first_day: date, last_day: date) -> Dict[str, Any]:
+    """
+    Verify the counters of [first_day, last_day] against usage_events.
+
+    Raw totals and counters are read from one snapshot, and each mismatch is
+    repaired by adding the difference, so events recorded while the pass runs
+    keep their own increments.
+    """
+    start = datetime.combine(first_day, time.min, tzinfo=timezone.utc)
+    end = datetime.combine(last_day + timedelta(days=1), time.min, tzinfo=timezone.utc)
+
+    async with conn.transaction(isolation='repeatable_read', readonly=True):
+        raw_rows = await conn.fetch(RAW_SPEND_SQL, start, end)
+        counter_rows = await conn.fetch(
+            """
+            SELECT scope_type, scope_id, day, amount, event_count
+            FROM spend_counters WHERE day BETWEEN $1 AND $2
+            """,
+            first_day, last_day
+        )
+
+    expected: Dict[CounterKey, CounterValue] = {}
+    for row in raw_rows:
+        scope_type, column = RAW_SPEND_SCOPES[row['grouping']]
+        scope_id = row[column] if column else GLOBAL_SCOPE_ID
+        if scope_id is None:
+            # Events without a learner
+            continue
+        expected[(scope_type, scope_id, row['day'])] = (row['amount'] or Decimal('0'), row['event_count'])
+
+    counted = {
+        (row['scope_type'], row['scope_id'], row['day']): (row['amount'], row['event_count'])
+        for row in counter_rows
+    }
+
+    deltas: Dict[CounterKey, CounterValue] = {}
+    for key in expected.keys() | counted.keys():
+        expected_amount, expected_count = expected.get(key, (Decimal('0'), 0))
+        counted_amount, counted_count = counted.get(key, (Decimal('0'), 0))
+        if expected_amount != counted_amount or expected_count != counted_count:
+            deltas[key] = (expected_amount - counted_amount, expected_count - counted_count)
+
+    if deltas:
+        logger.warning(f"Repairing {len(deltas)} drifted spend counters for {first_day} to {last_day}")
+        async with conn.transaction():
+            await apply_spend_deltas(conn, deltas)
+
+    return {
+        "first_day": first_day.isoformat(),
+        "last_day": last_day.isoformat(),
+        "counters_checked": len(expected.keys() | counted.keys()),
+        "counters_repaired": len(deltas),
+    }
@@ -0,0 +1,171 @@
+"""
+Budget monitoring tick benchmark against PostgreSQL
+
+Seeds usage_events (server-side generate_series), the spend counters that
+recording those events would have produced, and active monthly budgets
+(60% tenant, 30% learner, 10% service/model/global). Times the spend
+evaluation of one monitoring tick both ways:
+
+- previous: one SUM(calculated_cost) over usage_events per budget, run one
+  after another (timed on a sample of budgets and extrapolated)
+- counters: budget_spends, one query over spend_counters for all budgets
+
+and checks that both agree on the sampled budgets. The request target is
+--events 100000000 --budgets 10000; seeding that many rows takes a while.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_budget_tick.py \\
+        [--events N] [--budgets B] [--tenants T] [--learners L] [--days D] [--legacy-sample S]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import database  # noqa: E402
+from app.budget_monitor import BudgetMonitor  # noqa: E402
+from app.spend_counters import RAW_SPEND_SCOPES, RAW_SPEND_SQL, budget_spends  # noqa: E402
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+CHUNK = 1_000_000
+
+LEGACY_FILTERS = {
+    "tenant": "AND tenant_id = $3",
+    "learner": "AND learner_id = $3",
+    "service": "AND service_name = $3",
+    "model": "AND model_name = $3",
+}
+
+
+async def seed(conn, args) -> None:
+    await conn.execute("TRUNCATE usage_events, spend_counters, budgets CASCADE")
+    span_seconds = args.days * 86400
+    for offset in range(0, args.events, CHUNK):
+        count = min(CHUNK, args.events - offset)
+        await conn.execute(
+            """
+            INSERT INTO usage_events (tenant_id, learner_id, service_name, provider, model_name, model_type,
+                                      input_tokens, output_tokens, calculated_cost, timestamp)
+            SELECT 'tenant-' || (i % $2), 'learner-' || (i % $3), 'svc-' || (i % 8), 'openai',
+                   'model-' || (i % 6), 'text_generation', 800, 200, (i % 1000) / 100000.0,
+                   $4::timestamptz + make_interval(secs => (i::bigint * $5 / $6))
+            FROM generate_series($1::bigint, $1::bigint + $7 - 1) AS i
+            """,
+            offset, args.tenants, args.learners, START, span_seconds, args.events, count
+        )
+        print(f"  usage events: {offset + count:,}", end="\r", flush=True)
+    print()
+
+    # Counters as recording the events (or a full reconciliation) would leave them
+    end = START + timedelta(days=args.days + 1)
+    rows = await conn.fetch(RAW_SPEND_SQL, START, end)
+    records = []
+    for row in rows:
+        scope_type, column = RAW_SPEND_SCOPES[row["grouping"]]
+        scope_id = row[column] if column else "*"
+        if scope_id is not None:
+            records.append((scope_type, scope_id, row["day"], row["amount"], row["event_count"]))
+    await conn.copy_records_to_table(
+        "spend_counters", records=records, columns=["scope_type", "scope_id", "day", "amount", "event_count"]
+    )
+
+    rng = random.Random(0)
+    budgets = []
+    months = max(1, args.days // 30)
+    for i in range(args.budgets):
+        roll = rng.random()
+        if roll < 0.6:
+            budget_type, column, value = "tenant", "tenant_id", f"tenant-{rng.randrange(args.tenants)}"
+        elif roll < 0.9:
+            budget_type, column, value = "learner", "learner_id", f"learner-{rng.randrange(args.learners)}"
+        else:
+            budget_type, column, value = rng.choice([
+                ("service", "service_name", f"svc-{rng.randrange(8)}"),
+                ("model", "model_name", f"model-{rng.randrange(6)}"),
+                ("global", None, None),
+            ])
+        start = START + timedelta(days=30 * rng.randrange(months))
+        budgets.append((
+            budget_type, f"bench-{i}", value if column == "tenant_id" else None,
+            value if column == "learner_id" else None, value if column == "service_name" else None,
+            value if column == "model_name" else None, Decimal("1000000.00"), "monthly",
+            start, start + timedelta(days=30) - timedelta(microseconds=1)
+        ))
+    await conn.copy_records_to_table(
+        "budgets", records=budgets,
+        columns=["budget_type", "name", "tenant_id", "learner_id", "service_name", "model_name",
+                 "amount", "period", "start_date", "end_date"]
+    )
+    await conn.execute("ANALYZE usage_events; ANALYZE spend_counters; ANALYZE budgets")
+    print(f"  spend counters: {len(records):,}, budgets: {len(budgets):,}")
+
+
+async def legacy_spend(conn, budget) -> Decimal:
+    """Reference copy of the previous per-budget usage_events scan"""
+    scope_id = {
+        "tenant": budget.tenant_id, "learner": budget.learner_id,
+        "service": budget.service_name, "model": budget.model_name,
+    }.get(budget.budget_type.value)
+    sql = "SELECT SUM(calculated_cost) FROM usage_events WHERE timestamp >= $1 AND timestamp <= $2 "
+    params = [budget.start_date, budget.end_date]
+    if scope_id:
+        sql += LEGACY_FILTERS[budget.budget_type.value]
+        params.append(scope_id)
+    return (await conn.fetchval(sql, *params) or Decimal("0")).quantize(Decimal("0.000001"))
+
+
+async def run(args) -> None:
+    await database.init_database()
+    try:
+        async with database.get_db_connection() as conn:
+            print(f"seeding {args.events:,} usage events over {args.days} days ...")
+            started = time.perf_counter()
+            await seed(conn, args)
+            print(f"  seeded in {time.perf_counter() - started:.1f} s")
+
+        async with database.get_db_session() as session:
+            budgets = await BudgetMonitor()._load_active_budgets(session)
+
+            started = time.perf_counter()
+            spends = await budget_spends(session, budgets)
+            counter_seconds = time.perf_counter() - started
+
+        sample = random.Random(1).sample(budgets, min(args.legacy_sample, len(budgets)))
+        async with database.get_db_connection() as conn:
+            started = time.perf_counter()
+            legacy = {budget.id: await legacy_spend(conn, budget) for budget in sample}
+            legacy_seconds = (time.perf_counter() - started) * len(budgets) / len(sample)
+
+        mismatches = [budget.id for budget in sample if legacy[budget.id] != spends[budget.id]]
+        assert not mismatches, f"counter spend differs from usage_events for {len(mismatches)} budgets"
+
+        print(f"tick over {len(budgets):,} budgets:")
+        print(f"  previous (per-budget scans): {legacy_seconds:10.2f} s  "
+              f"(extrapolated from {len(sample)} budgets)")
+        print(f"  spend counters (one query):  {counter_seconds:10.2f} s  "
+              f"({legacy_seconds / counter_seconds:.0f}x)")
+    finally:
+        await database.close_database()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--budgets", type=int, default=10_000)
+    parser.add_argument("--tenants", type=int, default=1_000)
+    parser.add_argument("--learners", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--legacy-sample", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
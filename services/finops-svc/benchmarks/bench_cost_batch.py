@@ -0,0 +1,120 @@
+"""
+Backfill costing benchmark
+
+Builds N usage events spread over the models PricingUpdater knows (no
+database: the pricing snapshot is built from the documented rates) and
+measures cost calculations per second both ways:
+
+- previous: per-event Decimal pricing (_calculate_generic_cost with a warm
+  pricing lookup, timed on a sample of events)
+- batch: calculate_batch_costs over all events, grouped by (provider, model)
+  and priced column-wise from the snapshot
+
+and checks that both produce identical costs on the sample.
+
+Usage:
+    python benchmarks/bench_cost_batch.py [--events N] [--legacy-sample S]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.cost_calculator import CostCalculator  # noqa: E402
+from app.models import ProviderType, UsageEvent  # noqa: E402
+from app.pricing_snapshot import ModelRates, PricingSnapshot, install_pricing_snapshot  # noqa: E402
+from app.pricing_updater import PricingUpdater  # noqa: E402
+
+
+async def documented_snapshot() -> PricingSnapshot:
+    updater = PricingUpdater()
+    rates = []
+    for provider, fetch in (
+        (ProviderType.OPENAI, updater._fetch_openai_pricing),
+        (ProviderType.GEMINI, updater._fetch_gemini_pricing),
+        (ProviderType.BEDROCK, updater._fetch_bedrock_pricing),
+    ):
+        for pricing in await fetch():
+            rates.append(ModelRates.from_row({
+                "provider": provider.value,
+                "model_name": pricing["model_name"],
+                "model_type": pricing["model_type"].value,
+                "input_token_price": pricing["input_token_price"],
+                "output_token_price": pricing["output_token_price"],
+                "request_price": pricing.get("request_price"),
+                "image_price": pricing.get("image_price"),
+                "audio_price": pricing.get("audio_price"),
+                "storage_price": pricing.get("storage_price"),
+                "effective_date": datetime.now(timezone.utc),
+            }))
+    return PricingSnapshot(1, rates)
+
+
+def make_events(snapshot: PricingSnapshot, count: int):
+    rng = random.Random(0)
+    models = [snapshot.get(provider, name) for provider, name in snapshot._rates]
+    events = []
+    for i in range(count):
+        rates = rng.choice(models)
+        events.append(UsageEvent(
+            tenant_id=f"tenant-{i % 500}",
+            service_name="tutor-svc",
+            provider=rates.provider,
+            model_name=rates.model_name,
+            model_type=rates.model_type,
+            input_tokens=rng.randrange(0, 8000),
+            output_tokens=rng.randrange(0, 2000),
+            images_processed=1 if rates.image_price else 0,
+            audio_minutes=Decimal(rng.randrange(1, 1200)) / 100 if rates.audio_price else Decimal("0"),
+        ))
+    return events
+
+
+async def run(args) -> None:
+    snapshot = await documented_snapshot()
+    install_pricing_snapshot(snapshot)
+    calculator = CostCalculator()
+
+    print(f"building {args.events:,} usage events over {len(snapshot)} models ...")
+    started = time.perf_counter()
+    events = make_events(snapshot, args.events)
+    print(f"  built in {time.perf_counter() - started:.1f} s")
+
+    sample = events[:args.legacy_sample]
+    started = time.perf_counter()
+    legacy = [(await calculator._calculate_generic_cost(event, None))[0] for event in sample]
+    legacy_rate = len(sample) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    results = await calculator.calculate_batch_costs(events)
+    batch_seconds = time.perf_counter() - started
+    batch_rate = len(events) / batch_seconds
+
+    mismatches = sum(1 for expected, (_, cost, _) in zip(legacy, results) if expected != cost)
+    assert not mismatches, f"batch cost differs from Decimal pricing for {mismatches} events"
+
+    print(f"costing {len(events):,} events:")
+    print(f"  previous (per event):  {legacy_rate:12,.0f} calcs/s  "
+          f"({len(events) / legacy_rate:.1f} s extrapolated from {len(sample):,} events)")
+    print(f"  batch (snapshot):      {batch_rate:12,.0f} calcs/s  "
+          f"({batch_seconds:.1f} s, {batch_rate / legacy_rate:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--legacy-sample", type=int, default=100_000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Test suite for the FinOps pricing snapshot
+Tests snapshot versioning and hot swap, and batch costing against Decimal pricing
+"""
+
+import random
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app import pricing_snapshot
+from app.cost_calculator import CostCalculator
+from app.models import ModelType, ProviderType, UsageEvent
+from app.pricing_snapshot import (
+    ModelRates, PricingSnapshot, current_pricing_snapshot, install_pricing_snapshot, refresh_pricing_snapshot
+)
+
+EFFECTIVE = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def pricing_row(provider, model_name, model_type, input_price, output_price, **prices):
+    row = {
+        "provider": provider, "model_name": model_name, "model_type": model_type,
+        "input_token_price": Decimal(input_price), "output_token_price": Decimal(output_price),
+        "request_price": None, "image_price": None, "audio_price": None, "storage_price": None,
+        "effective_date": EFFECTIVE,
+    }
+    row.update({column: Decimal(price) for column, price in prices.items()})
+    return row
+
+
+PRICING_ROWS = [
+    pricing_row("openai", "gpt-4", "text_generation", "0.00003", "0.00006"),
+    pricing_row("openai", "gpt-3.5-turbo", "text_generation", "0.0000005", "0.0000015", request_price="0.000150"),
+    pricing_row("openai", "whisper-1", "speech_to_text", "0", "0", audio_price="0.006", storage_price="0.023"),
+    pricing_row("gemini", "gemini-pro-vision", "image_analysis", "0.00000025", "0.0000005", image_price="0.0025"),
+    # Finer than the 10^-8 price units: priced in Decimal
+    pricing_row("bedrock", "claude-3-haiku", "text_generation", "0.000000253", "0.00000125"),
+]
+
+
+def make_event(provider, model_name, rng):
+    return UsageEvent(
+        tenant_id="tenant-1",
+        service_name="tutor-svc",
+        provider=ProviderType(provider),
+        model_name=model_name,
+        model_type=ModelType.TEXT_GENERATION,
+        input_tokens=rng.randrange(0, 200_000),
+        output_tokens=rng.randrange(0, 50_000),
+        request_count=rng.randrange(1, 4),
+        images_processed=rng.randrange(0, 3),
+        audio_minutes=Decimal(rng.randrange(0, 600)) / 100 if model_name == "whisper-1" else Decimal("0"),
+    )
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    snapshot = PricingSnapshot(7, [ModelRates.from_row(row) for row in PRICING_ROWS])
+    monkeypatch.setattr(pricing_snapshot, "_snapshot", snapshot)
+    return snapshot
+
+
+@pytest.mark.asyncio
+async def test_batch_costs_match_decimal_pricing(snapshot):
+    rng = random.Random(42)
+    models = [(row["provider"], row["model_name"]) for row in PRICING_ROWS] + [("openai", "gpt-unknown")]
+    events = [make_event(*rng.choice(models), rng) for _ in range(2000)]
+    # Rounding exactly half a quantum goes up: 0.0000005 * 1 = 0.0000005 -> 0.000001
+    events.append(UsageEvent(
+        tenant_id="tenant-1", service_name="tutor-svc", provider=ProviderType.OPENAI,
+        model_name="gpt-3.5-turbo", model_type=ModelType.TEXT_GENERATION, input_tokens=1, request_count=0
+    ))
+
+    calculator = CostCalculator()
+    results = await calculator.calculate_batch_costs(events)
+
+    assert [event for event, _, _ in results] == events
+    for event, cost, breakdown in results:
+        if event.model_name == "gpt-unknown":
+            assert breakdown["fallback"] is True
+            assert cost == await calculator._get_fallback_cost(event)
+            continue
+        expected, _ = await calculator._calculate_generic_cost(event, None)
+        assert cost == expected
+        assert cost.as_tuple().exponent == -6
+        assert breakdown["pricing_version"] == 7
+    assert results[-1][1] == Decimal("0.000001")
+
+
+def test_snapshot_is_immutable_and_versioned(snapshot):
+    rates = snapshot.get(ProviderType.OPENAI, "gpt-4")
+    assert rates.units == (3000, 6000, 0, 0)
+    assert snapshot.get("openai", "gpt-4") is rates
+    assert snapshot.get(ProviderType.BEDROCK, "claude-3-haiku").units is None
+    assert snapshot.get(ProviderType.GEMINI, "gpt-4") is None
+
+    with pytest.raises(AttributeError):
+        snapshot.version = 8
+    with pytest.raises(TypeError):
+        snapshot._rates[("openai", "gpt-4")] = None
+
+    # An older or equal version never replaces the installed one
+    assert not install_pricing_snapshot(PricingSnapshot(7, []))
+    assert current_pricing_snapshot() is snapshot
+    newer = PricingSnapshot(8, [])
+    assert install_pricing_snapshot(newer)
+    assert current_pricing_snapshot() is newer
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetch(self, sql, *params):
+        return self.rows
+
+
+@pytest.mark.asyncio
+async def test_refresh_installs_next_version(monkeypatch):
+    monkeypatch.setattr(pricing_snapshot, "_snapshot", None)
+    connection = FakeConnection(PRICING_ROWS[:1])
+
+    @asynccontextmanager
+    async def fake_db_connection():
+        yield connection
+
+    monkeypatch.setattr(pricing_snapshot, "get_db_connection", fake_db_connection)
+
+    first = await refresh_pricing_snapshot()
+    assert first.version == 1 and len(first) == 1
+
+    # Prices saved by PricingUpdater: the next calculation sees the new version
+    connection.rows = PRICING_ROWS
+    second = await refresh_pricing_snapshot()
+    assert second.version == 2 and len(second) == len(PRICING_ROWS)
+    assert current_pricing_snapshot() is second
+    assert first.get(ProviderType.OPENAI, "whisper-1") is None
@@ -0,0 +1,120 @@
+"""
+Test suite for FinOps spend counters
+Tests per-scope daily counter deltas, budget scope mapping and reconciliation
+"""
+
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.models import Budget, BudgetPeriod, BudgetType, ModelType, ProviderType, UsageEvent
+from app.spend_counters import (
+    GLOBAL_SCOPE_ID, budget_days, budget_scope, reconcile_spend_counters, spend_counter_deltas
+)
+
+
+def make_event(cost, timestamp, learner_id=None, tenant_id="tenant-1"):
+    return UsageEvent(
+        tenant_id=tenant_id,
+        learner_id=learner_id,
+        service_name="tutor-svc",
+        provider=ProviderType.OPENAI,
+        model_name="gpt-4",
+        model_type=ModelType.TEXT_GENERATION,
+        calculated_cost=Decimal(cost),
+        timestamp=timestamp
+    )
+
+
+def test_deltas_charge_every_scope_per_utc_day():
+    day = datetime(2024, 5, 1, 23, 30)
+    events = [
+        make_event("0.100000", day, learner_id="learner-1"),
+        make_event("0.250000", day),
+        # 01:30 at UTC+3 is still 22:30 UTC on the 1st
+        make_event("1.000000", datetime(2024, 5, 2, 1, 30, tzinfo=timezone(timedelta(hours=3)))),
+        make_event("2.000000", day + timedelta(hours=1), tenant_id="tenant-2"),
+    ]
+
+    deltas = spend_counter_deltas(events)
+
+    may_1, may_2 = date(2024, 5, 1), date(2024, 5, 2)
+    assert deltas[("global", GLOBAL_SCOPE_ID, may_1)] == (Decimal("1.350000"), 3)
+    assert deltas[("tenant", "tenant-1", may_1)] == (Decimal("1.350000"), 3)
+    assert deltas[("learner", "learner-1", may_1)] == (Decimal("0.100000"), 1)
+    assert deltas[("model", "gpt-4", may_2)] == (Decimal("2.000000"), 1)
+    assert ("tenant", "tenant-1", may_2) not in deltas
+    assert not any(scope_type == "learner" and day == may_2 for scope_type, _, day in deltas)
+
+
+def test_budget_scope_and_days():
+    budget = Budget(
+        budget_type=BudgetType.LEARNER,
+        name="Learner budget",
+        learner_id="learner-1",
+        amount=Decimal("25"),
+        period=BudgetPeriod.MONTHLY,
+        start_date=datetime(2024, 5, 1),
+        end_date=datetime(2024, 5, 31, 23, 59, 59)
+    )
+    assert budget_scope(budget) == ("learner", "learner-1")
+    assert budget_days(budget) == (date(2024, 5, 1), date(2024, 5, 31))
+
+    # A scoped budget without its identifier covers all usage
+    budget.learner_id = None
+    budget.end_date = None
+    assert budget_scope(budget) == ("global", GLOBAL_SCOPE_ID)
+    assert budget_days(budget, now=datetime(2024, 5, 10, 8)) == (date(2024, 5, 1), date(2024, 5, 10))
+
+
+class FakeConnection:
+    def __init__(self, raw_rows, counter_rows):
+        self.raw_rows = raw_rows
+        self.counter_rows = counter_rows
+        self.executed = []
+
+    @asynccontextmanager
+    async def transaction(self, **kwargs):
+        yield
+
+    async def fetch(self, sql, *params):
+        return self.raw_rows if "usage_events" in sql else self.counter_rows
+
+    async def execute(self, sql, *params):
+        self.executed.append(params)
+
+
+@pytest.mark.asyncio
+async def test_reconciliation_repairs_drift_by_difference():
+    day = date(2024, 5, 1)
+    raw_rows = [
+        {"day": day, "tenant_id": None, "learner_id": None, "service_name": None, "model_name": None,
+         "grouping": 0b1111, "amount": Decimal("5.000000"), "event_count": 5},
+        {"day": day, "tenant_id": "tenant-1", "learner_id": None, "service_name": None, "model_name": None,
+         "grouping": 0b0111, "amount": Decimal("5.000000"), "event_count": 5},
+        # Learner grouping set row for events without a learner
+        {"day": day, "tenant_id": None, "learner_id": None, "service_name": None, "model_name": None,
+         "grouping": 0b1011, "amount": Decimal("5.000000"), "event_count": 5},
+    ]
+    counter_rows = [
+        {"scope_type": "global", "scope_id": GLOBAL_SCOPE_ID, "day": day,
+         "amount": Decimal("5.000000"), "event_count": 5},
+        {"scope_type": "tenant", "scope_id": "tenant-1", "day": day,
+         "amount": Decimal("4.000000"), "event_count": 4},
+        {"scope_type": "service", "scope_id": "retired-svc", "day": day,
+         "amount": Decimal("1.000000"), "event_count": 1},
+    ]
+    conn = FakeConnection(raw_rows, counter_rows)
+
+    result = await reconcile_spend_counters(conn, day, day)
+
+    assert result["counters_checked"] == 3
+    assert result["counters_repaired"] == 2
+    scope_types, scope_ids, days, amounts, counts = conn.executed[0]
+    repairs = dict(zip(zip(scope_types, scope_ids), zip(amounts, counts)))
+    assert repairs == {
+        ("tenant", "tenant-1"): (Decimal("1.000000"), 1),
+        ("service", "retired-svc"): (Decimal("-1.000000"), -1),
+    }
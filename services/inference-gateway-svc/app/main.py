@@ -26,7 +26,7 @@ from .providers.base import ProviderType
 from .providers.openai import OpenAIProvider
 from .providers.vertex_gemini import VertexGeminiProvider
 from .providers.bedrock_anthropic import BedrockAnthropicProvider
-from .policy import PolicyEngine
+from .policy import PolicyEngine, SafetyEngine, ModerationAuditLogger
 from .pii import PIIScrubber, DEFAULT_CONFIG as DEFAULT_PII_CONFIG
 from .routers import generate, embed, moderate, checkpoints
 
@@ -40,6 +40,7 @@ logger = logging.getLogger(__name__)
 # Global state
 providers: Dict[ProviderType, Any] = {}
 policy_engine: Optional[PolicyEngine] = None
+safety_engine: Optional[SafetyEngine] = None
 pii_scrubber: Optional[PIIScrubber] = None
 
 
@@ -58,6 +59,9 @@ async def lifespan(app: FastAPI):
     # Initialize policy engine
     await initialize_policy_engine()
     
+    # Initialize safety engine
+    await initialize_safety_engine()
+    
     # Initialize PII scrubber
     await initialize_pii_scrubber()
     
@@ -218,6 +222,19 @@ async def initialize_policy_engine():
     logger.info("Policy engine initialized")
 
 
+async def initialize_safety_engine():
+    """Initialize safety engine with its moderation result cache"""
+    global safety_engine
+    
+    safety_config = {
+        "moderation_cache_size": int(os.getenv("MODERATION_CACHE_SIZE", "10000")),
+        "moderation_cache_ttl_seconds": float(os.getenv("MODERATION_CACHE_TTL_SECONDS", "300"))
+    }
+    
+    safety_engine = SafetyEngine(config=safety_config, audit_logger=ModerationAuditLogger())
+    logger.info("Safety engine initialized")
+
+
 async def initialize_pii_scrubber():
     """Initialize PII scrubber"""
     global pii_scrubber
@@ -239,7 +256,8 @@ async def initialize_router_services():
     generate.generation_service = generate.GenerationService(
         providers=providers,
         policy_engine=policy_engine,
-        pii_scrubber=pii_scrubber
+        pii_scrubber=pii_scrubber,
+        safety_engine=safety_engine
     )
     
     # Initialize embedding service
@@ -252,7 +270,8 @@ async def initialize_router_services():
     # Initialize moderation service
     moderate.moderation_service = moderate.ModerationService(
         providers=providers,
-        policy_engine=policy_engine
+        policy_engine=policy_engine,
+        safety_engine=safety_engine
     )
     
     logger.info("Router services initialized")
@@ -392,10 +411,15 @@ async def get_metrics():
     if not policy_engine:
         raise HTTPException(status_code=503, detail="Policy engine not available")
     
-    return {
+    metrics = {
         "provider_health": policy_engine.get_provider_health_status(),
         "timestamp": time.time()
     }
+    
+    if safety_engine:
+        metrics["moderation_cache"] = safety_engine.result_cache.get_stats()
+    
+    return metrics
 
 
 @app.get("/providers")
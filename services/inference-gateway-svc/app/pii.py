@@ -4,6 +4,7 @@ S2-01 Implementation: Detects and masks PII in requests/responses
 """
 
 import re
+import string
 import hashlib
 from typing import Dict, List, Set, Optional, Tuple, Any
 from dataclasses import dataclass
@@ -38,13 +39,63 @@ class PIIMatch:
     replacement: str
 
 
+# Characters held back by PIIStreamScrubber to catch PII split across chunks
+DEFAULT_STREAM_WINDOW = 64
+
+# Longest buffer PIIStreamScrubber holds when there is no clean cut in it
+DEFAULT_STREAM_MAX_CARRY = 512
+
+# (PII type, original value) -> replacement token, scoped to one request
+ReplacementCache = Dict[Tuple[Optional[PIIType], str], str]
+
+_WORD_GROUP = "word"
+
+# Characters that can appear in an email local part or a plate prefix
+_TOKEN_CHARS = frozenset(string.ascii_letters + string.digits + "._%+-")
+
+# A character no pattern can match, so no PII spans it: anything outside the
+# classes the patterns use, \d and \s, and the non-ASCII letters IGNORECASE
+# folds onto [A-Za-z]
+_STREAM_BREAK = re.compile(r'(?!\d)[^\sA-Za-z0-9._%+\-@()/|\u0130\u0131\u017f\u212a]')
+_WHITESPACE = re.compile(r'\s')
+
+
+def _build_scanner(patterns: Dict[PIIType, "re.Pattern"], order: List[PIIType]) -> "re.Pattern":
+    """Fold per-type patterns into one alternation with a named group per type
+
+    Case-insensitive patterns are wrapped in scoped ``(?i:...)`` groups so the
+    trailing capitalized-word alternative used for name detection stays
+    case-sensitive.
+    """
+    alternatives = []
+    for pii_type in order:
+        pattern = patterns[pii_type]
+        body = pattern.pattern
+        if pattern.flags & re.IGNORECASE:
+            body = f"(?i:{body})"
+        alternatives.append(f"(?P<{pii_type.value}>{body})")
+    
+    alternatives.append(rf"(?P<{_WORD_GROUP}>\b[A-Z][a-z]+\b)")
+    return re.compile("|".join(alternatives))
+
+
 class PIIDetector:
-    """PII detection engine with pattern matching and ML heuristics"""
+    """PII detection engine with pattern matching and ML heuristics
+
+    All patterns are folded into a single precompiled alternation that is
+    scanned once over the text, with alternatives tried in ``SCAN_ORDER`` at
+    each candidate position. Matches come out sorted and non-overlapping, so
+    overlap resolution happens inline instead of in a separate sort pass.
+    Name candidates are capitalized tokens checked against frozen first/last
+    name sets in O(1) per token.
+    """
     
     # Regex patterns for common PII types
     PATTERNS = {
+        # Local part capped at the RFC 5321 limit so a long run of token
+        # characters without an "@" is not rescanned from every boundary
         PIIType.EMAIL: re.compile(
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+            r'\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
             re.IGNORECASE
         ),
         PIIType.PHONE: re.compile(
@@ -65,61 +116,208 @@ class PIIDetector:
         PIIType.LICENSE_PLATE: re.compile(
             r'\b[A-Z]{2,3}[-\s]?\d{3,4}\b|\b\d{3}[-\s]?[A-Z]{3}\b',
             re.IGNORECASE
-        )
+        ),
+        # Simple address pattern: number + street name + (optional apt/suite)
+        PIIType.ADDRESS: re.compile(
+            r'\b\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd|Way|Court|Ct)\b(?:\s+(?:Apt|Suite|Unit)\s*\d+)?',
+            re.IGNORECASE
+        ),
+    }
+    
+    # Priority of alternatives when several patterns match at the same
+    # position, ordered by the best confidence each type can score
+    SCAN_ORDER = [
+        PIIType.CREDIT_CARD,
+        PIIType.SSN,
+        PIIType.PHONE,
+        PIIType.EMAIL,
+        PIIType.IP_ADDRESS,
+        PIIType.DATE_OF_BIRTH,
+        PIIType.LICENSE_PLATE,
+        PIIType.ADDRESS,
+    ]
+    
+    # Fixed confidence for heuristic (non-validated) detections
+    HEURISTIC_CONFIDENCE = {
+        PIIType.NAME: 0.75,
+        PIIType.ADDRESS: 0.7,
     }
     
     # Common first/last names for heuristic detection
-    COMMON_FIRST_NAMES = {
+    COMMON_FIRST_NAMES = frozenset({
         "james", "robert", "john", "michael", "david", "william", "richard", "charles",
         "joseph", "thomas", "christopher", "daniel", "paul", "mark", "donald", "george",
         "mary", "patricia", "jennifer", "linda", "elizabeth", "barbara", "susan",
         "jessica", "sarah", "karen", "nancy", "lisa", "betty", "helen", "sandra"
-    }
+    })
     
-    COMMON_LAST_NAMES = {
+    COMMON_LAST_NAMES = frozenset({
         "smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis",
         "rodriguez", "martinez", "hernandez", "lopez", "gonzalez", "wilson", "anderson",
         "thomas", "taylor", "moore", "jackson", "martin", "lee", "perez", "thompson"
-    }
+    })
+    
+    _ANCHORS = re.compile(r'[0-9@(+A-Z]')
+    _NAME_TAIL = re.compile(r'\s+([A-Z][a-z]+)\b')
+    _NON_DIGITS = re.compile(r'[^\d]')
     
     def __init__(self):
         self.confidence_threshold = 0.7
+        self._scanner = _build_scanner(self.PATTERNS, self.SCAN_ORDER)
+        self._group_rank = {t.value: rank for rank, t in enumerate(self.SCAN_ORDER)}
     
-    def detect_pii(self, text: str) -> List[PIIMatch]:
-        """Detect all PII in the given text"""
+    def detect_pii(self, text: str,
+                   replacements: Optional[ReplacementCache] = None) -> List[PIIMatch]:
+        """Detect all PII in the given text in a single left-to-right scan
+
+        ``replacements`` memoizes replacement tokens per original value, so a
+        caller scrubbing many strings for one request hashes each value once.
+        """
         with tracer.start_as_current_span("detect_pii") as span:
-            matches = []
-            
-            # Pattern-based detection
-            for pii_type, pattern in self.PATTERNS.items():
-                for match in pattern.finditer(text):
-                    confidence = self._calculate_pattern_confidence(pii_type, match.group())
-                    if confidence >= self.confidence_threshold:
-                        matches.append(PIIMatch(
-                            pii_type=pii_type,
-                            start=match.start(),
-                            end=match.end(),
-                            original_text=match.group(),
-                            confidence=confidence,
-                            replacement=self._generate_replacement(pii_type, match.group())
-                        ))
-            
-            # Name detection using heuristics
-            name_matches = self._detect_names(text)
-            matches.extend(name_matches)
-            
-            # Address detection using heuristics
-            address_matches = self._detect_addresses(text)
-            matches.extend(address_matches)
-            
-            # Remove overlapping matches (keep higher confidence)
-            matches = self._remove_overlaps(matches)
+            matches = self._scan(text, replacements)
             
             span.set_attribute("pii_matches_found", len(matches))
             span.set_attribute("pii_types", [m.pii_type.value for m in matches])
             
             return matches
     
+    def _scan(self, text: str,
+              replacements: Optional[ReplacementCache] = None) -> List[PIIMatch]:
+        """Run the combined scanner over text, resolving overlaps as it goes
+
+        Every detectable value contains an anchor character (digit, ``@``,
+        ``(``, ``+`` or an uppercase letter), so the scanner is only tried in
+        the short window that can precede each anchor instead of at every
+        offset. Overlapping candidates are resolved against the last kept
+        match only, keeping the higher-confidence one, so the pass stays
+        linear.
+        """
+        matches = []
+        match_at = self._scanner.match
+        current = None
+        pos = 0
+        
+        for anchor in self._ANCHORS.finditer(text):
+            t = anchor.start()
+            if t < pos:
+                continue
+            
+            s = self._window_start(text, t, pos)
+            while s <= t:
+                found = match_at(text, s)
+                if found is None:
+                    s += 1
+                    continue
+                
+                # Resume inside the hit so overlapping candidates are still seen
+                pos = s = s + 1
+                
+                kind = found.lastgroup
+                if kind == _WORD_GROUP:
+                    candidate = self._match_name(text, found, replacements)
+                    if candidate is None:
+                        # No other pattern can start inside a plain word
+                        pos = s = found.end()
+                        continue
+                else:
+                    rank = self._group_rank[kind]
+                    candidate = self._candidate(self.SCAN_ORDER[rank], found, replacements)
+                    if candidate is None:
+                        # Rejected by validation: give lower-priority patterns
+                        # a chance at the same start
+                        candidate = self._match_fallback(
+                            text, found.start(), rank + 1, replacements
+                        )
+                    if candidate is None:
+                        continue
+                
+                if current is not None and candidate.start < current.end:
+                    if candidate.confidence > current.confidence:
+                        current = candidate
+                    continue
+                
+                if current is not None:
+                    matches.append(current)
+                current = candidate
+            
+            pos = max(pos, t + 1)
+        
+        if current is not None:
+            matches.append(current)
+        
+        return matches
+    
+    def _window_start(self, text: str, anchor: int, pos: int) -> int:
+        """Earliest offset from ``pos`` a match containing the anchor can start at
+
+        Covers an email local part or plate letters directly before the
+        anchor, plus plate letters separated from a digit by one space.
+        Offsets before ``pos`` were already tried, so the walk back stops
+        there: each character is walked over once per scan, which keeps long
+        runs of token characters (hashes, base64, digit strings) linear.
+        """
+        start = anchor
+        while start > pos and text[start - 1] in _TOKEN_CHARS:
+            start -= 1
+        if (start > max(pos, 1) and text[anchor].isdigit()
+                and text[start - 1].isspace() and text[start - 2].isalpha()):
+            start -= 1
+            floor = max(pos, start - 3)
+            while start > floor and text[start - 1].isalpha():
+                start -= 1
+        return start
+    
+    def _candidate(self, pii_type: PIIType, found: re.Match,
+                   replacements: Optional[ReplacementCache] = None) -> Optional[PIIMatch]:
+        """Score a raw pattern hit and build a match if it clears the threshold"""
+        value = found.group()
+        confidence = self.HEURISTIC_CONFIDENCE.get(pii_type)
+        if confidence is None:
+            confidence = self._calculate_pattern_confidence(pii_type, value)
+        if confidence < self.confidence_threshold:
+            return None
+        
+        return PIIMatch(
+            pii_type=pii_type,
+            start=found.start(),
+            end=found.end(),
+            original_text=value,
+            confidence=confidence,
+            replacement=self._replacement_for(pii_type, value, replacements)
+        )
+    
+    def _match_fallback(self, text: str, start: int, rank: int,
+                        replacements: Optional[ReplacementCache] = None) -> Optional[PIIMatch]:
+        """Try the remaining patterns, in priority order, anchored at start"""
+        for pii_type in self.SCAN_ORDER[rank:]:
+            found = self.PATTERNS[pii_type].match(text, start)
+            if found:
+                match = self._candidate(pii_type, found, replacements)
+                if match is not None:
+                    return match
+        return None
+    
+    def _match_name(self, text: str, found: re.Match,
+                    replacements: Optional[ReplacementCache] = None) -> Optional[PIIMatch]:
+        """Detect a first name immediately followed by a known last name"""
+        if found.group().lower() not in self.COMMON_FIRST_NAMES:
+            return None
+        
+        tail = self._NAME_TAIL.match(text, found.end())
+        if not tail or tail.group(1).lower() not in self.COMMON_LAST_NAMES:
+            return None
+        
+        start = found.start()
+        full_name = text[start:tail.end()]
+        return PIIMatch(
+            pii_type=PIIType.NAME,
+            start=start,
+            end=tail.end(),
+            original_text=full_name,
+            confidence=self.HEURISTIC_CONFIDENCE[PIIType.NAME],
+            replacement=self._replacement_for(PIIType.NAME, full_name, replacements)
+        )
+    
     def _calculate_pattern_confidence(self, pii_type: PIIType, text: str) -> float:
         """Calculate confidence score for pattern matches"""
         base_confidence = 0.8
@@ -142,7 +340,7 @@ class PIIDetector:
         
         elif pii_type == PIIType.PHONE:
             # Basic phone validation
-            digits = re.sub(r'[^\d]', '', text)
+            digits = self._NON_DIGITS.sub('', text)
             if len(digits) == 10 or len(digits) == 11:
                 return 0.85
             else:
@@ -165,76 +363,17 @@ class PIIDetector:
         
         return checksum % 10 == 0
     
-    def _detect_names(self, text: str) -> List[PIIMatch]:
-        """Detect potential names using heuristics"""
-        matches = []
-        
-        # Look for capitalized words that could be names
-        words = re.findall(r'\b[A-Z][a-z]+\b', text)
-        
-        for i, word in enumerate(words):
-            if word.lower() in self.COMMON_FIRST_NAMES:
-                # Look for a last name following
-                start_pos = text.find(word)
-                next_word_match = re.search(r'\s+([A-Z][a-z]+)\b', text[start_pos + len(word):])
-                
-                if next_word_match and next_word_match.group(1).lower() in self.COMMON_LAST_NAMES:
-                    full_name = f"{word} {next_word_match.group(1)}"
-                    matches.append(PIIMatch(
-                        pii_type=PIIType.NAME,
-                        start=start_pos,
-                        end=start_pos + len(full_name),
-                        original_text=full_name,
-                        confidence=0.75,
-                        replacement=self._generate_replacement(PIIType.NAME, full_name)
-                    ))
-        
-        return matches
-    
-    def _detect_addresses(self, text: str) -> List[PIIMatch]:
-        """Detect potential addresses using pattern matching"""
-        matches = []
-        
-        # Simple address pattern: number + street name + (optional apt/suite)
-        address_pattern = re.compile(
-            r'\b\d+\s+[A-Za-z\s]+(Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd|Way|Court|Ct)\b(?:\s+(?:Apt|Suite|Unit)\s*\d+)?',
-            re.IGNORECASE
-        )
+    def _replacement_for(self, pii_type: PIIType, original: str,
+                         replacements: Optional[ReplacementCache]) -> str:
+        """Look up or generate the replacement token for a value"""
+        if replacements is None:
+            return self._generate_replacement(pii_type, original)
         
-        for match in address_pattern.finditer(text):
-            matches.append(PIIMatch(
-                pii_type=PIIType.ADDRESS,
-                start=match.start(),
-                end=match.end(),
-                original_text=match.group(),
-                confidence=0.7,
-                replacement=self._generate_replacement(PIIType.ADDRESS, match.group())
-            ))
-        
-        return matches
-    
-    def _remove_overlaps(self, matches: List[PIIMatch]) -> List[PIIMatch]:
-        """Remove overlapping matches, keeping higher confidence ones"""
-        if not matches:
-            return matches
-        
-        # Sort by start position
-        matches.sort(key=lambda x: x.start)
-        
-        result = [matches[0]]
-        
-        for match in matches[1:]:
-            last_match = result[-1]
-            
-            # Check for overlap
-            if match.start < last_match.end:
-                # Keep the higher confidence match
-                if match.confidence > last_match.confidence:
-                    result[-1] = match
-            else:
-                result.append(match)
-        
-        return result
+        key = (pii_type, original)
+        token = replacements.get(key)
+        if token is None:
+            token = replacements[key] = self._generate_replacement(pii_type, original)
+        return token
     
     def _generate_replacement(self, pii_type: PIIType, original: str) -> str:
         """Generate appropriate replacement for PII"""
@@ -265,6 +404,8 @@ class PIIScrubber:
         self.detector = PIIDetector()
         self.enabled_types = set(PIIType)  # Enable all types by default
         self.scrub_mode = self.config.get("scrub_mode", "mask")  # mask, hash, remove
+        self.stream_window = self.config.get("stream_window", DEFAULT_STREAM_WINDOW)
+        self.stream_max_carry = self.config.get("stream_max_carry", DEFAULT_STREAM_MAX_CARRY)
         
         # Configure enabled PII types
         if "enabled_types" in self.config:
@@ -273,24 +414,11 @@ class PIIScrubber:
     def scrub_text(self, text: str) -> Tuple[str, List[PIIMatch]]:
         """Scrub PII from text and return cleaned text with matches"""
         with tracer.start_as_current_span("scrub_text") as span:
-            matches = self.detector.detect_pii(text)
-            
-            # Filter matches by enabled types
-            matches = [m for m in matches if m.pii_type in self.enabled_types]
+            cleaned_text, matches = self._scrub(text)
             
             if not matches:
                 span.set_attribute("pii_scrubbed", False)
-                return text, matches
-            
-            # Apply scrubbing (reverse order to maintain positions)
-            cleaned_text = text
-            for match in reversed(matches):
-                replacement = self._get_replacement(match)
-                cleaned_text = (
-                    cleaned_text[:match.start] + 
-                    replacement + 
-                    cleaned_text[match.end:]
-                )
+                return cleaned_text, matches
             
             span.set_attribute("pii_scrubbed", True)
             span.set_attribute("pii_matches_count", len(matches))
@@ -301,41 +429,103 @@ class PIIScrubber:
         """Scrub PII from request data"""
         with tracer.start_as_current_span("scrub_request") as span:
             all_matches = []
-            scrubbed_data = {}
-            
-            for key, value in request_data.items():
-                if isinstance(value, str):
-                    scrubbed_value, matches = self.scrub_text(value)
-                    scrubbed_data[key] = scrubbed_value
-                    all_matches.extend(matches)
-                elif isinstance(value, list):
-                    scrubbed_list = []
-                    for item in value:
-                        if isinstance(item, str):
-                            scrubbed_item, matches = self.scrub_text(item)
-                            scrubbed_list.append(scrubbed_item)
-                            all_matches.extend(matches)
-                        else:
-                            scrubbed_list.append(item)
-                    scrubbed_data[key] = scrubbed_list
-                elif isinstance(value, dict):
-                    # Recursively scrub nested dictionaries
-                    scrubbed_nested, matches = self.scrub_request(value)
-                    scrubbed_data[key] = scrubbed_nested
-                    all_matches.extend(matches)
-                else:
-                    scrubbed_data[key] = value
+            scrubbed_data = self._scrub_value(request_data, {}, all_matches)
             
             span.set_attribute("total_pii_matches", len(all_matches))
             
             return scrubbed_data, all_matches
     
-    def _get_replacement(self, match: PIIMatch) -> str:
+    def scrub_messages(self, messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[PIIMatch]]:
+        """Scrub a whole conversation in one call
+
+        Replacement tokens are computed once per original value across all
+        messages, and only a single tracing span is opened.
+        """
+        with tracer.start_as_current_span("scrub_messages") as span:
+            all_matches = []
+            scrubbed_messages = self._scrub_value(messages, {}, all_matches)
+            
+            span.set_attribute("message_count", len(messages))
+            span.set_attribute("total_pii_matches", len(all_matches))
+            
+            return scrubbed_messages, all_matches
+    
+    def scrub_batch(self, requests: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], List[PIIMatch]]]:
+        """Scrub many requests in one call, caching replacements per request"""
+        with tracer.start_as_current_span("scrub_batch") as span:
+            results = []
+            total_matches = 0
+            
+            for request_data in requests:
+                matches = []
+                results.append((self._scrub_value(request_data, {}, matches), matches))
+                total_matches += len(matches)
+            
+            span.set_attribute("batch_size", len(requests))
+            span.set_attribute("total_pii_matches", total_matches)
+            
+            return results
+    
+    def stream(self, window: Optional[int] = None) -> "PIIStreamScrubber":
+        """Create an incremental scrubber for one streamed completion"""
+        return PIIStreamScrubber(self, window if window is not None else self.stream_window,
+                                 self.stream_max_carry)
+    
+    def _scrub_value(self, value: Any, replacements: ReplacementCache,
+                     all_matches: List[PIIMatch]) -> Any:
+        """Recursively scrub strings inside dicts and lists"""
+        if isinstance(value, str):
+            scrubbed_value, matches = self._scrub(value, replacements)
+            all_matches.extend(matches)
+            return scrubbed_value
+        elif isinstance(value, dict):
+            return {
+                key: self._scrub_value(item, replacements, all_matches)
+                for key, item in value.items()
+            }
+        elif isinstance(value, list):
+            return [self._scrub_value(item, replacements, all_matches) for item in value]
+        return value
+    
+    def _scrub(self, text: str,
+               replacements: Optional[ReplacementCache] = None) -> Tuple[str, List[PIIMatch]]:
+        """Detect and replace PII without opening a tracing span"""
+        matches = self._detect(text, replacements)
+        if not matches:
+            return text, matches
+        return self._apply(text, matches, replacements), matches
+    
+    def _detect(self, text: str,
+                replacements: Optional[ReplacementCache] = None) -> List[PIIMatch]:
+        """Detect PII of the enabled types"""
+        matches = self.detector._scan(text, replacements)
+        return [m for m in matches if m.pii_type in self.enabled_types]
+    
+    def _apply(self, text: str, matches: List[PIIMatch],
+               replacements: Optional[ReplacementCache] = None) -> str:
+        """Replace sorted, non-overlapping matches in text"""
+        parts = []
+        last = 0
+        for match in matches:
+            parts.append(text[last:match.start])
+            parts.append(self._get_replacement(match, replacements))
+            last = match.end
+        parts.append(text[last:])
+        return "".join(parts)
+    
+    def _get_replacement(self, match: PIIMatch,
+                         replacements: Optional[ReplacementCache] = None) -> str:
         """Get replacement text based on scrub mode"""
         if self.scrub_mode == "remove":
             return ""
         elif self.scrub_mode == "hash":
-            return hashlib.md5(match.original_text.encode()).hexdigest()[:8]
+            if replacements is None:
+                return hashlib.md5(match.original_text.encode()).hexdigest()[:8]
+            key = (None, match.original_text)
+            digest = replacements.get(key)
+            if digest is None:
+                digest = replacements[key] = hashlib.md5(match.original_text.encode()).hexdigest()[:8]
+            return digest
         else:  # mask mode (default)
             return match.replacement
     
@@ -353,6 +543,111 @@ class PIIScrubber:
         return summary
 
 
+class PIIStreamScrubber:
+    """Incremental scrubber for streamed provider output
+
+    Each chunk is appended to a carry-over buffer. Text is released up to
+    the last character no pattern can match (punctuation, CJK text), or up
+    to whitespace at least ``window`` characters before the end of the
+    buffer, and never from inside a match, so PII split across chunk
+    boundaries is detected once the rest of it arrives and the streamed
+    output equals ``scrub_text`` on the whole completion. A buffer with no
+    such cut (base64, minified code) is cut ``window`` characters before its
+    end once it grows past ``max_carry``. Call ``flush()`` after the last
+    chunk to release the remainder.
+    """
+    
+    def __init__(self, scrubber: PIIScrubber, window: int = None, max_carry: int = None):
+        self.scrubber = scrubber
+        self.window = window if window is not None else DEFAULT_STREAM_WINDOW
+        max_carry = max_carry if max_carry is not None else DEFAULT_STREAM_MAX_CARRY
+        self.max_carry = max(max_carry, self.window)
+        self.matches: List[PIIMatch] = []
+        # Last released character, kept so word boundaries at the start of
+        # the carry are detected as they would be in the whole completion
+        self._context = ""
+        self._carry = ""
+        self._replacements: ReplacementCache = {}
+    
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the scrubbed text that is safe to emit"""
+        start = len(self._context)
+        text = self._context + self._carry + chunk
+        forced = len(text) - start > self.max_carry
+        if not forced and not self._may_cut(text, start):
+            self._carry = text[start:]
+            return ""
+        
+        matches = self._detect(text, start)
+        cut = self._safe_cut(text, start, matches)
+        if cut <= start and forced:
+            cut = self._forced_cut(text, matches)
+        
+        if cut <= start:
+            self._carry = text[start:]
+            return ""
+        
+        released = [m for m in matches if m.end <= cut]
+        self._context, self._carry = text[cut - 1], text[cut:]
+        self.matches.extend(released)
+        return self.scrubber._apply(text[:cut], released, self._replacements)[start:]
+    
+    def _detect(self, text: str, start: int) -> List[PIIMatch]:
+        """Matches in the carry, ignoring any that take in the context character"""
+        return [m for m in self.scrubber._detect(text, self._replacements) if m.start >= start]
+    
+    def _may_cut(self, text: str, start: int) -> bool:
+        """Whether the buffer has a clean cut, checked before running detection"""
+        return (_STREAM_BREAK.search(text, start) is not None
+                or _WHITESPACE.search(text, start, len(text) - self.window) is not None)
+    
+    def _safe_cut(self, text: str, start: int, matches: List[PIIMatch]) -> int:
+        """Latest position after ``start`` that no current or future match can cross
+
+        The cut follows either a character no pattern can match, which ends
+        any match before it, or whitespace at least ``window`` characters
+        before the end, so it never splits a token, and lies before every
+        match that crosses it. Matches ending inside the window before a
+        whitespace cut stay held as a consequence: the rest of the value may
+        still arrive and extend or re-type them (plates and names can span a
+        space). Returns ``start`` when nothing can be released yet.
+        """
+        limit = len(text) - self.window
+        cut = len(text)
+        while cut > start:
+            char = text[cut - 1]
+            if not (char.isspace() and cut <= limit) and not _STREAM_BREAK.match(char):
+                cut -= 1
+                continue
+            crossing = [m.start for m in matches if m.start < cut < m.end]
+            if not crossing:
+                return cut
+            cut = min(crossing)
+        return start
+    
+    def _forced_cut(self, text: str, matches: List[PIIMatch]) -> int:
+        """Cut for a buffer past ``max_carry`` that has no clean cut
+
+        Falls ``window`` characters before the end, or after a match crossing
+        that point so the match is still replaced whole. Only PII longer than
+        the window can be split by it.
+        """
+        cut = len(text) - self.window
+        for m in matches:
+            if m.start < cut < m.end:
+                return m.end
+        return cut
+    
+    def flush(self) -> str:
+        """Scrub and return whatever is still held in the carry-over buffer"""
+        start = len(self._context)
+        text = self._context + self._carry
+        self._context = self._carry = ""
+        matches = self._detect(text, start)
+        self.matches.extend(matches)
+        return self.scrubber._apply(text, matches, self._replacements)[start:]
+
+
 # Configuration presets
 DEFAULT_CONFIG = {
     "scrub_mode": "mask",
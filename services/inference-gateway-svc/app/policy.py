@@ -5,10 +5,13 @@ S4-12 Implementation: Content moderation & safety filters with subject-aware rul
 """
 
 import json
+import logging
 import time
 import re
+import hashlib
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any, Tuple, Set, Union
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from datetime import datetime, timedelta
 from opentelemetry import trace
@@ -34,6 +37,12 @@ except ImportError:
 
 tracer = trace.get_tracer(__name__)
 
+# Numbered or named backreferences inside a moderation pattern
+_GROUP_REFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+# Escape sequences (\b, \W, ...) and uppercase literals outside them
+_ESCAPE_SEQUENCE = re.compile(r'\\.')
+_UPPERCASE_LITERAL = re.compile(r'[A-Z]')
+
 
 class RoutingStrategy(Enum):
     """Provider routing strategies"""
@@ -171,6 +180,11 @@ class ModerationResult:
     confidence: float = 0.0
     provider_used: Optional[str] = None
     processing_time_ms: int = 0
+    
+    @property
+    def blocks_request(self) -> bool:
+        """Whether the verdict stops the request (block, or block + notify)"""
+        return self.action in (ModerationAction.BLOCK, ModerationAction.ESCALATE)
 
 
 @dataclass
@@ -499,15 +513,276 @@ class PolicyEngine:
             self.provider_health[provider] = ProviderHealth(provider=provider)
 
 
+def _keyword_trie_pattern(keywords: Set[str]) -> str:
+    """Build a trie-shaped alternation matching the longest keyword at a position"""
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Greedy optional group: prefer extending to a longer keyword
+        return f"(?:{body})?" if "" in node else body
+    
+    return build(trie)
+
+
+class ModerationIndex:
+    """Compiled keyword and pattern matchers for one safety policy
+    
+    All blocked keywords of the policy's enabled rules are folded into one
+    trie-shaped regex over the lowercased content, and all blocked/SEL
+    patterns into one alternation. A single scan reports every keyword and
+    pattern that occurs, so rules can be attributed by set lookups instead
+    of rescanning the content per rule.
+    """
+    
+    def __init__(self, rules: List[ModerationRule],
+                 sel_patterns: Optional[Dict[SELCategory, List[str]]] = None,
+                 version: int = 0):
+        self.version = version
+        
+        keywords = {
+            keyword.lower()
+            for rule in rules if rule.enabled
+            for keyword in rule.blocked_keywords
+        }
+        # Keywords that occur inside another keyword: finding the longer one
+        # at a position implies the shorter ones occur too
+        self._keyword_closure = {
+            keyword: frozenset(other for other in keywords if other in keyword)
+            for keyword in keywords
+        }
+        self._keyword_re = re.compile(_keyword_trie_pattern(keywords)) if keywords else None
+        
+        patterns: List[str] = []
+        for rule in rules:
+            if rule.enabled:
+                patterns.extend(rule.blocked_patterns)
+        for category_patterns in (sel_patterns or {}).values():
+            patterns.extend(category_patterns)
+        self._patterns = list(dict.fromkeys(patterns))
+        
+        # Patterns without uppercase literals run case-sensitively over the
+        # lowercased content, which is much cheaper than IGNORECASE. Patterns
+        # with group references cannot be renumbered into an alternation and
+        # are searched individually.
+        lowered, mixed, self._standalone = [], [], []
+        for i, pattern in enumerate(self._patterns):
+            if _GROUP_REFERENCE.search(pattern):
+                self._standalone.append((i, re.compile(pattern, re.IGNORECASE)))
+            elif _UPPERCASE_LITERAL.search(_ESCAPE_SEQUENCE.sub("", pattern)):
+                mixed.append((i, re.compile(pattern, re.IGNORECASE)))
+            else:
+                lowered.append((i, re.compile(pattern)))
+        self._lowered_scan = self._alternation(lowered, 0)
+        self._mixed_scan = self._alternation(mixed, re.IGNORECASE)
+    
+    def _alternation(self, members: List[Tuple[int, "re.Pattern"]], flags: int):
+        if not members:
+            return None
+        try:
+            combined = re.compile("|".join(f"(?:{c.pattern})" for _, c in members), flags)
+        except re.error:
+            # e.g. global inline flags that are only valid at pattern start
+            self._standalone.extend(
+                (i, re.compile(self._patterns[i], re.IGNORECASE)) for i, _ in members
+            )
+            return None
+        return combined, members
+    
+    def scan(self, content: str) -> Tuple[Set[str], Set[str]]:
+        """Return the lowercased keywords and the patterns found in content"""
+        content_lower = content.lower()
+        hit_ids: Set[int] = set()
+        self._scan_alternation(self._lowered_scan, content_lower, hit_ids)
+        self._scan_alternation(self._mixed_scan, content, hit_ids)
+        for i, compiled in self._standalone:
+            if compiled.search(content):
+                hit_ids.add(i)
+        
+        return self._scan_keywords(content_lower), {self._patterns[i] for i in hit_ids}
+    
+    def _scan_keywords(self, content_lower: str) -> Set[str]:
+        hits: Set[str] = set()
+        if self._keyword_re is None:
+            return hits
+        
+        search = self._keyword_re.search
+        pos = 0
+        while True:
+            found = search(content_lower, pos)
+            if found is None:
+                break
+            hits |= self._keyword_closure[found.group()]
+            pos = found.start() + 1
+        return hits
+    
+    @staticmethod
+    def _scan_alternation(scan, content: str, hit_ids: Set[int]):
+        if scan is None:
+            return
+        
+        combined, members = scan
+        pending = list(members)
+        pos = 0
+        while pending:
+            found = combined.search(content, pos)
+            if found is None:
+                break
+            # The alternation only says some pattern matches here; check
+            # each pattern not yet seen directly at this offset
+            start = found.start()
+            remaining = []
+            for i, compiled in pending:
+                if compiled.match(content, start):
+                    hit_ids.add(i)
+                else:
+                    remaining.append((i, compiled))
+            pending = remaining
+            pos = start + 1
+
+
+class ModerationCache:
+    """Bounded LRU/TTL cache of moderation verdicts
+    
+    Keys combine a content digest with the (subject, grade_band) policy and
+    its version, so verdicts computed under an older policy are never
+    served. Results are copied on the way in and out so callers cannot
+    mutate cached verdicts.
+    """
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, ModerationResult]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+    
+    @staticmethod
+    def make_key(content: str, policy_key: Tuple[Subject, GradeBand], version: int) -> Tuple:
+        digest = hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+        return (digest, policy_key[0], policy_key[1], version)
+    
+    def get(self, key: Tuple) -> Optional[ModerationResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return _copy_moderation_result(result)
+    
+    def put(self, key: Tuple, result: ModerationResult):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, _copy_moderation_result(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self):
+        """Drop every cached verdict (policies or block lists changed)"""
+        if self._entries:
+            self._entries.clear()
+        self.invalidations += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+def _copy_moderation_result(result: ModerationResult) -> ModerationResult:
+    """Copy a result along with its mutable containers"""
+    return replace(
+        result,
+        triggered_rules=list(result.triggered_rules),
+        category_scores=dict(result.category_scores),
+        categories_flagged=dict(result.categories_flagged),
+        sel_categories=list(result.sel_categories)
+    )
+
+
+def resolve_safety_scope(subject: Optional[str] = None,
+                         grade_band: Optional[str] = None) -> Tuple[Subject, GradeBand]:
+    """Map request subject/grade band strings onto a safety policy key
+    
+    Routing subjects that are not academic subjects (e.g. "enterprise/acme")
+    fall back to the general subject; a missing grade band means adult.
+    """
+    try:
+        resolved_subject = Subject(subject.strip().lower()) if subject else Subject.GENERAL
+    except ValueError:
+        resolved_subject = Subject.GENERAL
+    
+    try:
+        resolved_grade_band = GradeBand(grade_band.strip().lower()) if grade_band else GradeBand.ADULT
+    except ValueError:
+        resolved_grade_band = GradeBand.ADULT
+    
+    return resolved_subject, resolved_grade_band
+
+
+class ModerationAuditLogger:
+    """Writes moderation audit events as structured log records"""
+    
+    def __init__(self, logger_name: str = "aivo.moderation.audit"):
+        self.logger = logging.getLogger(logger_name)
+    
+    async def log_moderation_event(self, audit_data: Dict[str, Any]):
+        self.logger.info(json.dumps(audit_data))
+
+
 class SafetyEngine:
     """Subject-aware content moderation and safety filter engine"""
     
-    def __init__(self, config: Dict[str, Any] = None):
+    def __init__(self, config: Dict[str, Any] = None, audit_logger: Any = None):
         self.config = config or {}
         self.safety_policies: Dict[Tuple[Subject, GradeBand], SafetyPolicy] = {}
         self.moderation_rules: Dict[str, ModerationRule] = {}
         self.block_lists: Dict[str, Set[str]] = {}
-        self.audit_logger = None  # Will be set by dependency injection
+        # Anything with an async log_moderation_event(audit_data)
+        self.audit_logger = audit_logger
+        
+        # Compiled matchers per (subject, grade_band), rebuilt lazily when the
+        # policy version moves past the version they were built for
+        self.policy_versions: Dict[Tuple[Subject, GradeBand], int] = {}
+        self._moderation_indexes: Dict[Tuple[Subject, GradeBand], ModerationIndex] = {}
+        
+        # Verdicts for repeated content (canned prompts, "I don't know", ...)
+        self.result_cache = ModerationCache(
+            max_entries=self.config.get("moderation_cache_size", 10000),
+            ttl_seconds=self.config.get("moderation_cache_ttl_seconds", 300.0)
+        )
         
         # Default grade-band thresholds
         self.grade_band_thresholds = {
@@ -725,6 +1000,8 @@ class SafetyEngine:
                 # Add notification webhooks
                 policy.guardian_notification_webhook = policy_config.get("guardian_webhook")
                 policy.teacher_notification_webhook = policy_config.get("teacher_webhook")
+                
+                self._bump_policy_version((subject, grade_band))
     
     async def moderate_content(self, content: str, subject: Subject = Subject.GENERAL,
                               grade_band: GradeBand = GradeBand.ADULT,
@@ -744,24 +1021,22 @@ class SafetyEngine:
                 # Fallback to general adult policy
                 policy = self.safety_policies.get((Subject.GENERAL, GradeBand.ADULT))
             
-            # Initialize result
-            result = ModerationResult(
-                content=content,
-                flagged=False,
-                severity=ContentSeverity.SAFE,
-                action=ModerationAction.ALLOW
-            )
-            
-            # Apply moderation rules
-            await self._apply_moderation_rules(content, policy, result)
-            
-            # Check SEL sensitivity
-            await self._check_sel_sensitivity(content, policy, result)
+            policy_key = (policy.subject, policy.grade_band)
+            cache_key = None
+            result = None
+            if self.result_cache.enabled:
+                cache_key = ModerationCache.make_key(
+                    content, policy_key, self.policy_versions.get(policy_key, 0)
+                )
+                result = self.result_cache.get(cache_key)
+            span.set_attribute("cache_hit", result is not None)
             
-            # Determine final action
-            self._determine_final_action(policy, result)
+            if result is None:
+                result = await self._evaluate_policy(content, policy)
+                if cache_key is not None:
+                    self.result_cache.put(cache_key, result)
             
-            # Log audit if required
+            # Log audit if required (also for cached verdicts)
             if result.audit_required:
                 await self._log_audit_event(result, subject, grade_band, user_id, tenant_id)
             
@@ -772,18 +1047,69 @@ class SafetyEngine:
             
             return result
     
-    async def _apply_moderation_rules(self, content: str, policy: SafetyPolicy, 
-                                    result: ModerationResult):
-        """Apply moderation rules from the safety policy"""
-        content_lower = content.lower()
+    async def _evaluate_policy(self, content: str, policy: SafetyPolicy) -> ModerationResult:
+        """Run the policy's rules and SEL checks against content"""
+        # Scan once with the policy's compiled matchers
+        keyword_hits, pattern_hits = self._get_moderation_index(policy).scan(content)
+        
+        # Initialize result
+        result = ModerationResult(
+            content=content,
+            flagged=False,
+            severity=ContentSeverity.SAFE,
+            action=ModerationAction.ALLOW
+        )
+        
+        # Apply moderation rules
+        await self._apply_moderation_rules(keyword_hits, pattern_hits, policy, result)
+        
+        # Check SEL sensitivity
+        await self._check_sel_sensitivity(pattern_hits, policy, result)
+        
+        # Determine final action
+        self._determine_final_action(policy, result)
         
+        return result
+    
+    def _get_moderation_index(self, policy: SafetyPolicy) -> ModerationIndex:
+        """Return the compiled matchers for a policy, rebuilding if stale"""
+        key = (policy.subject, policy.grade_band)
+        version = self.policy_versions.get(key, 0)
+        index = self._moderation_indexes.get(key)
+        
+        if index is None or index.version != version:
+            index = ModerationIndex(
+                policy.base_rules,
+                self.sel_patterns if policy.sel_escalation_enabled else None,
+                version=version
+            )
+            self._moderation_indexes[key] = index
+        
+        return index
+    
+    def _bump_policy_version(self, key: Optional[Tuple[Subject, GradeBand]] = None):
+        """Mark one policy (or all policies) as changed"""
+        keys = [key] if key is not None else list(self.safety_policies)
+        for policy_key in keys:
+            self.policy_versions[policy_key] = self.policy_versions.get(policy_key, 0) + 1
+        
+        # Versioned keys already make old verdicts unreachable; drop them
+        # now instead of waiting for LRU/TTL eviction
+        self.result_cache.invalidate()
+    
+    async def _apply_moderation_rules(self, keyword_hits: Set[str], pattern_hits: Set[str],
+                                    policy: SafetyPolicy, result: ModerationResult):
+        """Apply moderation rules from the safety policy"""
         for rule in policy.base_rules:
             if not rule.enabled:
                 continue
             
+            rule_triggered = False
+            
             # Check blocked keywords
             for keyword in rule.blocked_keywords:
-                if keyword.lower() in content_lower:
+                if keyword.lower() in keyword_hits:
+                    rule_triggered = True
                     result.flagged = True
                     result.triggered_rules.append(f"{rule.name}:keyword:{keyword}")
                     
@@ -794,7 +1120,8 @@ class SafetyEngine:
             
             # Check blocked patterns (regex)
             for pattern in rule.blocked_patterns:
-                if re.search(pattern, content, re.IGNORECASE):
+                if pattern in pattern_hits:
+                    rule_triggered = True
                     result.flagged = True
                     result.triggered_rules.append(f"{rule.name}:pattern:{pattern}")
                     
@@ -802,7 +1129,7 @@ class SafetyEngine:
                         result.severity = ContentSeverity.SEVERE
             
             # Apply rule-specific action if triggered
-            if any(rule.name in triggered for triggered in result.triggered_rules):
+            if rule_triggered:
                 if rule.action.value in ["escalate", "block"] and result.action.value == "allow":
                     result.action = rule.action
                 elif rule.action.value == "filter" and result.action.value == "allow":
@@ -814,7 +1141,7 @@ class SafetyEngine:
                 if rule.audit_log:
                     result.audit_required = True
     
-    async def _check_sel_sensitivity(self, content: str, policy: SafetyPolicy, 
+    async def _check_sel_sensitivity(self, pattern_hits: Set[str], policy: SafetyPolicy, 
                                    result: ModerationResult):
         """Check for SEL-sensitive content that requires special handling"""
         if not policy.sel_escalation_enabled:
@@ -822,7 +1149,7 @@ class SafetyEngine:
         
         for sel_category, patterns in self.sel_patterns.items():
             for pattern in patterns:
-                if re.search(pattern, content, re.IGNORECASE):
+                if pattern in pattern_hits:
                     result.sel_categories.append(sel_category)
                     result.flagged = True
                     result.requires_escalation = True
@@ -899,11 +1226,13 @@ class SafetyEngine:
     def add_block_list(self, name: str, keywords: List[str]):
         """Add a custom block list"""
         self.block_lists[name] = set(keywords)
+        self._bump_policy_version()
     
     def remove_block_list(self, name: str):
         """Remove a block list"""
         if name in self.block_lists:
             del self.block_lists[name]
+            self._bump_policy_version()
     
     def update_safety_policy(self, subject: Subject, grade_band: GradeBand,
                            updates: Dict[str, Any]):
@@ -920,6 +1249,8 @@ class SafetyEngine:
             
             if "sel_escalation_enabled" in updates:
                 policy.sel_escalation_enabled = updates["sel_escalation_enabled"]
+            
+            self._bump_policy_version(key)
     
     def get_safety_policy(self, subject: Subject, grade_band: GradeBand) -> Optional[SafetyPolicy]:
         """Get safety policy for subject/grade combination"""
@@ -937,7 +1268,8 @@ class SafetyEngine:
             "subjects": [s.value for s in Subject],
             "sel_categories": [cat.value for cat in SELCategory],
             "block_lists_count": len(self.block_lists),
-            "default_thresholds": self.grade_band_thresholds
+            "default_thresholds": self.grade_band_thresholds,
+            "result_cache": self.result_cache.get_stats()
         }
 
 
@@ -15,7 +15,7 @@ from ..providers.base import (
     BaseProvider, ProviderType, GenerateRequest, GenerateResponse,
     StreamChunk, ProviderError, RateLimitError, SLATier
 )
-from ..policy import PolicyEngine, RoutingContext
+from ..policy import PolicyEngine, RoutingContext, SafetyEngine, resolve_safety_scope
 from ..pii import PIIScrubber
 
 tracer = trace.get_tracer(__name__)
@@ -31,6 +31,7 @@ class GenerateAPIRequest(BaseModel):
     temperature: Optional[float] = Field(default=0.7, description="Sampling temperature")
     stream: bool = Field(default=False, description="Enable streaming response")
     subject: Optional[str] = Field(default=None, description="Subject for routing")
+    grade_band: Optional[str] = Field(default=None, description="Learner grade band for the safety policy")
     locale: Optional[str] = Field(default=None, description="Locale for routing")
     sla_tier: str = Field(default="standard", description="SLA tier")
     user_id: Optional[str] = Field(default=None, description="User ID")
@@ -64,10 +65,12 @@ class GenerationService:
     """Core generation service with provider management"""
     
     def __init__(self, providers: Dict[ProviderType, BaseProvider],
-                 policy_engine: PolicyEngine, pii_scrubber: PIIScrubber):
+                 policy_engine: PolicyEngine, pii_scrubber: PIIScrubber,
+                 safety_engine: Optional[SafetyEngine] = None):
         self.providers = providers
         self.policy_engine = policy_engine
         self.pii_scrubber = pii_scrubber
+        self.safety_engine = safety_engine
     
     async def generate(self, request: GenerateAPIRequest, request_id: str) -> GenerateAPIResponse:
         """Generate text completion with provider routing and safety checks"""
@@ -100,19 +103,7 @@ class GenerationService:
             
             # PII scrubbing
             if request.scrub_pii:
-                scrubbed_messages = []
-                all_matches = []
-                
-                for message in messages:
-                    scrubbed_msg = {}
-                    for key, value in message.items():
-                        if isinstance(value, str):
-                            scrubbed_value, matches = self.pii_scrubber.scrub_text(value)
-                            scrubbed_msg[key] = scrubbed_value
-                            all_matches.extend(matches)
-                        else:
-                            scrubbed_msg[key] = value
-                    scrubbed_messages.append(scrubbed_msg)
+                scrubbed_messages, all_matches = self.pii_scrubber.scrub_messages(messages)
                 
                 if all_matches:
                     pii_detected = True
@@ -126,7 +117,8 @@ class GenerationService:
                 # Check all message content for safety
                 content_to_moderate = " ".join([msg.get("content", "") for msg in messages])
                 moderation_flagged = await self._check_content_moderation(
-                    content_to_moderate, provider_order[0] if provider_order else ProviderType.OPENAI
+                    content_to_moderate, provider_order[0] if provider_order else ProviderType.OPENAI,
+                    request
                 )
                 
                 if moderation_flagged:
@@ -227,23 +219,14 @@ class GenerationService:
             # PII scrubbing (same as non-streaming)
             messages = request.messages
             if request.scrub_pii:
-                scrubbed_messages = []
-                for message in messages:
-                    scrubbed_msg = {}
-                    for key, value in message.items():
-                        if isinstance(value, str):
-                            scrubbed_value, _ = self.pii_scrubber.scrub_text(value)
-                            scrubbed_msg[key] = scrubbed_value
-                        else:
-                            scrubbed_msg[key] = value
-                    scrubbed_messages.append(scrubbed_msg)
-                messages = scrubbed_messages
+                messages, _ = self.pii_scrubber.scrub_messages(messages)
             
             # Content moderation (same as non-streaming)
             if request.moderate_content:
                 content_to_moderate = " ".join([msg.get("content", "") for msg in messages])
                 moderation_flagged = await self._check_content_moderation(
-                    content_to_moderate, provider_order[0] if provider_order else ProviderType.OPENAI
+                    content_to_moderate, provider_order[0] if provider_order else ProviderType.OPENAI,
+                    request
                 )
                 if moderation_flagged:
                     error_chunk = StreamingChunk(
@@ -271,14 +254,32 @@ class GenerationService:
                 try:
                     span.set_attribute("active_provider", provider_type.value)
                     
+                    # Scrub provider output incrementally, holding back a
+                    # small window so PII split across chunks is still caught
+                    output_scrubber = self.pii_scrubber.stream() if request.scrub_pii else None
+                    
                     async for chunk in provider.generate_stream(provider_request):
+                        delta = output_scrubber.feed(chunk.delta) if output_scrubber else chunk.delta
+                        if not delta:
+                            continue
                         streaming_chunk = StreamingChunk(
-                            delta=chunk.delta,
+                            delta=delta,
                             provider=chunk.provider,
                             request_id=request_id
                         )
                         yield f"data: {streaming_chunk.model_dump_json()}\n\n"
                     
+                    if output_scrubber:
+                        tail = output_scrubber.flush()
+                        if tail:
+                            tail_chunk = StreamingChunk(
+                                delta=tail,
+                                provider=provider_type.value,
+                                request_id=request_id
+                            )
+                            yield f"data: {tail_chunk.model_dump_json()}\n\n"
+                        span.set_attribute("output_pii_matches", len(output_scrubber.matches))
+                    
                     # Stream completed successfully
                     self.policy_engine.record_success(provider_type, 0, 0)  # No latency/cost for streaming
                     yield "data: [DONE]\n\n"
@@ -302,8 +303,21 @@ class GenerationService:
             )
             yield f"data: {error_chunk.model_dump_json()}\n\n"
     
-    async def _check_content_moderation(self, content: str, provider_type: ProviderType) -> bool:
-        """Check content moderation using available provider"""
+    async def _check_content_moderation(self, content: str, provider_type: ProviderType,
+                                        request: Optional[GenerateAPIRequest] = None) -> bool:
+        """Check content against the safety policy, then the provider's moderation"""
+        if self.safety_engine is not None and request is not None:
+            subject, grade_band = resolve_safety_scope(request.subject, request.grade_band)
+            verdict = await self.safety_engine.moderate_content(
+                content,
+                subject=subject,
+                grade_band=grade_band,
+                user_id=request.user_id,
+                tenant_id=request.tenant_id
+            )
+            if verdict.blocks_request:
+                return True
+        
         try:
             provider = self.providers.get(provider_type)
             if not provider:
@@ -13,7 +13,10 @@ from ..providers.base import (
     BaseProvider, ProviderType, ModerationRequest, ModerationResponse,
     ProviderError, RateLimitError, SLATier
 )
-from ..policy import PolicyEngine, RoutingContext
+from ..policy import (
+    PolicyEngine, RoutingContext, SafetyEngine, resolve_safety_scope,
+    ModerationResult as SafetyVerdict
+)
 
 tracer = trace.get_tracer(__name__)
 
@@ -25,6 +28,7 @@ class ModerationAPIRequest(BaseModel):
     input: str = Field(..., description="Text to moderate")
     model: str = Field(default="text-moderation-latest", description="Moderation model")
     subject: Optional[str] = Field(default=None, description="Subject for routing")
+    grade_band: Optional[str] = Field(default=None, description="Learner grade band for the safety policy")
     locale: Optional[str] = Field(default=None, description="Locale for routing")
     sla_tier: str = Field(default="standard", description="SLA tier")
     user_id: Optional[str] = Field(default=None, description="User ID")
@@ -52,9 +56,11 @@ class ModerationService:
     """Core moderation service with provider management"""
     
     def __init__(self, providers: Dict[ProviderType, BaseProvider],
-                 policy_engine: PolicyEngine):
+                 policy_engine: PolicyEngine,
+                 safety_engine: Optional[SafetyEngine] = None):
         self.providers = providers
         self.policy_engine = policy_engine
+        self.safety_engine = safety_engine
         
         # Moderation thresholds by category
         self.thresholds = {
@@ -81,6 +87,25 @@ class ModerationService:
             span.set_attribute("request_id", request_id)
             span.set_attribute("input_length", len(request.input))
             
+            # Subject/grade-band safety policy (verdicts cached per content digest)
+            verdict = await self._check_safety_policy(request)
+            if verdict is not None:
+                span.set_attribute("policy_action", verdict.action.value)
+                if verdict.blocks_request:
+                    # Blocked by policy: no provider call needed
+                    return ModerationAPIResponse(
+                        id=f"modr-{request_id}",
+                        model=request.model,
+                        results=[self._with_policy_verdict({
+                            "flagged": True,
+                            "categories": dict(verdict.categories_flagged),
+                            "category_scores": dict(verdict.category_scores)
+                        }, verdict)],
+                        provider="gateway-policy",
+                        latency_ms=int((time.time() - start_time) * 1000),
+                        request_id=request_id
+                    )
+            
             # Create routing context
             routing_context = RoutingContext(
                 subject=request.subject,
@@ -152,7 +177,7 @@ class ModerationService:
                     return ModerationAPIResponse(
                         id=f"modr-{request_id}",
                         model=request.model,
-                        results=[result],
+                        results=[self._with_policy_verdict(result, verdict)],
                         provider=response.provider,
                         latency_ms=total_latency,
                         request_id=request_id
@@ -183,12 +208,42 @@ class ModerationService:
             return ModerationAPIResponse(
                 id=f"modr-{request_id}",
                 model="conservative-fallback",
-                results=[conservative_result],
+                results=[self._with_policy_verdict(conservative_result, verdict)],
                 provider="gateway-fallback",
                 latency_ms=int((time.time() - start_time) * 1000),
                 request_id=request_id
             )
     
+    async def _check_safety_policy(self, request: ModerationAPIRequest) -> Optional[SafetyVerdict]:
+        """Evaluate the request's safety policy (audited, also on cache hits)"""
+        if self.safety_engine is None:
+            return None
+        
+        subject, grade_band = resolve_safety_scope(request.subject, request.grade_band)
+        return await self.safety_engine.moderate_content(
+            request.input,
+            subject=subject,
+            grade_band=grade_band,
+            user_id=request.user_id,
+            tenant_id=request.tenant_id
+        )
+    
+    @staticmethod
+    def _with_policy_verdict(result: Dict[str, Any],
+                             verdict: Optional[SafetyVerdict]) -> Dict[str, Any]:
+        """Fold the safety policy verdict into a moderation result"""
+        if verdict is None:
+            return result
+        
+        result["flagged"] = result["flagged"] or verdict.flagged
+        result["policy"] = {
+            "action": verdict.action.value,
+            "severity": verdict.severity.value,
+            "triggered_rules": verdict.triggered_rules,
+            "requires_escalation": verdict.requires_escalation
+        }
+        return result
+    
     def _apply_thresholds(self, original_flagged: bool, categories: Dict[str, bool],
                          scores: Dict[str, float]) -> tuple[bool, Dict[str, bool], Dict[str, float]]:
         """Apply custom thresholds to moderation results"""
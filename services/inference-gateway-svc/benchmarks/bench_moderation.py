@@ -0,0 +1,94 @@
+"""
+Moderation rule-matching microbenchmark
+
+Compares the compiled per-policy ModerationIndex against the previous
+per-rule scan (one substring test per keyword and one uncompiled
+re.search per pattern) over every default (subject, grade_band) policy.
+
+Usage:
+    python benchmarks/bench_moderation.py [--repeat N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from typing import List, Set, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from policy import ModerationIndex, SafetyEngine  # noqa: E402
+
+SAMPLES = [
+    "Can you help me understand how to add fractions with unlike denominators?",
+    "I don't know",
+    "The character killed the enemy with a sword and the hero died.",
+    "This math problem is so stupid and dumb, shut up already.",
+    "I feel sad and scared because the mean kids at school keep bullying me.",
+    "My parents are getting a divorce and I have been feeling depressed lately.",
+    "Write a short story about a dragon who learns to share with friends. " * 8,
+    "Explain photosynthesis, cellular respiration and the role of mitochondria "
+    "in plant and animal cells, with examples suitable for a science quiz. " * 20,
+]
+
+
+class LegacyScan:
+    """Reference copy of the per-rule keyword/pattern scan"""
+
+    def __init__(self, index_args: Tuple):
+        rules, sel_patterns = index_args
+        self.keywords = [kw for rule in rules if rule.enabled for kw in rule.blocked_keywords]
+        self.patterns = [p for rule in rules if rule.enabled for p in rule.blocked_patterns]
+        for patterns in (sel_patterns or {}).values():
+            self.patterns.extend(patterns)
+
+    def scan(self, content: str) -> Tuple[Set[str], Set[str]]:
+        content_lower = content.lower()
+        keywords = {kw.lower() for kw in self.keywords if kw.lower() in content_lower}
+        patterns = {p for p in self.patterns if re.search(p, content, re.IGNORECASE)}
+        return keywords, patterns
+
+
+def index_args(engine: SafetyEngine, policy) -> Tuple:
+    return policy.base_rules, engine.sel_patterns if policy.sel_escalation_enabled else None
+
+
+def measure(scanners: List, repeat: int) -> float:
+    """Return mean microseconds per (policy, sample) scan"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for scanner in scanners:
+            for sample in SAMPLES:
+                scanner.scan(sample)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(scanners) * len(SAMPLES)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = SafetyEngine()
+    policies = list(engine.safety_policies.values())
+
+    build_start = time.perf_counter()
+    compiled = [ModerationIndex(*index_args(engine, policy)) for policy in policies]
+    build_ms = (time.perf_counter() - build_start) * 1000
+    legacy = [LegacyScan(index_args(engine, policy)) for policy in policies]
+
+    for new, old in zip(compiled, legacy):
+        for sample in SAMPLES:
+            assert new.scan(sample) == old.scan(sample), sample
+
+    legacy_us = measure(legacy, args.repeat)
+    compiled_us = measure(compiled, args.repeat)
+    print(f"policies: {len(policies)}, samples: {len(SAMPLES)}, "
+          f"index build: {build_ms:.1f} ms total")
+    print(f"legacy scan:   {legacy_us:8.1f} us/op")
+    print(f"compiled scan: {compiled_us:8.1f} us/op  ({legacy_us / compiled_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+PII detector throughput benchmark
+
+Compares the single-pass PIIDetector against the previous multi-pass
+detector (one finditer per pattern, then name/address heuristics and a
+sort-based overlap pass) on 1 KB, 16 KB and 256 KB prompts.
+
+Usage:
+    python benchmarks/bench_pii.py [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from pii import PIIDetector, PIIMatch, PIIType  # noqa: E402
+
+SIZES = [("1KB", 1024), ("16KB", 16 * 1024), ("256KB", 256 * 1024)]
+
+FILLER = (
+    "Today we practiced fractions and decimals in class. The teacher asked us "
+    "to explain how we solved each problem and to show our work clearly. "
+)
+PII_SNIPPETS = [
+    "Email me at student.helper@example.org please.",
+    "My mom's number is (555) 123-4567 if you need it.",
+    "I think my SSN is 123-45-6789 but I'm not sure.",
+    "We live at 42 Maple Street Apt 3 near the park.",
+    "My name is Sarah Johnson and I like science.",
+    "Dad paid with 4111111111111111 last week.",
+    "My birthday is 04/12/2012.",
+    "The server IP is 10.0.0.12 according to the lab sheet.",
+]
+
+
+class LegacyPIIDetector(PIIDetector):
+    """Reference copy of the pre-compiled-scanner detection algorithm"""
+
+    LEGACY_ORDER = [
+        PIIType.EMAIL, PIIType.PHONE, PIIType.SSN, PIIType.CREDIT_CARD,
+        PIIType.IP_ADDRESS, PIIType.DATE_OF_BIRTH, PIIType.LICENSE_PLATE,
+    ]
+
+    def detect_pii(self, text: str) -> List[PIIMatch]:
+        matches = []
+        for pii_type in self.LEGACY_ORDER:
+            for match in self.PATTERNS[pii_type].finditer(text):
+                confidence = self._calculate_pattern_confidence(pii_type, match.group())
+                if confidence >= self.confidence_threshold:
+                    matches.append(PIIMatch(
+                        pii_type=pii_type,
+                        start=match.start(),
+                        end=match.end(),
+                        original_text=match.group(),
+                        confidence=confidence,
+                        replacement=self._generate_replacement(pii_type, match.group())
+                    ))
+
+        for word in re.findall(r'\b[A-Z][a-z]+\b', text):
+            if word.lower() in self.COMMON_FIRST_NAMES:
+                start_pos = text.find(word)
+                next_word = re.search(r'\s+([A-Z][a-z]+)\b', text[start_pos + len(word):])
+                if next_word and next_word.group(1).lower() in self.COMMON_LAST_NAMES:
+                    full_name = f"{word} {next_word.group(1)}"
+                    matches.append(PIIMatch(
+                        pii_type=PIIType.NAME,
+                        start=start_pos,
+                        end=start_pos + len(full_name),
+                        original_text=full_name,
+                        confidence=0.75,
+                        replacement=self._generate_replacement(PIIType.NAME, full_name)
+                    ))
+
+        address_pattern = re.compile(
+            r'\b\d+\s+[A-Za-z\s]+(Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd|Way|Court|Ct)\b(?:\s+(?:Apt|Suite|Unit)\s*\d+)?',
+            re.IGNORECASE
+        )
+        for match in address_pattern.finditer(text):
+            matches.append(PIIMatch(
+                pii_type=PIIType.ADDRESS,
+                start=match.start(),
+                end=match.end(),
+                original_text=match.group(),
+                confidence=0.7,
+                replacement=self._generate_replacement(PIIType.ADDRESS, match.group())
+            ))
+
+        if not matches:
+            return matches
+        matches.sort(key=lambda x: x.start)
+        result = [matches[0]]
+        for match in matches[1:]:
+            if match.start < result[-1].end:
+                if match.confidence > result[-1].confidence:
+                    result[-1] = match
+            else:
+                result.append(match)
+        return result
+
+
+def build_prompt(size: int, seed: int = 7) -> str:
+    """Build a prompt of roughly `size` bytes with PII sprinkled through it"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        chunk = FILLER if rng.random() < 0.8 else rng.choice(PII_SNIPPETS) + " "
+        parts.append(chunk)
+        length += len(chunk)
+    return "".join(parts)[:size]
+
+
+def measure(detector: PIIDetector, text: str, repeat: int) -> float:
+    """Return throughput in MB/s over `repeat` runs"""
+    detector.detect_pii(text)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        detector.detect_pii(text)
+    elapsed = time.perf_counter() - start
+    return (len(text.encode()) * repeat) / elapsed / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    current = PIIDetector()
+    legacy = LegacyPIIDetector()
+
+    print(f"{'size':>6} {'legacy MB/s':>12} {'single-pass MB/s':>17} {'speedup':>8} {'matches':>8}")
+    for label, size in SIZES:
+        text = build_prompt(size)
+        repeat = max(1, args.repeat * 1024 // size) if size > 16 * 1024 else args.repeat
+        legacy_mbps = measure(legacy, text, repeat)
+        current_mbps = measure(current, text, repeat)
+        found = len(current.detect_pii(text))
+        print(f"{label:>6} {legacy_mbps:>12.2f} {current_mbps:>17.2f} "
+              f"{current_mbps / legacy_mbps:>7.1f}x {found:>8}")
+
+
+if __name__ == "__main__":
+    main()
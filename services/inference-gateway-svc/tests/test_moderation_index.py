@@ -0,0 +1,252 @@
+"""
+Tests for the compiled per-policy moderation index and verdict cache
+Covers keyword/pattern attribution, overlap handling, index rebuilds and caching
+"""
+
+import json
+import re
+import time
+import pytest
+from unittest.mock import AsyncMock
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from policy import (
+    SafetyEngine, ModerationIndex, ModerationCache, ModerationRule, ModerationResult,
+    ModerationAction, ContentSeverity, GradeBand, Subject, SELCategory,
+    ModerationAuditLogger, resolve_safety_scope
+)
+
+
+@pytest.fixture
+def safety_engine():
+    return SafetyEngine()
+
+
+def _reference_scan(rules, sel_patterns, content):
+    """Per-rule scan the index must agree with"""
+    content_lower = content.lower()
+    keywords = {
+        kw.lower() for rule in rules if rule.enabled
+        for kw in rule.blocked_keywords if kw.lower() in content_lower
+    }
+    patterns = [p for rule in rules if rule.enabled for p in rule.blocked_patterns]
+    for category_patterns in (sel_patterns or {}).values():
+        patterns.extend(category_patterns)
+    return keywords, {p for p in patterns if re.search(p, content, re.IGNORECASE)}
+
+
+class TestModerationIndex:
+    """Single-scan matching agrees with per-rule scanning"""
+
+    @pytest.mark.parametrize("content", [
+        "The character killed the enemy and then died",
+        "Sexual content is not allowed; neither is SEX ed spam",
+        "I feel sad, scared and DEPRESSED after the divorce",
+        "Death and grief are part of the story",
+        "Nothing to see here, just fractions.",
+        "",
+    ])
+    def test_matches_reference_scan(self, safety_engine, content):
+        for policy in safety_engine.safety_policies.values():
+            sel = safety_engine.sel_patterns if policy.sel_escalation_enabled else None
+            index = ModerationIndex(policy.base_rules, sel)
+
+            assert index.scan(content) == _reference_scan(policy.base_rules, sel, content)
+
+    def test_overlapping_keywords_all_reported(self):
+        rule = ModerationRule(name="r", description="", blocked_keywords=["sex", "Sexual", "xu"])
+        keywords, _ = ModerationIndex([rule]).scan("SEXUAL")
+
+        assert keywords == {"sex", "sexual", "xu"}
+
+    def test_patterns_matching_same_offset_all_reported(self):
+        rule = ModerationRule(
+            name="r", description="",
+            blocked_patterns=[r'\b(kill|death)\b', r'\b(grief|death)\b', r'(a)\1', r'[A-Z]{2}9']
+        )
+        _, patterns = ModerationIndex([rule]).scan("a death, aa, and XY9")
+
+        assert patterns == set(rule.blocked_patterns)
+
+    def test_disabled_rules_are_not_indexed(self):
+        rule = ModerationRule(name="r", description="", blocked_keywords=["gun"], enabled=False)
+
+        assert ModerationIndex([rule]).scan("a gun") == (set(), set())
+
+
+class TestRuleAttribution:
+    """Triggered rules are attributed from index hits"""
+
+    @pytest.mark.asyncio
+    async def test_elementary_keywords_and_patterns(self, safety_engine):
+        result = await safety_engine.moderate_content(
+            "The character killed the enemy",
+            subject=Subject.ENGLISH,
+            grade_band=GradeBand.ELEMENTARY
+        )
+
+        assert result.flagged is True
+        assert "elementary_safe_content:keyword:kill" in result.triggered_rules
+        assert result.action == ModerationAction.BLOCK
+        assert result.audit_required is True
+
+    @pytest.mark.asyncio
+    async def test_sel_attribution(self, safety_engine):
+        result = await safety_engine.moderate_content(
+            "I have been so depressed lately",
+            subject=Subject.SEL,
+            grade_band=GradeBand.MIDDLE
+        )
+
+        assert SELCategory.MENTAL_HEALTH in result.sel_categories
+        assert result.action == ModerationAction.ESCALATE
+
+    @pytest.mark.asyncio
+    async def test_safe_content(self, safety_engine):
+        result = await safety_engine.moderate_content(
+            "What is 7 times 8?", subject=Subject.MATH, grade_band=GradeBand.ELEMENTARY
+        )
+
+        assert result.flagged is False
+        assert result.triggered_rules == []
+
+
+class TestIndexRebuild:
+    """Indexes are cached per policy and rebuilt only on changes"""
+
+    def test_index_reused_until_policy_changes(self, safety_engine):
+        policy = safety_engine.get_safety_policy(Subject.MATH, GradeBand.ELEMENTARY)
+        index = safety_engine._get_moderation_index(policy)
+
+        assert safety_engine._get_moderation_index(policy) is index
+
+        safety_engine.update_safety_policy(
+            Subject.MATH, GradeBand.ELEMENTARY, {"sel_escalation_enabled": False}
+        )
+        rebuilt = safety_engine._get_moderation_index(policy)
+
+        assert rebuilt is not index
+        assert rebuilt.scan("so depressed") == (set(), set())
+
+    def test_block_list_changes_bump_all_policies(self, safety_engine):
+        before = dict(safety_engine.policy_versions)
+        safety_engine.add_block_list("custom", ["banned"])
+
+        for key in safety_engine.safety_policies:
+            assert safety_engine.policy_versions[key] == before.get(key, 0) + 1
+
+
+class TestModerationResultCache:
+    """Verdicts are cached per content digest and policy version"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_content_hits_cache(self, safety_engine):
+        for _ in range(3):
+            result = await safety_engine.moderate_content(
+                "I don't know", subject=Subject.MATH, grade_band=GradeBand.MIDDLE
+            )
+
+        stats = safety_engine.result_cache.get_stats()
+        assert (stats["hits"], stats["misses"]) == (2, 1)
+        assert result.flagged is False
+
+    @pytest.mark.asyncio
+    async def test_cache_keyed_by_policy(self, safety_engine):
+        content = "The character killed the enemy"
+        elementary = await safety_engine.moderate_content(
+            content, subject=Subject.ENGLISH, grade_band=GradeBand.ELEMENTARY
+        )
+        adult = await safety_engine.moderate_content(
+            content, subject=Subject.ENGLISH, grade_band=GradeBand.ADULT
+        )
+
+        assert elementary.action == ModerationAction.BLOCK
+        assert adult.action == ModerationAction.ALLOW
+        assert safety_engine.result_cache.hits == 0
+
+    @pytest.mark.asyncio
+    async def test_cached_results_are_copies(self, safety_engine):
+        args = dict(subject=Subject.ENGLISH, grade_band=GradeBand.ELEMENTARY)
+        first = await safety_engine.moderate_content("you are so dumb", **args)
+        first.triggered_rules.clear()
+        second = await safety_engine.moderate_content("you are so dumb", **args)
+
+        assert second.triggered_rules
+
+    @pytest.mark.asyncio
+    async def test_audit_fires_on_cache_hit(self, safety_engine):
+        safety_engine.audit_logger = AsyncMock()
+        args = dict(subject=Subject.ENGLISH, grade_band=GradeBand.ELEMENTARY)
+        await safety_engine.moderate_content("kill", user_id="u1", **args)
+        await safety_engine.moderate_content("kill", user_id="u2", **args)
+
+        assert safety_engine.result_cache.hits == 1
+        calls = safety_engine.audit_logger.log_moderation_event.await_args_list
+        assert [c.args[0]["user_id"] for c in calls] == ["u1", "u2"]
+
+    @pytest.mark.asyncio
+    async def test_policy_change_invalidates(self, safety_engine):
+        args = dict(subject=Subject.SEL, grade_band=GradeBand.MIDDLE)
+        before = await safety_engine.moderate_content("feeling lonely", **args)
+        safety_engine.update_safety_policy(
+            Subject.SEL, GradeBand.MIDDLE, {"sel_escalation_enabled": False}
+        )
+        after = await safety_engine.moderate_content("feeling lonely", **args)
+
+        assert before.flagged is True
+        assert after.flagged is False
+        assert safety_engine.result_cache.hits == 0
+        assert safety_engine.result_cache.invalidations == 1
+
+    def test_lru_and_ttl_eviction(self, monkeypatch):
+        cache = ModerationCache(max_entries=2, ttl_seconds=10)
+        key = lambda text: ModerationCache.make_key(text, (Subject.MATH, GradeBand.HIGH), 0)
+        verdict = ModerationResult(
+            content="a", flagged=False, severity=ContentSeverity.SAFE, action=ModerationAction.ALLOW
+        )
+        for text in ("a", "b", "c"):
+            cache.put(key(text), verdict)
+
+        assert cache.get(key("a")) is None
+        assert cache.evictions == 1
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+        assert cache.get(key("c")) is None
+        assert cache.evictions == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_disabled(self):
+        engine = SafetyEngine({"moderation_cache_size": 0})
+        await engine.moderate_content("hello")
+        await engine.moderate_content("hello")
+
+        assert engine.result_cache.get_stats()["size"] == 0
+        assert engine.result_cache.hits == 0
+
+
+class TestGatewayWiring:
+    """Request scope resolution and the audit logger the gateway injects"""
+
+    def test_resolve_safety_scope(self):
+        assert resolve_safety_scope("SEL", "elementary") == (Subject.SEL, GradeBand.ELEMENTARY)
+        assert resolve_safety_scope("enterprise/acme", None) == (Subject.GENERAL, GradeBand.ADULT)
+        assert resolve_safety_scope(None, "grade-4") == (Subject.GENERAL, GradeBand.ADULT)
+
+    @pytest.mark.asyncio
+    async def test_audit_logger_records_cached_verdicts(self, caplog):
+        engine = SafetyEngine(audit_logger=ModerationAuditLogger())
+        args = dict(subject=Subject.GENERAL, grade_band=GradeBand.ELEMENTARY, tenant_id="t1")
+
+        with caplog.at_level("INFO", logger="aivo.moderation.audit"):
+            first = await engine.moderate_content("you are stupid", **args)
+            second = await engine.moderate_content("you are stupid", **args)
+
+        assert first.blocks_request and second.blocks_request
+        assert engine.result_cache.hits == 1
+        events = [json.loads(r.getMessage()) for r in caplog.records]
+        assert [e["action"] for e in events] == ["block", "block"]
+        assert all(e["tenant_id"] == "t1" for e in events)
@@ -0,0 +1,127 @@
+"""
+Tests for the single-pass PII detection engine
+Covers per-type detection, inline overlap resolution, name heuristics and
+linear scanning of long token runs
+"""
+
+import random
+import time
+
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from pii import PIIDetector, PIIScrubber, PIIType
+
+
+@pytest.fixture
+def detector():
+    return PIIDetector()
+
+
+def _types(matches):
+    return [(m.pii_type, m.original_text) for m in matches]
+
+
+class TestSinglePassDetection:
+    """Each PII type is found by the combined scanner"""
+
+    @pytest.mark.parametrize("text,pii_type,value", [
+        ("write to jane.doe@example.com today", PIIType.EMAIL, "jane.doe@example.com"),
+        ("call 555-123-4567 now", PIIType.PHONE, "555-123-4567"),
+        ("ssn 123-45-6789 here", PIIType.SSN, "123-45-6789"),
+        ("card 4111111111111111 on file", PIIType.CREDIT_CARD, "4111111111111111"),
+        ("server: 192.168.10.1 is down", PIIType.IP_ADDRESS, "192.168.10.1"),
+        ("born on 04/12/2012 in spring", PIIType.DATE_OF_BIRTH, "04/12/2012"),
+        ("lives at 42 Maple Street Apt 3", PIIType.ADDRESS, "42 Maple Street Apt 3"),
+        ("my name is Sarah Johnson.", PIIType.NAME, "Sarah Johnson"),
+    ])
+    def test_detects_type(self, detector, text, pii_type, value):
+        assert (pii_type, value) in _types(detector.detect_pii(text))
+
+    def test_no_pii_in_plain_prose(self, detector):
+        text = "Today we practiced fractions and decimals in class."
+        assert detector.detect_pii(text) == []
+
+    def test_matches_sorted_and_disjoint(self, detector):
+        text = ("John Smith emailed john@example.com from 10.0.0.1, "
+                "phone (555) 123-4567, SSN 123-45-6789.")
+        matches = detector.detect_pii(text)
+
+        assert len(matches) >= 4
+        for prev, nxt in zip(matches, matches[1:]):
+            assert prev.end <= nxt.start
+
+
+class TestOverlapResolution:
+    """Overlapping candidates keep the higher-confidence match"""
+
+    def test_phone_beats_plate_prefix(self, detector):
+        # "or 555" is a plate candidate that overlaps the phone number
+        matches = detector.detect_pii("reach me or 555-123-4567")
+
+        assert _types(matches) == [(PIIType.PHONE, "555-123-4567")]
+
+    def test_failed_luhn_falls_back_to_lower_priority_patterns(self, detector):
+        matches = detector.detect_pii("card 4111111111111112")
+
+        assert PIIType.CREDIT_CARD not in {m.pii_type for m in matches}
+
+    def test_confidence_threshold_respected(self, detector):
+        detector.confidence_threshold = 0.9
+        matches = detector.detect_pii("mail a@b.org or 123-45-6789")
+
+        assert _types(matches) == [(PIIType.SSN, "123-45-6789")]
+
+
+class TestNameHeuristics:
+    """Name detection uses set lookups on adjacent capitalized tokens"""
+
+    def test_repeated_names_all_detected(self, detector):
+        text = "Mary Smith said hi. Later, Mary Smith left."
+        names = [m for m in detector.detect_pii(text) if m.pii_type == PIIType.NAME]
+
+        assert [m.start for m in names] == [0, 27]
+
+    def test_first_name_without_known_last_name(self, detector):
+        assert detector.detect_pii("Mary went home with Zed") == []
+
+    def test_last_name_must_be_adjacent(self, detector):
+        assert detector.detect_pii("Mary went to see Smith") == []
+
+
+class TestLongTokenRuns:
+    """Hashes, base64 blobs and digit strings are scanned in linear time"""
+
+    @staticmethod
+    def _run(alphabet, size):
+        rng = random.Random(7)
+        return "".join(rng.choice(alphabet) for _ in range(size))
+
+    @pytest.mark.parametrize("alphabet", [
+        "7",
+        "0123456789abcdefABCDEF",
+        "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+        "0123456789._-",
+    ])
+    def test_long_run_is_linear(self, detector, alphabet):
+        # A walk back over the whole run per anchor took minutes at 64 KB
+        started = time.perf_counter()
+        detector.detect_pii(self._run(alphabet, 64 * 1024))
+        assert time.perf_counter() - started < 2.0
+
+    def test_pii_after_long_run_still_found(self, detector):
+        text = self._run("0123456789abcdef", 16 * 1024) + " mail jane.doe@example.com"
+        assert (PIIType.EMAIL, "jane.doe@example.com") in _types(detector.detect_pii(text))
+
+
+def test_scrubber_masks_all_matches():
+    scrubber = PIIScrubber()
+    cleaned, matches = scrubber.scrub_text("Email jane@example.com or call 555-123-4567")
+
+    assert len(matches) == 2
+    assert "jane@example.com" not in cleaned
+    assert "555-123-4567" not in cleaned
+    assert cleaned.startswith("Email [EMAIL_")
@@ -0,0 +1,174 @@
+"""
+Tests for batched and streaming PII scrubbing
+Covers conversation/batch scrubbing, replacement caching and chunked output
+"""
+
+import pytest
+
+import base64
+import random
+import sys
+import time
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from pii import PIIScrubber, PIIType, STRICT_CONFIG
+
+
+@pytest.fixture
+def scrubber():
+    return PIIScrubber()
+
+
+class TestBatchScrubbing:
+    """Whole conversations and request batches in one call"""
+
+    def test_scrub_messages(self, scrubber):
+        messages = [
+            {"role": "user", "content": "My email is jane@example.com"},
+            {"role": "assistant", "content": "Thanks!"},
+            {"role": "user", "content": "Also jane@example.com and 555-123-4567"},
+        ]
+        scrubbed, matches = scrubber.scrub_messages(messages)
+
+        assert [m["role"] for m in scrubbed] == ["user", "assistant", "user"]
+        assert scrubbed[1]["content"] == "Thanks!"
+        assert "jane@example.com" not in scrubbed[0]["content"]
+        assert len(matches) == 3
+        # The same value maps to the same token across messages
+        token = matches[0].replacement
+        assert token in scrubbed[0]["content"] and token in scrubbed[2]["content"]
+
+    def test_scrub_messages_leaves_input_untouched(self, scrubber):
+        messages = [{"role": "user", "content": "call 555-123-4567"}]
+        scrubber.scrub_messages(messages)
+
+        assert messages[0]["content"] == "call 555-123-4567"
+
+    def test_scrub_request_handles_messages_nested_in_lists(self, scrubber):
+        request = {"model": "gpt-4o", "messages": [{"content": "ssn 123-45-6789"}], "n": 1}
+        scrubbed, matches = scrubber.scrub_request(request)
+
+        assert scrubbed["n"] == 1
+        assert "123-45-6789" not in scrubbed["messages"][0]["content"]
+        assert [m.pii_type for m in matches] == [PIIType.SSN]
+
+    def test_scrub_batch(self, scrubber):
+        requests = [
+            {"prompt": "mail a.b@example.org"},
+            {"prompt": "nothing here"},
+        ]
+        results = scrubber.scrub_batch(requests)
+
+        assert len(results) == 2
+        assert len(results[0][1]) == 1
+        assert results[1] == ({"prompt": "nothing here"}, [])
+
+    def test_batch_matches_single_text_scrubbing(self, scrubber):
+        texts = ["John Smith lives at 42 Maple Street", "card 4111111111111111"]
+        scrubbed, _ = scrubber.scrub_messages(texts)
+
+        assert scrubbed == [scrubber.scrub_text(t)[0] for t in texts]
+
+
+# Tokens the random completions are built from: every PII type, values that
+# span a space and ordinary words sharing their prefixes
+STREAM_TOKENS = [
+    "call", "at", "from", "the", "and", "lives", "Sure!", ".", "\n",
+    "192.168.1.10", "4111111111111111", "john.doe@example.com", "555-123-4567",
+    "(555) 123-4567", "123-45-6789", "01/15/1990", "42 Maple Street",
+    "ABC 1234", "ABC", "1234", "XYZ-987", "Mary", "Smith", "John",
+    "请联系", "。", "x=1;", "\"id\":",
+]
+
+
+def random_chunking(rng, text):
+    """Split text at random offsets, including single characters"""
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 12))))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+class TestStreamScrubbing:
+    """Chunked provider output keeps a carry-over window"""
+
+    def _run(self, stream, chunks):
+        return "".join(stream.feed(c) for c in chunks) + stream.flush()
+
+    def test_pii_split_across_chunks(self, scrubber):
+        text = "Sure! You can reach Mary Smith at mary.smith@example.com or 555-123-4567."
+        chunks = [text[i:i + 5] for i in range(0, len(text), 5)]
+
+        stream = scrubber.stream()
+        streamed = self._run(stream, chunks)
+
+        assert streamed == scrubber.scrub_text(text)[0]
+        assert {m.pii_type for m in stream.matches} == {
+            PIIType.NAME, PIIType.EMAIL, PIIType.PHONE
+        }
+
+    def test_releases_text_before_window(self, scrubber):
+        stream = scrubber.stream(window=8)
+        released = stream.feed("A long stretch of harmless text")
+
+        assert released == "A long stretch of "
+        assert stream.flush() == "harmless text"
+
+    def test_holds_back_short_output(self, scrubber):
+        stream = scrubber.stream()
+
+        assert stream.feed("call 555-") == ""
+        assert stream.feed("123-4567") == ""
+        assert "555-123-4567" not in stream.flush()
+
+    def test_pii_split_inside_a_token(self, scrubber):
+        chunks = ['cal', 'l', ' 192.168.1.10 at \n ', '4111111111111111',
+                  ' john.do', 'e@e', 'x', 'ample.com from']
+
+        streamed = self._run(scrubber.stream(), chunks)
+
+        assert streamed == scrubber.scrub_text("".join(chunks))[0]
+        assert "168.1.10" not in streamed
+
+    def test_random_chunkings_match_scrub_text(self, scrubber):
+        rng = random.Random(2024)
+        for _ in range(2000):
+            text = " ".join(rng.choice(STREAM_TOKENS) for _ in range(rng.randint(1, 30)))
+            chunks = random_chunking(rng, text)
+
+            streamed = self._run(scrubber.stream(), chunks)
+
+            assert streamed == scrubber.scrub_text(text)[0], chunks
+
+    def test_releases_text_without_whitespace(self, scrubber):
+        text = "请联系 Mary Smith，电话555-123-4567。" + "这是一个很长的回答" * 900
+        stream = scrubber.stream()
+
+        started = time.perf_counter()
+        released = [stream.feed(c) for c in text]
+        elapsed = time.perf_counter() - started
+
+        assert released[100:] == list(text[100:])
+        assert "".join(released) + stream.flush() == scrubber.scrub_text(text)[0]
+        assert elapsed < 1.0
+
+    def test_carry_is_capped_without_a_clean_cut(self, scrubber):
+        text = base64.b64encode(random.Random(7).randbytes(6000)).decode()
+        stream = scrubber.stream()
+
+        started = time.perf_counter()
+        released = []
+        for c in text:
+            released.append(stream.feed(c))
+            assert len(stream._carry) <= stream.max_carry
+        elapsed = time.perf_counter() - started
+
+        assert len("".join(released)) >= len(text) - stream.max_carry
+        assert "".join(released) + stream.flush() == scrubber.scrub_text(text)[0]
+        assert elapsed < 1.0
+
+    def test_remove_mode(self):
+        scrubber = PIIScrubber(STRICT_CONFIG)
+        stream = scrubber.stream(window=4)
+
+        streamed = self._run(stream, ["email: a@exa", "mple.com done"])
+        assert streamed == "email:  done"
@@ -4,8 +4,10 @@
 import asyncio
 import json
 import logging
+import os
+from collections import deque
 from datetime import datetime, timezone
-from typing import Dict, Set, Any, Optional, List
+from typing import Dict, Set, Any, Optional, List, Iterable, Callable, Awaitable
 import uuid
 import jwt
 from fastapi import WebSocket, WebSocketDisconnect, HTTPException, Depends
@@ -21,12 +23,103 @@ from .database import get_db
 
 logger = logging.getLogger(__name__)
 
+# Fan-out: frames a connection may have waiting, what to do once a slow consumer
+# fills them (drop_oldest, drop_newest or close) and how long one send may take
+# before the connection is closed as a slow consumer
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+
+# Connections queued per event loop turn during a fan-out, so writers start
+# (and other requests get served) while a large tenant is still being queued
+WS_FANOUT_BATCH = int(os.getenv("WS_FANOUT_BATCH", "1000"))
+
+# Close code for connections dropped as slow consumers (1013: try again later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def encode_frame(message: Dict[str, Any]) -> str:
+    """Serialize a message once for every connection it goes to (same text as send_json)."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ClientConnection:
+    """A registered WebSocket with its bounded outbox and on-demand writer task."""
+    
+    QUEUED = "queued"
+    DROPPED = "dropped"
+    CLOSE = "close"
+    
+    __slots__ = (
+        "connection_id", "websocket", "user_id", "tenant_id", "pending",
+        "writer", "closed", "on_error"
+    )
+    
+    def __init__(
+        self,
+        connection_id: str,
+        websocket: WebSocket,
+        user_id: str,
+        tenant_id: str,
+        on_error: Callable[[str, Exception], Awaitable[None]]
+    ):
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.user_id = user_id
+        self.tenant_id = tenant_id
+        self.pending: deque = deque()
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.on_error = on_error
+    
+    def push(self, frame: str, policy: Optional[str] = None) -> str:
+        """Queue a frame for the writer; never waits on the socket."""
+        if self.closed:
+            return self.DROPPED
+        
+        if len(self.pending) >= WS_SEND_QUEUE_SIZE:
+            policy = policy or WS_SLOW_CONSUMER_POLICY
+            if policy == "close":
+                return self.CLOSE
+            if policy == "drop_newest":
+                return self.DROPPED
+            self.pending.popleft()
+            self.pending.append(frame)
+            return self.DROPPED
+        
+        self.pending.append(frame)
+        if self.writer is None:
+            self.writer = asyncio.create_task(self._write())
+        return self.QUEUED
+    
+    async def _write(self):
+        """Send queued frames in order until the outbox is empty or a send times out."""
+        try:
+            while self.pending and not self.closed:
+                frame = self.pending.popleft()
+                await asyncio.wait_for(self.websocket.send_text(frame), WS_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.close()
+            await self.on_error(self.connection_id, e)
+        finally:
+            self.writer = None
+    
+    def close(self):
+        """Stop sending: drop queued frames and stop the writer."""
+        self.closed = True
+        self.pending.clear()
+        if self.writer is not None and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+
+
 class WebSocketManager:
     """Manages WebSocket connections with Redis pub/sub for scalability."""
     
     def __init__(self, redis_client: redis.Redis):
-        # Active connections: {connection_id: WebSocketConnection}
-        self.active_connections: Dict[str, WebSocket] = {}
+        # Active connections: {connection_id: ClientConnection} (also the connection -> user/tenant index)
+        self.active_connections: Dict[str, ClientConnection] = {}
         
         # User to connections mapping: {user_id: set of connection_ids}
         self.user_connections: Dict[str, Set[str]] = {}
@@ -38,6 +131,11 @@ class WebSocketManager:
         self.pubsub_channel = "notification:events"
         self.server_instance = f"ws-server-{uuid.uuid4().hex[:8]}"
         
+        # Fan-out counters
+        self.frames_dropped = 0
+        self.slow_consumers_closed = 0
+        self._closing: Set[asyncio.Task] = set()
+        
         # Start Redis subscriber task
         self._subscriber_task = None
         self._start_subscriber()
@@ -70,10 +168,21 @@ class WebSocketManager:
     
     async def _handle_redis_event(self, event_data: Dict[str, Any]):
         """Handle events from Redis pub/sub."""
+        # Local connections already got the events this server published
+        if event_data.get("server_instance") == self.server_instance:
+            return
+        
         event_type = event_data.get("type")
         data = event_data.get("data", {})
         
-        if event_type == "notification":
+        if event_type == "tenant_broadcast":
+            await self._fan_out(
+                self.tenant_connections.get(data.get("tenant_id"), ()),
+                encode_frame(data.get("message", {})),
+                exclude_user_id=data.get("exclude_user_id")
+            )
+        
+        elif event_type == "notification":
             notification_data = data.get("notification")
             user_id = notification_data.get("user_id")
             tenant_id = notification_data.get("tenant_id")
@@ -107,7 +216,9 @@ class WebSocketManager:
         connection_id = f"conn-{uuid.uuid4().hex}"
         
         # Store connection
-        self.active_connections[connection_id] = websocket
+        self.active_connections[connection_id] = ClientConnection(
+            connection_id, websocket, user_id, tenant_id, self._on_send_error
+        )
         
         # Update user connections
         if user_id not in self.user_connections:
@@ -135,45 +246,13 @@ class WebSocketManager:
         logger.info(f"WebSocket connected: {connection_id} for user {user_id}")
         
         # Send pending notifications
-        await self._send_pending_notifications(websocket, user_id, tenant_id, db)
+        await self._send_pending_notifications(self.active_connections[connection_id], db)
         
         return connection_id
     
     async def disconnect(self, connection_id: str, db: Session):
         """Disconnect WebSocket and clean up."""
-        if connection_id not in self.active_connections:
-            return
-        
-        websocket = self.active_connections[connection_id]
-        
-        # Find user and tenant for this connection
-        user_id = None
-        tenant_id = None
-        
-        for uid, conn_ids in self.user_connections.items():
-            if connection_id in conn_ids:
-                user_id = uid
-                break
-        
-        for tid, conn_ids in self.tenant_connections.items():
-            if connection_id in conn_ids:
-                tenant_id = tid
-                break
-        
-        # Remove from active connections
-        del self.active_connections[connection_id]
-        
-        # Remove from user connections
-        if user_id and user_id in self.user_connections:
-            self.user_connections[user_id].discard(connection_id)
-            if not self.user_connections[user_id]:
-                del self.user_connections[user_id]
-        
-        # Remove from tenant connections
-        if tenant_id and tenant_id in self.tenant_connections:
-            self.tenant_connections[tenant_id].discard(connection_id)
-            if not self.tenant_connections[tenant_id]:
-                del self.tenant_connections[tenant_id]
+        self._unregister(connection_id)
         
         # Update database
         db.query(WebSocketConnection).filter(
@@ -186,28 +265,46 @@ class WebSocketManager:
         
         logger.info(f"WebSocket disconnected: {connection_id}")
     
-    async def _send_pending_notifications(
-        self, 
-        websocket: WebSocket, 
-        user_id: str, 
-        tenant_id: str, 
-        db: Session
-    ):
-        """Send any pending notifications to newly connected user."""
+    def _unregister(self, connection_id: str) -> Optional[ClientConnection]:
+        """Remove a connection from all indexes and stop its writer."""
+        connection = self.active_connections.pop(connection_id, None)
+        if connection is None:
+            return None
+        
+        connection.close()
+        
+        # Remove from user connections
+        user_connections = self.user_connections.get(connection.user_id)
+        if user_connections is not None:
+            user_connections.discard(connection_id)
+            if not user_connections:
+                del self.user_connections[connection.user_id]
+        
+        # Remove from tenant connections
+        tenant_connections = self.tenant_connections.get(connection.tenant_id)
+        if tenant_connections is not None:
+            tenant_connections.discard(connection_id)
+            if not tenant_connections:
+                del self.tenant_connections[connection.tenant_id]
+        
+        return connection
+    
+    async def _send_pending_notifications(self, connection: ClientConnection, db: Session):
+        """Queue any pending notifications for a newly connected user."""
         # Get unread notifications
         notifications = db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.tenant_id == tenant_id,
+            Notification.user_id == connection.user_id,
+            Notification.tenant_id == connection.tenant_id,
             Notification.read_at.is_(None),
             Notification.status == NotificationStatus.PENDING
         ).order_by(Notification.created_at.desc()).limit(10).all()
         
         for notification in notifications:
-            await websocket.send_json({
+            self._deliver(connection, encode_frame({
                 "type": "notification",
                 "data": notification.to_dict(),
                 "timestamp": datetime.now(timezone.utc).isoformat()
-            })
+            }))
     
     async def send_personal_message(
         self, 
@@ -215,32 +312,62 @@ class WebSocketManager:
         connection_id: str
     ):
         """Send message to specific connection."""
-        if connection_id in self.active_connections:
-            websocket = self.active_connections[connection_id]
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"Error sending message to {connection_id}: {e}")
-                # Connection might be dead, remove it
-                await self._cleanup_dead_connection(connection_id)
+        connection = self.active_connections.get(connection_id)
+        if connection:
+            self._deliver(connection, encode_frame(message))
     
     async def _send_to_user(self, user_id: str, message: Dict[str, Any]):
         """Send message to all connections for a user."""
         if user_id not in self.user_connections:
             return
         
-        connection_ids = list(self.user_connections[user_id])
-        for connection_id in connection_ids:
-            await self.send_personal_message(message, connection_id)
+        await self._fan_out(self.user_connections[user_id], encode_frame(message))
     
     async def _send_to_tenant(self, tenant_id: str, message: Dict[str, Any]):
         """Send message to all connections in a tenant."""
         if tenant_id not in self.tenant_connections:
             return
         
-        connection_ids = list(self.tenant_connections[tenant_id])
-        for connection_id in connection_ids:
-            await self.send_personal_message(message, connection_id)
+        await self._fan_out(self.tenant_connections[tenant_id], encode_frame(message))
+    
+    async def _fan_out(
+        self,
+        connection_ids: Iterable[str],
+        frame: str,
+        exclude_user_id: Optional[str] = None
+    ) -> int:
+        """
+        Queue one serialized frame on many connections.
+        
+        Each connection has its own writer, so a slow client only holds up its
+        own frames. Returns the number of connections the frame was queued on.
+        """
+        queued = 0
+        # Snapshot: connections may come and go while the fan-out yields
+        for index, connection_id in enumerate(list(connection_ids), 1):
+            if index % WS_FANOUT_BATCH == 0:
+                await asyncio.sleep(0)
+            connection = self.active_connections.get(connection_id)
+            if connection is None or (exclude_user_id and connection.user_id == exclude_user_id):
+                continue
+            queued += self._deliver(connection, frame)
+        return queued
+    
+    def _deliver(self, connection: ClientConnection, frame: str) -> bool:
+        """Queue a frame on one connection, applying the slow-consumer policy."""
+        result = connection.push(frame)
+        if result == ClientConnection.QUEUED:
+            return True
+        
+        if result == ClientConnection.CLOSE:
+            # Closed right away so later frames are dropped instead of
+            # scheduling another close before this one runs
+            connection.close()
+            self.slow_consumers_closed += 1
+            self._close_in_background(connection.connection_id, "Slow consumer")
+        else:
+            self.frames_dropped += 1
+        return False
     
     async def broadcast_to_tenant(
         self, 
@@ -249,30 +376,8 @@ class WebSocketManager:
         exclude_user_id: str = None
     ):
         """Broadcast message to all users in tenant, optionally excluding one user."""
-        if tenant_id not in self.tenant_connections:
-            # Still publish to Redis for other servers
-            await self._publish_to_redis("tenant_broadcast", {
-                "tenant_id": tenant_id,
-                "message": message,
-                "exclude_user_id": exclude_user_id
-            })
-            return
-        
-        connection_ids = list(self.tenant_connections[tenant_id])
-        
-        for connection_id in connection_ids:
-            # Skip connections for excluded user
-            if exclude_user_id:
-                user_id_for_conn = None
-                for uid, conn_ids in self.user_connections.items():
-                    if connection_id in conn_ids:
-                        user_id_for_conn = uid
-                        break
-                
-                if user_id_for_conn == exclude_user_id:
-                    continue
-            
-            await self.send_personal_message(message, connection_id)
+        if tenant_id in self.tenant_connections:
+            await self._fan_out(self.tenant_connections[tenant_id], encode_frame(message), exclude_user_id)
         
         # Also publish to Redis for other servers
         await self._publish_to_redis("tenant_broadcast", {
@@ -316,18 +421,34 @@ class WebSocketManager:
         except Exception as e:
             logger.error(f"Error publishing to Redis: {e}")
     
-    async def _cleanup_dead_connection(self, connection_id: str):
+    async def _cleanup_dead_connection(self, connection_id: str, code: int = 1000, reason: str = ""):
         """Clean up a dead connection."""
-        if connection_id in self.active_connections:
+        connection = self._unregister(connection_id)
+        if connection:
             try:
                 # Try to close the websocket
-                websocket = self.active_connections[connection_id]
-                await websocket.close()
-            except:
+                await connection.websocket.close(code=code, reason=reason)
+            except Exception:
                 pass
-            
-            # Remove from tracking
-            del self.active_connections[connection_id]
+    
+    async def _on_send_error(self, connection_id: str, error: Exception):
+        """A writer failed to send: the connection is dead or too slow."""
+        if isinstance(error, asyncio.TimeoutError):
+            self.slow_consumers_closed += 1
+            logger.warning(f"Closing WebSocket {connection_id}: send timed out after {WS_SEND_TIMEOUT} s")
+            await self._cleanup_dead_connection(connection_id, SLOW_CONSUMER_CLOSE_CODE, "Send timed out")
+            return
+        logger.error(f"Error sending message to {connection_id}: {error}")
+        await self._cleanup_dead_connection(connection_id)
+    
+    def _close_in_background(self, connection_id: str, reason: str):
+        """Close a slow consumer without holding up the fan-out."""
+        logger.warning(f"Closing WebSocket {connection_id}: {reason}")
+        task = asyncio.create_task(
+            self._cleanup_dead_connection(connection_id, SLOW_CONSUMER_CLOSE_CODE, reason)
+        )
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
     
     async def handle_connection_messages(
         self,
@@ -353,10 +474,10 @@ class WebSocketManager:
                     db.commit()
                     
                     # Send pong response
-                    await websocket.send_json({
+                    await self.send_personal_message({
                         "type": "pong",
                         "timestamp": datetime.now(timezone.utc).isoformat()
-                    })
+                    }, connection_id)
                 
                 elif message_type == "mark_read":
                     # Mark notification as read
@@ -373,11 +494,11 @@ class WebSocketManager:
                         db.commit()
                         
                         # Send confirmation
-                        await websocket.send_json({
+                        await self.send_personal_message({
                             "type": "read_confirmation",
                             "notification_id": notification_id,
                             "timestamp": datetime.now(timezone.utc).isoformat()
-                        })
+                        }, connection_id)
                 
                 elif message_type == "subscribe_channel":
                     # Subscribe to specific notification channels
@@ -391,11 +512,11 @@ class WebSocketManager:
                         })
                         db.commit()
                         
-                        await websocket.send_json({
+                        await self.send_personal_message({
                             "type": "subscription_confirmed",
                             "channel": channel,
                             "timestamp": datetime.now(timezone.utc).isoformat()
-                        })
+                        }, connection_id)
                 
         except WebSocketDisconnect:
             await self.disconnect(connection_id, db)
@@ -409,6 +530,8 @@ class WebSocketManager:
             "total_connections": len(self.active_connections),
             "users_connected": len(self.user_connections),
             "tenants_connected": len(self.tenant_connections),
+            "frames_dropped": self.frames_dropped,
+            "slow_consumers_closed": self.slow_consumers_closed,
             "server_instance": self.server_instance
         }
 
@@ -0,0 +1,240 @@
+"""
+WebSocket tenant broadcast benchmark with simulated connections
+
+Registers N simulated connections (two per user, one tenant) on a
+WebSocketManager, a fraction of them slow (each send takes --slow-latency),
+and broadcasts to the tenant excluding one user. Measures broadcast
+completion latency, from the call until the last connection received the
+frame:
+
+- previous: reference copy of the old loop (per-connection send_json awaited
+  in turn, excluded user looked up by scanning user_connections). It is timed
+  on a sample of the connections and scaled to N.
+- fan-out engine: WebSocketManager.broadcast_to_tenant (frame serialized once,
+  reverse index for the exclusion, per-connection writers)
+
+Then sends a burst of broadcasts while some connections are stalled, checking
+that the fast connections get every frame and the outboxes of the stalled and
+slow ones stay bounded.
+
+Usage:
+    python benchmarks/bench_ws_fanout.py [--connections N] [--slow F] [--slow-latency S]
+        [--sample M] [--burst B] [--stalled K]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, Optional, Set
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DATABASE_URL', 'postgresql+psycopg2://benchmark@localhost/benchmark')
+
+from app import ws  # noqa: E402
+from app.ws import WebSocketManager  # noqa: E402
+
+
+class MockSocket:
+    """Records when each frame arrived; slow sockets take `latency` per send, stalled ones never finish."""
+
+    def __init__(self, latency: float = 0.0, stalled: Optional[asyncio.Event] = None):
+        self.latency = latency
+        self.stalled = stalled
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        if self.stalled is not None:
+            await self.stalled.wait()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.received.append(time.perf_counter())
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+class NullRedis:
+    async def publish(self, channel: str, message: str):
+        pass
+
+    def pubsub(self):
+        return NullPubSub()
+
+
+class NullPubSub:
+    async def subscribe(self, channel: str):
+        pass
+
+    async def listen(self):
+        await asyncio.Event().wait()
+        yield {}
+
+
+class NullQuery:
+    def filter(self, *conditions):
+        return self
+
+    def order_by(self, *columns):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def all(self):
+        return []
+
+
+class NullDB:
+    def add(self, obj):
+        pass
+
+    def commit(self):
+        pass
+
+    def query(self, model_class):
+        return NullQuery()
+
+
+class LegacyManager:
+    """Connection maps of the previous manager (connection_id -> websocket)."""
+
+    def __init__(self):
+        self.active_connections: Dict[str, MockSocket] = {}
+        self.user_connections: Dict[str, Set[str]] = {}
+        self.tenant_connections: Dict[str, Set[str]] = {}
+
+    async def send_personal_message(self, message, connection_id: str):
+        if connection_id in self.active_connections:
+            websocket = self.active_connections[connection_id]
+            try:
+                await websocket.send_json(message)
+            except Exception:
+                pass
+
+    async def broadcast_to_tenant(self, tenant_id: str, message, exclude_user_id: str = None):
+        """Reference copy of the previous broadcast loop (without the Redis publish)"""
+        connection_ids = list(self.tenant_connections[tenant_id])
+
+        for connection_id in connection_ids:
+            if exclude_user_id:
+                user_id_for_conn = None
+                for uid, conn_ids in self.user_connections.items():
+                    if connection_id in conn_ids:
+                        user_id_for_conn = uid
+                        break
+
+                if user_id_for_conn == exclude_user_id:
+                    continue
+
+            await self.send_personal_message(message, connection_id)
+
+
+def socket_for(index: int, slow: Set[int], latency: float) -> MockSocket:
+    return MockSocket(latency if index in slow else 0.0)
+
+
+def message(seq: int):
+    return {
+        "type": "announcement",
+        "seq": seq,
+        "data": {"title": "Scheduled maintenance", "body": "Learning sessions pause at 22:00 UTC for 15 minutes."}
+    }
+
+
+async def wait_for_frames(sockets, frames: int):
+    while any(len(socket.received) < frames for socket in sockets):
+        await asyncio.sleep(0.005)
+
+
+async def run(args) -> None:
+    users = args.connections // 2
+    slow = set(random.Random(7).sample(range(args.connections), int(args.connections * args.slow)))
+    print(f"{args.connections:,} connections ({users:,} users, 1 tenant), {len(slow):,} slow "
+          f"({args.slow_latency * 1000:.0f} ms per send), excluding 1 user")
+
+    # Previous loop, timed on a sample spread over the connections with every user still indexed
+    legacy = LegacyManager()
+    for user in range(users):
+        legacy.user_connections[f"user-{user}"] = {f"conn-{user}-0", f"conn-{user}-1"}
+    legacy.tenant_connections["tenant"] = set()
+    stride = args.connections // args.sample
+    for index in range(0, args.connections, stride):
+        connection_id = f"conn-{index // 2}-{index % 2}"
+        legacy.active_connections[connection_id] = socket_for(index, slow, args.slow_latency)
+        legacy.tenant_connections["tenant"].add(connection_id)
+
+    started = time.perf_counter()
+    await legacy.broadcast_to_tenant("tenant", message(0), exclude_user_id="user-0")
+    legacy_seconds = (time.perf_counter() - started) * stride
+
+    # Fan-out engine over all connections
+    manager = WebSocketManager(NullRedis())
+    db = NullDB()
+    sockets = []
+    for index in range(args.connections):
+        socket = socket_for(index, slow, args.slow_latency)
+        await manager.connect(socket, f"user-{index // 2}", "tenant", db)
+        sockets.append(socket)
+    receivers = sockets[2:]
+
+    started = time.perf_counter()
+    await manager.broadcast_to_tenant("tenant", message(0), exclude_user_id="user-0")
+    queued_seconds = time.perf_counter() - started
+    await wait_for_frames(receivers, 1)
+    engine_seconds = max(socket.received[0] for socket in receivers) - started
+    fast = sorted(socket.received[0] - started for socket in receivers if not socket.latency)
+    assert not sockets[0].received and not sockets[1].received, "excluded user received the broadcast"
+
+    print(f"  previous (sequential, {args.sample:,} sampled): {legacy_seconds:9.3f} s to complete")
+    print(f"  fan-out engine:                {engine_seconds:9.3f} s to complete "
+          f"({legacy_seconds / engine_seconds:,.0f}x), {queued_seconds * 1000:.0f} ms to queue, "
+          f"fast connections p50 {statistics.median(fast) * 1000:.0f} ms / "
+          f"p99 {fast[int(len(fast) * 0.99)] * 1000:.0f} ms")
+
+    # Burst with stalled connections: the others keep up, stalled outboxes stay bounded
+    stall = asyncio.Event()
+    for socket in receivers[:args.stalled]:
+        socket.stalled = stall
+    steady = [socket for socket in receivers[args.stalled:] if not socket.latency]
+    started = time.perf_counter()
+    for seq in range(1, args.burst + 1):
+        await manager.broadcast_to_tenant("tenant", message(seq))
+    await wait_for_frames(steady, args.burst + 1)
+    burst_seconds = time.perf_counter() - started
+    pending = max(len(manager.active_connections[connection_id].pending) for connection_id in manager.active_connections)
+    print(f"  burst of {args.burst} broadcasts, {args.stalled} stalled connections: "
+          f"{burst_seconds:.2f} s for the fast connections to receive all, "
+          f"{manager.frames_dropped:,} frames dropped ({ws.WS_SLOW_CONSUMER_POLICY}), "
+          f"{manager.slow_consumers_closed} stalled past {ws.WS_SEND_TIMEOUT:.0f} s closed, "
+          f"largest outbox {pending} frames")
+
+    stall.set()
+    manager._subscriber_task.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=50_000)
+    parser.add_argument("--slow", type=float, default=0.01)
+    parser.add_argument("--slow-latency", type=float, default=0.05)
+    parser.add_argument("--sample", type=int, default=1_000)
+    parser.add_argument("--burst", type=int, default=80)
+    parser.add_argument("--stalled", type=int, default=100)
+    logging.disable(logging.WARNING)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# AIVO Notification Service - WebSocket Fan-out Tests
+# Test the WebSocketManager fan-out engine: reverse index, shared frames, slow consumers
+
+import pytest
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+from app import ws
+from app.ws import WebSocketManager, SLOW_CONSUMER_CLOSE_CODE
+
+class FakeWebSocket:
+    """WebSocket that records text frames; a blocked one never finishes a send."""
+
+    def __init__(self, blocked: bool = False, broken: bool = False):
+        self.frames: List[str] = []
+        self.blocked = blocked
+        self.broken = broken
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        if self.broken:
+            raise RuntimeError("connection reset")
+        if self.blocked:
+            await asyncio.Event().wait()
+        self.frames.append(frame)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.close_code = code
+
+class FakeRedis:
+    """Redis client that records publishes; the subscription stays silent."""
+
+    def __init__(self):
+        self.published: List[Dict[str, Any]] = []
+
+    async def publish(self, channel: str, message: str):
+        self.published.append(json.loads(message))
+
+    def pubsub(self):
+        return FakePubSub()
+
+class FakePubSub:
+    async def subscribe(self, channel: str):
+        pass
+
+    async def listen(self):
+        await asyncio.Event().wait()
+        yield {}
+
+class FakeQuery:
+    def filter(self, *conditions):
+        return self
+
+    def order_by(self, *columns):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def all(self):
+        return []
+
+    def update(self, values):
+        return 0
+
+class FakeDB:
+    def add(self, obj):
+        pass
+
+    def commit(self):
+        pass
+
+    def query(self, model_class):
+        return FakeQuery()
+
+async def settle():
+    """Let the writer tasks run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+@asynccontextmanager
+async def running_manager():
+    manager = WebSocketManager(FakeRedis())
+    try:
+        yield manager
+    finally:
+        if manager._subscriber_task:
+            manager._subscriber_task.cancel()
+
+class TestWebSocketFanout:
+    """Test fan-out through per-connection outboxes."""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_excludes_user_through_reverse_index(self):
+        async with running_manager() as manager:
+            db = FakeDB()
+            sender, other, sender_tab = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+            await manager.connect(sender, "user_1", "tenant_1", db)
+            await manager.connect(sender_tab, "user_1", "tenant_1", db)
+            await manager.connect(other, "user_2", "tenant_1", db)
+
+            message = {"type": "announcement", "title": "Maintenance tonight", "emoji": "🔧"}
+            await manager.broadcast_to_tenant("tenant_1", message, exclude_user_id="user_1")
+            await settle()
+
+            # Same text as send_json would have produced
+            assert other.frames == [json.dumps(message, separators=(",", ":"), ensure_ascii=False)]
+            assert sender.frames == [] and sender_tab.frames == []
+            assert manager.redis.published[0]["type"] == "tenant_broadcast"
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_does_not_block_broadcast(self):
+        async with running_manager() as manager:
+            db = FakeDB()
+            stuck = FakeWebSocket(blocked=True)
+            fast = [FakeWebSocket() for _ in range(20)]
+            await manager.connect(stuck, "user_stuck", "tenant_1", db)
+            for i, websocket in enumerate(fast):
+                await manager.connect(websocket, f"user_{i}", "tenant_1", db)
+
+            await asyncio.wait_for(manager._send_to_tenant("tenant_1", {"type": "ping"}), timeout=1)
+            await settle()
+
+            assert all(len(websocket.frames) == 1 for websocket in fast)
+            assert stuck.frames == []
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_newest_frames(self, monkeypatch):
+        async with running_manager() as manager:
+            monkeypatch.setattr(ws, "WS_SEND_QUEUE_SIZE", 2)
+            monkeypatch.setattr(ws, "WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+            stuck = FakeWebSocket(blocked=True)
+            connection_id = await manager.connect(stuck, "user_1", "tenant_1", FakeDB())
+
+            # The first frame is taken by the (blocked) writer, two more fit in the outbox
+            for i in range(6):
+                await manager.send_personal_message({"seq": i}, connection_id)
+                await settle()
+
+            connection = manager.active_connections[connection_id]
+            assert [json.loads(frame)["seq"] for frame in connection.pending] == [4, 5]
+            assert manager.frames_dropped == 3
+
+    @pytest.mark.asyncio
+    async def test_close_policy_disconnects_slow_consumer(self, monkeypatch):
+        async with running_manager() as manager:
+            monkeypatch.setattr(ws, "WS_SEND_QUEUE_SIZE", 2)
+            monkeypatch.setattr(ws, "WS_SLOW_CONSUMER_POLICY", "close")
+            stuck = FakeWebSocket(blocked=True)
+            connection_id = await manager.connect(stuck, "user_1", "tenant_1", FakeDB())
+
+            for i in range(4):
+                await manager.send_personal_message({"seq": i}, connection_id)
+                await settle()
+
+            assert stuck.close_code == SLOW_CONSUMER_CLOSE_CODE
+            assert connection_id not in manager.active_connections
+            assert "user_1" not in manager.user_connections
+            assert "tenant_1" not in manager.tenant_connections
+            assert manager.slow_consumers_closed == 1
+
+    @pytest.mark.asyncio
+    async def test_close_policy_closes_once_per_connection(self, monkeypatch):
+        async with running_manager() as manager:
+            monkeypatch.setattr(ws, "WS_SEND_QUEUE_SIZE", 1)
+            monkeypatch.setattr(ws, "WS_SLOW_CONSUMER_POLICY", "close")
+            stuck = FakeWebSocket(blocked=True)
+            connection_id = await manager.connect(stuck, "user_1", "tenant_1", FakeDB())
+            await manager.send_personal_message({"seq": 0}, connection_id)
+            await settle()
+
+            # Several frames before the background close gets to run
+            for i in range(1, 5):
+                await manager.send_personal_message({"seq": i}, connection_id)
+            await settle()
+
+            assert manager.slow_consumers_closed == 1
+            assert connection_id not in manager.active_connections
+
+    @pytest.mark.asyncio
+    async def test_stalled_send_times_out(self, monkeypatch):
+        async with running_manager() as manager:
+            monkeypatch.setattr(ws, "WS_SEND_TIMEOUT", 0.01)
+            stuck = FakeWebSocket(blocked=True)
+            connection_id = await manager.connect(stuck, "user_1", "tenant_1", FakeDB())
+
+            await manager.send_personal_message({"seq": 0}, connection_id)
+            await asyncio.sleep(0.05)
+
+            assert stuck.close_code == SLOW_CONSUMER_CLOSE_CODE
+            assert connection_id not in manager.active_connections
+            assert manager.slow_consumers_closed == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_send_unregisters_connection(self):
+        async with running_manager() as manager:
+            broken = FakeWebSocket(broken=True)
+            connection_id = await manager.connect(broken, "user_1", "tenant_1", FakeDB())
+
+            await manager._send_to_user("user_1", {"type": "notification"})
+            await settle()
+
+            assert connection_id not in manager.active_connections
+            assert "user_1" not in manager.user_connections
+
+    @pytest.mark.asyncio
+    async def test_redis_tenant_broadcast_from_other_servers_only(self):
+        async with running_manager() as manager:
+            websocket = FakeWebSocket()
+            await manager.connect(websocket, "user_1", "tenant_1", FakeDB())
+            event = {
+                "type": "tenant_broadcast",
+                "data": {"tenant_id": "tenant_1", "message": {"type": "announcement"}, "exclude_user_id": None}
+            }
+
+            await manager._handle_redis_event({**event, "server_instance": manager.server_instance})
+            await manager._handle_redis_event({**event, "server_instance": "ws-server-other"})
+            await settle()
+
+            assert [json.loads(frame) for frame in websocket.frames] == [{"type": "announcement"}]
@@ -8,6 +8,7 @@ Consumes educational events from various services and triggers orchestration log
 import json
 import logging
 import asyncio
+import zlib
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
@@ -19,6 +20,14 @@ from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
+# Last error kept per failed message for its dead letter record
+MAX_TRACKED_ERRORS = 10000
+
+
+def _decode(value) -> str:
+    """Decode a Redis reply value that may be bytes"""
+    return value.decode() if isinstance(value, bytes) else value
+
 
 class EventType(str, Enum):
     """Supported input event types"""
@@ -101,10 +110,26 @@ class EventConsumerConfig(BaseModel):
     ])
     consumer_group: str = "orchestrator-consumer-group"
     consumer_name: str = "orchestrator-consumer-1"
-    batch_size: int = 10
+    batch_size: int = 100
     poll_timeout: float = 1.0
     max_retry_attempts: int = 3
     
+    # Concurrent processing: events are hashed by learner into partitions,
+    # each drained by one worker, so per-learner order is kept while
+    # different learners are processed in parallel
+    worker_partitions: int = 16
+    partition_queue_size: int = 64
+    drain_timeout: float = 10.0
+    
+    # Acknowledgements are buffered and flushed in one pipeline per interval
+    ack_batch_size: int = 100
+    ack_flush_interval: float = 0.05
+    
+    # Pending entry recovery and dead-lettering
+    claim_min_idle_ms: int = 60000
+    claim_interval: float = 30.0
+    dead_letter_stream: str = "aivo.events.dlq"
+    
     # Service endpoints for actions
     learner_service_url: str = "http://learner-svc:8001"
     notification_service_url: str = "http://notification-svc:8003"
@@ -114,19 +139,39 @@ class EventConsumerConfig(BaseModel):
 
 
 class EventConsumer:
-    """Redis-based event consumer with orchestration logic"""
+    """Redis-based event consumer with orchestration logic
+    
+    XREADGROUP batches are fanned out to learner-keyed partitions. Each
+    partition is drained by a single worker, so events for one learner are
+    handled in stream order while a slow downstream call only holds up the
+    learners hashed to the same partition. Successful messages are
+    acknowledged in pipelined batches; failed ones stay pending, are
+    reclaimed with XAUTOCLAIM and moved to the dead letter stream once
+    they exceed max_retry_attempts deliveries.
+    """
     
-    def __init__(self, orchestration_engine):
-        self.config = EventConsumerConfig()
+    def __init__(self, orchestration_engine, config: Optional[EventConsumerConfig] = None):
+        self.config = config or EventConsumerConfig()
         self.orchestration_engine = orchestration_engine
         self.redis_client: Optional[redis.Redis] = None
         self.is_running = False
         
+        # Partition queues, worker tasks and buffered acknowledgements
+        self._partitions: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._ack_buffer: Dict[str, List[str]] = {}
+        self._ack_ready: Optional[asyncio.Event] = None
+        self._in_flight: set = set()
+        self._last_errors: Dict[str, str] = {}
+        
         # Statistics tracking
         self.stats = {
             "total_events_processed": 0,
             "events_by_type": {},
             "processing_errors": 0,
+            "messages_acknowledged": 0,
+            "messages_reclaimed": 0,
+            "messages_dead_lettered": 0,
             "last_event_time": None,
             "start_time": datetime.utcnow()
         }
@@ -134,7 +179,8 @@ class EventConsumer:
     async def initialize(self):
         """Initialize Redis connection and consumer groups"""
         try:
-            self.redis_client = redis.from_url(self.config.redis_url)
+            if self.redis_client is None:
+                self.redis_client = redis.from_url(self.config.redis_url)
             
             # Test connection
             await self.redis_client.ping()
@@ -164,12 +210,17 @@ class EventConsumer:
             await self.initialize()
             
         self.is_running = True
-        logger.info("Starting event consumption...")
+        self._start_workers()
+        logger.info(
+            f"Starting event consumption with {self.config.worker_partitions} partitions..."
+        )
         
         try:
+            # XREADGROUP blocks for poll_timeout, so no extra delay is needed;
+            # sleep(0) only yields to the workers between reads
             while self.is_running:
                 await self._consume_batch()
-                await asyncio.sleep(0.1)  # Small delay to prevent tight loop
+                await asyncio.sleep(0)
                 
         except asyncio.CancelledError:
             logger.info("Event consumption cancelled")
@@ -177,6 +228,7 @@ class EventConsumer:
             logger.error(f"Event consumption error: {e}")
             self.is_running = False
         finally:
+            await self._drain()
             await self._cleanup()
             
     async def stop_consuming(self):
@@ -184,6 +236,38 @@ class EventConsumer:
         logger.info("Stopping event consumption...")
         self.is_running = False
         
+    def _start_workers(self):
+        """Create partition queues, partition workers and background loops"""
+        self._ack_ready = asyncio.Event()
+        self._partitions = [
+            asyncio.Queue(maxsize=self.config.partition_queue_size)
+            for _ in range(max(1, self.config.worker_partitions))
+        ]
+        self._tasks = [
+            asyncio.create_task(self._partition_worker(queue)) for queue in self._partitions
+        ]
+        self._tasks.append(asyncio.create_task(self._ack_loop()))
+        self._tasks.append(asyncio.create_task(self._reclaim_loop()))
+        
+    async def _drain(self):
+        """Finish queued messages, flush acknowledgements and stop workers"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._partitions)),
+                timeout=self.config.drain_timeout
+            )
+        except asyncio.TimeoutError:
+            # Unfinished messages stay pending and are reclaimed later
+            logger.warning("Timed out draining partitions; pending messages will be reclaimed")
+            
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._flush_acks()
+        
     async def _consume_batch(self):
         """Consume a batch of events from all channels"""
         try:
@@ -200,25 +284,53 @@ class EventConsumer:
             
             for channel, channel_messages in messages:
                 for message_id, fields in channel_messages:
-                    await self._process_message(channel.decode(), message_id.decode(), fields)
+                    await self._dispatch(_decode(channel), _decode(message_id), fields)
                     
         except redis.ResponseError as e:
             logger.error(f"Redis stream read error: {e}")
         except Exception as e:
             logger.error(f"Batch consumption error: {e}")
             
-    async def _process_message(self, channel: str, message_id: str, fields: Dict[bytes, bytes]):
-        """Process a single event message"""
+    def _partition_for(self, learner_id: str) -> asyncio.Queue:
+        """Stable learner -> partition mapping"""
+        index = zlib.crc32(learner_id.encode()) % len(self._partitions)
+        return self._partitions[index]
+        
+    async def _dispatch(self, channel: str, message_id: str, fields: Dict[bytes, bytes]):
+        """Parse a message and queue it on its learner's partition"""
         try:
-            # Decode message fields
-            decoded_fields = {
-                k.decode(): v.decode() for k, v in fields.items()
-            }
-            
-            # Parse event data
-            event_data = json.loads(decoded_fields.get("data", "{}"))
-            event = Event.from_dict(event_data)
+            event = self._parse_event(fields)
+        except Exception as e:
+            # Malformed events will never succeed, so skip the retries
+            logger.error(f"Unparseable event {message_id} on {channel}: {e}")
+            self.stats["processing_errors"] += 1
+            await self._dead_letter(channel, message_id, fields, f"unparseable event: {e}", 1)
+            return
             
+        self._in_flight.add(message_id)
+        # Blocks when the partition is full, which throttles XREADGROUP
+        await self._partition_for(event.learner_id).put((channel, message_id, event))
+        
+    def _parse_event(self, fields: Dict[bytes, bytes]) -> Event:
+        """Decode message fields into an Event"""
+        decoded_fields = {
+            _decode(k): _decode(v) for k, v in fields.items()
+        }
+        event_data = json.loads(decoded_fields.get("data", "{}"))
+        return Event.from_dict(event_data)
+        
+    async def _partition_worker(self, queue: asyncio.Queue):
+        """Process one partition's messages in order"""
+        while True:
+            channel, message_id, event = await queue.get()
+            try:
+                await self._process_message(channel, message_id, event)
+            finally:
+                queue.task_done()
+                
+    async def _process_message(self, channel: str, message_id: str, event: Event):
+        """Process a single event message"""
+        try:
             logger.info(f"Processing event {event.type} for learner {event.learner_id}")
             
             # Process through orchestration engine
@@ -231,20 +343,146 @@ class EventConsumer:
             # Update statistics
             self._update_stats(event)
             
-            # Acknowledge message
-            await self.redis_client.xack(channel, self.config.consumer_group, message_id)
+            # Acknowledge message with the next pipelined flush
+            self._queue_ack(channel, message_id)
             
         except Exception as e:
             logger.error(f"Message processing error: {e}")
             self.stats["processing_errors"] += 1
             
-            # For now, acknowledge failed messages to prevent infinite retry
-            # In production, you might want to implement a dead letter queue
+            # Leave the message pending; the reclaim loop retries it and
+            # dead-letters it after max_retry_attempts deliveries
+            self._in_flight.discard(message_id)
+            if len(self._last_errors) >= MAX_TRACKED_ERRORS:
+                self._last_errors.pop(next(iter(self._last_errors)))
+            self._last_errors[message_id] = str(e)
+            
+    def _queue_ack(self, channel: str, message_id: str):
+        """Buffer an acknowledgement for the ack loop"""
+        self._ack_buffer.setdefault(channel, []).append(message_id)
+        self._last_errors.pop(message_id, None)
+        if sum(len(ids) for ids in self._ack_buffer.values()) >= self.config.ack_batch_size:
+            self._ack_ready.set()
+            
+    async def _ack_loop(self):
+        """Flush buffered acknowledgements every ack_flush_interval or batch"""
+        while True:
             try:
-                await self.redis_client.xack(channel, self.config.consumer_group, message_id)
-            except:
+                await asyncio.wait_for(self._ack_ready.wait(), self.config.ack_flush_interval)
+            except asyncio.TimeoutError:
                 pass
+            await self._flush_acks()
+            
+    async def _flush_acks(self):
+        """XACK every buffered message in one pipeline round trip"""
+        if self._ack_ready:
+            self._ack_ready.clear()
+        if not self._ack_buffer:
+            return
+            
+        buffer, self._ack_buffer = self._ack_buffer, {}
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for channel, message_ids in buffer.items():
+                    pipe.xack(channel, self.config.consumer_group, *message_ids)
+                await pipe.execute()
+            self.stats["messages_acknowledged"] += sum(len(ids) for ids in buffer.values())
+        except Exception as e:
+            # Unacknowledged messages are redelivered by the reclaim loop
+            logger.error(f"Failed to flush acknowledgements: {e}")
+        finally:
+            for message_ids in buffer.values():
+                self._in_flight.difference_update(message_ids)
                 
+    async def _reclaim_loop(self):
+        """Periodically recover messages left pending by failures or crashed consumers"""
+        while True:
+            await asyncio.sleep(self.config.claim_interval)
+            for channel in self.config.event_channels:
+                try:
+                    await self._reclaim_pending(channel)
+                except Exception as e:
+                    logger.error(f"Pending message recovery failed for {channel}: {e}")
+                    
+    async def _reclaim_pending(self, channel: str):
+        """XAUTOCLAIM idle pending entries and retry or dead-letter them"""
+        start_id = "0-0"
+        while True:
+            result = await self.redis_client.xautoclaim(
+                channel,
+                self.config.consumer_group,
+                self.config.consumer_name,
+                min_idle_time=self.config.claim_min_idle_ms,
+                start_id=start_id,
+                count=self.config.batch_size
+            )
+            start_id, claimed = _decode(result[0]), result[1]
+            
+            # Skip entries this consumer still has queued or unflushed
+            claimed = [
+                (_decode(message_id), fields) for message_id, fields in claimed
+                if _decode(message_id) not in self._in_flight
+            ]
+            if claimed:
+                deliveries = await self._delivery_counts(channel, [m for m, _ in claimed])
+                for message_id, fields in claimed:
+                    if fields is None:
+                        # Trimmed from the stream while pending
+                        self._queue_ack(channel, message_id)
+                    elif deliveries.get(message_id, 0) > self.config.max_retry_attempts:
+                        reason = self._last_errors.pop(message_id, "max retry attempts exceeded")
+                        await self._dead_letter(
+                            channel, message_id, fields, reason, deliveries[message_id]
+                        )
+                    else:
+                        self.stats["messages_reclaimed"] += 1
+                        await self._dispatch(channel, message_id, fields)
+                        
+            if start_id == "0-0":
+                break
+                
+    async def _delivery_counts(self, channel: str, message_ids: List[str]) -> Dict[str, int]:
+        """Delivery counter of each pending message, fetched in one pipeline"""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for message_id in message_ids:
+                pipe.xpending_range(
+                    channel, self.config.consumer_group, min=message_id, max=message_id, count=1
+                )
+            results = await pipe.execute()
+        return {
+            _decode(entry["message_id"]): entry["times_delivered"]
+            for entries in results for entry in entries
+        }
+        
+    async def _dead_letter(
+        self,
+        channel: str,
+        message_id: str,
+        fields: Dict[bytes, bytes],
+        reason: str,
+        deliveries: int
+    ):
+        """Move a message to the dead letter stream and acknowledge it"""
+        entry = {_decode(k): v for k, v in fields.items()}
+        entry.update({
+            "source_stream": channel,
+            "source_id": message_id,
+            "error": reason,
+            "deliveries": deliveries,
+            "failed_at": datetime.utcnow().isoformat()
+        })
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.xadd(self.config.dead_letter_stream, entry)
+                pipe.xack(channel, self.config.consumer_group, message_id)
+                await pipe.execute()
+            self.stats["messages_dead_lettered"] += 1
+            logger.warning(
+                f"Dead-lettered message {message_id} from {channel} after {deliveries} deliveries: {reason}"
+            )
+        except Exception as e:
+            logger.error(f"Failed to dead-letter message {message_id}: {e}")
+            
     async def _execute_action(self, action: OrchestrationAction):
         """Execute an orchestration action"""
         try:
@@ -409,6 +647,8 @@ class EventConsumer:
             **self.stats,
             "uptime_seconds": int(uptime.total_seconds()),
             "events_per_minute": self._calculate_events_per_minute(),
+            "in_flight": len(self._in_flight),
+            "queued": sum(queue.qsize() for queue in self._partitions),
             "is_running": self.is_running
         }
         
@@ -6,7 +6,10 @@ Core orchestration logic for processing educational events and generating
 intelligent level suggestions and game break triggers.
 """
 
+import json
 import logging
+import math
+import struct
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
@@ -14,6 +17,7 @@ from enum import Enum
 import uuid
 
 from .consumer import Event, EventType, OrchestrationAction, ActionType
+from .state_store import LearnerStateBackend, LearnerStateCache, LearnerStateStoreConfig
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +40,32 @@ class EngagementLevel(str, Enum):
     VERY_HIGH = "very_high"
 
 
-@dataclass
+# Packed LearnerState layout: version, level index, engagement, performance,
+# consecutive correct/incorrect, session minutes, baseline flag and the
+# break-due, last-break and updated-at epochs (NaN for None), followed by a
+# JSON tail holding the variable-length history only when it is non-empty
+LEARNER_STATE_PACK_VERSION = 1
+_LEARNER_STATE_HEADER = struct.Struct("<BBddHHI?ddd")
+_DIFFICULTY_LEVELS = list(DifficultyLevel)
+
+
+def _pack_time(value: Optional[datetime]) -> float:
+    return value.timestamp() if value is not None else math.nan
+
+
+def _unpack_time(value: float) -> Optional[datetime]:
+    return None if math.isnan(value) else datetime.fromtimestamp(value)
+
+
+def _pack_history(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{**entry, "timestamp": _pack_time(entry.get("timestamp"))} for entry in entries]
+
+
+def _unpack_history(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{**entry, "timestamp": _unpack_time(entry["timestamp"])} for entry in entries]
+
+
+@dataclass(slots=True)
 class LearnerState:
     """Current state of a learner"""
     learner_id: str
@@ -54,6 +83,57 @@ class LearnerState:
     slp_data: Optional[Dict[str, Any]] = None
     recent_assessments: List[Dict[str, Any]] = field(default_factory=list)
     updated_at: datetime = field(default_factory=datetime.utcnow)
+    
+    def pack(self) -> bytes:
+        """Serialize to the compact binary layout used by the state store"""
+        header = _LEARNER_STATE_HEADER.pack(
+            LEARNER_STATE_PACK_VERSION,
+            _DIFFICULTY_LEVELS.index(self.current_level),
+            self.engagement_score,
+            self.performance_score,
+            min(self.consecutive_correct, 0xFFFF),
+            min(self.consecutive_incorrect, 0xFFFF),
+            # Coursework events report fractional durations
+            min(max(round(self.session_duration_minutes), 0), 0xFFFFFFFF),
+            self.baseline_established,
+            _pack_time(self.break_due_time),
+            _pack_time(self.last_break_time),
+            _pack_time(self.updated_at)
+        )
+        if not (self.sel_alerts or self.slp_data or self.recent_assessments):
+            return header
+        history = [_pack_history(self.sel_alerts), self.slp_data, _pack_history(self.recent_assessments)]
+        return header + json.dumps(history, default=str, separators=(",", ":")).encode()
+        
+    @classmethod
+    def unpack(cls, learner_id: str, tenant_id: str, packed: bytes) -> 'LearnerState':
+        """Rebuild a state serialized with pack()"""
+        (version, level, engagement, performance, correct, incorrect, minutes,
+         baseline, break_due, last_break, updated) = _LEARNER_STATE_HEADER.unpack_from(packed)
+        if version != LEARNER_STATE_PACK_VERSION:
+            raise ValueError(f"Unsupported learner state version: {version}")
+            
+        sel_alerts, slp_data, recent_assessments = [], None, []
+        if len(packed) > _LEARNER_STATE_HEADER.size:
+            sel_alerts, slp_data, recent_assessments = json.loads(packed[_LEARNER_STATE_HEADER.size:])
+            
+        return cls(
+            learner_id=learner_id,
+            tenant_id=tenant_id,
+            current_level=_DIFFICULTY_LEVELS[level],
+            engagement_score=engagement,
+            performance_score=performance,
+            consecutive_correct=correct,
+            consecutive_incorrect=incorrect,
+            session_duration_minutes=minutes,
+            break_due_time=_unpack_time(break_due),
+            last_break_time=_unpack_time(last_break),
+            sel_alerts=_unpack_history(sel_alerts),
+            baseline_established=baseline,
+            slp_data=slp_data,
+            recent_assessments=_unpack_history(recent_assessments),
+            updated_at=_unpack_time(updated)
+        )
 
 
 class OrchestrationRules:
@@ -82,8 +162,21 @@ class OrchestrationRules:
 class OrchestrationEngine:
     """Core orchestration engine with rule-based intelligence"""
     
-    def __init__(self):
-        self.learner_states: Dict[str, LearnerState] = {}
+    def __init__(
+        self,
+        state_backend: Optional[LearnerStateBackend] = None,
+        state_config: Optional[LearnerStateStoreConfig] = None
+    ):
+        # Bounded learner state cache, persisted write-behind when a
+        # backend is configured and warmed lazily on each learner's first event
+        state_config = state_config or LearnerStateStoreConfig()
+        self.learner_states = LearnerStateCache(
+            backend=state_backend,
+            unpack=LearnerState.unpack,
+            max_entries=state_config.max_cached_learners,
+            ttl_seconds=state_config.cache_ttl_seconds,
+            flush_interval=state_config.flush_interval
+        )
         self.rules = OrchestrationRules()
         self.is_initialized = False
         
@@ -114,7 +207,7 @@ class OrchestrationEngine:
         logger.info(f"Processing {event.type} event for learner {event.learner_id}")
         
         # Update learner state
-        learner_state = self._get_or_create_learner_state(event.learner_id, event.tenant_id)
+        learner_state = await self._get_or_create_learner_state(event.learner_id, event.tenant_id)
         await self._update_learner_state(learner_state, event)
         
         # Generate actions based on event type
@@ -150,6 +243,9 @@ class OrchestrationEngine:
             elif action.type == ActionType.LEARNING_PATH_UPDATE:
                 self.stats["learning_path_updates"] += 1
                 
+        # Persist the modified state with the next write-behind flush
+        self.learner_states.mark_dirty(learner_state)
+                
         logger.info(f"Generated {len(actions)} actions for learner {event.learner_id}")
         return actions
         
@@ -651,16 +747,18 @@ class OrchestrationEngine:
         time_since_break = datetime.utcnow() - learner_state.last_break_time
         return time_since_break >= timedelta(minutes=self.rules.MIN_BREAK_INTERVAL)
         
-    def _get_or_create_learner_state(self, learner_id: str, tenant_id: str) -> LearnerState:
-        """Get existing learner state or create new one"""
+    async def _get_or_create_learner_state(self, learner_id: str, tenant_id: str) -> LearnerState:
+        """Get cached or persisted learner state, or create a new one"""
         
-        if learner_id not in self.learner_states:
-            self.learner_states[learner_id] = LearnerState(
+        learner_state = await self.learner_states.load(learner_id, tenant_id)
+        if learner_state is None:
+            learner_state = LearnerState(
                 learner_id=learner_id,
                 tenant_id=tenant_id
             )
+            self.learner_states[learner_id] = learner_state
             
-        return self.learner_states[learner_id]
+        return learner_state
         
     async def _update_learner_state(self, learner_state: LearnerState, event: Event):
         """Update learner state based on event"""
@@ -670,16 +768,23 @@ class OrchestrationEngine:
         # For now, just update the timestamp
         
     async def _load_learner_states(self):
-        """Load learner states from persistent storage"""
-        # In production, this would load from database
-        # For now, start with empty state
-        logger.info("Loading learner states from storage...")
-        pass
+        """Start the learner state store
+        
+        States are not preloaded; each learner is warmed from the backend
+        on their first event.
+        """
+        logger.info("Starting learner state store...")
+        self.learner_states.start()
+        
+    async def close(self):
+        """Flush pending learner states and close the state backend"""
+        await self.learner_states.close()
         
     async def get_stats(self) -> Dict[str, Any]:
         """Get orchestration engine statistics"""
         return {
             **self.stats,
             "active_learners": len(self.learner_states),
+            "learner_state_store": self.learner_states.get_stats(),
             "is_initialized": self.is_initialized
         }
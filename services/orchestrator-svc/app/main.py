@@ -18,6 +18,7 @@ import uvicorn
 
 from .consumer import EventConsumer
 from .logic import OrchestrationEngine
+from .state_store import LearnerStateStoreConfig, create_learner_state_backend
 
 # Configure logging
 logging.basicConfig(
@@ -41,8 +42,12 @@ async def lifespan(app: FastAPI):
     logger.info("Starting AIVO Orchestrator Service...")
     
     try:
-        # Initialize orchestration engine
-        orchestration_engine = OrchestrationEngine()
+        # Initialize orchestration engine with its learner state store
+        state_config = LearnerStateStoreConfig()
+        orchestration_engine = OrchestrationEngine(
+            state_backend=create_learner_state_backend(state_config),
+            state_config=state_config
+        )
         await orchestration_engine.initialize()
         
         # Initialize event consumer  
@@ -70,6 +75,9 @@ async def lifespan(app: FastAPI):
             await consumer_task
         except asyncio.CancelledError:
             pass
+            
+    if orchestration_engine:
+        await orchestration_engine.close()
 
 
 # Create FastAPI application
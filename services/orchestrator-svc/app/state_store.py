@@ -0,0 +1,267 @@
+"""
+AIVO Orchestrator Service - Learner State Store
+S1-14 Implementation
+
+Bounded learner state cache with pluggable persistence:
+- LRU + TTL in-process cache so memory per pod stays bounded
+- Lazy warm-up from the backend on a learner's first event
+- Write-behind flushing of modified states in pipelined batches
+- Redis hash backend so replicas share state and survive restarts
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+from pydantic import AliasChoices, Field
+from pydantic_settings import BaseSettings
+
+logger = logging.getLogger(__name__)
+
+
+class LearnerStateStoreConfig(BaseSettings):
+    """Learner state store configuration (ORCHESTRATOR_STATE_* environment variables)"""
+    backend: str = "redis"  # "memory" or "redis"
+    # Falls back to the service-wide REDIS_URL
+    redis_url: str = Field(
+        default="redis://localhost:6379",
+        validation_alias=AliasChoices("ORCHESTRATOR_STATE_REDIS_URL", "REDIS_URL")
+    )
+    key_prefix: str = "orchestrator:learner_state"
+    max_cached_learners: int = 10000
+    cache_ttl_seconds: float = 3600.0
+    flush_interval: float = 1.0
+    persist_ttl_seconds: int = 30 * 24 * 3600
+
+    class Config:
+        env_prefix = "ORCHESTRATOR_STATE_"
+        populate_by_name = True
+
+
+class LearnerStateBackend:
+    """Persistence backend for packed learner states"""
+
+    async def load(self, tenant_id: str, learner_id: str) -> Optional[bytes]:
+        """Return the packed state of a learner, if stored"""
+        return None
+
+    async def save_many(self, states: List[Tuple[str, str, bytes]]):
+        """Persist (tenant_id, learner_id, packed state) triples"""
+
+    async def close(self):
+        """Release backend resources"""
+
+
+class RedisLearnerStateBackend(LearnerStateBackend):
+    """Redis backend storing one hash per tenant, keyed by learner id"""
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        key_prefix: str = "orchestrator:learner_state",
+        persist_ttl_seconds: Optional[int] = 30 * 24 * 3600
+    ):
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.persist_ttl_seconds = persist_ttl_seconds
+
+    def _key(self, tenant_id: str) -> str:
+        return f"{self.key_prefix}:{tenant_id}"
+
+    async def load(self, tenant_id: str, learner_id: str) -> Optional[bytes]:
+        return await self.redis_client.hget(self._key(tenant_id), learner_id)
+
+    async def save_many(self, states: List[Tuple[str, str, bytes]]):
+        by_tenant: Dict[str, Dict[str, bytes]] = {}
+        for tenant_id, learner_id, packed in states:
+            by_tenant.setdefault(tenant_id, {})[learner_id] = packed
+
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for tenant_id, mapping in by_tenant.items():
+                pipe.hset(self._key(tenant_id), mapping=mapping)
+                if self.persist_ttl_seconds:
+                    pipe.expire(self._key(tenant_id), self.persist_ttl_seconds)
+            await pipe.execute()
+
+    async def close(self):
+        await self.redis_client.aclose()
+
+
+class LearnerStateCache:
+    """LRU + TTL cache of learner states with write-behind persistence
+
+    Supports the mapping operations the engine and tests use
+    (``in``, ``[]``, ``len``). Entries expire ``ttl_seconds`` after their
+    last access and the least recently used entry is evicted beyond
+    ``max_entries``. Modified states are queued with ``mark_dirty`` and
+    written to the backend by ``flush``; a dirty state that is evicted
+    before the flush stays in the write buffer and is still served from
+    there, so no update is lost.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[LearnerStateBackend] = None,
+        unpack: Optional[Callable[[str, str, bytes], Any]] = None,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600.0,
+        flush_interval: float = 1.0
+    ):
+        self.backend = backend
+        self.unpack = unpack
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._dirty: Dict[str, Any] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "backend_loads": 0,
+            "evictions": 0,
+            "states_flushed": 0,
+            "pack_errors": 0,
+            "flush_errors": 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, learner_id: str) -> bool:
+        return self._lookup(learner_id) is not None
+
+    def __getitem__(self, learner_id: str):
+        state = self._lookup(learner_id)
+        if state is None:
+            raise KeyError(learner_id)
+        return state
+
+    def __setitem__(self, learner_id: str, state):
+        self._insert(learner_id, state)
+        self.mark_dirty(state)
+
+    def get(self, learner_id: str, default=None):
+        state = self._lookup(learner_id)
+        return default if state is None else state
+
+    def _lookup(self, learner_id: str):
+        entry = self._entries.get(learner_id)
+        if entry is not None:
+            state, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(learner_id)
+                self._entries[learner_id] = (state, time.monotonic() + self.ttl_seconds)
+                return state
+            del self._entries[learner_id]
+
+        # Evicted before its write-behind flush
+        state = self._dirty.get(learner_id)
+        if state is not None:
+            self._insert(learner_id, state)
+        return state
+
+    def _insert(self, learner_id: str, state):
+        self._entries[learner_id] = (state, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(learner_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def load(self, learner_id: str, tenant_id: str):
+        """Return a cached state, warming it from the backend on a miss"""
+        state = self._lookup(learner_id)
+        if state is not None:
+            self.stats["hits"] += 1
+            return state
+
+        self.stats["misses"] += 1
+        if self.backend is None or self.unpack is None:
+            return None
+
+        packed = await self.backend.load(tenant_id, learner_id)
+        if packed is None:
+            return None
+
+        self.stats["backend_loads"] += 1
+        state = self.unpack(learner_id, tenant_id, packed)
+        self._insert(learner_id, state)
+        return state
+
+    def mark_dirty(self, state):
+        """Queue a modified state for the next write-behind flush"""
+        if self.backend is not None:
+            self._dirty[state.learner_id] = state
+
+    async def flush(self):
+        """Write every dirty state to the backend in one batch"""
+        if not self._dirty:
+            return
+
+        dirty, self._dirty = self._dirty, {}
+        packed = []
+        for learner_id, state in dirty.items():
+            try:
+                packed.append((state.tenant_id, learner_id, state.pack()))
+            except Exception as e:
+                # A state that cannot be packed would fail every retry too,
+                # so drop it rather than hold back the rest of the batch
+                logger.error(f"Learner state for {learner_id} could not be packed: {e}")
+                self.stats["pack_errors"] += 1
+        if not packed:
+            return
+
+        try:
+            await self.backend.save_many(packed)
+            self.stats["states_flushed"] += len(packed)
+        except Exception as e:
+            logger.error(f"Learner state flush failed for {len(packed)} learners: {e}")
+            self.stats["flush_errors"] += 1
+            # Retry with the next flush, keeping any newer writes
+            for _, learner_id, _ in packed:
+                self._dirty.setdefault(learner_id, dirty[learner_id])
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Start the write-behind flush loop"""
+        if self.backend is not None and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the flush loop, write remaining states and close the backend"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        if self.backend is not None:
+            await self.flush()
+            await self.backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "cached_learners": len(self._entries),
+            "dirty_learners": len(self._dirty)
+        }
+
+
+def create_learner_state_backend(config: LearnerStateStoreConfig) -> Optional[LearnerStateBackend]:
+    """Build the configured persistence backend (None keeps state in memory only)"""
+    if config.backend == "redis":
+        return RedisLearnerStateBackend(
+            redis.from_url(config.redis_url),
+            key_prefix=config.key_prefix,
+            persist_ttl_seconds=config.persist_ttl_seconds
+        )
+    if config.backend != "memory":
+        raise ValueError(f"Unknown learner state backend: {config.backend}")
+    return None
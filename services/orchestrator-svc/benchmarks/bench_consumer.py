@@ -0,0 +1,150 @@
+"""
+Event consumer throughput and latency benchmark
+
+Publishes N coursework events for a set of learners, where every action
+call costs a few milliseconds and one learner's downstream service is
+slow, then drains the stream first with the previous sequential loop
+(one message at a time, XACK per message, 100 ms sleep per batch) and
+then with the partitioned EventConsumer. Reports wall time, throughput
+and end-to-end latency percentiles.
+
+Usage:
+    python benchmarks/bench_consumer.py [--events N] [--learners N] [--partitions N] [--redis-url URL]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+import fakeredis
+import redis.asyncio as redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.consumer import Event, EventConsumer, EventConsumerConfig  # noqa: E402
+
+STREAM = "bench.events.coursework"
+
+
+class SimulatedEngine:
+    """Orchestration engine whose work stands in for downstream HTTP calls"""
+
+    def __init__(self, action_ms: float, slow_learner: str, slow_ms: float):
+        self.action_ms = action_ms
+        self.slow_learner = slow_learner
+        self.slow_ms = slow_ms
+        self.latencies = []
+
+    async def process_event(self, event):
+        delay = self.slow_ms if event.learner_id == self.slow_learner else self.action_ms
+        await asyncio.sleep(delay / 1000)
+        self.latencies.append(time.time() - event.data["published_at"])
+        return []
+
+
+async def legacy_consume(client, engine, config: EventConsumerConfig, total: int):
+    """Reference copy of the previous loop: sequential processing, XACK per message"""
+    processed = 0
+    streams = {channel: ">" for channel in config.event_channels}
+    while processed < total:
+        messages = await client.xreadgroup(
+            config.consumer_group,
+            config.consumer_name,
+            streams,
+            count=10,
+            block=int(config.poll_timeout * 1000)
+        )
+        for channel, channel_messages in messages:
+            for message_id, fields in channel_messages:
+                event = Event.from_dict(json.loads(fields[b"data"]))
+                await engine.process_event(event)
+                await client.xack(channel, config.consumer_group, message_id)
+                processed += 1
+        await asyncio.sleep(0.1)
+
+
+async def publish(client, events: int, learners: int):
+    await client.delete(STREAM, "bench.events.dlq")
+    async with client.pipeline(transaction=False) as pipe:
+        for i in range(events):
+            pipe.xadd(STREAM, {"data": json.dumps({
+                "id": f"event-{i}",
+                "type": "COURSEWORK_ANALYZED",
+                "source_service": "bench",
+                "tenant_id": "tenant-1",
+                "learner_id": f"learner-{i % learners}",
+                "timestamp": "2025-01-01T00:00:00",
+                "data": {"published_at": time.time()}
+            })})
+        await pipe.execute()
+
+
+def report(label: str, seconds: float, engine: SimulatedEngine) -> None:
+    latencies = sorted(engine.latencies)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<22} {seconds:8.2f} s {len(latencies) / seconds:10.0f} ev/s "
+          f"{p50 * 1000:10.0f} {p99 * 1000:10.0f}  mean {statistics.mean(latencies) * 1000:.0f} ms")
+
+
+async def run(args) -> None:
+    if args.redis_url:
+        client = redis.from_url(args.redis_url)
+    else:
+        client = fakeredis.aioredis.FakeRedis()
+    config = EventConsumerConfig(
+        event_channels=[STREAM],
+        consumer_group="bench-group",
+        dead_letter_stream="bench.events.dlq",
+        poll_timeout=0.1,
+        worker_partitions=args.partitions
+    )
+    slow = "learner-0"
+    print(f"events: {args.events}, learners: {args.learners}, action: {args.action_ms} ms, "
+          f"slow learner: {args.slow_ms} ms, partitions: {args.partitions}")
+    print(f"{'consumer':<22} {'wall':>10} {'throughput':>13} {'p50 ms':>10} {'p99 ms':>10}")
+
+    await publish(client, args.events, args.learners)
+    await client.xgroup_create(STREAM, config.consumer_group, id="0", mkstream=True)
+    engine = SimulatedEngine(args.action_ms, slow, args.slow_ms)
+    start = time.perf_counter()
+    await legacy_consume(client, engine, config, args.events)
+    legacy_s = time.perf_counter() - start
+    report("sequential (previous)", legacy_s, engine)
+
+    await publish(client, args.events, args.learners)
+    engine = SimulatedEngine(args.action_ms, slow, args.slow_ms)
+    consumer = EventConsumer(engine, config)
+    consumer.redis_client = client
+    await consumer.initialize()
+    start = time.perf_counter()
+    task = asyncio.create_task(consumer.start_consuming())
+    while consumer.stats["messages_acknowledged"] < args.events:
+        await asyncio.sleep(0.01)
+    partitioned_s = time.perf_counter() - start
+    await consumer.stop_consuming()
+    await task
+    report("partitioned", partitioned_s, engine)
+    print(f"speedup: {legacy_s / partitioned_s:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--learners", type=int, default=100)
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--action-ms", type=float, default=5.0, help="latency of a normal action call")
+    parser.add_argument("--slow-ms", type=float, default=200.0, help="latency for the slow learner")
+    parser.add_argument("--redis-url", help="defaults to in-process fakeredis")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+AIVO Orchestrator Service - Event Consumer Tests
+S1-14 Implementation - Concurrent partitioned consumption
+
+Tests the Redis stream consumer against fakeredis:
+- Per-learner ordering with learners processed concurrently
+- Pipelined acknowledgements leave nothing pending
+- Unparseable messages go straight to the dead letter stream
+- Failed messages are reclaimed and dead-lettered after max retries
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import pytest
+import fakeredis
+
+from app.consumer import EventConsumer, EventConsumerConfig
+
+STREAM = "aivo.events.coursework"
+
+
+class RecordingEngine:
+    """Orchestration engine stub that records event order per learner"""
+
+    def __init__(self, delay: float = 0.0, fail_learners=()):
+        self.delay = delay
+        self.fail_learners = set(fail_learners)
+        self.seen = {}
+
+    async def process_event(self, event):
+        if event.learner_id in self.fail_learners:
+            raise RuntimeError("engine unavailable")
+        await asyncio.sleep(self.delay)
+        self.seen.setdefault(event.learner_id, []).append(event.data["seq"])
+        return []
+
+
+def make_consumer(engine, **overrides) -> EventConsumer:
+    config = EventConsumerConfig(
+        event_channels=[STREAM],
+        poll_timeout=0.05,
+        ack_flush_interval=0.01,
+        **overrides
+    )
+    consumer = EventConsumer(engine, config)
+    consumer.redis_client = fakeredis.aioredis.FakeRedis()
+    return consumer
+
+
+async def publish(client, learner_id: str, seq: int):
+    payload = {
+        "id": f"{learner_id}-{seq}",
+        "type": "COURSEWORK_ANALYZED",
+        "source_service": "coursework-svc",
+        "tenant_id": "tenant-1",
+        "learner_id": learner_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        "data": {"seq": seq}
+    }
+    await client.xadd(STREAM, {"data": json.dumps(payload)})
+
+
+async def run_until(consumer: EventConsumer, done, timeout: float = 5.0):
+    task = asyncio.create_task(consumer.start_consuming())
+    deadline = time.monotonic() + timeout
+    while not done() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    await consumer.stop_consuming()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_per_learner_order_and_batched_acks():
+    engine = RecordingEngine(delay=0.001)
+    consumer = make_consumer(engine, worker_partitions=4, batch_size=25)
+    await consumer.initialize()
+    client = consumer.redis_client
+    for seq in range(30):
+        for learner in ("learner-a", "learner-b", "learner-c"):
+            await publish(client, learner, seq)
+
+    await run_until(consumer, lambda: consumer.stats["messages_acknowledged"] == 90)
+
+    assert engine.seen == {
+        learner: list(range(30)) for learner in ("learner-a", "learner-b", "learner-c")
+    }
+    pending = await client.xpending(STREAM, consumer.config.consumer_group)
+    assert pending["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_learners_processed_concurrently():
+    engine = RecordingEngine(delay=0.2)
+    consumer = make_consumer(engine, worker_partitions=16)
+    await consumer.initialize()
+    learners = [f"learner-{i}" for i in range(8)]
+    for learner in learners:
+        await publish(consumer.redis_client, learner, 0)
+
+    start = time.monotonic()
+    await run_until(consumer, lambda: consumer.stats["total_events_processed"] == 8)
+
+    assert consumer.stats["total_events_processed"] == 8
+    # Sequential processing would take 8 x 0.2 s
+    assert time.monotonic() - start < 1.2
+
+
+@pytest.mark.asyncio
+async def test_unparseable_message_is_dead_lettered():
+    consumer = make_consumer(RecordingEngine())
+    await consumer.initialize()
+    client = consumer.redis_client
+    await client.xadd(STREAM, {"data": "{not json"})
+
+    await run_until(consumer, lambda: consumer.stats["messages_dead_lettered"] == 1)
+
+    dead = await client.xrange(consumer.config.dead_letter_stream)
+    assert len(dead) == 1
+    assert dead[0][1][b"source_stream"] == STREAM.encode()
+    assert dead[0][1][b"data"] == b"{not json"
+    pending = await client.xpending(STREAM, consumer.config.consumer_group)
+    assert pending["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_message_retried_then_dead_lettered():
+    engine = RecordingEngine(fail_learners={"learner-x"})
+    consumer = make_consumer(engine, claim_min_idle_ms=0, max_retry_attempts=2)
+    await consumer.initialize()
+    client = consumer.redis_client
+    await publish(client, "learner-x", 0)
+    await publish(client, "learner-y", 0)
+
+    await run_until(consumer, lambda: consumer.stats["messages_acknowledged"] == 1)
+    assert consumer.stats["processing_errors"] == 1
+    assert (await client.xpending(STREAM, consumer.config.consumer_group))["pending"] == 1
+
+    # Second delivery fails again, the third exceeds max_retry_attempts
+    consumer._start_workers()
+    await consumer._reclaim_pending(STREAM)
+    await consumer._drain()
+    assert consumer.stats["messages_reclaimed"] == 1
+    assert consumer.stats["processing_errors"] == 2
+
+    consumer._start_workers()
+    await consumer._reclaim_pending(STREAM)
+    await consumer._drain()
+
+    dead = await client.xrange(consumer.config.dead_letter_stream)
+    assert len(dead) == 1
+    assert dead[0][1][b"error"] == b"engine unavailable"
+    assert dead[0][1][b"deliveries"] == b"3"
+    assert (await client.xpending(STREAM, consumer.config.consumer_group))["pending"] == 0
+    assert engine.seen == {"learner-y": [0]}
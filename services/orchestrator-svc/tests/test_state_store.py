@@ -0,0 +1,163 @@
+"""
+AIVO Orchestrator Service - Learner State Store Tests
+S1-14 Implementation - Bounded, persistent learner state
+
+Tests the learner state store:
+- Packed LearnerState serialization round trip
+- LRU eviction and TTL expiry bound the in-process cache
+- Write-behind flush to the Redis hash backend, skipping unpackable states
+- Lazy warm-up so a restarted or second replica sees the same state
+- Store settings read from ORCHESTRATOR_STATE_* environment variables
+"""
+
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+
+from app.consumer import Event, EventType
+from app.logic import DifficultyLevel, LearnerState, OrchestrationEngine
+from app.state_store import LearnerStateCache, LearnerStateStoreConfig, RedisLearnerStateBackend
+
+
+def make_state(learner_id: str = "learner-1") -> LearnerState:
+    return LearnerState(learner_id=learner_id, tenant_id="tenant-1")
+
+
+def test_pack_round_trip():
+    now = datetime.utcnow().replace(microsecond=0)
+    state = LearnerState(
+        learner_id="learner-1",
+        tenant_id="tenant-1",
+        current_level=DifficultyLevel.CHALLENGING,
+        engagement_score=0.42,
+        performance_score=0.91,
+        consecutive_correct=6,
+        session_duration_minutes=31,
+        last_break_time=now - timedelta(minutes=20),
+        sel_alerts=[{"timestamp": now, "alert_type": "anxiety", "severity": "high", "data": {"confidence": 0.8}}],
+        baseline_established=True,
+        recent_assessments=[{"timestamp": now, "score": 0.7, "percentile": 55, "assessment_type": "unit"}],
+        updated_at=now
+    )
+
+    restored = LearnerState.unpack("learner-1", "tenant-1", state.pack())
+
+    assert restored == state
+    assert len(make_state().pack()) < 64
+    assert not hasattr(state, "__dict__")
+
+
+def test_cache_is_bounded_by_lru_and_ttl():
+    cache = LearnerStateCache(max_entries=2, ttl_seconds=60)
+    for learner_id in ("a", "b"):
+        cache[learner_id] = make_state(learner_id)
+    assert "a" in cache  # refreshes "a"
+    cache["c"] = make_state("c")
+
+    assert len(cache) == 2
+    assert "b" not in cache
+    assert cache.stats["evictions"] == 1
+
+    cache._entries["a"] = (cache["a"], 0.0)
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_evicted_dirty_state_survives_until_flush():
+    client = fakeredis.aioredis.FakeRedis()
+    cache = LearnerStateCache(RedisLearnerStateBackend(client), LearnerState.unpack, max_entries=1)
+    first = make_state("a")
+    cache["a"] = first
+    cache["b"] = make_state("b")
+
+    assert cache["a"] is first
+    await cache.flush()
+    assert cache.stats["states_flushed"] == 2
+    assert await client.hlen("orchestrator:learner_state:tenant-1") == 2
+
+
+@pytest.mark.asyncio
+async def test_fractional_session_duration_is_flushed():
+    client = fakeredis.aioredis.FakeRedis()
+    engine = OrchestrationEngine(state_backend=RedisLearnerStateBackend(client))
+    await engine.initialize()
+    event = Event(
+        id="event-1",
+        type=EventType.COURSEWORK_ANALYZED,
+        source_service="coursework-svc",
+        learner_id="learner-3",
+        tenant_id="tenant-1",
+        timestamp=datetime.utcnow(),
+        data={"performance_metrics": {"accuracy": 0.6}, "session_duration": 12.6}
+    )
+    await engine.process_event(event)
+    await engine.learner_states.flush()
+
+    packed = await client.hget("orchestrator:learner_state:tenant-1", "learner-3")
+    assert LearnerState.unpack("learner-3", "tenant-1", packed).session_duration_minutes == 13
+    assert engine.learner_states.stats["states_flushed"] == 1
+    await engine.close()
+
+
+@pytest.mark.asyncio
+async def test_unpackable_state_does_not_block_flush():
+    client = fakeredis.aioredis.FakeRedis()
+    cache = LearnerStateCache(RedisLearnerStateBackend(client), LearnerState.unpack)
+    broken = make_state("broken")
+    broken.consecutive_correct = -1
+    for state in (make_state("a"), broken, make_state("b")):
+        cache[state.learner_id] = state
+
+    await cache.flush()
+
+    assert sorted(await client.hkeys("orchestrator:learner_state:tenant-1")) == [b"a", b"b"]
+    assert cache.stats["states_flushed"] == 2
+    assert cache.stats["pack_errors"] == 1
+    assert cache._dirty == {}
+
+
+@pytest.mark.asyncio
+async def test_state_shared_across_engine_instances():
+    server = fakeredis.FakeServer()
+    engine = OrchestrationEngine(state_backend=RedisLearnerStateBackend(fakeredis.aioredis.FakeRedis(server=server)))
+    await engine.initialize()
+    event = Event(
+        id="event-1",
+        type=EventType.BASELINE_COMPLETE,
+        source_service="assessment-svc",
+        learner_id="learner-9",
+        tenant_id="tenant-1",
+        timestamp=datetime.utcnow(),
+        data={"overall_score": 0.95}
+    )
+    await engine.process_event(event)
+    level = engine.learner_states["learner-9"].current_level
+    await engine.close()
+
+    replica = OrchestrationEngine(state_backend=RedisLearnerStateBackend(fakeredis.aioredis.FakeRedis(server=server)))
+    await replica.initialize()
+    state = await replica._get_or_create_learner_state("learner-9", "tenant-1")
+
+    assert state.baseline_established
+    assert state.current_level == level
+    assert replica.learner_states.stats["backend_loads"] == 1
+    await replica.close()
+
+
+def test_config_reads_environment(monkeypatch):
+    monkeypatch.setenv("ORCHESTRATOR_STATE_BACKEND", "memory")
+    monkeypatch.setenv("ORCHESTRATOR_STATE_MAX_CACHED_LEARNERS", "250")
+    monkeypatch.setenv("ORCHESTRATOR_STATE_FLUSH_INTERVAL", "0.5")
+    monkeypatch.setenv("REDIS_URL", "redis://shared:6379")
+
+    config = LearnerStateStoreConfig()
+
+    assert config.backend == "memory"
+    assert config.max_cached_learners == 250
+    assert config.flush_interval == 0.5
+    assert config.redis_url == "redis://shared:6379"
+
+    monkeypatch.setenv("ORCHESTRATOR_STATE_REDIS_URL", "redis://state:6379")
+    assert LearnerStateStoreConfig().redis_url == "redis://state:6379"
+    assert LearnerStateStoreConfig(redis_url="redis://explicit:6379").redis_url == "redis://explicit:6379"
@@ -0,0 +1,378 @@
+"""
+AIVO Search Service - Search Result Cache
+S1-13 Implementation
+
+Tenant- and RBAC-scope-aware cache for search and suggestion responses:
+- In-process LRU with an optional shared Redis tier
+- Precise invalidation through per (index, tenant) generation counters,
+  bumped by the CDC indexer and by direct index/delete calls
+- Stale-while-revalidate for suggestions and single-flight loading so a
+  burst of identical queries costs one OpenSearch round trip
+- Hit rates and latency percentiles per request kind
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+from pydantic_settings import BaseSettings
+
+logger = logging.getLogger(__name__)
+
+# Generation field suffixes: "*" is bumped when a whole index is invalidated
+# (e.g. a delete without a tenant), "+" on every change to the index and is
+# what cross-tenant (system) entries depend on
+ALL_TENANTS = "*"
+ANY_TENANT = "+"
+
+Loader = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class SearchCacheConfig(BaseSettings):
+    """Search result cache configuration"""
+    enabled: bool = True
+    max_entries: int = 10000
+    search_ttl_seconds: float = 60.0
+    suggest_ttl_seconds: float = 30.0
+    # Suggestions up to this much past their TTL are served while a
+    # background refresh runs
+    suggest_stale_seconds: float = 300.0
+    redis_url: Optional[str] = None
+    key_prefix: str = "search:results"
+    latency_sample_size: int = 2048
+
+    class Config:
+        env_prefix = "SEARCH_CACHE_"
+
+
+class _Entry:
+    """Cached response with the index generations it was loaded under"""
+    __slots__ = ("value", "stored_at", "fields", "generations")
+
+    def __init__(self, value: Dict[str, Any], stored_at: float, fields: Tuple[str, ...], generations: Tuple[int, ...]):
+        self.value = value
+        self.stored_at = stored_at
+        self.fields = fields
+        self.generations = generations
+
+
+def generation_fields(indices: Iterable[str], tenant_id: Optional[str]) -> Tuple[str, ...]:
+    """Generation counters an entry for ``tenant_id`` over ``indices`` depends on
+
+    ``tenant_id`` is None for cross-tenant (system) queries.
+    """
+    if tenant_id is None:
+        return tuple(f"{index}|{ANY_TENANT}" for index in sorted(indices))
+    fields: List[str] = []
+    for index in sorted(indices):
+        fields.append(f"{index}|{tenant_id}")
+        fields.append(f"{index}|{ALL_TENANTS}")
+    return tuple(fields)
+
+
+class SearchResultCache:
+    """Two-tier response cache invalidated by index generation counters
+
+    Every entry records the generation of each (index, tenant) counter it
+    depends on; ``invalidate`` bumps the counters for the documents that
+    changed, so only entries for that index and tenant stop matching. With
+    Redis configured the counters live in a Redis hash shared by all
+    replicas and the CDC indexer, and bumps are published so each
+    replica's in-process tier drops the affected entries immediately.
+    """
+
+    KINDS = ("search", "suggest")
+
+    def __init__(self, config: Optional[SearchCacheConfig] = None, redis_client: Optional[redis.Redis] = None):
+        self.config = config or SearchCacheConfig()
+        self.redis_client = redis_client
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: set = set()
+        self._listener: Optional[asyncio.Task] = None
+
+        self._generations_key = f"{self.config.key_prefix}:generations"
+        self._channel = f"{self.config.key_prefix}:invalidations"
+
+        self.stats: Dict[str, Dict[str, int]] = {
+            kind: {"hits": 0, "redis_hits": 0, "misses": 0, "stale_served": 0, "refreshes": 0}
+            for kind in self.KINDS
+        }
+        self.stats_invalidations = 0
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {
+            (kind, outcome): deque(maxlen=self.config.latency_sample_size)
+            for kind in self.KINDS
+            for outcome in ("hit", "miss")
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    async def start(self):
+        """Connect the Redis tier, if configured, and follow invalidations"""
+        if self.redis_client is None and self.config.redis_url:
+            self.redis_client = redis.from_url(self.config.redis_url)
+        if self.redis_client is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
+            self.redis_client = None
+
+    def _ttl(self, kind: str) -> float:
+        return self.config.suggest_ttl_seconds if kind == "suggest" else self.config.search_ttl_seconds
+
+    def _stale_window(self, kind: str) -> float:
+        return self.config.suggest_stale_seconds if kind == "suggest" else 0.0
+
+    def _set_generation(self, field: str, generation: int):
+        if generation > self._generations.get(field, 0):
+            self._generations[field] = generation
+
+    def _is_current(self, entry: _Entry) -> bool:
+        return all(
+            self._generations.get(field, 0) == generation
+            for field, generation in zip(entry.fields, entry.generations)
+        )
+
+    async def _snapshot(self, fields: Tuple[str, ...]) -> Tuple[int, ...]:
+        """Current generations for fields, read from Redis when configured"""
+        if self.redis_client is not None:
+            try:
+                values = await self.redis_client.hmget(self._generations_key, list(fields))
+                for field, value in zip(fields, values):
+                    self._set_generation(field, int(value or 0))
+            except redis.RedisError as e:
+                logger.warning(f"Result cache generation read failed: {e}")
+        return tuple(self._generations.get(field, 0) for field in fields)
+
+    async def _lookup(self, kind: str, key: str, fields: Tuple[str, ...]) -> Tuple[Optional[_Entry], bool]:
+        """Find a current entry for key; returns (entry, from_redis)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._is_current(entry):
+                self._entries.move_to_end(key)
+                return entry, False
+            del self._entries[key]
+
+        if self.redis_client is None:
+            return None, False
+
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hmget(self._generations_key, list(fields))
+                pipe.get(f"{self.config.key_prefix}:{kind}:{key}")
+                generations, raw = await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Result cache read failed: {e}")
+            return None, False
+
+        for field, value in zip(fields, generations):
+            self._set_generation(field, int(value or 0))
+        if raw is None:
+            return None, False
+        stored = json.loads(raw)
+        entry = _Entry(stored["value"], stored["stored_at"], fields, tuple(stored["generations"]))
+        if not self._is_current(entry):
+            return None, False
+        self._remember(key, entry)
+        return entry, True
+
+    def _remember(self, key: str, entry: _Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _store(self, kind: str, key: str, entry: _Entry):
+        self._remember(key, entry)
+        if self.redis_client is None:
+            return
+        payload = json.dumps({
+            "value": entry.value,
+            "stored_at": entry.stored_at,
+            "generations": entry.generations
+        })
+        expires = self._ttl(kind) + self._stale_window(kind)
+        try:
+            await self.redis_client.set(f"{self.config.key_prefix}:{kind}:{key}", payload, ex=max(1, int(expires)))
+        except redis.RedisError as e:
+            logger.warning(f"Result cache write failed: {e}")
+
+    async def _load(self, kind: str, key: str, fields: Tuple[str, ...], loader: Loader) -> Optional[Dict[str, Any]]:
+        """Run the loader once per key; concurrent callers share the result"""
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            # Generations are read before the query so a change indexed
+            # while it runs leaves the stored entry already out of date
+            generations = await self._snapshot(fields)
+            value = await loader()
+            if value is not None:
+                await self._store(kind, key, _Entry(value, time.time(), fields, generations))
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited is not logged
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _refresh(self, kind: str, key: str, fields: Tuple[str, ...], loader: Loader):
+        try:
+            await self._load(kind, key, fields, loader)
+            self.stats[kind]["refreshes"] += 1
+        except Exception as e:
+            logger.warning(f"Background {kind} refresh failed: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    async def get_or_load(
+        self,
+        kind: str,
+        key: str,
+        indices: Iterable[str],
+        tenant_id: Optional[str],
+        loader: Loader
+    ) -> Optional[Dict[str, Any]]:
+        """Cached response for key, loading it on a miss
+
+        ``loader`` returns the response to cache, or None for a result that
+        must not be cached (e.g. missing indices or a failed suggestion).
+        """
+        if not self.config.enabled:
+            return await loader()
+
+        start = time.perf_counter()
+        fields = generation_fields(indices, tenant_id)
+        entry, from_redis = await self._lookup(kind, key, fields)
+
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            if age < self._ttl(kind):
+                self.stats[kind]["redis_hits" if from_redis else "hits"] += 1
+                self._record(kind, "hit", start)
+                return entry.value
+            if age < self._ttl(kind) + self._stale_window(kind):
+                self.stats[kind]["stale_served"] += 1
+                if key not in self._refreshing and key not in self._inflight:
+                    self._refreshing.add(key)
+                    asyncio.create_task(self._refresh(kind, key, fields, loader))
+                self._record(kind, "hit", start)
+                return entry.value
+
+        self.stats[kind]["misses"] += 1
+        try:
+            return await self._load(kind, key, fields, loader)
+        finally:
+            self._record(kind, "miss", start)
+
+    async def invalidate(self, index: str, tenant_ids: Iterable[Optional[str]]):
+        """Invalidate cached responses over index for the given tenants
+
+        A tenant of None invalidates the index for every tenant.
+        """
+        fields = {f"{index}|{ANY_TENANT}"}
+        for tenant_id in tenant_ids:
+            fields.add(f"{index}|{tenant_id if tenant_id is not None else ALL_TENANTS}")
+        self.stats_invalidations += 1
+
+        if self.redis_client is None:
+            for field in fields:
+                self._generations[field] = self._generations.get(field, 0) + 1
+            return
+
+        fields_list = sorted(fields)
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                for field in fields_list:
+                    pipe.hincrby(self._generations_key, field, 1)
+                generations = await pipe.execute()
+            bumped = dict(zip(fields_list, generations))
+            await self.redis_client.publish(self._channel, json.dumps(bumped))
+        except redis.RedisError as e:
+            # Fall back to local bumps; other replicas catch up on TTL
+            logger.error(f"Result cache invalidation for {index} failed: {e}")
+            bumped = {field: self._generations.get(field, 0) + 1 for field in fields_list}
+        for field, generation in bumped.items():
+            self._set_generation(field, generation)
+
+    async def _listen(self):
+        """Apply generation bumps published by other processes"""
+        pubsub = self.redis_client.pubsub()
+        await pubsub.subscribe(self._channel)
+        try:
+            while True:
+                try:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                except redis.RedisError as e:
+                    logger.warning(f"Result cache invalidation listener error: {e}")
+                    await asyncio.sleep(1.0)
+                    continue
+                if message is None:
+                    await asyncio.sleep(0.01)
+                    continue
+                for field, generation in json.loads(message["data"]).items():
+                    self._set_generation(field, int(generation))
+        finally:
+            await pubsub.aclose()
+
+    def _record(self, kind: str, outcome: str, start: float):
+        self._latencies[(kind, outcome)].append((time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def _percentiles(samples: Iterable[float]) -> Dict[str, float]:
+        ordered = sorted(samples)
+        if not ordered:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+        def pick(q: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+        return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rates and latency percentiles (ms) per request kind"""
+        stats: Dict[str, Any] = {
+            "enabled": self.config.enabled,
+            "redis_tier": self.redis_client is not None,
+            "entries": len(self._entries),
+            "invalidations": self.stats_invalidations
+        }
+        for kind in self.KINDS:
+            counts = dict(self.stats[kind])
+            served = counts["hits"] + counts["redis_hits"] + counts["stale_served"]
+            lookups = served + counts["misses"]
+            counts["hit_rate"] = round(served / lookups, 4) if lookups else 0.0
+            counts["latency_ms"] = {
+                "hit": self._percentiles(self._latencies[(kind, "hit")]),
+                "miss": self._percentiles(self._latencies[(kind, "miss")]),
+                "all": self._percentiles(
+                    list(self._latencies[(kind, "hit")]) + list(self._latencies[(kind, "miss")])
+                )
+            }
+            stats[kind] = counts
+        return stats
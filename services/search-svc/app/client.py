@@ -6,19 +6,28 @@ Provides OpenSearch integration with multi-tenant search capabilities,
 role-based access control, and intelligent suggestions.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, List, Optional, Any, Union
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime
 from dataclasses import dataclass
 
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from opensearchpy import AIOHttpConnection, AsyncOpenSearch
 from opensearchpy.exceptions import NotFoundError, RequestError
 import httpx
 from pydantic_settings import BaseSettings
 
+from .cache import SearchCacheConfig, SearchResultCache
+
 logger = logging.getLogger(__name__)
 
+# Stands in for the user's text in precompiled query templates
+QUERY_PLACEHOLDER = "\u0000aivo-query\u0000"
+_ENCODED_PLACEHOLDER = json.dumps(QUERY_PLACEHOLDER)
+
 
 class SearchConfig(BaseSettings):
     """Search service configuration"""
@@ -30,10 +39,18 @@ class SearchConfig(BaseSettings):
     opensearch_verify_certs: bool = False
     opensearch_ca_certs: Optional[str] = None
     
+    # Async transport: pooled keep-alive connections, timeouts and retries
+    opensearch_pool_maxsize: int = 25
+    opensearch_timeout: float = 10.0
+    opensearch_max_retries: int = 2
+    search_timeout: float = 5.0
+    suggest_timeout: float = 2.0
+    
     # Index configuration
     default_index_prefix: str = "aivo"
     max_search_results: int = 100
     suggestion_size: int = 10
+    query_template_cache_size: int = 4096
     
     class Config:
         env_prefix = "SEARCH_"
@@ -79,11 +96,13 @@ class SuggestionResult:
 class OpenSearchClient:
     """OpenSearch client with RBAC-aware search capabilities"""
     
-    def __init__(self, config: SearchConfig):
+    def __init__(self, config: SearchConfig, result_cache: Optional[SearchResultCache] = None):
         self.config = config
         
-        # Initialize OpenSearch client
-        self.client = OpenSearch(
+        # Initialize async OpenSearch client; the aiohttp connection keeps up
+        # to opensearch_pool_maxsize keep-alive connections per node, so
+        # queries run concurrently without blocking the event loop
+        self.client = AsyncOpenSearch(
             hosts=[{
                 'host': config.opensearch_host,
                 'port': config.opensearch_port
@@ -92,7 +111,12 @@ class OpenSearchClient:
             use_ssl=config.opensearch_use_ssl,
             verify_certs=config.opensearch_verify_certs,
             ca_certs=config.opensearch_ca_certs,
-            connection_class=RequestsHttpConnection
+            connection_class=AIOHttpConnection,
+            maxsize=config.opensearch_pool_maxsize,
+            timeout=config.opensearch_timeout,
+            max_retries=config.opensearch_max_retries,
+            retry_on_timeout=True,
+            retry_on_status=(502, 503, 504)
         )
         
         # Index mappings by document type
@@ -105,10 +129,25 @@ class OpenSearchClient:
             "user": f"{config.default_index_prefix}_user"
         }
         
+        # Per-principal RBAC filter fragments and pre-serialized query
+        # templates (JSON split around the user's text), both LRU-bounded
+        self._rbac_filters: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._query_templates: "OrderedDict[tuple, Tuple[str, Optional[str]]]" = OrderedDict()
+        # Digest of each principal's RBAC filter: principals with identical
+        # filters (e.g. teachers of the same schools) share cached results
+        self._rbac_scopes: "OrderedDict[tuple, str]" = OrderedDict()
+        self.result_cache = result_cache or SearchResultCache(SearchCacheConfig())
+        self.cache_stats = {
+            "rbac_filter_hits": 0,
+            "rbac_filter_misses": 0,
+            "template_hits": 0,
+            "template_misses": 0
+        }
+        
     async def ensure_indices(self):
         """Ensure all required indices exist with proper mappings"""
         for doc_type, index_name in self.index_mappings.items():
-            if not self.client.indices.exists(index=index_name):
+            if not await self.client.indices.exists(index=index_name):
                 await self.create_index(doc_type, index_name)
                 
     async def create_index(self, doc_type: str, index_name: str):
@@ -116,7 +155,7 @@ class OpenSearchClient:
         mapping = self._get_index_mapping(doc_type)
         
         try:
-            self.client.indices.create(
+            await self.client.indices.create(
                 index=index_name,
                 body={
                     "mappings": mapping,
@@ -265,13 +304,14 @@ class OpenSearchClient:
             }
             
         try:
-            response = self.client.index(
+            response = await self.client.index(
                 index=index_name,
                 id=doc_id,
                 body=document,
                 refresh=refresh
             )
             logger.debug(f"Indexed document {doc_id} in {index_name}")
+            await self.result_cache.invalidate(index_name, [document.get("tenant_id")])
             return response
         except RequestError as e:
             logger.error(f"Failed to index document {doc_id}: {e}")
@@ -288,43 +328,320 @@ class OpenSearchClient:
     ) -> List[SearchResult]:
         """Search with RBAC filtering"""
         
-        # Build search query with RBAC filters
-        search_body = self._build_search_query(
-            query=query,
-            context=context,
-            doc_types=doc_types,
-            size=size,
-            from_=from_,
-            sort=sort
-        )
-        
         # Determine indices to search
         indices = self._get_search_indices(doc_types)
         
-        try:
-            response = self.client.search(
-                index=",".join(indices),
-                body=search_body
-            )
+        async def load() -> Optional[Dict[str, Any]]:
+            # Build search query with RBAC filters from the cached template
+            search_body = self._render_search_body(query, context, doc_types, size, from_, sort)
+            try:
+                response = await self.client.search(
+                    index=",".join(indices),
+                    body=search_body,
+                    request_timeout=self.config.search_timeout
+                )
+                return self._cacheable_search(response)
+                
+            except NotFoundError:
+                logger.warning(f"Search indices not found: {indices}")
+                return None
+            except RequestError as e:
+                logger.error(f"Search query failed: {e}")
+                raise
+                
+        response = await self.result_cache.get_or_load(
+            "search",
+            self._result_key("search", query, context, doc_types, size, from_, sort),
+            indices,
+            self._cache_tenant(context),
+            load
+        )
+        return self._parse_search_results(response) if response else []
             
-            return self._parse_search_results(response)
+    async def suggest(
+        self,
+        query: str,
+        context: SearchContext,
+        size: int = 10
+    ) -> List[SuggestionResult]:
+        """Get search suggestions with RBAC filtering"""
+        
+        indices = self._get_search_indices()
+        
+        async def load() -> Optional[Dict[str, Any]]:
+            suggest_body = self._render_suggest_body(query, context, size)
+            try:
+                response = await self.client.search(
+                    index=",".join(indices),
+                    body=suggest_body,
+                    request_timeout=self.config.suggest_timeout
+                )
+                return self._cacheable_suggest(response)
+                
+            except NotFoundError:
+                logger.warning("Suggestion indices not found")
+                return None
+            except RequestError as e:
+                logger.error(f"Suggestion query failed: {e}")
+                return None
+                
+        response = await self.result_cache.get_or_load(
+            "suggest",
+            self._result_key("suggest", query, context, None, size),
+            indices,
+            self._cache_tenant(context),
+            load
+        )
+        return self._parse_suggestion_results(response, size) if response else []
+            
+    async def search_with_suggestions(
+        self,
+        query: str,
+        context: SearchContext,
+        doc_types: Optional[List[str]] = None,
+        size: int = 20,
+        from_: int = 0,
+        sort: Optional[List[Dict[str, Any]]] = None,
+        suggestion_size: int = 10
+    ) -> Tuple[List[SearchResult], List[SuggestionResult]]:
+        """Run search and suggest as one _msearch round trip
+        
+        Both halves are cached like search() and suggest(); if either
+        misses, a single _msearch fetches them together.
+        """
+        
+        search_indices = self._get_search_indices(doc_types)
+        suggest_indices = self._get_search_indices()
+        round_trip: Optional[asyncio.Future] = None
+        
+        def fetch() -> asyncio.Future:
+            nonlocal round_trip
+            if round_trip is None:
+                round_trip = asyncio.ensure_future(self._msearch(
+                    query, context, doc_types, size, from_, sort, suggestion_size
+                ))
+            return round_trip
+            
+        async def load_search() -> Optional[Dict[str, Any]]:
+            search_response, _ = await fetch()
+            if search_response is None:
+                return None
+            if "error" in search_response:
+                if search_response.get("status") != 404:
+                    raise RequestError(
+                        search_response.get("status", 400), "search_phase_execution_exception", search_response["error"]
+                    )
+                logger.warning("Search indices not found")
+                return None
+            return self._cacheable_search(search_response)
             
+        async def load_suggestions() -> Optional[Dict[str, Any]]:
+            _, suggest_response = await fetch()
+            if suggest_response is None:
+                return None
+            if "error" in suggest_response:
+                # Suggestions are best effort, matching suggest()
+                logger.error(f"Suggestion query failed: {suggest_response['error']}")
+                return None
+            return self._cacheable_suggest(suggest_response)
+            
+        tenant = self._cache_tenant(context)
+        search_response, suggest_response = await asyncio.gather(
+            self.result_cache.get_or_load(
+                "search",
+                self._result_key("search", query, context, doc_types, size, from_, sort),
+                search_indices,
+                tenant,
+                load_search
+            ),
+            self.result_cache.get_or_load(
+                "suggest",
+                self._result_key("suggest", query, context, None, suggestion_size),
+                suggest_indices,
+                tenant,
+                load_suggestions
+            )
+        )
+        
+        results = self._parse_search_results(search_response) if search_response else []
+        suggestions = (
+            self._parse_suggestion_results(suggest_response, suggestion_size) if suggest_response else []
+        )
+        return results, suggestions
+        
+    async def _msearch(
+        self,
+        query: str,
+        context: SearchContext,
+        doc_types: Optional[List[str]],
+        size: int,
+        from_: int,
+        sort: Optional[List[Dict[str, Any]]],
+        suggestion_size: int
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Raw search and suggest responses from one _msearch; (None, None) if indices are missing"""
+        
+        search_body = self._render_search_body(query, context, doc_types, size, from_, sort)
+        suggest_body = self._render_suggest_body(query, context, suggestion_size)
+        
+        # msearch body: header/body pairs, one per sub-search
+        body = [
+            {"index": ",".join(self._get_search_indices(doc_types))},
+            search_body,
+            {"index": ",".join(self._get_search_indices())},
+            suggest_body
+        ]
+        
+        try:
+            response = await self.client.msearch(
+                body=body,
+                request_timeout=self.config.search_timeout
+            )
         except NotFoundError:
-            logger.warning(f"Search indices not found: {indices}")
-            return []
+            logger.warning("Search indices not found")
+            return None, None
         except RequestError as e:
-            logger.error(f"Search query failed: {e}")
+            logger.error(f"Multi-search query failed: {e}")
             raise
             
-    async def suggest(
+        search_response, suggest_response = response.get("responses", [{}, {}])
+        return search_response, suggest_response
+        
+    @staticmethod
+    def _cacheable_search(response: Dict[str, Any]) -> Dict[str, Any]:
+        """The part of a search response that results are parsed from"""
+        return {"hits": {"hits": response.get("hits", {}).get("hits", [])}}
+        
+    @staticmethod
+    def _cacheable_suggest(response: Dict[str, Any]) -> Dict[str, Any]:
+        """The part of a suggest response that suggestions are parsed from"""
+        return {"suggest": {"title_suggest": response.get("suggest", {}).get("title_suggest", [])}}
+        
+    @staticmethod
+    def _cache_tenant(context: SearchContext) -> Optional[str]:
+        """Tenant whose changes invalidate the context's results; None for cross-tenant system users"""
+        return None if context.is_system else context.tenant_id
+        
+    def _result_key(
+        self,
+        kind: str,
+        query: str,
+        context: SearchContext,
+        doc_types: Optional[List[str]] = None,
+        size: int = 20,
+        from_: int = 0,
+        sort: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        """Result cache key: normalized query, doc types and RBAC scope
+        
+        Search text is lowercased and whitespace-collapsed, which the
+        analyzers do anyway; suggestion prefixes are only lowercased since
+        a trailing space changes what completes.
+        """
+        if kind == "suggest":
+            normalized = query.lower()
+        else:
+            normalized = " ".join(query.lower().split())
+        parts = [
+            kind,
+            context.tenant_id,
+            self._rbac_scope(context),
+            normalized,
+            sorted(doc_types) if doc_types else None,
+            size,
+            from_,
+            sort
+        ]
+        return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+        
+    def _rbac_scope(self, context: SearchContext) -> str:
+        """Digest of the principal's RBAC filter, cached per principal"""
+        key = self._context_key(context)
+        scope = self._rbac_scopes.get(key)
+        if scope is not None:
+            self._rbac_scopes.move_to_end(key)
+            return scope
+            
+        rbac_filter = json.dumps(self._build_rbac_filter(context), sort_keys=True)
+        scope = self._rbac_scopes[key] = hashlib.sha1(rbac_filter.encode()).hexdigest()
+        if len(self._rbac_scopes) > self.config.query_template_cache_size:
+            self._rbac_scopes.popitem(last=False)
+        return scope
+        
+    def _render_search_body(
+        self,
+        query: str,
+        context: SearchContext,
+        doc_types: Optional[List[str]] = None,
+        size: int = 20,
+        from_: int = 0,
+        sort: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        """Serialized search body: cached template with the query text spliced in"""
+        has_text = bool(query.strip())
+        key = (
+            "search",
+            self._context_key(context),
+            tuple(doc_types) if doc_types else None,
+            size,
+            from_,
+            json.dumps(sort, sort_keys=True) if sort else None,
+            has_text
+        )
+        template = self._get_template(key, lambda: self._build_search_query(
+            query=QUERY_PLACEHOLDER if has_text else "",
+            context=context,
+            doc_types=doc_types,
+            size=size,
+            from_=from_,
+            sort=sort
+        ))
+        return self._splice(template, query)
+        
+    def _render_suggest_body(self, query: str, context: SearchContext, size: int = 10) -> str:
+        """Serialized suggest body: cached template with the prefix spliced in"""
+        key = ("suggest", self._context_key(context), size)
+        template = self._get_template(
+            key, lambda: self._build_suggest_query(QUERY_PLACEHOLDER, context, size)
+        )
+        return self._splice(template, query.lower())
+        
+    def _get_template(
+        self,
+        key: tuple,
+        build: Callable[[], Dict[str, Any]]
+    ) -> Tuple[str, Optional[str]]:
+        """Look up or compile a query template as JSON split at the placeholder"""
+        template = self._query_templates.get(key)
+        if template is not None:
+            self._query_templates.move_to_end(key)
+            self.cache_stats["template_hits"] += 1
+            return template
+            
+        self.cache_stats["template_misses"] += 1
+        head, found, tail = json.dumps(build()).partition(_ENCODED_PLACEHOLDER)
+        template = (head, tail) if found else (head, None)
+        self._query_templates[key] = template
+        if len(self._query_templates) > self.config.query_template_cache_size:
+            self._query_templates.popitem(last=False)
+        return template
+        
+    @staticmethod
+    def _splice(template: Tuple[str, Optional[str]], text: str) -> str:
+        head, tail = template
+        if tail is None:
+            return head
+        return head + json.dumps(text) + tail
+        
+    def _build_suggest_query(
         self,
         query: str,
         context: SearchContext,
         size: int = 10
-    ) -> List[SuggestionResult]:
-        """Get search suggestions with RBAC filtering"""
+    ) -> Dict[str, Any]:
+        """Build completion suggester query with RBAC filters"""
         
-        suggest_body = {
+        return {
             "suggest": {
                 "title_suggest": {
                     "prefix": query.lower(),
@@ -341,23 +658,6 @@ class OpenSearchClient:
             "size": 0  # Don't return documents, just suggestions
         }
         
-        indices = self._get_search_indices()
-        
-        try:
-            response = self.client.search(
-                index=",".join(indices),
-                body=suggest_body
-            )
-            
-            return self._parse_suggestion_results(response, size)
-            
-        except NotFoundError:
-            logger.warning("Suggestion indices not found")
-            return []
-        except RequestError as e:
-            logger.error(f"Suggestion query failed: {e}")
-            return []
-            
     def _build_search_query(
         self,
         query: str,
@@ -434,7 +734,37 @@ class OpenSearchClient:
             
         return search_body
         
+    @staticmethod
+    def _context_key(context: SearchContext) -> tuple:
+        """Cache key covering every context field the RBAC filter depends on"""
+        return (
+            context.tenant_id,
+            context.user_id,
+            tuple(context.school_ids or ()),
+            tuple(context.roles),
+            context.is_admin,
+            context.is_system
+        )
+        
     def _build_rbac_filter(self, context: SearchContext) -> Dict[str, Any]:
+        """RBAC filter for a principal, compiled once and cached
+        
+        The returned dict is shared between queries and must not be mutated.
+        """
+        key = self._context_key(context)
+        rbac_filter = self._rbac_filters.get(key)
+        if rbac_filter is not None:
+            self._rbac_filters.move_to_end(key)
+            self.cache_stats["rbac_filter_hits"] += 1
+            return rbac_filter
+            
+        self.cache_stats["rbac_filter_misses"] += 1
+        rbac_filter = self._rbac_filters[key] = self._compile_rbac_filter(context)
+        if len(self._rbac_filters) > self.config.query_template_cache_size:
+            self._rbac_filters.popitem(last=False)
+        return rbac_filter
+        
+    def _compile_rbac_filter(self, context: SearchContext) -> Dict[str, Any]:
         """Build RBAC filter based on user context"""
         
         # System users can see everything
@@ -586,11 +916,13 @@ class OpenSearchClient:
             raise ValueError(f"Unknown document type: {doc_type}")
             
         try:
-            response = self.client.delete(
+            response = await self.client.delete(
                 index=index_name,
                 id=doc_id
             )
             logger.debug(f"Deleted document {doc_id} from {index_name}")
+            # The tenant of a deleted document is unknown here
+            await self.result_cache.invalidate(index_name, [None])
             return response
         except NotFoundError:
             logger.warning(f"Document {doc_id} not found for deletion")
@@ -601,8 +933,8 @@ class OpenSearchClient:
     async def health_check(self) -> Dict[str, Any]:
         """Check OpenSearch cluster health"""
         try:
-            cluster_health = self.client.cluster.health()
-            indices_stats = self.client.indices.stats()
+            cluster_health = await self.client.cluster.health()
+            indices_stats = await self.client.indices.stats()
             
             return {
                 "status": "healthy",
@@ -621,6 +953,21 @@ class OpenSearchClient:
                 "status": "unhealthy",
                 "error": str(e)
             }
+            
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """RBAC filter and query template cache statistics"""
+        stats: Dict[str, Any] = dict(self.cache_stats)
+        for name in ("rbac_filter", "template"):
+            lookups = stats[f"{name}_hits"] + stats[f"{name}_misses"]
+            stats[f"{name}_hit_rate"] = round(stats[f"{name}_hits"] / lookups, 4) if lookups else 0.0
+        stats["rbac_filters_cached"] = len(self._rbac_filters)
+        stats["templates_cached"] = len(self._query_templates)
+        return stats
+        
+    async def close(self):
+        """Close pooled OpenSearch connections and the result cache"""
+        await self.client.close()
+        await self.result_cache.close()
 
 
 # Global client instance
@@ -38,6 +38,7 @@ async def lifespan(app: FastAPI):
         search_client = get_search_client()
         await search_client.ensure_indices()
         logger.info("OpenSearch indices initialized")
+        await search_client.result_cache.start()
         
     except Exception as e:
         logger.error(f"Failed to initialize search service: {e}")
@@ -47,6 +48,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down AIVO Search Service...")
+    await get_search_client().close()
 
 
 # Create FastAPI application
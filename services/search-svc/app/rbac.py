@@ -5,8 +5,11 @@ S1-13 Implementation
 Provides RBAC filtering and permission management for search operations.
 """
 
+import hashlib
 import logging
-from typing import Dict, List, Optional, Set, Any
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Set, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
@@ -144,12 +147,53 @@ class RBACManager:
         Role.STUDENT: {"iep"}
     }
     
-    def __init__(self, jwt_secret: str = "your-jwt-secret", jwt_algorithm: str = "HS256"):
+    def __init__(
+        self,
+        jwt_secret: str = "your-jwt-secret",
+        jwt_algorithm: str = "HS256",
+        context_cache_size: int = 10000,
+        context_cache_ttl: float = 300.0
+    ):
         self.jwt_secret = jwt_secret
         self.jwt_algorithm = jwt_algorithm
         
+        # Parsed contexts keyed by token digest, valid until the JWT expires
+        # (or context_cache_ttl for tokens without exp)
+        self.context_cache_size = context_cache_size
+        self.context_cache_ttl = context_cache_ttl
+        self._context_cache: "OrderedDict[bytes, Tuple[UserContext, float]]" = OrderedDict()
+        self._permission_cache: Dict[FrozenSet[Role], FrozenSet[Permission]] = {}
+        self.cache_stats = {"hits": 0, "misses": 0, "expired": 0}
+        
     def parse_token(self, token: str) -> UserContext:
-        """Parse JWT token and extract user context"""
+        """Parse JWT token and extract user context
+        
+        Contexts are cached per token digest until the token's exp claim, so
+        repeat requests skip signature verification and permission
+        expansion. An expired entry is dropped and the token decoded again,
+        which raises the usual expiry error.
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        cached = self._context_cache.get(digest)
+        if cached is not None:
+            context, expires_at = cached
+            if expires_at > time.time():
+                self._context_cache.move_to_end(digest)
+                self.cache_stats["hits"] += 1
+                return context
+            del self._context_cache[digest]
+            self.cache_stats["expired"] += 1
+            
+        self.cache_stats["misses"] += 1
+        context, expires_at = self._decode_token(token)
+        
+        self._context_cache[digest] = (context, expires_at)
+        if len(self._context_cache) > self.context_cache_size:
+            self._context_cache.popitem(last=False)
+        return context
+        
+    def _decode_token(self, token: str) -> Tuple[UserContext, float]:
+        """Verify a JWT and build its user context and cache expiry"""
         try:
             payload = jwt.decode(
                 token, 
@@ -198,7 +242,10 @@ class RBACManager:
                 student_ids=payload.get("student_ids", [])
             )
             
-            return context
+            expires_at = time.time() + self.context_cache_ttl
+            if payload.get("exp") is not None:
+                expires_at = min(expires_at, float(payload["exp"]))
+            return context, expires_at
             
         except jwt.ExpiredSignatureError:
             raise HTTPException(
@@ -213,6 +260,14 @@ class RBACManager:
             
     def get_effective_permissions(self, roles: List[Role]) -> Set[Permission]:
         """Calculate effective permissions based on role hierarchy"""
+        key = frozenset(roles)
+        cached = self._permission_cache.get(key)
+        if cached is None:
+            cached = self._permission_cache[key] = frozenset(self._expand_permissions(roles))
+        return set(cached)
+        
+    def _expand_permissions(self, roles: List[Role]) -> Set[Permission]:
+        """Walk the role table for direct and inherited permissions"""
         permissions = set()
         
         for role in roles:
@@ -382,6 +437,15 @@ class RBACManager:
             
         # School-level roles are restricted to their schools
         return False
+        
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Parsed-context cache statistics"""
+        lookups = self.cache_stats["hits"] + self.cache_stats["misses"]
+        return {
+            **self.cache_stats,
+            "size": len(self._context_cache),
+            "hit_rate": round(self.cache_stats["hits"] / lookups, 4) if lookups else 0.0
+        }
 
 
 # Global RBAC manager instance
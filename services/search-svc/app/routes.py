@@ -67,6 +67,13 @@ class SearchResult(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
+class SuggestionResult(BaseModel):
+    """Suggestion result model"""
+    text: str
+    score: float
+    category: Optional[str] = None
+
+
 class SearchResponse(BaseModel):
     """Search response model"""
     results: List[SearchResult]
@@ -76,15 +83,9 @@ class SearchResponse(BaseModel):
     query: str
     filters: Dict[str, Any]
     took: int  # Search time in milliseconds
+    suggestions: Optional[List[SuggestionResult]] = None
     
     
-class SuggestionResult(BaseModel):
-    """Suggestion result model"""
-    text: str
-    score: float
-    category: Optional[str] = None
-
-
 class SuggestionResponse(BaseModel):
     """Suggestion response model"""
     suggestions: List[SuggestionResult]
@@ -134,6 +135,7 @@ async def search_documents(
     size: int = Query(20, description="Number of results", ge=1, le=100),
     from_: int = Query(0, alias="from", description="Result offset", ge=0),
     sort: Optional[str] = Query(None, description="Sort field:order (e.g. 'score:desc,updated_at:asc')"),
+    suggest: bool = Query(False, description="Also return suggestions for q in the same round trip"),
     user_context: UserContext = Depends(get_user_context),
     search_client: OpenSearchClient = Depends(get_client),
     rbac: RBACManager = Depends(get_rbac)
@@ -148,12 +150,14 @@ async def search_documents(
     * **size**: Number of results to return (1-100, default: 20)
     * **from**: Starting offset for pagination (default: 0)
     * **sort**: Sort criteria as 'field:order' pairs (e.g. 'score:desc,updated_at:asc')
+    * **suggest**: Include suggestions, fetched with the results in one multi-search
     
     ## Examples
     
     * Search IEPs: `/search?q=autism&doc_types=iep`
     * Search with pagination: `/search?q=reading&size=10&from=20`
     * Search and sort: `/search?q=math&sort=updated_at:desc`
+    * Search with suggestions: `/search?q=fra&suggest=true`
     
     ## Access Control
     
@@ -221,15 +225,26 @@ async def search_documents(
             is_system=user_context.is_system
         )
         
-        # Perform search
-        results = await search_client.search(
-            query=q,
-            context=search_context,
-            doc_types=doc_type_list,
-            size=size,
-            from_=from_,
-            sort=sort_criteria
-        )
+        # Perform search, together with suggestions when asked for
+        suggestions = None
+        if suggest and rbac.check_suggestion_permission(user_context):
+            results, suggestions = await search_client.search_with_suggestions(
+                query=q,
+                context=search_context,
+                doc_types=doc_type_list,
+                size=size,
+                from_=from_,
+                sort=sort_criteria
+            )
+        else:
+            results = await search_client.search(
+                query=q,
+                context=search_context,
+                doc_types=doc_type_list,
+                size=size,
+                from_=from_,
+                sort=sort_criteria
+            )
         
         # Calculate elapsed time
         elapsed = int((datetime.now() - start_time).total_seconds() * 1000)
@@ -263,7 +278,15 @@ async def search_documents(
                 "tenant_id": user_context.tenant_id,
                 "school_ids": user_context.school_ids
             },
-            took=elapsed
+            took=elapsed,
+            suggestions=[
+                SuggestionResult(
+                    text=suggestion.text,
+                    score=suggestion.score,
+                    category=suggestion.category
+                )
+                for suggestion in suggestions
+            ] if suggestions is not None else None
         )
         
     except HTTPException:
@@ -531,7 +554,12 @@ async def get_search_stats(
             },
             "search_health": health_info,
             "accessible_document_types": get_rbac_manager().filter_document_types(user_context),
-            "cross_school_access": get_rbac_manager().get_cross_school_visibility(user_context)
+            "cross_school_access": get_rbac_manager().get_cross_school_visibility(user_context),
+            "cache_stats": {
+                "auth_contexts": get_rbac_manager().get_cache_stats(),
+                "query_templates": search_client.get_cache_stats(),
+                "results": search_client.result_cache.get_stats()
+            }
         }
         
     except Exception as e:
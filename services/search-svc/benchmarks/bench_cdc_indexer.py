@@ -0,0 +1,231 @@
+"""
+CDC indexing throughput benchmark for outbox backfills
+
+Replays a synthetic outbox backfill of lesson and learner events (with
+bursts of repeated updates to the same aggregates) into a local stub
+OpenSearch bulk endpoint running in its own thread. The stub charges a
+fixed latency per bulk request, a per-megabyte cost, and an extra
+refresh cost when the request asks for refresh=true; outbox pages cost
+a fixed query latency. Compares the previous consumer loop - 100-event
+pages, fetch, transform and helpers.async_bulk(refresh=True) strictly in
+sequence - with the pipelined indexer: large keyset pages, per-aggregate
+coalescing, byte-sized concurrent bulk requests and no forced refresh.
+Both use the real DataTransformer and RBACFilter. Reports docs/sec.
+
+Usage:
+    python benchmarks/bench_cdc_indexer.py [--events N] [--legacy-events N] [--bulk-ms MS] [--refresh-ms MS]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+from aiohttp import web
+from opensearchpy import AIOHttpConnection, AsyncOpenSearch, helpers
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pipeline.indexer import (  # noqa: E402
+    BulkAction,
+    BulkIndexer,
+    IndexingConfig,
+    IndexingPipeline,
+    PreparedBatch,
+    coalesce_events
+)
+from pipeline.transform import DataTransformer, RBACFilter  # noqa: E402
+
+SUBJECTS = ["mathematics", "english", "science", "social_studies"]
+LESSON_TEXT = ("Students solve 3/4 + 1/8 and write equations, then read a short passage and "
+               "identify the main idea and supporting details. ") * 6
+
+
+class OutboxEvent:
+    __slots__ = ("id", "aggregate_id", "aggregate_type", "event_type", "event_data")
+
+    def __init__(self, id, aggregate_id, aggregate_type, event_type, event_data):
+        self.id = id
+        self.aggregate_id = aggregate_id
+        self.aggregate_type = aggregate_type
+        self.event_type = event_type
+        self.event_data = event_data
+
+
+class SyntheticOutbox:
+    """Deterministic outbox: event i is generated on demand from its id"""
+
+    def __init__(self, total: int, fetch_latency: float):
+        self.total = total
+        self.fetch_latency = fetch_latency
+
+    def event(self, i: int) -> OutboxEvent:
+        rng = random.Random(i)
+        # 30% of events are repeat edits of an aggregate touched nearby
+        if rng.random() < 0.3:
+            aggregate = max(0, i - rng.randint(1, 50))
+        else:
+            aggregate = i
+        tenant = f"tenant_{aggregate % 25}"
+        if aggregate % 4 == 0:
+            return OutboxEvent(i, f"learner-{aggregate}", "learner", "UPDATE", {
+                "id": f"learner-{aggregate}", "name": f"student {aggregate}", "email": f"s{aggregate}@school.org",
+                "grade_level": aggregate % 12, "tenant_id": tenant, "school_id": f"school_{aggregate % 80}",
+                "created_at": "2024-09-01T08:00:00"
+            })
+        event_type = "DELETE" if rng.random() < 0.02 else "UPDATE"
+        return OutboxEvent(i, f"lesson-{aggregate}", "lesson", event_type, {
+            "id": f"lesson-{aggregate}", "title": f"Lesson {aggregate}: fractions and main idea",
+            "description": "Practice adding fractions and finding the main idea",
+            "subject": SUBJECTS[aggregate % 4], "grade_level": 3 + aggregate % 6, "content": LESSON_TEXT,
+            "tags": ["fractions", "reading"], "tenant_id": tenant, "status": "published",
+            "created_at": "2024-09-01T08:00:00"
+        })
+
+    async def fetch(self, after: int, limit: int):
+        await asyncio.sleep(self.fetch_latency)
+        return [self.event(i) for i in range(after, min(after + limit, self.total))]
+
+
+def start_stub_server(bulk_latency: float, per_mb: float, refresh_latency: float) -> int:
+    """Bulk endpoint answering every action with 201 after a modelled delay"""
+    ready = threading.Event()
+    port = []
+
+    async def handle(request: web.Request) -> web.Response:
+        body = await request.read()
+        delay = bulk_latency + per_mb * len(body) / 1e6
+        if request.query.get("refresh") == "true":
+            delay += refresh_latency
+        items = []
+        for line in body.split(b"\n"):
+            if line.startswith(b'{"index"'):
+                items.append('{"index":{"status":201}}')
+            elif line.startswith(b'{"delete"'):
+                items.append('{"delete":{"status":200}}')
+        await asyncio.sleep(delay)
+        return web.Response(text='{"errors":false,"items":[' + ",".join(items) + "]}",
+                            content_type="application/json")
+
+    async def serve():
+        app = web.Application(client_max_size=200 * 1024 * 1024)
+        app.router.add_route("*", "/{tail:.*}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port.append(site._server.sockets[0].getsockname()[1])
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return port[0]
+
+
+INDEX_NAMES = {"learner": "learners", "lesson": "lessons"}
+
+
+async def transform(transformer: DataTransformer, rbac: RBACFilter, event: OutboxEvent):
+    return await rbac.filter_document(event.aggregate_type, transformer.transform(event.aggregate_type, event.event_data))
+
+
+async def legacy_backfill(client: AsyncOpenSearch, outbox: SyntheticOutbox) -> int:
+    """Reference copy of the previous loop: fetch, transform, bulk(refresh=True) in sequence"""
+    transformer, rbac = DataTransformer(), RBACFilter()
+    cursor, docs = 0, 0
+    while True:
+        events = await outbox.fetch(cursor, 100)
+        if not events:
+            return docs
+        cursor = events[-1].id + 1
+        by_type = {}
+        for event in events:
+            by_type.setdefault(event.aggregate_type, []).append(event)
+        for aggregate_type, type_events in by_type.items():
+            ops = []
+            for event in type_events:
+                if event.event_type == "DELETE":
+                    ops.append({"_op_type": "delete", "_index": INDEX_NAMES[aggregate_type], "_id": event.aggregate_id})
+                else:
+                    ops.append({"_op_type": "index", "_index": INDEX_NAMES[aggregate_type], "_id": event.aggregate_id,
+                                "_source": await transform(transformer, rbac, event)})
+            success, _ = await helpers.async_bulk(client, ops, refresh=True, raise_on_error=False)
+            docs += success
+
+
+async def pipelined_backfill(client: AsyncOpenSearch, outbox: SyntheticOutbox, config: IndexingConfig):
+    transformer, rbac = DataTransformer(), RBACFilter()
+    cursor = 0
+
+    async def fetch():
+        nonlocal cursor
+        events = await outbox.fetch(cursor, config.reindex_batch_size)
+        if events:
+            cursor = events[-1].id + 1
+        return events
+
+    async def prepare(events):
+        actions = []
+        for event in coalesce_events(events):
+            index = INDEX_NAMES[event.aggregate_type]
+            if event.event_type == "DELETE":
+                actions.append(BulkAction("delete", index, event.aggregate_id))
+            else:
+                actions.append(BulkAction("index", index, event.aggregate_id,
+                                          await transform(transformer, rbac, event)))
+        return PreparedBatch(actions=actions, event_count=len(events), last_event_id=events[-1].id)
+
+    async def commit(batch, result):
+        pass
+
+    pipeline = IndexingPipeline(fetch, prepare, BulkIndexer(client, config), commit, config, stop_when_idle=True)
+    await pipeline.run()
+    return pipeline.stats
+
+
+async def run(args, port: int) -> None:
+    client = AsyncOpenSearch(hosts=[{"host": "127.0.0.1", "port": port}], connection_class=AIOHttpConnection,
+                             maxsize=16, timeout=120)
+    fetch_latency = args.fetch_ms / 1000
+    print(f"stub: bulk {args.bulk_ms} ms + {args.per_mb_ms} ms/MB, refresh {args.refresh_ms} ms, "
+          f"outbox page {args.fetch_ms} ms")
+
+    start = time.perf_counter()
+    docs = await legacy_backfill(client, SyntheticOutbox(args.legacy_events, fetch_latency))
+    legacy_rate = args.legacy_events / (time.perf_counter() - start)
+    print(f"{'previous loop':<22} {args.legacy_events:>9} events  {legacy_rate:8.0f} events/s  ({docs} docs)")
+
+    config = IndexingConfig(bulk_concurrency=args.bulk_concurrency)
+    start = time.perf_counter()
+    stats = await pipelined_backfill(client, SyntheticOutbox(args.events, fetch_latency), config)
+    elapsed = time.perf_counter() - start
+    print(f"{'pipelined indexer':<22} {args.events:>9} events  {args.events / elapsed:8.0f} events/s  "
+          f"({stats['docs_indexed']} docs, {stats['docs_indexed'] / elapsed:.0f} docs/s, "
+          f"{stats['bulk_requests']} bulk requests, {elapsed:.1f} s)  "
+          f"({args.events / elapsed / legacy_rate:.1f}x)")
+    await client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--legacy-events", type=int, default=20_000)
+    parser.add_argument("--bulk-ms", type=float, default=10.0)
+    parser.add_argument("--per-mb-ms", type=float, default=40.0)
+    parser.add_argument("--refresh-ms", type=float, default=50.0)
+    parser.add_argument("--fetch-ms", type=float, default=5.0)
+    parser.add_argument("--bulk-concurrency", type=int, default=4)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    port = start_stub_server(args.bulk_ms / 1000, args.per_mb_ms / 1000, args.refresh_ms / 1000)
+    asyncio.run(run(args, port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Per-request CPU benchmark for auth parsing and query building
+
+Replays N search requests from a pool of principals (each with its own
+JWT) and measures the CPU time spent turning a bearer token and query
+text into the serialized OpenSearch body - first the previous way
+(decode and verify the JWT, expand role permissions, build the RBAC
+filter and query dicts, json.dumps) and then with the parsed-context
+cache, cached RBAC fragments and precompiled query templates.
+
+Usage:
+    python benchmarks/bench_query_build.py [--requests N] [--principals N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+import jwt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.client import OpenSearchClient, SearchConfig, SearchContext  # noqa: E402
+from app.rbac import RBACManager, Role, UserContext  # noqa: E402
+
+SECRET = "bench-secret"
+QUERIES = ["fractions", "reading comprehension", "autism iep goals", "decimals", "phonics",
+           "behavior plan", "algebra readiness", "speech therapy", "dyslexia accommodations"]
+ROLES = [["teacher"], ["case_manager"], ["school_admin"], ["parent"], ["tenant_admin"]]
+
+
+def make_tokens(principals: int, rng: random.Random):
+    exp = int(time.time()) + 3600
+    return [
+        jwt.encode({
+            "sub": f"user_{i}",
+            "tenant_id": f"tenant_{i % 20}",
+            "school_ids": [f"school_{i % 50}", f"school_{(i + 7) % 50}"],
+            "roles": rng.choice(ROLES),
+            "exp": exp
+        }, SECRET, algorithm="HS256")
+        for i in range(principals)
+    ]
+
+
+def to_search_context(user: UserContext) -> SearchContext:
+    return SearchContext(
+        user_id=user.user_id,
+        tenant_id=user.tenant_id,
+        school_ids=user.school_ids,
+        roles=[role.value for role in user.roles],
+        permissions=[perm.value for perm in user.permissions],
+        is_admin=user.is_admin,
+        is_system=user.is_system
+    )
+
+
+class LegacyBuilder(OpenSearchClient):
+    """Reference copy of the previous path: RBAC filter rebuilt on every query"""
+
+    def _build_rbac_filter(self, context):
+        return self._compile_rbac_filter(context)
+
+
+def legacy_request(rbac: RBACManager, builder: LegacyBuilder, token: str, query: str) -> str:
+    """Reference copy of the previous per-request work"""
+    payload = jwt.decode(token, SECRET, algorithms=["HS256"])
+    roles = [Role(role) for role in payload["roles"]]
+    user = UserContext(
+        user_id=payload["sub"],
+        tenant_id=payload["tenant_id"],
+        school_ids=payload.get("school_ids", []),
+        roles=roles,
+        permissions=rbac._expand_permissions(roles),
+        student_ids=payload.get("student_ids", [])
+    )
+    body = builder._build_search_query(query, to_search_context(user), None, 20, 0, None)
+    return json.dumps(body)
+
+
+def cached_request(rbac: RBACManager, client: OpenSearchClient, token: str, query: str) -> str:
+    user = rbac.parse_token(token)
+    return client._render_search_body(query, to_search_context(user), None, 20, 0, None)
+
+
+def measure(handler, requests) -> float:
+    """CPU microseconds per request"""
+    start = time.process_time()
+    for token, query in requests:
+        handler(token, query)
+    return (time.process_time() - start) / len(requests) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--principals", type=int, default=1000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    rng = random.Random(0)
+    tokens = make_tokens(args.principals, rng)
+    # Skewed traffic: active principals send most requests
+    weights = [1 / (i + 1) for i in range(args.principals)]
+    requests = [(token, rng.choice(QUERIES)) for token in rng.choices(tokens, weights, k=args.requests)]
+
+    rbac = RBACManager(jwt_secret=SECRET)
+    config = SearchConfig()
+    legacy = LegacyBuilder(config)
+    client = OpenSearchClient(config)
+
+    legacy_us = measure(lambda token, query: legacy_request(rbac, legacy, token, query), requests)
+    cached_us = measure(lambda token, query: cached_request(rbac, client, token, query), requests)
+
+    print(f"requests: {args.requests}, principals: {args.principals}")
+    print(f"{'previous path':<24} {legacy_us:8.1f} us CPU/request")
+    print(f"{'cached path':<24} {cached_us:8.1f} us CPU/request  ({legacy_us / cached_us:.1f}x)")
+    auth = rbac.get_cache_stats()
+    templates = client.get_cache_stats()
+    print(f"context cache hit rate {auth['hit_rate']:.1%}, "
+          f"template hit rate {templates['template_hit_rate']:.1%}, "
+          f"rbac filter hit rate {templates['rbac_filter_hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
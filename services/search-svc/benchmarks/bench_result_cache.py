@@ -0,0 +1,156 @@
+"""
+Search result cache benchmark for autocomplete and repeated searches
+
+Runs a local stub OpenSearch HTTP server (in its own thread) with a fixed
+latency and replays a school-day workload from C concurrent coroutines:
+teachers across a few schools type popular lesson queries one keystroke
+at a time (a suggest per prefix) and then search the full query. The
+same replay runs with the result cache disabled - the previous behaviour,
+one OpenSearch request per call - and enabled, while a simulated CDC
+indexer invalidates one tenant's curriculum index every few hundred
+requests. Reports throughput, hit rates and p50/p99 latency.
+
+Usage:
+    python benchmarks/bench_result_cache.py [--requests N] [--concurrency C] [--latency-ms MS]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.cache import SearchCacheConfig, SearchResultCache  # noqa: E402
+from app.client import OpenSearchClient, SearchConfig, SearchContext  # noqa: E402
+
+QUERIES = ["fractions", "reading comprehension", "phonics blends", "decimals", "multiplication facts",
+           "main idea", "place value", "photosynthesis", "algebra readiness", "story elements"]
+
+RESPONSE = {"hits": {"hits": [
+    {"_id": f"doc-{i}", "_score": 1.0, "_source": {"id": f"doc-{i}", "title": "Fractions", "content": "x" * 200}}
+    for i in range(20)
+]}, "suggest": {"title_suggest": [{"options": [{"text": "fractions", "_score": 3.0}]}]}}
+
+
+def start_stub_server(latency: float, counter: list) -> int:
+    """Serve a canned search response from a background thread"""
+    ready = threading.Event()
+    port = []
+
+    async def handle(request: web.Request) -> web.Response:
+        await request.read()
+        counter[0] += 1
+        await asyncio.sleep(latency)
+        return web.json_response(RESPONSE)
+
+    async def serve():
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port.append(site._server.sockets[0].getsockname()[1])
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return port[0]
+
+
+def make_workload(requests: int, rng: random.Random):
+    """(kind, text, context) calls: keystroke prefixes then the full search"""
+    contexts = [
+        SearchContext(
+            user_id=f"teacher_{i}",
+            tenant_id=f"tenant_{i % 3}",
+            school_ids=[f"school_{i % 6}"],
+            roles=["teacher"],
+            permissions=["search:school"]
+        )
+        for i in range(60)
+    ]
+    weights = [1 / (i + 1) for i in range(len(QUERIES))]
+    calls = []
+    while len(calls) < requests:
+        query = rng.choices(QUERIES, weights)[0]
+        context = rng.choice(contexts)
+        calls.extend(("suggest", query[:n], context) for n in range(2, min(len(query), 8) + 1))
+        calls.append(("search", query, context))
+    return calls[:requests]
+
+
+async def replay(client: OpenSearchClient, calls, concurrency: int, invalidate_every: int):
+    latencies = {"search": [], "suggest": []}
+    remaining = iter(enumerate(calls))
+    curriculum = client.index_mappings["curriculum"]
+
+    async def worker():
+        for i, (kind, text, context) in remaining:
+            if invalidate_every and i % invalidate_every == 0:
+                await client.result_cache.invalidate(curriculum, [f"tenant_{i % 3}"])
+            start = time.perf_counter()
+            if kind == "suggest":
+                await client.suggest(text, context)
+            else:
+                await client.search(text, context)
+            latencies[kind].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def describe(label: str, samples) -> str:
+    ordered = sorted(samples)
+    p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+    return f"  {label:<8} p50 {statistics.median(ordered) * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms"
+
+
+async def run(args, port: int, counter: list) -> None:
+    config = SearchConfig(opensearch_host="127.0.0.1", opensearch_port=port)
+    calls = make_workload(args.requests, random.Random(0))
+    print(f"stub latency: {args.latency_ms} ms, calls: {len(calls)}, concurrency: {args.concurrency}")
+
+    for label, cache_config in (
+        ("no result cache (previous)", SearchCacheConfig(enabled=False)),
+        ("result cache", SearchCacheConfig())
+    ):
+        client = OpenSearchClient(config, result_cache=SearchResultCache(cache_config))
+        counter[0] = 0
+        wall, latencies = await replay(client, calls, args.concurrency, args.invalidate_every)
+        print(f"-- {label}: {len(calls) / wall:.0f} calls/s, {counter[0]} OpenSearch requests")
+        for kind in ("suggest", "search"):
+            print(describe(kind, latencies[kind]))
+        if cache_config.enabled:
+            stats = client.result_cache.get_stats()
+            print(f"  hit rate: suggest {stats['suggest']['hit_rate']:.1%}, "
+                  f"search {stats['search']['hit_rate']:.1%}, invalidations {stats['invalidations']}")
+        await client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=15.0)
+    parser.add_argument("--invalidate-every", type=int, default=250)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    counter = [0]
+    port = start_stub_server(args.latency_ms / 1000, counter)
+    asyncio.run(run(args, port, counter))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+OpenSearch client concurrency benchmark
+
+Runs a local stub OpenSearch HTTP server (in its own thread) that answers
+every request after a fixed latency, then issues searches from C concurrent
+coroutines with the previous client - the synchronous requests transport
+called from async methods - and with the pooled async client. Also
+compares search + suggest as two calls and as one _msearch round trip.
+
+Usage:
+    python benchmarks/bench_search_client.py [--requests N] [--concurrency 1,10,50] [--latency-ms MS]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+from aiohttp import web
+from opensearchpy import OpenSearch, RequestsHttpConnection
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.cache import SearchCacheConfig, SearchResultCache  # noqa: E402
+from app.client import OpenSearchClient, SearchConfig, SearchContext  # noqa: E402
+
+CONTEXT = SearchContext(
+    user_id="teacher_1",
+    tenant_id="tenant_1",
+    school_ids=["school_a", "school_b"],
+    roles=["teacher"],
+    permissions=["search:school"]
+)
+
+HITS = {"hits": {"hits": [
+    {"_id": f"doc-{i}", "_score": 1.0, "_source": {"id": f"doc-{i}", "title": "Fractions", "content": "x" * 200}}
+    for i in range(20)
+]}, "suggest": {"title_suggest": [{"options": [{"text": "fractions", "_score": 3.0}]}]}}
+
+
+def start_stub_server(latency: float) -> int:
+    """Serve canned search/msearch responses from a background thread"""
+    ready = threading.Event()
+    port = []
+
+    async def handle(request: web.Request) -> web.Response:
+        await request.read()
+        await asyncio.sleep(latency)
+        if request.path.endswith("/_msearch"):
+            return web.json_response({"responses": [HITS, HITS]})
+        return web.json_response(HITS)
+
+    async def serve():
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port.append(site._server.sockets[0].getsockname()[1])
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return port[0]
+
+
+class LegacyClient(OpenSearchClient):
+    """Reference copy of the previous client: sync transport inside async methods"""
+
+    def __init__(self, config: SearchConfig):
+        super().__init__(config, result_cache=SearchResultCache(SearchCacheConfig(enabled=False)))
+        self.client = OpenSearch(
+            hosts=[{'host': config.opensearch_host, 'port': config.opensearch_port}],
+            http_auth=(config.opensearch_username, config.opensearch_password),
+            connection_class=RequestsHttpConnection
+        )
+
+    async def search(self, query, context, doc_types=None, size=20, from_=0, sort=None):
+        body = self._build_search_query(query, context, doc_types, size, from_, sort)
+        response = self.client.search(index=",".join(self._get_search_indices(doc_types)), body=body)
+        return self._parse_search_results(response)
+
+    async def suggest(self, query, context, size=10):
+        body = self._build_suggest_query(query, context, size)
+        response = self.client.search(index=",".join(self._get_search_indices()), body=body)
+        return self._parse_suggestion_results(response, size)
+
+    async def close(self):
+        self.client.close()
+
+
+async def drive(call, requests: int, concurrency: int):
+    """Run `requests` calls from `concurrency` workers; return wall time and latencies"""
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def describe(label: str, wall: float, latencies) -> str:
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    return (f"{label:<28} {len(latencies) / wall:9.0f} req/s "
+            f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms")
+
+
+async def run(args, port: int) -> None:
+    config = SearchConfig(opensearch_host="127.0.0.1", opensearch_port=port)
+    # Result cache off: every call measures the transport
+    legacy = LegacyClient(config)
+    pooled = OpenSearchClient(config, result_cache=SearchResultCache(SearchCacheConfig(enabled=False)))
+
+    print(f"stub latency: {args.latency_ms} ms, requests per run: {args.requests}")
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        print(f"-- concurrency {concurrency}")
+        wall, lat = await drive(lambda: legacy.search("fractions", CONTEXT), args.requests, concurrency)
+        legacy_rps = len(lat) / wall
+        print(describe("sync transport (previous)", wall, lat))
+        wall, lat = await drive(lambda: pooled.search("fractions", CONTEXT), args.requests, concurrency)
+        print(describe("pooled async", wall, lat) + f"  ({len(lat) / wall / legacy_rps:.1f}x)")
+
+    print("-- search + suggest, concurrency 10")
+    wall, lat = await drive(
+        lambda: asyncio.gather(pooled.search("fra", CONTEXT), pooled.suggest("fra", CONTEXT)),
+        args.requests, 10
+    )
+    print(describe("two concurrent requests", wall, lat))
+    wall, lat = await drive(lambda: pooled.search_with_suggestions("fra", CONTEXT), args.requests, 10)
+    print(describe("one _msearch", wall, lat))
+
+    await legacy.close()
+    await pooled.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", default="1,10,50")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    port = start_stub_server(args.latency_ms / 1000)
+    asyncio.run(run(args, port))
+
+
+if __name__ == "__main__":
+    main()
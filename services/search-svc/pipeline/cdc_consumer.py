@@ -3,18 +3,33 @@ CDC Consumer for Search Pipeline
 
 Consumes change data capture events from PostgreSQL outbox pattern
 and processes them for OpenSearch indexing with RBAC filtering.
+Fetch, transform and bulk indexing run as overlapping pipeline stages
+(see indexer.py); reindex() rebuilds indices from the outbox and
+switches aliases.
 """
 import asyncio
 import json
 import logging
+import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Set
 from dataclasses import dataclass
 from enum import Enum
 import asyncpg
-from opensearchpy import AsyncOpenSearch, helpers
-from .transform import DataTransformer, RBACFilter
+from opensearchpy import AsyncOpenSearch
+from opensearchpy.exceptions import NotFoundError
+from .transform import BatchTransformer, DataTransformer, RBACFilter
 from .analyzers import AnalyzerManager
+from .indexer import (
+    BulkAction,
+    BulkIndexer,
+    BulkResult,
+    IndexingConfig,
+    IndexingPipeline,
+    PreparedBatch,
+    coalesce_events,
+    refresh_interval_seconds
+)
 
 logger = logging.getLogger(__name__)
 
@@ -50,26 +65,43 @@ class CDCConsumer:
         self,
         postgres_url: str,
         opensearch_config: Dict[str, Any],
-        batch_size: int = 100,
-        poll_interval: int = 5
+        batch_size: int = 500,
+        poll_interval: int = 5,
+        cache_invalidator: Optional[Any] = None,
+        indexing_config: Optional[IndexingConfig] = None
     ):
         self.postgres_url = postgres_url
         self.opensearch_config = opensearch_config
         self.batch_size = batch_size
         self.poll_interval = poll_interval
+        self.indexing_config = indexing_config or IndexingConfig()
+        
+        # Search result cache shared with search-svc (normally an
+        # app.cache.SearchResultCache on the same Redis); anything with an
+        # async invalidate(index, tenant_ids) works
+        self.cache_invalidator = cache_invalidator
         
         # Components
         self.transformer = DataTransformer()
         self.rbac_filter = RBACFilter()
+        self.batch_transformer = BatchTransformer(
+            workers=self.indexing_config.transform_workers,
+            chunk_size=self.indexing_config.transform_chunk_size
+        )
         self.analyzer_manager = AnalyzerManager()
         
         # Client connections
         self.pg_pool: Optional[asyncpg.Pool] = None
         self.opensearch: Optional[AsyncOpenSearch] = None
+        self.indexer: Optional[BulkIndexer] = None
         
-        # Processing state
+        # Processing state: the checkpoint trails the fetch cursor by the
+        # batches still in the pipeline
         self.last_processed_id: Optional[str] = None
+        self.fetch_cursor: Optional[str] = None
+        self.pipeline: Optional[IndexingPipeline] = None
         self.running = False
+        self._pending_invalidations: Set[asyncio.Task] = set()
         
         # Metrics tracking
         self.events_processed = 0
@@ -95,6 +127,7 @@ class CDCConsumer:
                 verify_certs=self.opensearch_config.get("verify_certs", False),
                 timeout=30
             )
+            self.indexer = BulkIndexer(self.opensearch, self.indexing_config)
             
             # Setup indices and analyzers
             await self.setup_indices()
@@ -110,7 +143,40 @@ class CDCConsumer:
     
     async def setup_indices(self):
         """Setup OpenSearch indices with subject-specific analyzers."""
-        indices_config = {
+        # Create indices if they don't exist
+        for index_name, config in self.get_index_definitions().items():
+            try:
+                if not await self.opensearch.indices.exists(index=index_name):
+                    await self.opensearch.indices.create(
+                        index=index_name,
+                        body=config
+                    )
+                    logger.info(f"Created OpenSearch index: {index_name}")
+                else:
+                    # Update settings and mappings
+                    await self.opensearch.indices.put_settings(
+                        index=index_name,
+                        body={"settings": config["settings"]}
+                    )
+                    await self.opensearch.indices.put_mapping(
+                        index=index_name,
+                        body=config["mappings"]
+                    )
+                    logger.info(f"Updated OpenSearch index: {index_name}")
+                    
+            except Exception as e:
+                logger.error(f"Failed to setup index {index_name}: {e}")
+                raise
+    
+    def get_index_settings(self) -> Dict[str, Any]:
+        """Index settings: analyzers plus a periodic refresh instead of refresh-per-batch."""
+        settings = dict(self.analyzer_manager.get_index_settings("general"))
+        settings["refresh_interval"] = self.indexing_config.refresh_interval
+        return settings
+    
+    def get_index_definitions(self) -> Dict[str, Dict[str, Any]]:
+        """Mappings and settings for each search index (or alias) name."""
+        return {
             "learners": {
                 "mappings": {
                     "properties": {
@@ -138,7 +204,7 @@ class CDCConsumer:
                         "restricted_fields": {"type": "keyword"}
                     }
                 },
-                "settings": self.analyzer_manager.get_index_settings("general")
+                "settings": self.get_index_settings()
             },
             
             "lessons": {
@@ -175,7 +241,7 @@ class CDCConsumer:
                         "access_level": {"type": "keyword"}
                     }
                 },
-                "settings": self.analyzer_manager.get_index_settings("general")
+                "settings": self.get_index_settings()
             },
             
             "assessments": {
@@ -211,34 +277,9 @@ class CDCConsumer:
                         "data_sensitivity": {"type": "keyword"}
                     }
                 },
-                "settings": self.analyzer_manager.get_index_settings("general")
+                "settings": self.get_index_settings()
             }
         }
-        
-        # Create indices if they don't exist
-        for index_name, config in indices_config.items():
-            try:
-                if not await self.opensearch.indices.exists(index=index_name):
-                    await self.opensearch.indices.create(
-                        index=index_name,
-                        body=config
-                    )
-                    logger.info(f"Created OpenSearch index: {index_name}")
-                else:
-                    # Update settings and mappings
-                    await self.opensearch.indices.put_settings(
-                        index=index_name,
-                        body={"settings": config["settings"]}
-                    )
-                    await self.opensearch.indices.put_mapping(
-                        index=index_name,
-                        body=config["mappings"]
-                    )
-                    logger.info(f"Updated OpenSearch index: {index_name}")
-                    
-            except Exception as e:
-                logger.error(f"Failed to setup index {index_name}: {e}")
-                raise
     
     async def load_checkpoint(self):
         """Load the last processed event ID from checkpoint table."""
@@ -260,6 +301,8 @@ class CDCConsumer:
         except Exception as e:
             logger.warning(f"Failed to load checkpoint: {e}")
             self.last_processed_id = None
+        
+        self.fetch_cursor = self.last_processed_id
     
     async def save_checkpoint(self, event_id: str):
         """Save the last processed event ID to checkpoint table."""
@@ -284,7 +327,7 @@ class CDCConsumer:
             logger.error(f"Failed to save checkpoint: {e}")
     
     async def start(self):
-        """Start the CDC consumer loop."""
+        """Start the CDC consumer pipeline."""
         if self.running:
             logger.warning("CDC Consumer is already running")
             return
@@ -294,27 +337,22 @@ class CDCConsumer:
         
         try:
             while self.running:
+                self.pipeline = IndexingPipeline(
+                    fetch=self.fetch_next_events,
+                    prepare=self.prepare_batch,
+                    indexer=self.indexer,
+                    commit=self.commit_batch,
+                    config=self.indexing_config,
+                    poll_interval=self.poll_interval
+                )
                 try:
-                    # Fetch batch of events
-                    events = await self.fetch_events()
+                    await self.pipeline.run()
                     
-                    if events:
-                        # Process batch
-                        await self.process_batch(events)
-                        
-                        # Update checkpoint
-                        last_event = events[-1]
-                        await self.save_checkpoint(last_event.id)
-                        
-                        self.batches_processed += 1
-                        logger.info(f"Processed batch of {len(events)} events")
-                    else:
-                        # No events, wait before polling again
-                        await asyncio.sleep(self.poll_interval)
-                        
                 except Exception as e:
-                    logger.error(f"Error in CDC consumer loop: {e}")
-                    await asyncio.sleep(self.poll_interval * 2)  # Back-off
+                    logger.error(f"Error in CDC consumer pipeline: {e}")
+                    # Re-fetch whatever was in flight after the back-off
+                    self.fetch_cursor = self.last_processed_id
+                    await asyncio.sleep(self.poll_interval * 2)
                     
         finally:
             self.running = False
@@ -323,26 +361,45 @@ class CDCConsumer:
     async def stop(self):
         """Stop the CDC consumer."""
         self.running = False
+        if self.pipeline:
+            self.pipeline.stop()
         logger.info("Stopping CDC Consumer")
     
-    async def fetch_events(self) -> List[OutboxEvent]:
-        """Fetch unprocessed events from outbox table."""
+    async def fetch_next_events(self) -> List[OutboxEvent]:
+        """Fetch the next unprocessed page after the fetch cursor."""
+        events = await self.fetch_events(after_id=self.fetch_cursor)
+        if events:
+            self.fetch_cursor = events[-1].id
+        return events
+    
+    async def fetch_events(
+        self,
+        after_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        include_processed: bool = False,
+        up_to: Optional[str] = None
+    ) -> List[OutboxEvent]:
+        """Fetch a page of outbox events by keyset (id > after_id)."""
         if not self.pg_pool:
             return []
         
-        query = """
-            SELECT id, aggregate_id, aggregate_type, event_type, event_data, created_at
-            FROM outbox_events 
-            WHERE processed_at IS NULL
-        """
-        params = []
+        conditions = []
+        params: List[Any] = []
         
-        if self.last_processed_id:
-            query += " AND id > $1"
-            params.append(self.last_processed_id)
+        if not include_processed:
+            conditions.append("processed_at IS NULL")
+        if after_id:
+            params.append(after_id)
+            conditions.append(f"id > ${len(params)}")
+        if up_to:
+            params.append(up_to)
+            conditions.append(f"id <= ${len(params)}")
+        params.append(limit or self.batch_size)
         
-        query += " ORDER BY id LIMIT $" + str(len(params) + 1)
-        params.append(self.batch_size)
+        query = "SELECT id, aggregate_id, aggregate_type, event_type, event_data, created_at FROM outbox_events"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY id LIMIT ${len(params)}"
         
         try:
             async with self.pg_pool.acquire() as conn:
@@ -366,95 +423,233 @@ class CDCConsumer:
             logger.error(f"Failed to fetch events: {e}")
             return []
     
-    async def process_batch(self, events: List[OutboxEvent]):
-        """Process a batch of outbox events."""
-        if not self.opensearch:
-            return
+    async def prepare_batch(
+        self,
+        events: List[OutboxEvent],
+        index_names: Optional[Dict[str, str]] = None
+    ) -> PreparedBatch:
+        """
+        Turn a batch of outbox events into bulk actions.
+        
+        Events are coalesced per aggregate first (last write wins), so an
+        aggregate updated several times in a batch is transformed and
+        indexed once. Transforms for the whole batch run in the
+        BatchTransformer's worker processes. index_names redirects index
+        names, e.g. to the new indices during a reindex.
+        """
+        batch = PreparedBatch(
+            actions=[],
+            event_count=len(events),
+            last_event_id=events[-1].id if events else None
+        )
+        to_transform: List[tuple] = []
+        
+        for event in coalesce_events(events):
+            index_name = self.get_index_name(event.aggregate_type)
+            if not index_name:
+                logger.warning(f"No index mapping for aggregate type: {event.aggregate_type}")
+                continue
+            
+            # Tenants whose cached search results the batch changes; None
+            # when an event carries no tenant and the whole index is affected
+            batch.tenants_by_index.setdefault(index_name, set()).add(event.event_data.get("tenant_id"))
+            target = (index_names or {}).get(index_name, index_name)
+            
+            if event.event_type == EventType.DELETE:
+                batch.actions.append(BulkAction("delete", target, event.aggregate_id))
+            else:
+                to_transform.append((event, target))
         
-        # Group events by aggregate type for efficient processing
-        events_by_type: Dict[str, List[OutboxEvent]] = {}
-        for event in events:
-            if event.aggregate_type not in events_by_type:
-                events_by_type[event.aggregate_type] = []
-            events_by_type[event.aggregate_type].append(event)
+        # Transform and filter data; None if filtered out by RBAC or failed
+        transformed = await self.batch_transformer.transform_batch(
+            [(event.aggregate_type, event.event_data) for event, _ in to_transform]
+        )
         
-        # Process each aggregate type
-        for aggregate_type, type_events in events_by_type.items():
+        for (event, target), transformed_data in zip(to_transform, transformed):
+            if not transformed_data:
+                continue
             try:
-                await self.process_events_by_type(aggregate_type, type_events)
+                # Apply subject-specific analyzers
+                analyzed_data = self.analyzer_manager.enhance_document(
+                    transformed_data,
+                    event.aggregate_type
+                )
+                batch.actions.append(BulkAction("index", target, event.aggregate_id, analyzed_data))
                 
             except Exception as e:
-                logger.error(f"Failed to process {aggregate_type} events: {e}")
-                self.events_failed += len(type_events)
-                # Continue processing other types
+                logger.error(f"Failed to process event {event.id}: {e}")
+                batch.failed += 1
+        
+        return batch
+    
+    async def process_batch(self, events: List[OutboxEvent]) -> BulkResult:
+        """Transform and index one batch of outbox events without the pipeline."""
+        if not self.indexer:
+            return BulkResult()
+        
+        batch = await self.prepare_batch(events)
+        result = await self.indexer.index(batch.actions)
+        self._record_batch(batch, result)
+        return result
     
-    async def process_events_by_type(self, aggregate_type: str, events: List[OutboxEvent]):
-        """Process events for a specific aggregate type."""
-        index_name = self.get_index_name(aggregate_type)
-        if not index_name:
-            logger.warning(f"No index mapping for aggregate type: {aggregate_type}")
+    async def commit_batch(self, batch: PreparedBatch, result: BulkResult):
+        """Checkpoint an indexed batch and invalidate cached search results."""
+        self._record_batch(batch, result)
+        if batch.last_event_id:
+            await self.save_checkpoint(batch.last_event_id)
+        logger.info(
+            f"Indexed batch of {batch.event_count} events as {len(batch.actions)} actions "
+            f"in {result.requests} bulk requests"
+        )
+    
+    def _record_batch(self, batch: PreparedBatch, result: BulkResult):
+        self.events_processed += batch.event_count - batch.failed
+        self.events_failed += batch.failed + result.failed
+        self.batches_processed += 1
+        
+        for index_name, tenant_ids in batch.tenants_by_index.items():
+            task = asyncio.create_task(self.invalidate_search_cache(index_name, tenant_ids))
+            self._pending_invalidations.add(task)
+            task.add_done_callback(self._pending_invalidations.discard)
+    
+    async def invalidate_search_cache(self, index_name: str, tenant_ids: Set[Optional[str]]):
+        """Invalidate cached search results for the changed index and tenants."""
+        if not self.cache_invalidator or not tenant_ids:
             return
         
-        # Prepare bulk operations
-        bulk_ops = []
+        # Changes become searchable on the next refresh; invalidating
+        # before it would let a query re-cache the old results
+        await asyncio.sleep(refresh_interval_seconds(self.indexing_config.refresh_interval))
+        try:
+            await self.cache_invalidator.invalidate(index_name, tenant_ids)
+        except Exception as e:
+            # Cached entries still expire on their TTL
+            logger.error(f"Search cache invalidation failed for {index_name}: {e}")
+    
+    async def reindex(self, index_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Rebuild search indices from the full outbox and switch aliases.
         
-        for event in events:
-            try:
-                # Transform data based on event type
-                if event.event_type == EventType.DELETE:
-                    # Delete document
-                    bulk_ops.append({
-                        "_op_type": "delete",
-                        "_index": index_name,
-                        "_id": event.aggregate_id
-                    })
-                else:
-                    # Transform and filter data
-                    transformed_data = await self.transform_event_data(
-                        aggregate_type, 
-                        event.event_data
-                    )
-                    
-                    if transformed_data:  # May be None if filtered out by RBAC
-                        # Apply subject-specific analyzers
-                        analyzed_data = self.analyzer_manager.enhance_document(
-                            transformed_data,
-                            aggregate_type
-                        )
-                        
-                        bulk_ops.append({
-                            "_op_type": "index",
-                            "_index": index_name,
-                            "_id": event.aggregate_id,
-                            "_source": analyzed_data
-                        })
-                
-                self.events_processed += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to process event {event.id}: {e}")
-                self.events_failed += 1
+        Each index is rebuilt into a new timestamped index with refresh
+        disabled and no replicas, filled by replaying the outbox up to its
+        current high-water mark through the pipeline, then given its
+        normal settings, refreshed and atomically swapped in behind the
+        index name as an alias. Events that arrived during the rebuild are
+        replayed onto the alias afterwards. Returns throughput statistics.
+        """
+        definitions = self.get_index_definitions()
+        aliases = index_names or list(definitions)
+        suffix = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        targets = {alias: f"{alias}_{suffix}" for alias in aliases}
+        
+        for alias, target in targets.items():
+            settings = dict(definitions[alias]["settings"])
+            settings.update({"refresh_interval": "-1", "number_of_replicas": 0})
+            await self.opensearch.indices.create(
+                index=target,
+                body={"mappings": definitions[alias]["mappings"], "settings": settings}
+            )
+            logger.info(f"Created reindex target {target} for {alias}")
+        
+        high_water = await self.get_outbox_high_water()
+        started = time.monotonic()
+        stats = await self._replay_outbox(None, high_water, targets)
+        
+        for alias, target in targets.items():
+            replicas = definitions[alias]["settings"].get("number_of_replicas", 1)
+            await self.opensearch.indices.put_settings(
+                index=target,
+                body={"index": {
+                    "refresh_interval": self.indexing_config.refresh_interval,
+                    "number_of_replicas": replicas
+                }}
+            )
+            await self.opensearch.indices.refresh(index=target)
+        await self.switch_aliases(targets)
+        
+        # Catch up on events written while the rebuild ran
+        if high_water:
+            catch_up = await self._replay_outbox(high_water, None, None)
+            stats["events"] += catch_up["events"]
+            stats["docs_indexed"] += catch_up["docs_indexed"]
+            stats["docs_failed"] += catch_up["docs_failed"]
+        
+        elapsed = time.monotonic() - started
+        stats.update({
+            "indices": targets,
+            "seconds": round(elapsed, 2),
+            "docs_per_second": round(stats["docs_indexed"] / elapsed, 1) if elapsed > 0 else 0.0
+        })
+        logger.info(f"Reindex complete: {stats}")
+        return stats
+    
+    async def _replay_outbox(
+        self,
+        after_id: Optional[str],
+        up_to: Optional[str],
+        index_names: Optional[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Run every outbox event in (after_id, up_to] through the indexing pipeline."""
+        cursor = after_id
+        
+        async def fetch() -> List[OutboxEvent]:
+            nonlocal cursor
+            events = await self.fetch_events(
+                after_id=cursor,
+                limit=self.indexing_config.reindex_batch_size,
+                include_processed=True,
+                up_to=up_to
+            )
+            if events:
+                cursor = events[-1].id
+            return events
         
-        # Execute bulk operations
-        if bulk_ops:
+        async def commit(batch: PreparedBatch, result: BulkResult):
+            if index_names is None:
+                self._record_batch(batch, result)
+        
+        pipeline = IndexingPipeline(
+            fetch=fetch,
+            prepare=lambda events: self.prepare_batch(events, index_names),
+            indexer=self.indexer,
+            commit=commit,
+            config=self.indexing_config,
+            stop_when_idle=True
+        )
+        await pipeline.run()
+        return dict(pipeline.stats)
+    
+    async def get_outbox_high_water(self) -> Optional[str]:
+        """Highest outbox event id at this moment."""
+        async with self.pg_pool.acquire() as conn:
+            return await conn.fetchval("SELECT max(id) FROM outbox_events")
+    
+    async def switch_aliases(self, targets: Dict[str, str]):
+        """Atomically point each alias at its new index and drop the old ones."""
+        actions: List[Dict[str, Any]] = []
+        previous: List[str] = []
+        
+        for alias, target in targets.items():
+            actions.append({"add": {"index": target, "alias": alias}})
             try:
-                response = await helpers.async_bulk(
-                    self.opensearch,
-                    bulk_ops,
-                    refresh=True
-                )
-                
-                # Check for errors
-                if response[1]:  # Errors occurred
-                    logger.warning(f"Bulk operation had {len(response[1])} errors")
-                    for error in response[1][:5]:  # Log first 5 errors
-                        logger.error(f"Bulk error: {error}")
-                
-                logger.info(f"Bulk indexed {len(bulk_ops)} documents to {index_name}")
-                
-            except Exception as e:
-                logger.error(f"Bulk indexing failed: {e}")
-                raise
+                current = await self.opensearch.indices.get_alias(name=alias)
+                for index_name in current:
+                    actions.append({"remove": {"index": index_name, "alias": alias}})
+                    previous.append(index_name)
+            except NotFoundError:
+                if await self.opensearch.indices.exists(index=alias):
+                    # First reindex: a concrete index still holds the name
+                    actions.append({"remove_index": {"index": alias}})
+        
+        await self.opensearch.indices.update_aliases(body={"actions": actions})
+        logger.info(f"Switched aliases: {targets}")
+        
+        for index_name in previous:
+            await self.opensearch.indices.delete(index=index_name)
+            
+        # Cached results over these names now come from the new indices
+        for alias in targets:
+            await self.invalidate_search_cache(alias, {None})
     
     async def transform_event_data(self, aggregate_type: str, event_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Transform and filter event data for indexing."""
@@ -507,7 +702,9 @@ class CDCConsumer:
                 "events_processed": self.events_processed,
                 "events_failed": self.events_failed,
                 "batches_processed": self.batches_processed,
-                "last_processed_id": self.last_processed_id
+                "last_processed_id": self.last_processed_id,
+                "docs_per_second": round(self.pipeline.docs_per_second(), 1) if self.pipeline else 0.0,
+                "pipeline": dict(self.pipeline.stats) if self.pipeline else {}
             },
             "running": self.running
         }
@@ -515,6 +712,11 @@ class CDCConsumer:
     async def close(self):
         """Clean up resources."""
         self.running = False
+        if self.pipeline:
+            self.pipeline.stop()
+        for task in list(self._pending_invalidations):
+            task.cancel()
+        self.batch_transformer.close()
         
         if self.opensearch:
             await self.opensearch.close()
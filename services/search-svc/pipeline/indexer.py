@@ -0,0 +1,319 @@
+"""
+Pipelined Bulk Indexer for Search Pipeline
+
+Overlaps outbox fetching, document transformation and OpenSearch bulk
+I/O as bounded-queue stages, coalesces events per aggregate within a
+batch and sizes bulk requests by bytes instead of action counts.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexingConfig:
+    """Throughput tuning for the CDC indexer."""
+    # A bulk request is closed at whichever limit is reached first
+    max_bulk_bytes: int = 5 * 1024 * 1024
+    max_bulk_actions: int = 5000
+    # Bulk requests in flight at once, and batches buffered between stages
+    bulk_concurrency: int = 4
+    pipeline_depth: int = 4
+    # Index refresh interval; documents become searchable within it, so
+    # batches never force a refresh
+    refresh_interval: str = "1s"
+    # Outbox page size for bulk reindexing
+    reindex_batch_size: int = 5000
+    # Transform worker processes (None: one per CPU, 0: in-process) and
+    # documents sent to a worker at a time
+    transform_workers: Optional[int] = None
+    transform_chunk_size: int = 64
+    # Back-off for failed bulk batches and rejected (429) bulk items
+    retry_backoff: float = 1.0
+    max_retry_backoff: float = 30.0
+    max_item_retries: int = 3
+
+
+@dataclass
+class BulkAction:
+    """A single bulk index or delete operation."""
+    op_type: str  # "index" or "delete"
+    index: str
+    doc_id: str
+    source: Optional[Dict[str, Any]] = None
+
+    def serialize(self) -> bytes:
+        """NDJSON lines for the bulk body."""
+        header = json.dumps({self.op_type: {"_index": self.index, "_id": self.doc_id}})
+        if self.source is None:
+            return (header + "\n").encode()
+        return (header + "\n" + json.dumps(self.source, default=str) + "\n").encode()
+
+
+@dataclass
+class PreparedBatch:
+    """Bulk actions for a fetched batch and what to commit once indexed."""
+    actions: List[BulkAction]
+    event_count: int
+    last_event_id: Optional[str] = None
+    failed: int = 0
+    # Tenants whose documents changed, per index (None: tenant unknown)
+    tenants_by_index: Dict[str, Set[Optional[str]]] = field(default_factory=dict)
+
+
+@dataclass
+class BulkResult:
+    """Outcome of indexing a batch of bulk actions."""
+    succeeded: int = 0
+    failed: int = 0
+    requests: int = 0
+    bytes_sent: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def coalesce_events(events: Sequence[Any]) -> List[Any]:
+    """Keep the last event per aggregate, ordered by those last events.
+
+    Within a batch only the final state of an aggregate matters, so
+    earlier inserts/updates (and a delete followed by a re-insert)
+    collapse into one bulk action - last write wins.
+    """
+    latest: Dict[Tuple[str, str], Any] = {}
+    for event in events:
+        key = (event.aggregate_type, event.aggregate_id)
+        latest.pop(key, None)
+        latest[key] = event
+    return list(latest.values())
+
+
+def refresh_interval_seconds(interval: str) -> float:
+    """Seconds for an OpenSearch time value such as "1s" or "500ms"; 0 if disabled."""
+    value = interval.strip().lower()
+    if value in ("-1", ""):
+        return 0.0
+    for suffix, scale in (("ms", 0.001), ("s", 1.0), ("m", 60.0)):
+        if value.endswith(suffix):
+            return float(value[:-len(suffix)]) * scale
+    return float(value) / 1000
+
+
+class BulkIndexer:
+    """
+    Sends bulk actions as byte-sized requests, several at a time.
+
+    Actions are serialized once; requests are closed at max_bulk_bytes
+    or max_bulk_actions. Items rejected with 429 are retried with
+    back-off, and deletes of documents that are already gone count as
+    successful.
+    """
+
+    def __init__(self, client: Any, config: Optional[IndexingConfig] = None):
+        self.client = client
+        self.config = config or IndexingConfig()
+
+    def chunk(self, actions: Iterable[BulkAction]) -> List[Tuple[List[BulkAction], bytes]]:
+        """Split actions into (actions, NDJSON body) requests bounded by bytes and count."""
+        chunks: List[Tuple[List[BulkAction], bytes]] = []
+        current: List[BulkAction] = []
+        lines: List[bytes] = []
+        size = 0
+
+        for action in actions:
+            line = action.serialize()
+            if current and (size + len(line) > self.config.max_bulk_bytes
+                            or len(current) >= self.config.max_bulk_actions):
+                chunks.append((current, b"".join(lines)))
+                current, lines, size = [], [], 0
+            current.append(action)
+            lines.append(line)
+            size += len(line)
+
+        if current:
+            chunks.append((current, b"".join(lines)))
+        return chunks
+
+    async def index(self, actions: Sequence[BulkAction]) -> BulkResult:
+        """Index actions; raises if a bulk request fails outright."""
+        result = BulkResult()
+        if not actions:
+            return result
+
+        semaphore = asyncio.Semaphore(self.config.bulk_concurrency)
+
+        async def send(chunk: List[BulkAction], body: bytes):
+            async with semaphore:
+                await self._send(chunk, body, result)
+
+        await asyncio.gather(*(send(chunk, body) for chunk, body in self.chunk(actions)))
+        return result
+
+    async def _send(self, chunk: List[BulkAction], body: bytes, result: BulkResult):
+        backoff = self.config.retry_backoff
+        for attempt in range(self.config.max_item_retries + 1):
+            result.requests += 1
+            result.bytes_sent += len(body)
+            response = await self.client.bulk(body=body)
+
+            rejected: List[BulkAction] = []
+            for action, item in zip(chunk, response.get("items", [])):
+                outcome = item.get(action.op_type, {})
+                status = outcome.get("status", 500)
+                if status < 300 or (action.op_type == "delete" and status == 404):
+                    result.succeeded += 1
+                elif status == 429 and attempt < self.config.max_item_retries:
+                    rejected.append(action)
+                else:
+                    result.failed += 1
+                    if len(result.errors) < 20:
+                        result.errors.append({"_id": action.doc_id, "_index": action.index, **outcome})
+
+            if not rejected:
+                return
+            chunk = rejected
+            body = b"".join(action.serialize() for action in rejected)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.config.max_retry_backoff)
+
+
+class IndexingPipeline:
+    """
+    Runs fetch -> prepare -> bulk index -> commit as overlapping stages.
+
+    Stages are connected by queues of pipeline_depth batches, so the
+    next outbox page is fetched and transformed while the previous one
+    is being indexed. Batches are indexed and committed strictly in
+    fetch order; a batch whose bulk request fails is retried with
+    back-off rather than skipped, so checkpoints never pass it.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[List[Any]]],
+        prepare: Callable[[List[Any]], Any],
+        indexer: BulkIndexer,
+        commit: Callable[[PreparedBatch, BulkResult], Awaitable[None]],
+        config: Optional[IndexingConfig] = None,
+        poll_interval: float = 5.0,
+        stop_when_idle: bool = False
+    ):
+        self.fetch = fetch
+        self.prepare = prepare
+        self.indexer = indexer
+        self.commit = commit
+        self.config = config or IndexingConfig()
+        self.poll_interval = poll_interval
+        self.stop_when_idle = stop_when_idle
+
+        self.running = False
+        self.started_at: Optional[float] = None
+        self.stats = {
+            "events": 0,
+            "docs_indexed": 0,
+            "docs_failed": 0,
+            "batches": 0,
+            "bulk_requests": 0,
+            "bulk_bytes": 0
+        }
+
+    def docs_per_second(self) -> float:
+        if not self.started_at:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        return self.stats["docs_indexed"] / elapsed if elapsed > 0 else 0.0
+
+    def stop(self):
+        """Stop fetching; batches already fetched are still indexed."""
+        self.running = False
+
+    async def run(self):
+        """Run until stopped (or, with stop_when_idle, until the source is drained)."""
+        self.running = True
+        self.started_at = time.monotonic()
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=self.config.pipeline_depth)
+        prepared: asyncio.Queue = asyncio.Queue(maxsize=self.config.pipeline_depth)
+
+        tasks = [
+            asyncio.create_task(self._fetch_stage(fetched)),
+            asyncio.create_task(self._prepare_stage(fetched, prepared)),
+            asyncio.create_task(self._index_stage(prepared))
+        ]
+        try:
+            # Any stage failing ends the run; the index stage ends it normally
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+            await tasks[-1]
+        finally:
+            self.running = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch_stage(self, fetched: asyncio.Queue):
+        backoff = self.config.retry_backoff
+        while self.running:
+            try:
+                events = await self.fetch()
+                backoff = self.config.retry_backoff
+            except Exception as e:
+                logger.error(f"Outbox fetch failed: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.config.max_retry_backoff)
+                continue
+
+            if events:
+                await fetched.put(events)
+            elif self.stop_when_idle:
+                break
+            else:
+                await asyncio.sleep(self.poll_interval)
+        await fetched.put(None)
+
+    async def _prepare_stage(self, fetched: asyncio.Queue, prepared: asyncio.Queue):
+        while True:
+            events = await fetched.get()
+            if events is None:
+                await prepared.put(None)
+                return
+            batch = self.prepare(events)
+            if inspect.isawaitable(batch):
+                batch = await batch
+            await prepared.put(batch)
+
+    async def _index_stage(self, prepared: asyncio.Queue):
+        while True:
+            batch = await prepared.get()
+            if batch is None:
+                return
+
+            backoff = self.config.retry_backoff
+            while True:
+                try:
+                    result = await self.indexer.index(batch.actions)
+                    break
+                except Exception as e:
+                    if not self.running and not self.stop_when_idle:
+                        # Stopping: leave the batch for the next run
+                        raise
+                    logger.error(f"Bulk indexing failed, retrying in {backoff:.1f}s: {e}")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, self.config.max_retry_backoff)
+
+            if result.errors:
+                logger.warning(f"Bulk batch had {result.failed} failed items")
+                for error in result.errors[:5]:
+                    logger.error(f"Bulk error: {error}")
+
+            self.stats["events"] += batch.event_count
+            self.stats["docs_indexed"] += result.succeeded
+            self.stats["docs_failed"] += result.failed
+            self.stats["batches"] += 1
+            self.stats["bulk_requests"] += result.requests
+            self.stats["bulk_bytes"] += result.bytes_sent
+            await self.commit(batch, result)
@@ -3,9 +3,14 @@ Data Transformation and RBAC Filtering for Search Pipeline
 
 Transforms raw database events into search-optimized documents
 with role-based access control filtering and field masking.
+BatchTransformer runs both over batches of events in a process pool.
 """
+import asyncio
+import multiprocessing
+import os
 import re
-from typing import Dict, List, Optional, Any, Set
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Any, Sequence, Set, Tuple
 from datetime import datetime
 from dataclasses import dataclass
 import hashlib
@@ -32,6 +37,37 @@ class DataTransformer:
     with subject-specific processing.
     """
     
+    # Subject patterns, compiled once per process
+    FRACTION = re.compile(r'\b(\d+)/(\d+)\b')
+    EXPONENT = re.compile(r'\^(\d+)')
+    SQUARE_ROOT = re.compile(r'√(\d+)')
+    GRADE = re.compile(r'grade\s+(\d+)', re.IGNORECASE)
+    SCIENTIFIC_NOTATION = re.compile(r'(\d+)\s*x\s*10\^([+-]?\d+)')
+    DATE_RANGE = re.compile(r'\b(\d{4})\s*-\s*(\d{4})\b')
+    WHITESPACE = re.compile(r'\s+')
+    NAME_CHARS = re.compile(r'[^\w\s-]')
+    
+    MATH_TERMS = {
+        '+': 'plus addition',
+        '-': 'minus subtraction', 
+        '*': 'times multiplication multiply',
+        '/': 'divided division',
+        '=': 'equals equal',
+        '>': 'greater than',
+        '<': 'less than',
+        '≥': 'greater than or equal',
+        '≤': 'less than or equal'
+    }
+    
+    # Common ELA concepts for better searchability
+    ELA_EXPANSIONS = {
+        'metaphor': 'metaphor figurative language comparison',
+        'simile': 'simile figurative language like as comparison',
+        'alliteration': 'alliteration repetition sound',
+        'theme': 'theme main idea message',
+        'plot': 'plot story structure narrative'
+    }
+    
     def __init__(self):
         self.text_processors = {
             "mathematics": self._process_math_content,
@@ -256,9 +292,9 @@ class DataTransformer:
         content = self._extract_math_terms(content)
         
         # Normalize mathematical notation
-        content = re.sub(r'\b(\d+)/(\d+)\b', r'\1 divided by \2', content)  # Fractions
-        content = re.sub(r'\^(\d+)', r' to the power of \1', content)  # Exponents
-        content = re.sub(r'√(\d+)', r'square root of \1', content)  # Square roots
+        content = self.FRACTION.sub(r'\1 divided by \2', content)  # Fractions
+        content = self.EXPONENT.sub(r' to the power of \1', content)  # Exponents
+        content = self.SQUARE_ROOT.sub(r'square root of \1', content)  # Square roots
         
         return content
     
@@ -268,7 +304,7 @@ class DataTransformer:
         content = self._extract_ela_terms(content)
         
         # Normalize reading level indicators
-        content = re.sub(r'grade\s+(\d+)', r'grade level \1', content, flags=re.IGNORECASE)
+        content = self.GRADE.sub(r'grade level \1', content)
         
         return content
     
@@ -281,25 +317,13 @@ class DataTransformer:
     def _process_social_studies_content(self, content: str) -> str:
         """Process social studies content for search optimization."""
         # Extract historical dates and events
-        content = re.sub(r'\b(\d{4})\s*-\s*(\d{4})\b', r'\1 to \2', content)  # Date ranges
+        content = self.DATE_RANGE.sub(r'\1 to \2', content)  # Date ranges
         return content
     
     def _extract_math_terms(self, content: str) -> str:
         """Extract and normalize mathematical terms."""
         # Mathematical operations
-        math_terms = {
-            '+': 'plus addition',
-            '-': 'minus subtraction', 
-            '*': 'times multiplication multiply',
-            '/': 'divided division',
-            '=': 'equals equal',
-            '>': 'greater than',
-            '<': 'less than',
-            '≥': 'greater than or equal',
-            '≤': 'less than or equal'
-        }
-        
-        for symbol, words in math_terms.items():
+        for symbol, words in self.MATH_TERMS.items():
             if symbol in content:
                 content = content.replace(symbol, f' {words} ')
         
@@ -307,17 +331,9 @@ class DataTransformer:
     
     def _extract_ela_terms(self, content: str) -> str:
         """Extract and normalize ELA terms."""
-        # Common ELA concepts for better searchability
-        ela_expansions = {
-            'metaphor': 'metaphor figurative language comparison',
-            'simile': 'simile figurative language like as comparison',
-            'alliteration': 'alliteration repetition sound',
-            'theme': 'theme main idea message',
-            'plot': 'plot story structure narrative'
-        }
-        
-        for term, expansion in ela_expansions.items():
-            if term in content.lower():
+        lowered = content.lower()
+        for term, expansion in self.ELA_EXPANSIONS.items():
+            if term in lowered:
                 content = content + f' {expansion}'
         
         return content
@@ -325,7 +341,7 @@ class DataTransformer:
     def _extract_science_terms(self, content: str) -> str:
         """Extract and normalize science terms."""
         # Scientific notation and units
-        content = re.sub(r'(\d+)\s*x\s*10\^([+-]?\d+)', r'\1 times ten to the \2', content)
+        content = self.SCIENTIFIC_NOTATION.sub(r'\1 times ten to the \2', content)
         return content
     
     def _normalize_name(self, name: str) -> str:
@@ -334,8 +350,8 @@ class DataTransformer:
             return ""
         
         # Basic cleaning and standardization
-        name = re.sub(r'\s+', ' ', name.strip())  # Normalize whitespace
-        name = re.sub(r'[^\w\s-]', '', name)     # Remove special chars except hyphens
+        name = self.WHITESPACE.sub(' ', name.strip())  # Normalize whitespace
+        name = self.NAME_CHARS.sub('', name)           # Remove special chars except hyphens
         
         return name
     
@@ -344,7 +360,7 @@ class DataTransformer:
         text = " ".join([part for part in text_parts if part])
         
         # Clean and normalize
-        text = re.sub(r'\s+', ' ', text)  # Normalize whitespace
+        text = self.WHITESPACE.sub(' ', text)  # Normalize whitespace
         text = text.strip()
         
         return text
@@ -377,6 +393,15 @@ class RBACFilter:
     def __init__(self):
         self.rbac_rules = self._load_rbac_rules()
         self.sensitive_patterns = self._load_sensitive_patterns()
+        
+        # Compiled once: one combined pass finds fields that need redaction,
+        # the individual patterns only run on those
+        self._compiled_patterns = {
+            name: re.compile(pattern) for name, pattern in self.sensitive_patterns.items()
+        }
+        self._any_sensitive = re.compile(
+            "|".join(f"(?:{pattern})" for pattern in self.sensitive_patterns.values())
+        )
     
     def _load_rbac_rules(self) -> List[RBACRule]:
         """Load RBAC rules configuration."""
@@ -457,6 +482,15 @@ class RBACFilter:
         Returns None if document should not be indexed for the given roles,
         otherwise returns filtered document.
         """
+        return self.filter_document_sync(entity_type, document, user_roles)
+    
+    def filter_document_sync(
+        self,
+        entity_type: str,
+        document: Dict[str, Any],
+        user_roles: Optional[Set[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Synchronous filter_document, for worker processes and batch transforms."""
         if not user_roles:
             user_roles = {"public"}  # Default to most restrictive
         
@@ -478,7 +512,7 @@ class RBACFilter:
                         )
             
             # Scan for sensitive data patterns
-            filtered_doc = await self._scan_sensitive_data(filtered_doc)
+            filtered_doc = self._redact_sensitive_data(filtered_doc)
             
             # Add RBAC metadata to document
             filtered_doc["visible_to_roles"] = list(user_roles)
@@ -523,15 +557,20 @@ class RBACFilter:
     
     async def _scan_sensitive_data(self, document: Dict[str, Any]) -> Dict[str, Any]:
         """Scan document for sensitive data patterns and mask them."""
+        return self._redact_sensitive_data(document)
+    
+    def _redact_sensitive_data(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Mask sensitive data patterns in string fields."""
         for field_name, value in document.items():
-            if not isinstance(value, str):
+            if not isinstance(value, str) or not self._any_sensitive.search(value):
                 continue
             
-            for pattern_name, pattern in self.sensitive_patterns.items():
-                if re.search(pattern, value):
-                    # Found sensitive data, apply redaction
-                    document[field_name] = re.sub(pattern, "[REDACTED]", value)
+            # Apply each pattern to the already-redacted value
+            for pattern_name, pattern in self._compiled_patterns.items():
+                if pattern.search(value):
+                    value = pattern.sub("[REDACTED]", value)
                     logger.info(f"Redacted {pattern_name} pattern in field {field_name}")
+            document[field_name] = value
         
         return document
     
@@ -560,3 +599,97 @@ class RBACFilter:
                 restricted.append(rule.field_name)
         
         return restricted
+
+
+def transform_document(
+    transformer: DataTransformer,
+    rbac_filter: RBACFilter,
+    entity_type: str,
+    data: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Transform and RBAC-filter one document; None if filtered out or failed."""
+    try:
+        return rbac_filter.filter_document_sync(entity_type, transformer.transform(entity_type, data))
+    except Exception as e:
+        logger.error(f"Data transformation failed: {e}")
+        return None
+
+
+# Per-process transformer state, built once by each pool worker
+_worker_transformer: Optional[DataTransformer] = None
+_worker_rbac_filter: Optional[RBACFilter] = None
+
+
+def _init_worker():
+    global _worker_transformer, _worker_rbac_filter
+    _worker_transformer = DataTransformer()
+    _worker_rbac_filter = RBACFilter()
+
+
+def _transform_chunk(items: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+    return [
+        transform_document(_worker_transformer, _worker_rbac_filter, entity_type, data)
+        for entity_type, data in items
+    ]
+
+
+class BatchTransformer:
+    """
+    Transforms batches of (entity_type, data) pairs in a process pool.
+    
+    The regex-heavy transform and sensitive-data scan are CPU-bound, so
+    running them on the consumer's event loop serializes the pipeline.
+    Batches are split into chunks of chunk_size and spread over workers;
+    each worker builds its DataTransformer and RBACFilter (and compiles
+    their patterns) once. Results come back in input order. With
+    workers=0 batches are transformed in-process.
+    """
+    
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 64):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_size = chunk_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._transformer: Optional[DataTransformer] = None
+        self._rbac_filter: Optional[RBACFilter] = None
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and
+            # connection pools is not safe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return self._pool
+    
+    def transform_batch_sync(self, items: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+        """Transform a batch in the calling process."""
+        if self._transformer is None:
+            self._transformer = DataTransformer()
+            self._rbac_filter = RBACFilter()
+        return [
+            transform_document(self._transformer, self._rbac_filter, entity_type, data)
+            for entity_type, data in items
+        ]
+    
+    async def transform_batch(self, items: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+        """Transform a batch in the pool; None entries were filtered out or failed."""
+        if not items:
+            return []
+        if self.workers <= 0:
+            return self.transform_batch_sync(items)
+        
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(pool, _transform_chunk, items[start:start + self.chunk_size])
+            for start in range(0, len(items), self.chunk_size)
+        ))
+        return [document for chunk in chunks for document in chunk]
+    
+    def close(self):
+        """Shut the worker processes down."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,70 @@
+"""
+AIVO Search Service - Batch Transform Tests
+S1-13 Implementation - Process-pool document transforms
+
+Tests BatchTransformer against the per-document path:
+- Pool workers return the same documents, in input order
+- In-process batches (workers=0) match as well
+- Every sensitive pattern in a field is redacted
+"""
+
+import pytest
+
+from pipeline.transform import BatchTransformer, DataTransformer, RBACFilter
+
+
+def make_items():
+    items = []
+    for i in range(40):
+        if i % 3 == 0:
+            items.append(("lesson", {
+                "id": f"lesson-{i}", "title": f"Fractions {i}", "subject": "mathematics",
+                "content": "Add 1/2 + 1/4 and compare 3 > 2", "tags": ["fractions"], "tenant_id": "t1"
+            }))
+        elif i % 3 == 1:
+            items.append(("iep", {
+                "id": f"iep-{i}", "student_name": "Sam Lee", "goals": "Reads grade 3 passages with a theme",
+                "contact": "parent 555-123-4567 or sam@example.org", "tenant_id": "t1"
+            }))
+        else:
+            items.append(("learner", {
+                "id": f"learner-{i}", "name": "  Ana   O'Neil ", "email": "Ana@School.org", "tenant_id": "t2"
+            }))
+    return items
+
+
+async def expected_documents(items):
+    transformer, rbac_filter = DataTransformer(), RBACFilter()
+    return [
+        await rbac_filter.filter_document(entity_type, transformer.transform(entity_type, dict(data)))
+        for entity_type, data in items
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pool_matches_single_document_path_in_order():
+    items = make_items()
+    batch_transformer = BatchTransformer(workers=2, chunk_size=7)
+    try:
+        documents = await batch_transformer.transform_batch(items)
+    finally:
+        batch_transformer.close()
+
+    assert documents == await expected_documents(items)
+    assert [document["id"] for document in documents] == [data["id"] for _, data in items]
+
+
+@pytest.mark.asyncio
+async def test_in_process_batch_matches():
+    items = make_items()
+    documents = await BatchTransformer(workers=0).transform_batch(items)
+    assert documents == await expected_documents(items)
+
+
+def test_all_sensitive_patterns_redacted():
+    document = RBACFilter().filter_document_sync("iep", {
+        "contact": "ssn 123-45-6789, email sam@example.org"
+    })
+    assert "123-45-6789" not in document["contact"]
+    assert "sam@example.org" not in document["contact"]
+    assert document["contact"].count("[REDACTED]") == 2
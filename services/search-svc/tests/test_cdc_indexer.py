@@ -0,0 +1,175 @@
+"""
+AIVO Search Service - CDC Indexer Tests
+S1-13 Implementation - Pipelined bulk indexing
+
+Tests the pipelined indexer used by the CDC consumer:
+- Events for the same aggregate coalesce to the last write
+- Bulk requests are sized by bytes and action count
+- Rejected (429) items are retried, deletes of missing documents succeed
+- Fetch, prepare and bulk stages overlap and commit in order
+- A failed bulk batch is retried, never skipped
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from pipeline.indexer import (
+    BulkAction,
+    BulkIndexer,
+    IndexingConfig,
+    IndexingPipeline,
+    PreparedBatch,
+    coalesce_events,
+    refresh_interval_seconds
+)
+
+
+@dataclass
+class Event:
+    id: str
+    aggregate_type: str
+    aggregate_id: str
+    event_type: str = "UPDATE"
+
+
+class FakeBulkClient:
+    """Answers bulk requests, optionally rejecting or failing some"""
+
+    def __init__(self, reject_first: int = 0, fail_requests: int = 0, delay: float = 0.0):
+        self.reject_first = reject_first
+        self.fail_requests = fail_requests
+        self.delay = delay
+        self.bodies = []
+
+    async def bulk(self, body):
+        await asyncio.sleep(self.delay)
+        if self.fail_requests:
+            self.fail_requests -= 1
+            raise ConnectionError("bulk endpoint unavailable")
+        self.bodies.append(body)
+        items = []
+        for header in body.decode().splitlines():
+            action = json.loads(header)
+            if len(action) != 1 or not ({"index", "delete"} & set(action)):
+                continue  # document source line
+            op_type = next(iter(action))
+            if self.reject_first:
+                self.reject_first -= 1
+                status = 429
+            elif op_type == "delete":
+                status = 404
+            else:
+                status = 201
+            items.append({op_type: {"_id": action[op_type]["_id"], "status": status}})
+        return {"errors": False, "items": items}
+
+
+def make_config(**overrides) -> IndexingConfig:
+    return IndexingConfig(retry_backoff=0.01, **overrides)
+
+
+def test_coalesce_last_write_wins():
+    events = [
+        Event("1", "lesson", "a"),
+        Event("2", "lesson", "b"),
+        Event("3", "lesson", "a", "DELETE"),
+        Event("4", "learner", "a"),
+        Event("5", "lesson", "a", "INSERT")
+    ]
+
+    coalesced = coalesce_events(events)
+
+    assert [event.id for event in coalesced] == ["2", "4", "5"]
+    assert refresh_interval_seconds("500ms") == 0.5
+    assert refresh_interval_seconds("-1") == 0.0
+
+
+def test_bulk_requests_sized_by_bytes():
+    indexer = BulkIndexer(FakeBulkClient(), make_config(max_bulk_bytes=1000, max_bulk_actions=8))
+    actions = [BulkAction("index", "lessons", str(i), {"title": "x" * 100}) for i in range(30)]
+
+    chunks = indexer.chunk(actions)
+
+    assert sum(len(chunk) for chunk, _ in chunks) == 30
+    assert all(len(body) <= 1000 for _, body in chunks)
+    assert all(len(chunk) <= 8 for chunk, _ in chunks)
+    assert len(chunks) > 30 * len(actions[0].serialize()) // 1000
+
+
+@pytest.mark.asyncio
+async def test_rejected_items_retried_and_missing_deletes_succeed():
+    client = FakeBulkClient(reject_first=2)
+    indexer = BulkIndexer(client, make_config())
+    actions = [BulkAction("index", "lessons", str(i), {"title": "t"}) for i in range(4)]
+    actions.append(BulkAction("delete", "lessons", "gone"))
+
+    result = await indexer.index(actions)
+
+    assert result.succeeded == 5
+    assert result.failed == 0
+    assert result.requests == 2
+    # Only the two rejected items were resent
+    assert client.bodies[1].count(b'"index"') == 2
+
+
+@pytest.mark.asyncio
+async def test_pipeline_overlaps_stages_and_commits_in_order():
+    pages = [[Event(f"{page}-{i}", "lesson", f"{page}-{i}") for i in range(10)] for page in range(8)]
+    source = iter(pages)
+    committed = []
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return next(source, [])
+
+    async def prepare(events):
+        return PreparedBatch(
+            actions=[BulkAction("index", "lessons", event.aggregate_id, {}) for event in events],
+            event_count=len(events),
+            last_event_id=events[-1].id
+        )
+
+    async def commit(batch, result):
+        committed.append(batch.last_event_id)
+
+    pipeline = IndexingPipeline(
+        fetch, prepare, BulkIndexer(FakeBulkClient(delay=0.05), make_config()), commit,
+        make_config(), stop_when_idle=True
+    )
+    start = time.perf_counter()
+    await pipeline.run()
+
+    assert committed == [page[-1].id for page in pages]
+    assert pipeline.stats["docs_indexed"] == 80
+    # Strictly sequential fetch + bulk would take 8 x 0.1 s
+    assert time.perf_counter() - start < 0.7
+
+
+@pytest.mark.asyncio
+async def test_failed_bulk_batch_retried_not_skipped():
+    source = iter([[Event("1", "lesson", "a")], [Event("2", "lesson", "b")]])
+    committed = []
+
+    async def fetch():
+        return next(source, [])
+
+    def prepare(events):
+        return PreparedBatch(
+            actions=[BulkAction("index", "lessons", event.aggregate_id, {}) for event in events],
+            event_count=len(events),
+            last_event_id=events[-1].id
+        )
+
+    async def commit(batch, result):
+        committed.append((batch.last_event_id, result.succeeded))
+
+    client = FakeBulkClient(fail_requests=2)
+    pipeline = IndexingPipeline(fetch, prepare, BulkIndexer(client, make_config()), commit,
+                                make_config(), stop_when_idle=True)
+    await pipeline.run()
+
+    assert committed == [("1", 1), ("2", 1)]
@@ -0,0 +1,107 @@
+"""
+AIVO Search Service - Query Template and RBAC Cache Tests
+S1-13 Implementation - Per-principal caches
+
+Tests the request-path caches:
+- Spliced query templates serialize exactly like freshly built bodies
+- RBAC filter fragments are cached per principal
+- Parsed token contexts are reused until the JWT expires
+"""
+
+import json
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.client import OpenSearchClient, SearchConfig, SearchContext
+from app.rbac import Permission, RBACManager, Role
+
+
+def make_context(user_id: str = "teacher_1", school_ids=("school_a",), roles=("teacher",)) -> SearchContext:
+    return SearchContext(
+        user_id=user_id,
+        tenant_id="tenant_1",
+        school_ids=list(school_ids),
+        roles=list(roles),
+        permissions=["search:school"]
+    )
+
+
+class TestQueryTemplates:
+    """Test precompiled query templates against the dict builders."""
+
+    def setup_method(self):
+        self.client = OpenSearchClient(SearchConfig())
+
+    @pytest.mark.parametrize("query", ["fractions", 'say "hi" \\ there', "分数 ñ", "   "])
+    def test_search_body_matches_builder(self, query):
+        context = make_context()
+        sort = [{"updated_at": {"order": "asc"}}]
+
+        rendered = self.client._render_search_body(query, context, ["iep"], 10, 20, sort)
+
+        expected = self.client._build_search_query(query, context, ["iep"], 10, 20, sort)
+        assert json.loads(rendered) == expected
+
+    def test_suggest_body_matches_builder(self):
+        context = make_context()
+        rendered = self.client._render_suggest_body("Fra", context, 5)
+        assert json.loads(rendered) == self.client._build_suggest_query("Fra", context, 5)
+
+    def test_templates_and_filters_cached_per_principal(self):
+        for query in ("fractions", "decimals", "reading"):
+            self.client._render_search_body(query, make_context(), None, 20, 0, None)
+        self.client._render_search_body("fractions", make_context(user_id="teacher_2"), None, 20, 0, None)
+
+        stats = self.client.get_cache_stats()
+        assert stats["template_hits"] == 2
+        assert stats["template_misses"] == 2
+        assert stats["rbac_filters_cached"] == 2
+
+        other_school = make_context(school_ids=("school_b",))
+        rendered = json.loads(self.client._render_search_body("fractions", other_school, None, 20, 0, None))
+        assert "school_b" in json.dumps(rendered["query"]["bool"]["filter"])
+
+
+class TestTokenContextCache:
+    """Test parsed JWT contexts are cached until expiry."""
+
+    def setup_method(self):
+        self.rbac = RBACManager(jwt_secret="test-secret")
+
+    def make_token(self, exp: float) -> str:
+        return jwt.encode(
+            {"sub": "teacher_1", "tenant_id": "tenant_1", "school_ids": ["school_a"],
+             "roles": ["teacher"], "exp": int(exp)},
+            "test-secret",
+            algorithm="HS256"
+        )
+
+    def test_context_reused_until_expiry(self):
+        token = self.make_token(time.time() + 3600)
+
+        first = self.rbac.parse_token(token)
+        second = self.rbac.parse_token(token)
+
+        assert first is second
+        assert Permission.SEARCH_SCHOOL in first.permissions
+        assert self.rbac.get_cache_stats()["hit_rate"] == 0.5
+
+        # Once the cached expiry passes the token is verified again
+        digest = next(iter(self.rbac._context_cache))
+        self.rbac._context_cache[digest] = (first, time.time() - 1)
+        assert self.rbac.parse_token(token) is not first
+        assert self.rbac.cache_stats["expired"] == 1
+        assert self.rbac.cache_stats["misses"] == 2
+
+    def test_expired_token_not_cached(self):
+        with pytest.raises(HTTPException):
+            self.rbac.parse_token(self.make_token(time.time() - 10))
+        assert self.rbac.get_cache_stats()["size"] == 0
+
+    def test_effective_permissions_memoized_copy(self):
+        permissions = self.rbac.get_effective_permissions([Role.TEACHER])
+        permissions.add(Permission.SEARCH_ALL)
+        assert Permission.SEARCH_ALL not in self.rbac.get_effective_permissions([Role.TEACHER])
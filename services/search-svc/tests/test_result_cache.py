@@ -0,0 +1,175 @@
+"""
+AIVO Search Service - Result Cache Tests
+S1-13 Implementation - Search and suggestion response cache
+
+Tests the tenant- and RBAC-scope-aware result cache:
+- Repeated and normalized queries are served from cache per RBAC scope
+- Invalidation only affects the changed index and tenant
+- Stale suggestions are served while a background refresh runs
+- A burst of identical queries costs one OpenSearch request
+- Redis tier and published invalidations are shared across replicas
+"""
+
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+
+from app.cache import SearchCacheConfig, SearchResultCache
+from app.client import OpenSearchClient, SearchConfig, SearchContext
+
+HIT = {"_id": "doc-1", "_score": 1.5, "_source": {"id": "doc-1", "title": "Fractions", "content": "Intro"}}
+SUGGEST = {"title_suggest": [{"options": [{"text": "fractions", "_score": 3.0}]}]}
+
+
+def make_context(user_id: str = "teacher_1", tenant_id: str = "tenant_1", school_ids=("school_a",)) -> SearchContext:
+    return SearchContext(
+        user_id=user_id,
+        tenant_id=tenant_id,
+        school_ids=list(school_ids),
+        roles=["teacher"],
+        permissions=["search:school"]
+    )
+
+
+class FakeTransport:
+    """Stands in for AsyncOpenSearch.search and counts requests"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def search(self, index, body, request_timeout=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"hits": {"hits": [HIT]}, "suggest": SUGGEST}
+
+
+def make_client(cache: SearchResultCache, transport: FakeTransport) -> OpenSearchClient:
+    client = OpenSearchClient(SearchConfig(), result_cache=cache)
+    client.client.search = transport.search
+    return client
+
+
+@pytest.fixture
+async def local_client():
+    transport = FakeTransport()
+    client = make_client(SearchResultCache(SearchCacheConfig()), transport)
+    yield client, transport
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_search_cached_per_rbac_scope(local_client):
+    client, transport = local_client
+
+    await client.search("Fractions", make_context())
+    await client.search("  fractions ", make_context())
+    # Another teacher of the same school shares the RBAC filter and the entry
+    results = await client.search("fractions", make_context(user_id="teacher_2"))
+
+    assert transport.calls == 1
+    assert results[0].id == "doc-1"
+
+    await client.search("fractions", make_context(school_ids=("school_b",)))
+    await client.search("fractions", make_context(tenant_id="tenant_2"))
+    assert transport.calls == 3
+
+    stats = client.result_cache.get_stats()["search"]
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert set(stats["latency_ms"]["hit"]) == {"p50", "p95", "p99"}
+
+
+@pytest.mark.asyncio
+async def test_invalidation_scoped_to_index_and_tenant(local_client):
+    client, transport = local_client
+    context = make_context()
+    curriculum = client.index_mappings["curriculum"]
+
+    await client.search("fractions", context, doc_types=["curriculum"])
+    await client.result_cache.invalidate(client.index_mappings["iep"], ["tenant_1"])
+    await client.result_cache.invalidate(curriculum, ["tenant_2"])
+    await client.search("fractions", context, doc_types=["curriculum"])
+    assert transport.calls == 1
+
+    await client.result_cache.invalidate(curriculum, ["tenant_1"])
+    await client.search("fractions", context, doc_types=["curriculum"])
+    assert transport.calls == 2
+
+    # A change without a tenant invalidates the index for everyone
+    await client.result_cache.invalidate(curriculum, [None])
+    await client.search("fractions", context, doc_types=["curriculum"])
+    assert transport.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_stale_suggestions_revalidated_in_background():
+    transport = FakeTransport()
+    cache = SearchResultCache(SearchCacheConfig(suggest_ttl_seconds=0.0, suggest_stale_seconds=60.0))
+    client = make_client(cache, transport)
+
+    await client.suggest("fra", make_context())
+    suggestions = await client.suggest("fra", make_context())
+
+    # Served immediately from the stale entry, refreshed behind it
+    assert suggestions[0].text == "fractions"
+    await asyncio.sleep(0.01)
+    assert transport.calls == 2
+    assert cache.get_stats()["suggest"]["stale_served"] == 1
+    assert cache.get_stats()["suggest"]["refreshes"] == 1
+
+    # Invalidated suggestions are never served stale
+    await cache.invalidate(client.index_mappings["curriculum"], ["tenant_1"])
+    await client.suggest("fra", make_context())
+    assert transport.calls == 3
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_identical_burst_single_request():
+    transport = FakeTransport(delay=0.05)
+    client = make_client(SearchResultCache(SearchCacheConfig()), transport)
+
+    results = await asyncio.gather(*(client.suggest("Fra", make_context()) for _ in range(20)))
+
+    assert transport.calls == 1
+    assert all(suggestions[0].text == "fractions" for suggestions in results)
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_shared_across_replicas():
+    server = fakeredis.FakeServer()
+    config = SearchCacheConfig(redis_url="redis://fake")
+
+    def replica() -> SearchResultCache:
+        return SearchResultCache(config, redis_client=fakeredis.aioredis.FakeRedis(server=server))
+
+    first, second, indexer = replica(), replica(), replica()
+    await first.start()
+    await second.start()
+    transport = FakeTransport()
+    client_a, client_b = make_client(first, transport), make_client(second, transport)
+    context = make_context()
+
+    await client_a.search("fractions", context)
+    await client_b.search("fractions", context)
+    assert transport.calls == 1
+    assert second.get_stats()["search"]["redis_hits"] == 1
+
+    # The CDC indexer bumps the shared generation and publishes it
+    await indexer.invalidate(client_a.index_mappings["curriculum"], ["tenant_1"])
+    await asyncio.sleep(0.1)
+
+    # Both replicas' in-process entries were dropped by the published bump;
+    # B reloads and A then picks B's fresh entry up from Redis
+    await client_b.search("fractions", context)
+    assert transport.calls == 2
+    await client_a.search("fractions", context)
+    assert transport.calls == 2
+    assert first.get_stats()["search"]["redis_hits"] == 1
+
+    for client in (client_a, client_b):
+        await client.close()
+    await indexer.close()
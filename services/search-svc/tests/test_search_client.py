@@ -0,0 +1,108 @@
+"""
+AIVO Search Service - Async OpenSearch Client Tests
+S1-13 Implementation - Pooled async transport and multi-search
+
+Tests OpenSearchClient against a local stub HTTP server:
+- Concurrent searches overlap instead of blocking the event loop
+- search + suggest in one _msearch round trip
+- Retries on 503 responses
+"""
+
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from app.client import OpenSearchClient, SearchConfig, SearchContext
+
+CONTEXT = SearchContext(
+    user_id="teacher_1",
+    tenant_id="tenant_1",
+    school_ids=["school_a"],
+    roles=["teacher"],
+    permissions=["search:school"]
+)
+
+HIT = {"_id": "doc-1", "_score": 1.5, "_source": {"id": "doc-1", "title": "Fractions", "content": "Intro"}}
+SUGGEST = {"title_suggest": [{"options": [{"text": "fractions", "_score": 3.0}]}]}
+
+
+class StubOpenSearch:
+    """Minimal OpenSearch HTTP stub with configurable latency"""
+
+    def __init__(self, delay: float = 0.0, fail_first: int = 0):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.requests = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests.append(request.path)
+        await asyncio.sleep(self.delay)
+        if self.fail_first:
+            self.fail_first -= 1
+            return web.json_response({"error": "unavailable"}, status=503)
+        if request.path.endswith("/_msearch"):
+            lines = [line for line in (await request.text()).splitlines() if line]
+            return web.json_response({"responses": [
+                {"hits": {"hits": [HIT]}, "status": 200},
+                {"hits": {"hits": []}, "suggest": SUGGEST, "status": 200}
+            ][:len(lines) // 2]})
+        return web.json_response({"hits": {"hits": [HIT]}, "suggest": SUGGEST})
+
+
+@pytest.fixture
+async def stub_client():
+    servers = []
+
+    async def start(stub: StubOpenSearch) -> OpenSearchClient:
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", stub.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        client = OpenSearchClient(SearchConfig(opensearch_port=port, opensearch_host="127.0.0.1"))
+        servers.append((runner, client))
+        return client
+
+    yield start
+    for runner, client in servers:
+        await client.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_searches_overlap(stub_client):
+    client = await stub_client(StubOpenSearch(delay=0.2))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client.search("fractions", CONTEXT) for _ in range(10)))
+
+    assert all(result[0].id == "doc-1" for result in results)
+    # One at a time would take 10 x 0.2 s
+    assert time.perf_counter() - start < 1.0
+
+
+@pytest.mark.asyncio
+async def test_search_with_suggestions_single_round_trip(stub_client):
+    stub = StubOpenSearch()
+    client = await stub_client(stub)
+
+    results, suggestions = await client.search_with_suggestions("fra", CONTEXT, doc_types=["curriculum"])
+
+    assert stub.requests == ["/_msearch"]
+    assert [result.title for result in results] == ["Fractions"]
+    assert [suggestion.text for suggestion in suggestions] == ["fractions"]
+
+
+@pytest.mark.asyncio
+async def test_retries_unavailable_node(stub_client):
+    stub = StubOpenSearch(fail_first=1)
+    client = await stub_client(stub)
+
+    suggestions = await client.suggest("fra", CONTEXT)
+
+    assert len(stub.requests) == 2
+    assert suggestions[0].text == "fractions"
@@ -54,7 +54,13 @@ class Settings(BaseSettings):
     max_retry_attempts: int = Field(default=3, env="MAX_RETRY_ATTEMPTS")
     batch_size: int = Field(default=100, env="BATCH_SIZE")
     sync_timeout: int = Field(default=1800, env="SYNC_TIMEOUT")  # 30 minutes
-    
+    sync_chunk_size: int = Field(default=500, env="SYNC_CHUNK_SIZE")  # records per bulk commit
+    sync_stale_after: int = Field(default=1800, env="SYNC_STALE_AFTER")  # seconds without progress before a running job counts as crashed
+
+    # SCIM write pipeline
+    scim_max_concurrency: int = Field(default=16, env="SCIM_MAX_CONCURRENCY")  # in-flight SCIM requests
+    scim_rate_limit: float = Field(default=50.0, env="SCIM_RATE_LIMIT")  # SCIM requests per second
+
     # Webhook Configuration
     webhook_timeout: int = Field(default=30, env="WEBHOOK_TIMEOUT")
     webhook_retry_attempts: int = Field(default=3, env="WEBHOOK_RETRY_ATTEMPTS")
@@ -7,8 +7,9 @@ Base classes and specific implementations for SIS providers.
 from .base import BaseSISProvider
 from .clever import CleverProvider
 from .classlink import ClassLinkProvider
+from .paging import PagingCheckpoint
 
-__all__ = ["BaseSISProvider", "CleverProvider", "ClassLinkProvider", "get_provider", "AVAILABLE_PROVIDERS"]
+__all__ = ["BaseSISProvider", "CleverProvider", "ClassLinkProvider", "PagingCheckpoint", "get_provider", "AVAILABLE_PROVIDERS"]
 
 # Available SIS providers
 AVAILABLE_PROVIDERS = {
@@ -9,6 +9,8 @@ from typing import Dict, List, Any, Optional, AsyncGenerator
 from datetime import datetime
 from dataclasses import dataclass
 
+from .paging import PagingCheckpoint
+
 
 @dataclass
 class SISUser:
@@ -96,7 +98,8 @@ class BaseSISProvider(ABC):
         self, 
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISUser, None]:
         """
         Get users from SIS provider.
@@ -105,6 +108,7 @@ class BaseSISProvider(ABC):
             limit: Maximum number of users to fetch
             offset: Offset for pagination
             updated_since: Only fetch users updated since this date
+            checkpoint: Resume position of the paged reads, advanced as records are yielded
         
         Yields:
             SISUser objects
@@ -129,7 +133,8 @@ class BaseSISProvider(ABC):
         self,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISGroup, None]:
         """
         Get groups/sections from SIS provider.
@@ -138,6 +143,7 @@ class BaseSISProvider(ABC):
             limit: Maximum number of groups to fetch
             offset: Offset for pagination
             updated_since: Only fetch groups updated since this date
+            checkpoint: Resume position of the paged reads, advanced as records are yielded
         
         Yields:
             SISGroup objects
@@ -164,7 +170,8 @@ class BaseSISProvider(ABC):
         group_id: Optional[str] = None,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISEnrollment, None]:
         """
         Get enrollments from SIS provider.
@@ -175,6 +182,7 @@ class BaseSISProvider(ABC):
             limit: Maximum number of enrollments to fetch
             offset: Offset for pagination
             updated_since: Only fetch enrollments updated since this date
+            checkpoint: Resume position of the paged reads, advanced as records are yielded
         
         Yields:
             SISEnrollment objects
@@ -4,14 +4,15 @@ ClassLink SIS Provider Implementation
 Implements ClassLink OneRoster API integration for user, class, and enrollment sync.
 """
 
-import asyncio
 import aiohttp
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, AsyncGenerator
+from typing import Dict, List, Any, Optional, AsyncGenerator, Callable
 from urllib.parse import urljoin, quote
 import base64
 
 from .base import BaseSISProvider, SISUser, SISGroup, SISEnrollment
+from .paging import PageFetcher, PagingCheckpoint, stream_pages
+from ..rate_limit import AdaptiveRateLimiter
 
 
 class ClassLinkProvider(BaseSISProvider):
@@ -22,8 +23,11 @@ class ClassLinkProvider(BaseSISProvider):
         self.base_url = config.get('base_url', 'https://api.classlink.com')
         self.api_version = config.get('api_version', 'v2')
         self.tenant_id = config.get('tenant_id')
-        self.requests_per_second = 5
+        self.requests_per_second = config.get('requests_per_second', 5)
         self.requests_per_minute = 300
+        self.page_prefetch = config.get('page_prefetch', 4)
+        self.max_retries = config.get('max_retries', 3)
+        self.rate_limiter = AdaptiveRateLimiter(self.requests_per_second)
         self.session: Optional[aiohttp.ClientSession] = None
         self.access_token: Optional[str] = None
         self.token_expires_at: Optional[datetime] = None
@@ -87,7 +91,7 @@ class ClassLinkProvider(BaseSISProvider):
                 raise Exception("Failed to authenticate with ClassLink")
     
     async def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
-        """Make authenticated request to ClassLink OneRoster API."""
+        """Make authenticated request to ClassLink OneRoster API, paced by the provider's rate-limit headers."""
         await self._ensure_authenticated()
         
         session = await self._get_session()
@@ -98,22 +102,52 @@ class ClassLinkProvider(BaseSISProvider):
             'Accept': 'application/json'
         }
         
-        async with session.get(url, params=params, headers=headers) as response:
-            if response.status == 200:
-                return await response.json()
-            elif response.status == 401:
-                # Token expired, retry once
-                await self.authenticate()
-                headers['Authorization'] = f'Bearer {self.access_token}'
-                async with session.get(url, params=params, headers=headers) as retry_response:
-                    if retry_response.status == 200:
-                        return await retry_response.json()
-                    else:
-                        error_text = await retry_response.text()
-                        raise Exception(f"API request failed: {retry_response.status} - {error_text}")
-            else:
-                error_text = await response.text()
-                raise Exception(f"API request failed: {response.status} - {error_text}")
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            
+            async with session.get(url, params=params, headers=headers) as response:
+                self.rate_limiter.update(response.headers)
+                
+                if response.status == 200:
+                    return await response.json()
+                elif response.status == 429 and attempt < self.max_retries:
+                    # Rate limited: hold all requests until the window allows more
+                    self.rate_limiter.pause(self.rate_limiter.retry_after(response.headers))
+                    continue
+                elif response.status == 401:
+                    # Token expired, retry once
+                    await self.authenticate()
+                    headers['Authorization'] = f'Bearer {self.access_token}'
+                    await self.rate_limiter.acquire()
+                    async with session.get(url, params=params, headers=headers) as retry_response:
+                        if retry_response.status == 200:
+                            return await retry_response.json()
+                        else:
+                            error_text = await retry_response.text()
+                            raise Exception(f"API request failed: {retry_response.status} - {error_text}")
+                else:
+                    error_text = await response.text()
+                    raise Exception(f"API request failed: {response.status} - {error_text}")
+    
+    def _page_fetcher(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        map_record: Callable[[Dict[str, Any]], Any]
+    ) -> PageFetcher:
+        """Fetch the page of a OneRoster collection at an offset: (mapped records, whether more pages follow)."""
+        
+        async def fetch_page(offset: int):
+            page_params = dict(params)
+            if offset:
+                page_params['offset'] = offset
+            
+            data = await self._make_request(endpoint, page_params)
+            items = data.get(endpoint, [])
+            records = [record for record in map(map_record, items) if record]
+            return records, len(items) >= params.get('limit', 100)
+        
+        return fetch_page
     
     async def test_connection(self) -> Dict[str, Any]:
         """Test connection to ClassLink OneRoster API."""
@@ -135,7 +169,8 @@ class ClassLinkProvider(BaseSISProvider):
         self, 
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISUser, None]:
         """Get users from ClassLink OneRoster API."""
         
@@ -148,27 +183,15 @@ class ClassLinkProvider(BaseSISProvider):
             params['filter'] = f"dateLastModified>='{updated_since.isoformat()}'"
         
         try:
-            while True:
-                data = await self._make_request('users', params)
-                users = data.get('users', [])
-                
-                if not users:
-                    break
-                
-                for user_data in users:
-                    user = self._map_user_to_sis_user(user_data)
-                    if user:
-                        yield user
-                
-                # Check pagination
-                if len(users) < params.get('limit', 100):
-                    break
-                
-                # Update offset for next page
-                params['offset'] = params.get('offset', 0) + len(users)
-                
-                # Rate limiting
-                await asyncio.sleep(0.2)
+            async for user in stream_pages(
+                'users',
+                self._page_fetcher('users', params, self._map_user_to_sis_user),
+                first_cursor=params.get('offset', 0),
+                step=params.get('limit', 100),
+                prefetch=self.page_prefetch,
+                checkpoint=checkpoint
+            ):
+                yield user
         
         except Exception as e:
             print(f"Error fetching users: {e}")
@@ -232,7 +255,8 @@ class ClassLinkProvider(BaseSISProvider):
         self,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISGroup, None]:
         """Get classes from ClassLink OneRoster API."""
         
@@ -245,27 +269,15 @@ class ClassLinkProvider(BaseSISProvider):
             params['filter'] = f"dateLastModified>='{updated_since.isoformat()}'"
         
         try:
-            while True:
-                data = await self._make_request('classes', params)
-                classes = data.get('classes', [])
-                
-                if not classes:
-                    break
-                
-                for class_data in classes:
-                    group = self._map_class_to_sis_group(class_data)
-                    if group:
-                        yield group
-                
-                # Check pagination
-                if len(classes) < params.get('limit', 100):
-                    break
-                
-                # Update offset for next page
-                params['offset'] = params.get('offset', 0) + len(classes)
-                
-                # Rate limiting
-                await asyncio.sleep(0.2)
+            async for group in stream_pages(
+                'classes',
+                self._page_fetcher('classes', params, self._map_class_to_sis_group),
+                first_cursor=params.get('offset', 0),
+                step=params.get('limit', 100),
+                prefetch=self.page_prefetch,
+                checkpoint=checkpoint
+            ):
+                yield group
         
         except Exception as e:
             print(f"Error fetching classes: {e}")
@@ -322,7 +334,8 @@ class ClassLinkProvider(BaseSISProvider):
         group_id: Optional[str] = None,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISEnrollment, None]:
         """Get enrollments from ClassLink OneRoster API."""
         
@@ -348,27 +361,15 @@ class ClassLinkProvider(BaseSISProvider):
             params['filter'] = ' AND '.join(filters)
         
         try:
-            while True:
-                data = await self._make_request('enrollments', params)
-                enrollments = data.get('enrollments', [])
-                
-                if not enrollments:
-                    break
-                
-                for enrollment_data in enrollments:
-                    enrollment = self._map_enrollment_to_sis_enrollment(enrollment_data)
-                    if enrollment:
-                        yield enrollment
-                
-                # Check pagination
-                if len(enrollments) < params.get('limit', 100):
-                    break
-                
-                # Update offset for next page
-                params['offset'] = params.get('offset', 0) + len(enrollments)
-                
-                # Rate limiting
-                await asyncio.sleep(0.2)
+            async for enrollment in stream_pages(
+                'enrollments',
+                self._page_fetcher('enrollments', params, self._map_enrollment_to_sis_enrollment),
+                first_cursor=params.get('offset', 0),
+                step=params.get('limit', 100),
+                prefetch=self.page_prefetch,
+                checkpoint=checkpoint
+            ):
+                yield enrollment
         
         except Exception as e:
             print(f"Error fetching enrollments: {e}")
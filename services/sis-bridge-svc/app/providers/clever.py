@@ -4,13 +4,14 @@ Clever SIS Provider Implementation
 Implements Clever API integration for user, section, and enrollment sync.
 """
 
-import asyncio
 import aiohttp
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, AsyncGenerator
+from typing import Dict, List, Any, Optional, AsyncGenerator, Callable
 from urllib.parse import urljoin
 
 from .base import BaseSISProvider, SISUser, SISGroup, SISEnrollment
+from .paging import PageFetcher, PagingCheckpoint, stream_pages
+from ..rate_limit import AdaptiveRateLimiter
 
 
 class CleverProvider(BaseSISProvider):
@@ -21,8 +22,11 @@ class CleverProvider(BaseSISProvider):
         self.base_url = config.get('base_url', 'https://api.clever.com')
         self.api_version = config.get('api_version', 'v3.0')
         self.district_id = config.get('district_id')
-        self.requests_per_second = 10
+        self.requests_per_second = config.get('requests_per_second', 10)
         self.requests_per_minute = 600
+        self.page_prefetch = config.get('page_prefetch', 4)
+        self.max_retries = config.get('max_retries', 3)
+        self.rate_limiter = AdaptiveRateLimiter(self.requests_per_second)
         self.session: Optional[aiohttp.ClientSession] = None
         self.access_token: Optional[str] = None
         self.token_expires_at: Optional[datetime] = None
@@ -78,7 +82,7 @@ class CleverProvider(BaseSISProvider):
                 raise Exception("Failed to authenticate with Clever")
     
     async def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
-        """Make authenticated request to Clever API."""
+        """Make authenticated request to Clever API, paced by the provider's rate-limit headers."""
         await self._ensure_authenticated()
         
         session = await self._get_session()
@@ -89,22 +93,52 @@ class CleverProvider(BaseSISProvider):
             'Accept': 'application/json'
         }
         
-        async with session.get(url, params=params, headers=headers) as response:
-            if response.status == 200:
-                return await response.json()
-            elif response.status == 401:
-                # Token expired, retry once
-                await self.authenticate()
-                headers['Authorization'] = f'Bearer {self.access_token}'
-                async with session.get(url, params=params, headers=headers) as retry_response:
-                    if retry_response.status == 200:
-                        return await retry_response.json()
-                    else:
-                        error_text = await retry_response.text()
-                        raise Exception(f"API request failed: {retry_response.status} - {error_text}")
-            else:
-                error_text = await response.text()
-                raise Exception(f"API request failed: {response.status} - {error_text}")
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            
+            async with session.get(url, params=params, headers=headers) as response:
+                self.rate_limiter.update(response.headers)
+                
+                if response.status == 200:
+                    return await response.json()
+                elif response.status == 429 and attempt < self.max_retries:
+                    # Rate limited: hold all requests until the window allows more
+                    self.rate_limiter.pause(self.rate_limiter.retry_after(response.headers))
+                    continue
+                elif response.status == 401:
+                    # Token expired, retry once
+                    await self.authenticate()
+                    headers['Authorization'] = f'Bearer {self.access_token}'
+                    await self.rate_limiter.acquire()
+                    async with session.get(url, params=params, headers=headers) as retry_response:
+                        if retry_response.status == 200:
+                            return await retry_response.json()
+                        else:
+                            error_text = await retry_response.text()
+                            raise Exception(f"API request failed: {retry_response.status} - {error_text}")
+                else:
+                    error_text = await response.text()
+                    raise Exception(f"API request failed: {response.status} - {error_text}")
+    
+    def _page_fetcher(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        map_record: Callable[[Dict[str, Any]], Any]
+    ) -> PageFetcher:
+        """Fetch a numbered page of a list endpoint: (mapped records, whether more pages follow)."""
+        
+        async def fetch_page(page: int):
+            page_params = dict(params)
+            if page > 0:
+                page_params['page'] = page
+            
+            data = await self._make_request(endpoint, page_params)
+            items = data.get('data', [])
+            records = [record for record in map(map_record, items) if record]
+            return records, bool(items) and bool(data.get('paging', {}).get('next'))
+        
+        return fetch_page
     
     async def test_connection(self) -> Dict[str, Any]:
         """Test connection to Clever API."""
@@ -126,23 +160,25 @@ class CleverProvider(BaseSISProvider):
         self, 
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISUser, None]:
         """Get users from Clever (students and teachers)."""
         
         # Get students
-        async for student in self._get_students(limit, offset, updated_since):
+        async for student in self._get_students(limit, offset, updated_since, checkpoint):
             yield student
         
         # Get teachers
-        async for teacher in self._get_teachers(limit, offset, updated_since):
+        async for teacher in self._get_teachers(limit, offset, updated_since, checkpoint):
             yield teacher
     
     async def _get_students(
         self,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISUser, None]:
         """Get students from Clever."""
         
@@ -155,30 +191,13 @@ class CleverProvider(BaseSISProvider):
             params['updated_since'] = updated_since.isoformat()
         
         try:
-            page = 0
-            while True:
-                if page > 0:
-                    params['page'] = page
-                
-                data = await self._make_request('students', params)
-                students = data.get('data', [])
-                
-                if not students:
-                    break
-                
-                for student_data in students:
-                    student = self._map_student_to_sis_user(student_data)
-                    if student:
-                        yield student
-                
-                # Check if there are more pages
-                if not data.get('paging', {}).get('next'):
-                    break
-                
-                page += 1
-                
-                # Rate limiting
-                await asyncio.sleep(0.1)
+            async for student in stream_pages(
+                'students',
+                self._page_fetcher('students', params, self._map_student_to_sis_user),
+                prefetch=self.page_prefetch,
+                checkpoint=checkpoint
+            ):
+                yield student
         
         except Exception as e:
             print(f"Error fetching students: {e}")
@@ -188,7 +207,8 @@ class CleverProvider(BaseSISProvider):
         self,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISUser, None]:
         """Get teachers from Clever."""
         
@@ -201,30 +221,13 @@ class CleverProvider(BaseSISProvider):
             params['updated_since'] = updated_since.isoformat()
         
         try:
-            page = 0
-            while True:
-                if page > 0:
-                    params['page'] = page
-                
-                data = await self._make_request('teachers', params)
-                teachers = data.get('data', [])
-                
-                if not teachers:
-                    break
-                
-                for teacher_data in teachers:
-                    teacher = self._map_teacher_to_sis_user(teacher_data)
-                    if teacher:
-                        yield teacher
-                
-                # Check if there are more pages
-                if not data.get('paging', {}).get('next'):
-                    break
-                
-                page += 1
-                
-                # Rate limiting
-                await asyncio.sleep(0.1)
+            async for teacher in stream_pages(
+                'teachers',
+                self._page_fetcher('teachers', params, self._map_teacher_to_sis_user),
+                prefetch=self.page_prefetch,
+                checkpoint=checkpoint
+            ):
+                yield teacher
         
         except Exception as e:
             print(f"Error fetching teachers: {e}")
@@ -328,7 +331,8 @@ class CleverProvider(BaseSISProvider):
         self,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISGroup, None]:
         """Get sections from Clever."""
         
@@ -341,30 +345,13 @@ class CleverProvider(BaseSISProvider):
             params['updated_since'] = updated_since.isoformat()
         
         try:
-            page = 0
-            while True:
-                if page > 0:
-                    params['page'] = page
-                
-                data = await self._make_request('sections', params)
-                sections = data.get('data', [])
-                
-                if not sections:
-                    break
-                
-                for section_data in sections:
-                    section = self._map_section_to_sis_group(section_data)
-                    if section:
-                        yield section
-                
-                # Check if there are more pages
-                if not data.get('paging', {}).get('next'):
-                    break
-                
-                page += 1
-                
-                # Rate limiting
-                await asyncio.sleep(0.1)
+            async for section in stream_pages(
+                'sections',
+                self._page_fetcher('sections', params, self._map_section_to_sis_group),
+                prefetch=self.page_prefetch,
+                checkpoint=checkpoint
+            ):
+                yield section
         
         except Exception as e:
             print(f"Error fetching sections: {e}")
@@ -413,7 +400,8 @@ class CleverProvider(BaseSISProvider):
         group_id: Optional[str] = None,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
-        updated_since: Optional[datetime] = None
+        updated_since: Optional[datetime] = None,
+        checkpoint: Optional[PagingCheckpoint] = None
     ) -> AsyncGenerator[SISEnrollment, None]:
         """Get enrollments from Clever."""
         
@@ -427,7 +415,7 @@ class CleverProvider(BaseSISProvider):
                 yield enrollment
         else:
             # Get all enrollments (via sections)
-            async for group in self.get_groups(limit, offset, updated_since):
+            async for group in self.get_groups(limit, offset, updated_since, checkpoint):
                 async for enrollment in self._get_section_enrollments(group.id):
                     yield enrollment
     
@@ -0,0 +1,121 @@
+"""
+Provider Paging - Prefetching page streams with checkpointed resume
+
+Pages of a provider list endpoint are addressed by a numeric cursor (Clever
+page number, OneRoster offset), so the next pages can be requested while the
+current one is being processed. Records are handed to the consumer in page
+order through a bounded queue.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# fetch_page(cursor) -> (records of the page, whether more pages follow)
+PageFetcher = Callable[[int], Awaitable[Tuple[List[Any], bool]]]
+
+
+class PagingCheckpoint:
+    """
+    Resume position of the paged streams read during one sync phase.
+
+    The position of a stream ("students", "sections", ...) is the cursor of the
+    page its latest record came from, or DONE once it has been read to the end.
+    Resuming from it reads that page again, so no record is skipped.
+    """
+
+    DONE = "done"
+
+    def __init__(self, positions: Optional[Dict[str, Any]] = None):
+        self.positions = dict(positions or {})
+
+    def is_done(self, stream: str) -> bool:
+        return self.positions.get(stream) == self.DONE
+
+    def cursor(self, stream: str, default: int = 0) -> int:
+        position = self.positions.get(stream)
+        return position if isinstance(position, int) else default
+
+    def advance(self, stream: str, cursor: int):
+        self.positions[stream] = cursor
+
+    def finish(self, stream: str):
+        self.positions[stream] = self.DONE
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self.positions)
+
+
+async def stream_pages(
+    stream: str,
+    fetch_page: PageFetcher,
+    first_cursor: int = 0,
+    step: int = 1,
+    prefetch: int = 4,
+    checkpoint: Optional[PagingCheckpoint] = None
+) -> AsyncGenerator[Any, None]:
+    """
+    Yield the records of a paged endpoint while the next pages are fetched.
+
+    Args:
+        stream: Stream name used in the checkpoint
+        fetch_page: Fetches the page at a cursor
+        first_cursor: Cursor of the first page
+        step: Cursor distance between pages (1 for page numbers, the page size for offsets)
+        prefetch: Pages requested ahead of the one being consumed
+        checkpoint: Resume position, advanced as pages are consumed
+
+    Yields:
+        Records in page order
+    """
+
+    if checkpoint and checkpoint.is_done(stream):
+        return
+
+    start = checkpoint.cursor(stream, first_cursor) if checkpoint else first_cursor
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(prefetch, 1))
+    end = object()
+
+    async def pump():
+        # Pages past the last one are requested speculatively and come back empty
+        window = deque()
+        cursor = start
+        try:
+            while True:
+                while len(window) <= prefetch:
+                    window.append((cursor, asyncio.ensure_future(fetch_page(cursor))))
+                    cursor += step
+
+                page_cursor, page = window.popleft()
+                records, has_more = await page
+                if records:
+                    await queue.put((page_cursor, records))
+                if not has_more:
+                    break
+        except Exception as e:
+            await queue.put(e)
+            return
+        finally:
+            for _, page in window:
+                page.cancel()
+        await queue.put(end)
+
+    pumping = asyncio.create_task(pump())
+    try:
+        while True:
+            item = await queue.get()
+            if item is end:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            page_cursor, records = item
+            if checkpoint:
+                checkpoint.advance(stream, page_cursor)
+            for record in records:
+                yield record
+
+        if checkpoint:
+            checkpoint.finish(stream)
+    finally:
+        pumping.cancel()
@@ -0,0 +1,112 @@
+"""
+Rate Limiting - Token buckets for outbound API calls
+
+TokenBucket paces SCIM writes; AdaptiveRateLimiter paces SIS provider requests
+and follows the rate-limit headers the provider returns.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and take them (waiters are served in order)."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate follows the provider's rate-limit headers.
+
+    `X-RateLimit-Remaining` / `X-RateLimit-Reset` spread the remaining requests
+    over the time left in the window (never above `max_rate`); `Retry-After`
+    on a 429 pauses all requests until it has passed.
+    """
+
+    def __init__(self, max_rate: float, min_rate: float = 0.5):
+        super().__init__(max_rate)
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.paused_until = 0.0
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait out any pause, then take tokens."""
+        delay = self.paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.paused_until - time.monotonic()
+        await super().acquire(tokens)
+
+    def pause(self, seconds: float):
+        """Hold all requests for `seconds`."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def update(self, headers: Mapping[str, str]):
+        """Adjust the rate from the rate-limit headers of a response."""
+        remaining = _header_number(headers, 'X-RateLimit-Remaining')
+        reset_in = _reset_seconds(headers.get('X-RateLimit-Reset'))
+        if remaining is None or reset_in is None:
+            return
+
+        if remaining <= 0:
+            self.pause(reset_in)
+            return
+
+        self.rate = min(self.max_rate, max(self.min_rate, remaining / max(reset_in, 0.1)))
+        self.capacity = max(self.rate, 1.0)
+
+    def retry_after(self, headers: Mapping[str, str], default: float = 1.0) -> float:
+        """Seconds to wait after a 429 (Retry-After, else the window reset, else `default`)."""
+        for seconds in (_reset_seconds(headers.get('Retry-After')), _reset_seconds(headers.get('X-RateLimit-Reset'))):
+            if seconds is not None:
+                return seconds
+        return default
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _reset_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds until a reset given as delta seconds, epoch seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    # Values that look like a timestamp are absolute
+    if seconds > 1e9:
+        seconds -= datetime.now().timestamp()
+    return max(seconds, 0.0)
@@ -5,6 +5,7 @@ Handles the orchestration of SIS data synchronization with SCIM 2.0 provider.
 """
 
 import asyncio
+import time
 import aiohttp
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
@@ -12,8 +13,10 @@ from uuid import UUID, uuid4
 from sqlalchemy.orm import Session
 
 from .database import get_db, TenantSISProvider, SyncJob, SyncOperation, SISResourceMapping, SyncStatus, SyncType
-from .providers import get_provider, BaseSISProvider
+from .providers import get_provider, BaseSISProvider, PagingCheckpoint
 from .providers.base import SISUser, SISGroup, SISEnrollment
+from .rate_limit import TokenBucket
+from .sync_pipeline import MappedResource, MappingIndex, PhaseStats, payload_hash, read_ahead, source_data
 from .vault_client import VaultClient
 from .config import get_settings
 
@@ -26,6 +29,10 @@ class SyncEngine:
     def __init__(self):
         self.vault_client = VaultClient() if settings.vault_url else None
         self.session: Optional[aiohttp.ClientSession] = None
+        
+        # Shared by all running jobs: SCIM writes are bounded in flight and in rate
+        self.scim_slots = asyncio.Semaphore(settings.scim_max_concurrency)
+        self.scim_rate_limiter = TokenBucket(settings.scim_rate_limit)
     
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create HTTP session for SCIM API calls."""
@@ -138,15 +145,24 @@ class SyncEngine:
                 if job.sync_type == SyncType.INCREMENTAL:
                     last_sync_time = provider_config.last_sync_at
                 
+                # Existing mappings, read once and kept current by the phases
+                index = MappingIndex.load(db, job.tenant_id, provider_config.provider)
+                
+                # Resume the paged reads where an interrupted job of this provider stopped
+                checkpoints = self._resume_checkpoints(job, db)
+                
                 # Execute sync phases
                 if provider_config.sync_users:
-                    await self._sync_users(job, sis_provider, last_sync_time, user_filter, db)
+                    checkpoint = PagingCheckpoint(checkpoints.get('users'))
+                    await self._sync_users(job, sis_provider, last_sync_time, user_filter, index, checkpoint, db)
                 
                 if provider_config.sync_groups:
-                    await self._sync_groups(job, sis_provider, last_sync_time, group_filter, db)
+                    checkpoint = PagingCheckpoint(checkpoints.get('groups'))
+                    await self._sync_groups(job, sis_provider, last_sync_time, group_filter, index, checkpoint, db)
                 
                 if provider_config.sync_enrollments:
-                    await self._sync_enrollments(job, sis_provider, last_sync_time, db)
+                    checkpoint = PagingCheckpoint(checkpoints.get('enrollments'))
+                    await self._sync_enrollments(job, sis_provider, last_sync_time, checkpoint, db)
                 
                 # Update job completion
                 job.status = SyncStatus.COMPLETED
@@ -162,11 +178,12 @@ class SyncEngine:
                 await sis_provider.cleanup()
                 
             except Exception as e:
-                # Handle sync failure
+                # Handle sync failure (a failed bulk write leaves the session to roll back)
+                db.rollback()
                 job.status = SyncStatus.FAILED
                 job.error_message = str(e)
                 job.completed_at = datetime.utcnow()
-                job.stats['errors'] = job.stats.get('errors', 0) + 1
+                self._update_stats(job, errors=job.stats.get('errors', 0) + 1)
                 db.commit()
                 
                 print(f"Sync job {job_id} failed: {e}")
@@ -191,106 +208,224 @@ class SyncEngine:
         sis_provider: BaseSISProvider,
         last_sync_time: Optional[datetime],
         user_filter: Optional[Dict],
+        index: MappingIndex,
+        checkpoint: PagingCheckpoint,
         db: Session
     ):
-        """Sync users from SIS to SCIM."""
-        
-        batch_size = settings.batch_size
-        processed = 0
+        """Sync users from SIS to SCIM, one chunk at a time."""
+        
+        phase = PhaseStats("users")
+        users = (
+            sis_user async for sis_user in sis_provider.get_users(
+                limit=settings.batch_size,
+                updated_since=last_sync_time,
+                checkpoint=checkpoint
+            )
+            if not user_filter or self._apply_user_filter(sis_user, user_filter)
+        )
         
         try:
-            async for sis_user in sis_provider.get_users(
-                limit=batch_size,
-                updated_since=last_sync_time
-            ):
-                # Apply filters
-                if user_filter and not self._apply_user_filter(sis_user, user_filter):
-                    continue
-                
-                # Process user
-                await self._process_user(job, sis_user, db)
+            async for chunk, position in read_ahead(users, settings.sync_chunk_size, mark=checkpoint.as_dict):
+                await self._sync_chunk(job, "user", chunk, index, phase, db)
                 
-                processed += 1
-                
-                # Update progress
-                if processed % 10 == 0:
-                    job.stats['users_processed'] = processed
-                    job.progress = min(30, (processed / 100) * 30)  # Users = 30% of total
-                    db.commit()
-                
-                # Rate limiting
-                await asyncio.sleep(0.1)
+                # Update progress (one commit per chunk)
+                job.progress = min(30, (phase.records / 100) * 30)  # Users = 30% of total
+                self._record_phase(job, phase, position)
+                db.commit()
         
         except Exception as e:
             print(f"Error syncing users: {e}")
             raise
     
-    async def _process_user(self, job: SyncJob, sis_user: SISUser, db: Session):
-        """Process individual user sync."""
-        
-        operation = SyncOperation(
-            id=uuid4(),
-            job_id=job.id,
-            operation_type="sync_user",
-            resource_type="user",
-            resource_id=sis_user.id,
-            status="pending",
-            source_data=sis_user.__dict__,
-            created_at=datetime.utcnow()
-        )
+    async def _sync_chunk(
+        self,
+        job: SyncJob,
+        resource_type: str,
+        records: List[Any],
+        index: MappingIndex,
+        phase: PhaseStats,
+        db: Session
+    ):
+        """
+        Sync a chunk of SIS users or groups.
         
-        db.add(operation)
+        Records are diffed against the mapping index: a record whose SCIM payload
+        matches the one last synced is not written again. The others are created
+        or updated concurrently, then their operations and mappings are written in
+        bulk. The caller commits.
+        """
         
-        try:
-            # Check if user mapping exists
-            mapping = db.query(SISResourceMapping).filter(
-                SISResourceMapping.tenant_id == job.tenant_id,
-                SISResourceMapping.provider == job.provider.provider,
-                SISResourceMapping.sis_resource_id == sis_user.id,
-                SISResourceMapping.sis_resource_type == "user"
-            ).first()
-            
-            # Convert SIS user to SCIM format
-            scim_user_data = self._map_sis_user_to_scim(sis_user)
-            operation.mapped_data = scim_user_data
+        created_at = datetime.utcnow()
+        unchanged_ids = []
+        changes = []
+        
+        for record in records:
+            if resource_type == "user":
+                scim_data = self._map_sis_user_to_scim(record)
+            else:
+                scim_data = self._map_sis_group_to_scim(record, index)
             
-            if mapping:
-                # Update existing user
-                await self._update_scim_user(mapping.scim_resource_id, scim_user_data)
-                operation.operation_type = "update_user"
+            digest = payload_hash(scim_data)
+            mapped = index.get(resource_type, record.id)
+            if mapped and mapped.payload_hash == digest:
+                unchanged_ids.append(mapped.id)
             else:
-                # Create new user
-                scim_user_id = await self._create_scim_user(scim_user_data, str(job.tenant_id))
-                
-                # Create mapping
-                mapping = SISResourceMapping(
-                    id=uuid4(),
-                    tenant_id=job.tenant_id,
-                    provider=job.provider.provider,
-                    sis_resource_id=sis_user.id,
-                    sis_resource_type="user",
-                    scim_resource_id=scim_user_id,
-                    scim_resource_type="User",
-                    created_at=datetime.utcnow(),
-                    last_synced_at=datetime.utcnow()
-                )
-                db.add(mapping)
-                operation.operation_type = "create_user"
-                operation.scim_resource_id = scim_user_id
+                changes.append((record, scim_data, digest, mapped))
+        
+        # SCIM writes
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                self._write_scim(str(job.tenant_id), resource_type, scim_data, mapped)
+                for _, scim_data, _, mapped in changes
+            ),
+            return_exceptions=True
+        )
+        phase.write_seconds += time.perf_counter() - started
+        
+        # Bulk persistence
+        started = time.perf_counter()
+        completed_at = datetime.utcnow()
+        operations = []
+        new_mappings = []
+        updated_mappings = []
+        
+        for (record, scim_data, digest, mapped), result in zip(changes, results):
+            operation = {
+                'id': uuid4(),
+                'job_id': job.id,
+                'operation_type': f"{'update' if mapped else 'create'}_{resource_type}",
+                'resource_type': resource_type,
+                'resource_id': record.id,
+                'scim_resource_id': None,
+                'status': "completed",
+                'error_message': None,
+                'source_data': source_data(record),
+                'mapped_data': scim_data,
+                'created_at': created_at,
+                'completed_at': completed_at
+            }
+            operations.append(operation)
             
-            # Update mapping sync time
-            mapping.last_synced_at = datetime.utcnow()
+            if isinstance(result, Exception):
+                operation['status'] = "failed"
+                operation['error_message'] = str(result)
+                print(f"Error processing {resource_type} {record.id}: {result}")
+                continue
             
-            operation.status = "completed"
-            operation.completed_at = datetime.utcnow()
+            operation['scim_resource_id'] = result
+            mapping_data = {'payload_hash': digest}
             
-        except Exception as e:
-            operation.status = "failed"
-            operation.error_message = str(e)
-            operation.completed_at = datetime.utcnow()
-            print(f"Error processing user {sis_user.id}: {e}")
+            if mapped:
+                updated_mappings.append({
+                    'id': mapped.id,
+                    'updated_at': completed_at,
+                    'last_synced_at': completed_at,
+                    'mapping_data': mapping_data
+                })
+                index.set(resource_type, record.id, mapped._replace(payload_hash=digest))
+                phase.updated += 1
+            else:
+                mapping_id = uuid4()
+                new_mappings.append({
+                    'id': mapping_id,
+                    'tenant_id': job.tenant_id,
+                    'provider': index.provider,
+                    'sis_resource_id': record.id,
+                    'sis_resource_type': resource_type,
+                    'scim_resource_id': result,
+                    'scim_resource_type': "User" if resource_type == "user" else "Group",
+                    'created_at': completed_at,
+                    'updated_at': completed_at,
+                    'last_synced_at': completed_at,
+                    'mapping_data': mapping_data
+                })
+                index.set(resource_type, record.id, MappedResource(mapping_id, result, digest))
+                phase.created += 1
+        
+        if unchanged_ids:
+            db.query(SISResourceMapping).filter(
+                SISResourceMapping.id.in_(unchanged_ids)
+            ).update({SISResourceMapping.last_synced_at: completed_at}, synchronize_session=False)
+        db.bulk_insert_mappings(SyncOperation, operations)
+        db.bulk_insert_mappings(SISResourceMapping, new_mappings)
+        db.bulk_update_mappings(SISResourceMapping, updated_mappings)
+        
+        failed = len(changes) - len(new_mappings) - len(updated_mappings)
+        if failed:
+            self._update_stats(job, errors=job.stats.get('errors', 0) + failed)
+        
+        phase.records += len(records)
+        phase.unchanged += len(unchanged_ids)
+        phase.failed += failed
+        phase.persist_seconds += time.perf_counter() - started
+    
+    async def _write_scim(
+        self,
+        tenant_id: str,
+        resource_type: str,
+        scim_data: Dict[str, Any],
+        mapped: Optional[MappedResource]
+    ) -> UUID:
+        """Create or update a SCIM user or group within the concurrency and rate limits."""
+        
+        async with self.scim_slots:
+            await self.scim_rate_limiter.acquire()
+            
+            if mapped:
+                if resource_type == "user":
+                    await self._update_scim_user(mapped.scim_resource_id, scim_data)
+                else:
+                    await self._update_scim_group(mapped.scim_resource_id, scim_data)
+                return mapped.scim_resource_id
+            
+            if resource_type == "user":
+                return await self._create_scim_user(scim_data, tenant_id)
+            return await self._create_scim_group(scim_data, tenant_id)
+    
+    def _update_stats(self, job: SyncJob, **values):
+        """Update job stats (assigned anew so the JSON column is written)."""
+        job.stats = {**(job.stats or {}), **values}
+    
+    def _record_phase(self, job: SyncJob, phase: PhaseStats, position: Dict[str, Any]):
+        """Publish the progress, throughput and paging checkpoint of a phase in the job stats."""
+        phases = {**job.stats.get('phases', {}), phase.name: phase.as_dict()}
+        checkpoints = {**job.stats.get('checkpoints', {}), phase.name: position}
+        self._update_stats(job, **{
+            f'{phase.name}_processed': phase.records,
+            'phases': phases,
+            'checkpoints': checkpoints
+        })
+    
+    def _resume_checkpoints(self, job: SyncJob, db: Session) -> Dict[str, Dict[str, Any]]:
+        """
+        Paging checkpoints of the provider's previous job of this type, if it did not complete.
         
-        db.commit()
+        Resumes from a FAILED job, or from a RUNNING one that has made no
+        progress for settings.sync_stale_after seconds (its process died). A
+        job that is still running is left alone and this one starts over.
+        """
+        
+        previous = db.query(SyncJob).filter(
+            SyncJob.provider_id == job.provider_id,
+            SyncJob.sync_type == job.sync_type,
+            SyncJob.created_at < job.created_at
+        ).order_by(SyncJob.created_at.desc()).first()
+        
+        if not previous:
+            return {}
+        if previous.status == SyncStatus.RUNNING:
+            # Chunk commits bump updated_at, so it is the job's last sign of life
+            last_progress = previous.updated_at or previous.started_at or previous.created_at
+            if datetime.utcnow() - last_progress < timedelta(seconds=settings.sync_stale_after):
+                return {}
+        elif previous.status != SyncStatus.FAILED:
+            return {}
+        
+        checkpoints = (previous.stats or {}).get('checkpoints', {})
+        if checkpoints:
+            self._update_stats(job, resumed_from=str(previous.id))
+        return checkpoints
     
     def _map_sis_user_to_scim(self, sis_user: SISUser) -> Dict[str, Any]:
         """Map SIS user to SCIM user format."""
@@ -366,109 +501,37 @@ class SyncEngine:
         sis_provider: BaseSISProvider,
         last_sync_time: Optional[datetime],
         group_filter: Optional[Dict],
+        index: MappingIndex,
+        checkpoint: PagingCheckpoint,
         db: Session
     ):
-        """Sync groups from SIS to SCIM."""
-        
-        batch_size = settings.batch_size
-        processed = 0
+        """Sync groups from SIS to SCIM, one chunk at a time."""
+        
+        phase = PhaseStats("groups")
+        groups = (
+            sis_group async for sis_group in sis_provider.get_groups(
+                limit=settings.batch_size,
+                updated_since=last_sync_time,
+                checkpoint=checkpoint
+            )
+            if not group_filter or self._apply_group_filter(sis_group, group_filter)
+        )
         
         try:
-            async for sis_group in sis_provider.get_groups(
-                limit=batch_size,
-                updated_since=last_sync_time
-            ):
-                # Apply filters
-                if group_filter and not self._apply_group_filter(sis_group, group_filter):
-                    continue
+            async for chunk, position in read_ahead(groups, settings.sync_chunk_size, mark=checkpoint.as_dict):
+                await self._sync_chunk(job, "group", chunk, index, phase, db)
                 
-                # Process group
-                await self._process_group(job, sis_group, db)
-                
-                processed += 1
-                
-                # Update progress
-                if processed % 10 == 0:
-                    job.stats['groups_processed'] = processed
-                    job.progress = min(60, 30 + (processed / 100) * 30)  # Groups = 30% of total
-                    db.commit()
-                
-                # Rate limiting
-                await asyncio.sleep(0.1)
+                # Update progress (one commit per chunk)
+                job.progress = min(60, 30 + (phase.records / 100) * 30)  # Groups = 30% of total
+                self._record_phase(job, phase, position)
+                db.commit()
         
         except Exception as e:
             print(f"Error syncing groups: {e}")
             raise
     
-    async def _process_group(self, job: SyncJob, sis_group: SISGroup, db: Session):
-        """Process individual group sync."""
-        
-        operation = SyncOperation(
-            id=uuid4(),
-            job_id=job.id,
-            operation_type="sync_group",
-            resource_type="group",
-            resource_id=sis_group.id,
-            status="pending",
-            source_data=sis_group.__dict__,
-            created_at=datetime.utcnow()
-        )
-        
-        db.add(operation)
-        
-        try:
-            # Check if group mapping exists
-            mapping = db.query(SISResourceMapping).filter(
-                SISResourceMapping.tenant_id == job.tenant_id,
-                SISResourceMapping.provider == job.provider.provider,
-                SISResourceMapping.sis_resource_id == sis_group.id,
-                SISResourceMapping.sis_resource_type == "group"
-            ).first()
-            
-            # Convert SIS group to SCIM format
-            scim_group_data = self._map_sis_group_to_scim(sis_group, db)
-            operation.mapped_data = scim_group_data
-            
-            if mapping:
-                # Update existing group
-                await self._update_scim_group(mapping.scim_resource_id, scim_group_data)
-                operation.operation_type = "update_group"
-            else:
-                # Create new group
-                scim_group_id = await self._create_scim_group(scim_group_data, str(job.tenant_id))
-                
-                # Create mapping
-                mapping = SISResourceMapping(
-                    id=uuid4(),
-                    tenant_id=job.tenant_id,
-                    provider=job.provider.provider,
-                    sis_resource_id=sis_group.id,
-                    sis_resource_type="group",
-                    scim_resource_id=scim_group_id,
-                    scim_resource_type="Group",
-                    created_at=datetime.utcnow(),
-                    last_synced_at=datetime.utcnow()
-                )
-                db.add(mapping)
-                operation.operation_type = "create_group"
-                operation.scim_resource_id = scim_group_id
-            
-            # Update mapping sync time
-            mapping.last_synced_at = datetime.utcnow()
-            
-            operation.status = "completed"
-            operation.completed_at = datetime.utcnow()
-            
-        except Exception as e:
-            operation.status = "failed"
-            operation.error_message = str(e)
-            operation.completed_at = datetime.utcnow()
-            print(f"Error processing group {sis_group.id}: {e}")
-        
-        db.commit()
-    
-    def _map_sis_group_to_scim(self, sis_group: SISGroup, db: Session) -> Dict[str, Any]:
-        """Map SIS group to SCIM group format."""
+    def _map_sis_group_to_scim(self, sis_group: SISGroup, index: MappingIndex) -> Dict[str, Any]:
+        """Map SIS group to SCIM group format (members resolved through the mapping index)."""
         
         scim_group = {
             "schemas": ["urn:ietf:params:scim:schemas:core:2.0:Group"],
@@ -478,31 +541,14 @@ class SyncEngine:
         }
         
         # Add members if available
-        if sis_group.student_ids:
-            for student_id in sis_group.student_ids:
-                member_mapping = db.query(SISResourceMapping).filter(
-                    SISResourceMapping.sis_resource_id == student_id,
-                    SISResourceMapping.sis_resource_type == "user"
-                ).first()
-                
-                if member_mapping:
-                    scim_group["members"].append({
-                        "value": str(member_mapping.scim_resource_id),
-                        "type": "User"
-                    })
-        
-        if sis_group.teacher_ids:
-            for teacher_id in sis_group.teacher_ids:
-                member_mapping = db.query(SISResourceMapping).filter(
-                    SISResourceMapping.sis_resource_id == teacher_id,
-                    SISResourceMapping.sis_resource_type == "user"
-                ).first()
-                
-                if member_mapping:
-                    scim_group["members"].append({
-                        "value": str(member_mapping.scim_resource_id),
-                        "type": "User"
-                    })
+        for member_id in (sis_group.student_ids or []) + (sis_group.teacher_ids or []):
+            member_mapping = index.get("user", member_id)
+            
+            if member_mapping:
+                scim_group["members"].append({
+                    "value": str(member_mapping.scim_resource_id),
+                    "type": "User"
+                })
         
         return scim_group
     
@@ -541,6 +587,7 @@ class SyncEngine:
         job: SyncJob,
         sis_provider: BaseSISProvider,
         last_sync_time: Optional[datetime],
+        checkpoint: PagingCheckpoint,
         db: Session
     ):
         """Sync enrollments (handled via group memberships)."""
@@ -548,22 +595,17 @@ class SyncEngine:
         # Enrollments are handled as part of group membership sync
         # This could be extended for more complex enrollment tracking
         
-        processed = 0
+        phase = PhaseStats("enrollments")
+        enrollments = sis_provider.get_enrollments(updated_since=last_sync_time, checkpoint=checkpoint)
         
         try:
-            async for enrollment in sis_provider.get_enrollments(
-                updated_since=last_sync_time
-            ):
-                processed += 1
+            async for chunk, position in read_ahead(enrollments, settings.sync_chunk_size, mark=checkpoint.as_dict):
+                phase.records += len(chunk)
                 
                 # Update progress
-                if processed % 10 == 0:
-                    job.stats['enrollments_processed'] = processed
-                    job.progress = min(100, 60 + (processed / 100) * 40)  # Enrollments = 40% of total
-                    db.commit()
-                
-                # Rate limiting
-                await asyncio.sleep(0.05)
+                job.progress = min(100, 60 + (phase.records / 100) * 40)  # Enrollments = 40% of total
+                self._record_phase(job, phase, position)
+                db.commit()
         
         except Exception as e:
             print(f"Error syncing enrollments: {e}")
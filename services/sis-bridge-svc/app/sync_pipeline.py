@@ -0,0 +1,163 @@
+"""
+Sync Pipeline - Building blocks for chunked, concurrent synchronization
+
+The in-memory index of existing SIS to SCIM resource mappings, chunked
+read-ahead of SIS records and per-phase throughput statistics.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from .database import SISResourceMapping
+
+
+class MappedResource(NamedTuple):
+    """Existing mapping of one SIS resource."""
+    id: UUID
+    scim_resource_id: UUID
+    payload_hash: Optional[str]
+
+
+class MappingIndex:
+    """All SIS resource mappings of a tenant/provider, loaded with one query."""
+
+    def __init__(self, tenant_id: UUID, provider: str):
+        self.tenant_id = tenant_id
+        self.provider = provider
+        self._entries: Dict[Tuple[str, str], MappedResource] = {}
+
+    @classmethod
+    def load(cls, db: Session, tenant_id: UUID, provider: str) -> "MappingIndex":
+        """Load the index (plain column rows, no ORM instances)."""
+        index = cls(tenant_id, provider)
+        rows = db.query(
+            SISResourceMapping.id,
+            SISResourceMapping.sis_resource_type,
+            SISResourceMapping.sis_resource_id,
+            SISResourceMapping.scim_resource_id,
+            SISResourceMapping.mapping_data
+        ).filter(
+            SISResourceMapping.tenant_id == tenant_id,
+            SISResourceMapping.provider == provider
+        ).all()
+
+        for row in rows:
+            index.set(
+                row.sis_resource_type,
+                row.sis_resource_id,
+                MappedResource(row.id, row.scim_resource_id, (row.mapping_data or {}).get('payload_hash'))
+            )
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, resource_type: str, sis_resource_id: str) -> Optional[MappedResource]:
+        return self._entries.get((resource_type, sis_resource_id))
+
+    def set(self, resource_type: str, sis_resource_id: str, mapped: MappedResource):
+        self._entries[(resource_type, sis_resource_id)] = mapped
+
+
+def payload_hash(scim_data: Dict[str, Any]) -> str:
+    """Stable digest of a SCIM payload, stored on the mapping to detect unchanged records."""
+    encoded = json.dumps(scim_data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def source_data(record: Any) -> Dict[str, Any]:
+    """JSON-safe copy of an SIS record for SyncOperation.source_data."""
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in vars(record).items()
+    }
+
+
+async def read_ahead(
+    records: AsyncIterator[Any],
+    chunk_size: int,
+    depth: int = 2,
+    mark: Optional[Callable[[], Any]] = None
+) -> AsyncIterator[Tuple[List[Any], Any]]:
+    """
+    Yield (chunk, position) while up to `depth` further chunks are read in the background.
+
+    Reading from the SIS provider overlaps with the SCIM writes of the current
+    chunk. `mark()` is taken right after the last record of a chunk is read, so
+    once the chunk is persisted the position is safe to resume from.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+    done = object()
+
+    def position():
+        return mark() if mark else None
+
+    async def produce():
+        chunk = []
+        async for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                await queue.put((chunk, position()))
+                chunk = []
+        if chunk or mark:
+            await queue.put((chunk, position()))
+
+    async def run_producer():
+        try:
+            await produce()
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(done)
+
+    producer = asyncio.create_task(run_producer())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+
+
+@dataclass
+class PhaseStats:
+    """Throughput of one sync phase (users, groups, enrollments)."""
+    name: str
+    records: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    write_seconds: float = 0.0
+    persist_seconds: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        return {
+            'records': self.records,
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'failed': self.failed,
+            'seconds': round(elapsed, 3),
+            'write_seconds': round(self.write_seconds, 3),
+            'persist_seconds': round(self.persist_seconds, 3),
+            'records_per_second': round(self.records / elapsed, 1) if elapsed > 0 else 0.0
+        }
@@ -0,0 +1,185 @@
+"""
+Provider paging benchmark against a local mock Clever API
+
+Serves N students from an aiohttp mock of the Clever API with injected
+latency per page and a per-second rate-limit window (X-RateLimit-* headers,
+429 + Retry-After once the window is spent). Reads all students both ways,
+with a simulated processing cost per page on the consumer side:
+
+- previous: one page at a time with a fixed 0.1 s sleep between pages
+  (reference copy of the old loop)
+- paging engine: CleverProvider._get_students, prefetching the next pages
+  through the adaptive rate limiter
+
+Then interrupts a read midway and resumes it from the paging checkpoint,
+checking that every student is read.
+
+Usage:
+    python benchmarks/bench_paging.py [--students N] [--limit L] [--latency S] [--process S]
+        [--prefetch P] [--rps R] [--server-rate R]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.providers.clever import CleverProvider  # noqa: E402
+from app.providers.paging import PagingCheckpoint  # noqa: E402
+
+
+class MockClever:
+    """Clever students endpoint with latency and a per-second rate-limit window."""
+
+    def __init__(self, students: int, latency: float, rate: int):
+        self.students = students
+        self.latency = latency
+        self.rate = rate
+        self.window = 0
+        self.window_requests = 0
+        self.requests = 0
+        self.throttled = 0
+
+    async def token(self, request):
+        return web.json_response({'access_token': 'benchmark', 'expires_in': 3600})
+
+    async def list_students(self, request):
+        now = time.time()
+        if int(now) != self.window:
+            self.window, self.window_requests = int(now), 0
+        self.window_requests += 1
+        reset = str(self.window + 1)
+        remaining = max(self.rate - self.window_requests, 0)
+        headers = {'X-RateLimit-Limit': str(self.rate), 'X-RateLimit-Remaining': str(remaining), 'X-RateLimit-Reset': reset}
+        if self.window_requests > self.rate:
+            self.throttled += 1
+            return web.json_response({'message': 'rate limited'}, status=429, headers={**headers, 'Retry-After': '1'})
+
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        limit = int(request.query.get('limit', 100))
+        page = int(request.query.get('page', 0))
+        first = page * limit
+        data = [
+            {'id': f'student-{i}', 'data': {'name': {'first': 'S', 'last': str(i)}, 'sis_id': str(i)}}
+            for i in range(first, min(first + limit, self.students))
+        ]
+        more = first + limit < self.students
+        return web.json_response(
+            {'data': data, 'paging': {'next': f'/v3.0/students?page={page + 1}'} if more else {}},
+            headers=headers
+        )
+
+
+async def legacy_students(provider: CleverProvider, limit: int):
+    """Reference copy of the previous sequential page loop"""
+    params = {'limit': limit}
+    page = 0
+    while True:
+        if page > 0:
+            params['page'] = page
+        data = await provider._make_request('students', params)
+        students = data.get('data', [])
+        if not students:
+            break
+        for student_data in students:
+            student = provider._map_student_to_sis_user(student_data)
+            if student:
+                yield student
+        if not data.get('paging', {}).get('next'):
+            break
+        page += 1
+        await asyncio.sleep(0.1)
+
+
+async def consume(students, limit: int, process: float, stop_after: int = 0):
+    """Read students, spending `process` seconds per page; returns the ids read."""
+    ids = []
+    async for student in students:
+        ids.append(student.id)
+        if len(ids) % limit == 0:
+            await asyncio.sleep(process)
+        if stop_after and len(ids) >= stop_after:
+            break
+    return ids
+
+
+async def run(args) -> None:
+    mock = MockClever(args.students, args.latency, args.server_rate)
+    app = web.Application()
+    app.router.add_post('/oauth/tokens', mock.token)
+    app.router.add_get('/v3.0/students', mock.list_students)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    def provider(prefetch: int) -> CleverProvider:
+        return CleverProvider({
+            'base_url': base_url, 'client_id': 'benchmark', 'client_secret': 'benchmark',
+            'page_prefetch': prefetch, 'requests_per_second': args.rps
+        })
+
+    pages = math.ceil(args.students / args.limit)
+    print(f"{args.students:,} students in {pages} pages, {args.latency * 1000:.0f} ms per page, "
+          f"{args.process * 1000:.0f} ms processing per page, server limit {args.server_rate} req/s")
+    try:
+        legacy = provider(0)
+        started = time.perf_counter()
+        legacy_ids = await consume(legacy_students(legacy, args.limit), args.limit, args.process)
+        legacy_seconds = time.perf_counter() - started
+        await legacy.cleanup()
+
+        mock.throttled = 0
+        engine = provider(args.prefetch)
+        started = time.perf_counter()
+        engine_ids = await consume(engine._get_students(limit=args.limit), args.limit, args.process)
+        engine_seconds = time.perf_counter() - started
+        await engine.cleanup()
+        assert engine_ids == legacy_ids, "paging engine read different students"
+
+        print(f"  previous (sequential):    {legacy_seconds:8.2f} s  {len(legacy_ids) / legacy_seconds:9,.0f} records/s")
+        print(f"  paging engine (prefetch {args.prefetch}): {engine_seconds:6.2f} s  "
+              f"{len(engine_ids) / engine_seconds:9,.0f} records/s  ({legacy_seconds / engine_seconds:.1f}x, "
+              f"{mock.throttled} throttled requests)")
+
+        # Interrupted read resumed from the checkpoint of the records already consumed
+        checkpoint = PagingCheckpoint()
+        crashed = provider(args.prefetch)
+        first_ids = await consume(
+            crashed._get_students(limit=args.limit, checkpoint=checkpoint), args.limit, 0, stop_after=args.students // 2
+        )
+        await crashed.cleanup()
+        resumed = provider(args.prefetch)
+        rest_ids = await consume(
+            resumed._get_students(limit=args.limit, checkpoint=PagingCheckpoint(checkpoint.as_dict())), args.limit, 0
+        )
+        await resumed.cleanup()
+        assert set(first_ids) | set(rest_ids) == set(legacy_ids), "resumed read missed students"
+        print(f"  resume: stopped after {len(first_ids):,} records at {checkpoint.as_dict()}, "
+              f"read {len(rest_ids):,} more ({len(first_ids) + len(rest_ids) - len(legacy_ids)} read twice)")
+    finally:
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--process", type=float, default=0.05)
+    parser.add_argument("--prefetch", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument("--server-rate", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Chunked user sync benchmark against a file-backed SQLite database
+
+Syncs N SIS users through a fake SCIM writer with injected latency per
+request, both ways:
+
+- previous: one user at a time, a mapping query, an awaited SCIM write and
+  a commit per user (reference copy of the old loop, without its fixed 0.1 s
+  sleep per user, which alone would cap it at 10 users/s)
+- chunked: SyncEngine._sync_users, diffing chunks against the mapping index,
+  writing concurrently within the SCIM slots and persisting each chunk with
+  bulk inserts/updates and one commit
+
+Then re-syncs the same users unchanged, and once more with a share of them
+changed, to show that only changed records are written.
+
+Usage:
+    python benchmarks/bench_sync_chunk.py [--users N] [--latency S] [--chunk C]
+        [--concurrency K] [--changed F]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from uuid import uuid4
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import sync_engine  # noqa: E402
+from app.database import (  # noqa: E402
+    Base, SISResourceMapping, SyncJob, SyncOperation, SyncStatus, SyncType, TenantSISProvider
+)
+from app.providers import PagingCheckpoint  # noqa: E402
+from app.providers.base import SISUser  # noqa: E402
+from app.rate_limit import TokenBucket  # noqa: E402
+from app.sync_engine import SyncEngine  # noqa: E402
+from app.sync_pipeline import MappingIndex, source_data  # noqa: E402
+
+
+class FakeScimEngine(SyncEngine):
+    """SyncEngine whose SCIM calls take `latency` seconds and are not sent."""
+
+    def __init__(self, latency: float, concurrency: int):
+        super().__init__()
+        self.latency = latency
+        self.scim_slots = asyncio.Semaphore(concurrency)
+        self.scim_rate_limiter = TokenBucket(1_000_000)
+        self.writes = 0
+
+    async def _create_scim_user(self, scim_user_data, tenant_id):
+        self.writes += 1
+        await asyncio.sleep(self.latency)
+        return uuid4()
+
+    async def _update_scim_user(self, user_id, scim_user_data):
+        self.writes += 1
+        await asyncio.sleep(self.latency)
+
+
+class FakeProvider:
+    """SIS provider serving a fixed list of users."""
+
+    def __init__(self, users):
+        self.users = users
+
+    async def get_users(self, limit=100, updated_since=None, checkpoint=None):
+        for user in self.users:
+            yield user
+
+
+async def legacy_process_user(engine: SyncEngine, job: SyncJob, sis_user: SISUser, db):
+    """Reference copy of the previous per-user sync"""
+    operation = SyncOperation(
+        id=uuid4(), job_id=job.id, operation_type="sync_user", resource_type="user",
+        resource_id=sis_user.id, status="pending", source_data=source_data(sis_user),
+        created_at=datetime.utcnow()
+    )
+    db.add(operation)
+    try:
+        mapping = db.query(SISResourceMapping).filter(
+            SISResourceMapping.tenant_id == job.tenant_id,
+            SISResourceMapping.provider == "benchmark",
+            SISResourceMapping.sis_resource_id == sis_user.id,
+            SISResourceMapping.sis_resource_type == "user"
+        ).first()
+        scim_user_data = engine._map_sis_user_to_scim(sis_user)
+        operation.mapped_data = scim_user_data
+        if mapping:
+            await engine._update_scim_user(mapping.scim_resource_id, scim_user_data)
+            operation.operation_type = "update_user"
+        else:
+            scim_user_id = await engine._create_scim_user(scim_user_data, str(job.tenant_id))
+            mapping = SISResourceMapping(
+                id=uuid4(), tenant_id=job.tenant_id, provider="benchmark", sis_resource_id=sis_user.id,
+                sis_resource_type="user", scim_resource_id=scim_user_id, scim_resource_type="User",
+                created_at=datetime.utcnow(), last_synced_at=datetime.utcnow()
+            )
+            db.add(mapping)
+            operation.operation_type = "create_user"
+            operation.scim_resource_id = scim_user_id
+        mapping.last_synced_at = datetime.utcnow()
+        operation.status = "completed"
+        operation.completed_at = datetime.utcnow()
+    except Exception as e:
+        operation.status = "failed"
+        operation.error_message = str(e)
+        operation.completed_at = datetime.utcnow()
+    db.commit()
+
+
+def make_users(count: int, renamed: int = 0):
+    return [
+        SISUser(
+            id=f"user-{i}", username=f"user{i}", email=f"user{i}@school.example",
+            first_name=f"User{i}", last_name="Renamed" if i < renamed else "Learner",
+            role="student", active=True, external_data={"grade": "5", "school": "benchmark"}
+        )
+        for i in range(count)
+    ]
+
+
+def new_database(directory: str, name: str):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    provider = TenantSISProvider(id=uuid4(), tenant_id=uuid4(), provider="benchmark", name="Benchmark", config={})
+    job = SyncJob(
+        id=uuid4(), provider_id=provider.id, tenant_id=provider.tenant_id,
+        sync_type=SyncType.FULL, status=SyncStatus.RUNNING, stats={}
+    )
+    db.add_all([provider, job])
+    db.commit()
+    return db, job
+
+
+async def chunked_sync(engine: FakeScimEngine, job: SyncJob, users, db) -> float:
+    started = time.perf_counter()
+    index = MappingIndex.load(db, job.tenant_id, "benchmark")
+    await engine._sync_users(job, FakeProvider(users), None, None, index, PagingCheckpoint(), db)
+    return time.perf_counter() - started
+
+
+async def run(args) -> None:
+    sync_engine.settings.sync_chunk_size = args.chunk
+    users = make_users(args.users)
+    print(f"{args.users:,} users, {args.latency * 1000:.0f} ms per SCIM request, "
+          f"chunks of {args.chunk}, {args.concurrency} SCIM slots")
+
+    with tempfile.TemporaryDirectory() as directory:
+        db, job = new_database(directory, "legacy.db")
+        legacy = FakeScimEngine(args.latency, args.concurrency)
+        started = time.perf_counter()
+        for user in users:
+            await legacy_process_user(legacy, job, user, db)
+        legacy_seconds = time.perf_counter() - started
+        db.close()
+
+        db, job = new_database(directory, "chunked.db")
+        engine = FakeScimEngine(args.latency, args.concurrency)
+        chunked_seconds = await chunked_sync(engine, job, users, db)
+        assert db.query(SISResourceMapping).count() == args.users, "chunked sync lost mappings"
+
+        print(f"  previous (per user):  {legacy_seconds:8.2f} s  {args.users / legacy_seconds:9,.0f} users/s")
+        print(f"  chunked:              {chunked_seconds:8.2f} s  {args.users / chunked_seconds:9,.0f} users/s  "
+              f"({legacy_seconds / chunked_seconds:.1f}x)")
+
+        engine.writes = 0
+        seconds = await chunked_sync(engine, job, users, db)
+        print(f"  re-sync, unchanged:   {seconds:8.2f} s  {engine.writes:9,} SCIM writes")
+
+        engine.writes = 0
+        renamed = int(args.users * args.changed)
+        seconds = await chunked_sync(engine, job, make_users(args.users, renamed), db)
+        assert engine.writes == renamed, "re-sync wrote unchanged users"
+        label = f"re-sync, {args.changed:.0%} changed:"
+        print(f"  {label:<22}{seconds:8.2f} s  {engine.writes:9,} SCIM writes")
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--chunk", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--changed", type=float, default=0.1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Shared fixtures for SIS Bridge Service tests
+"""
+
+import os
+
+# app.database builds its engine at import time
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("ENVIRONMENT", "test")
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+
+
+@pytest.fixture
+def db():
+    """In-memory SQLite session with the service schema."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+class FakeResponse:
+    """aiohttp response stand-in usable as `async with session.get(...)`."""
+
+    def __init__(self, status=200, body=None, headers=None):
+        self.status = status
+        self.body = body if body is not None else {}
+        self.headers = headers or {}
+
+    async def json(self):
+        return self.body
+
+    async def text(self):
+        return json.dumps(self.body)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeSession:
+    """aiohttp session stand-in: `respond(url, params)` returns a FakeResponse."""
+
+    closed = False
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+
+    def get(self, url, params=None, headers=None):
+        params = dict(params or {})
+        self.requests.append((url, params))
+        return self.respond(url, params)
+
+    async def close(self):
+        self.closed = True
+
+
+def authenticated(provider, session):
+    """Give a provider a fake HTTP session and a valid token."""
+    provider.session = session
+    provider.access_token = "test-token"
+    provider.token_expires_at = datetime.utcnow() + timedelta(hours=1)
+    return provider
@@ -0,0 +1,110 @@
+"""
+Tests for prefetching provider paging
+Covers page order under prefetch, the fetch window, checkpoints and errors
+"""
+
+import asyncio
+
+import pytest
+
+from app.providers.paging import PagingCheckpoint, stream_pages
+
+
+def paged_source(pages, page_size=3, delays=None):
+    """fetch_page over `pages` numbered pages; records are (page, index)."""
+    state = {"in_flight": 0, "max_in_flight": 0, "cursors": []}
+
+    async def fetch_page(cursor):
+        state["cursors"].append(cursor)
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep((delays or {}).get(cursor, 0))
+        finally:
+            state["in_flight"] -= 1
+        if cursor >= pages:
+            return [], False
+        return [(cursor, i) for i in range(page_size)], cursor + 1 < pages
+
+    return fetch_page, state
+
+
+async def collect(records, stop_after=None):
+    seen = []
+    async for record in records:
+        seen.append(record)
+        if stop_after and len(seen) >= stop_after:
+            break
+    return seen
+
+
+def test_checkpoint_round_trip():
+    checkpoint = PagingCheckpoint({"students": 4})
+    checkpoint.finish("teachers")
+
+    restored = PagingCheckpoint(checkpoint.as_dict())
+
+    assert restored.cursor("students") == 4
+    assert restored.cursor("sections", default=7) == 7
+    assert restored.is_done("teachers") and not restored.is_done("students")
+
+
+@pytest.mark.asyncio
+async def test_pages_yield_in_order_when_fetches_finish_out_of_order():
+    # Later pages answer first
+    fetch_page, state = paged_source(8, delays={c: (8 - c) * 0.002 for c in range(10)})
+
+    records = await collect(stream_pages("students", fetch_page, prefetch=3))
+
+    assert records == [(page, i) for page in range(8) for i in range(3)]
+    assert 1 < state["max_in_flight"] <= 4
+
+
+@pytest.mark.asyncio
+async def test_offset_cursors_advance_by_step():
+    fetch_page, state = paged_source(1000, page_size=1)
+
+    async def by_offset(offset):
+        records, _ = await fetch_page(offset // 100)
+        return records, offset < 200
+
+    await collect(stream_pages("users", by_offset, step=100, prefetch=1))
+
+    assert state["cursors"][:3] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_resumes_from_page_of_last_record():
+    fetch_page, _ = paged_source(5)
+    checkpoint = PagingCheckpoint()
+
+    # Stop in the middle of page 2
+    first = await collect(stream_pages("students", fetch_page, prefetch=2, checkpoint=checkpoint), stop_after=7)
+    assert checkpoint.cursor("students") == 2
+
+    resumed = PagingCheckpoint(checkpoint.as_dict())
+    rest = await collect(stream_pages("students", fetch_page, prefetch=2, checkpoint=resumed))
+
+    assert rest[0] == (2, 0)
+    assert set(first) | set(rest) == {(page, i) for page in range(5) for i in range(3)}
+    assert resumed.is_done("students")
+    assert await collect(stream_pages("students", fetch_page, checkpoint=resumed)) == []
+
+
+@pytest.mark.asyncio
+async def test_fetch_error_reaches_consumer_after_earlier_pages():
+    fetch_page, _ = paged_source(5)
+
+    async def failing(cursor):
+        if cursor == 2:
+            raise RuntimeError("provider unavailable")
+        return await fetch_page(cursor)
+
+    seen = []
+    checkpoint = PagingCheckpoint()
+    with pytest.raises(RuntimeError, match="provider unavailable"):
+        async for record in stream_pages("students", failing, prefetch=2, checkpoint=checkpoint):
+            seen.append(record)
+
+    assert seen == [(page, i) for page in range(2) for i in range(3)]
+    assert checkpoint.cursor("students") == 1
@@ -0,0 +1,85 @@
+"""
+Tests for outbound rate limiting
+Covers header-driven rate adaptation, pauses and Retry-After parsing
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from app.rate_limit import AdaptiveRateLimiter, TokenBucket
+
+
+def test_rate_spreads_remaining_requests_over_window():
+    limiter = AdaptiveRateLimiter(max_rate=10, min_rate=0.5)
+
+    limiter.update({"X-RateLimit-Remaining": "20", "X-RateLimit-Reset": "10"})
+    assert limiter.rate == pytest.approx(2.0)
+
+    limiter.update({"X-RateLimit-Remaining": "500", "X-RateLimit-Reset": "1"})
+    assert limiter.rate == 10
+
+    limiter.update({"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": "60"})
+    assert limiter.rate == 0.5
+
+
+def test_reset_as_epoch_seconds():
+    limiter = AdaptiveRateLimiter(max_rate=100)
+    reset = datetime.now().timestamp() + 20
+
+    limiter.update({"X-RateLimit-Remaining": "40", "X-RateLimit-Reset": str(reset)})
+
+    assert limiter.rate == pytest.approx(2.0, rel=0.05)
+
+
+def test_spent_window_pauses_until_reset():
+    limiter = AdaptiveRateLimiter(max_rate=10)
+
+    limiter.update({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "5"})
+
+    assert limiter.paused_until - time.monotonic() == pytest.approx(5, abs=0.1)
+    assert limiter.tokens == 0
+
+
+def test_missing_headers_leave_rate_unchanged():
+    limiter = AdaptiveRateLimiter(max_rate=10)
+
+    limiter.update({"X-RateLimit-Remaining": "3"})
+    limiter.update({})
+
+    assert limiter.rate == 10 and limiter.paused_until == 0
+
+
+def test_retry_after_sources():
+    limiter = AdaptiveRateLimiter(max_rate=10)
+    http_date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+
+    assert limiter.retry_after({"Retry-After": "3"}) == 3
+    assert limiter.retry_after({"Retry-After": http_date}) == pytest.approx(30, abs=2)
+    assert limiter.retry_after({"X-RateLimit-Reset": "7"}) == 7
+    assert limiter.retry_after({"Retry-After": "soon"}, default=2.5) == 2.5
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_out_pause():
+    limiter = AdaptiveRateLimiter(max_rate=1000)
+    limiter.pause(0.05)
+
+    started = time.monotonic()
+    await limiter.acquire()
+
+    assert time.monotonic() - started >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=100, capacity=2)
+
+    started = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+
+    # Two tokens from the burst, two more at 10 ms each
+    assert time.monotonic() - started >= 0.018
@@ -0,0 +1,265 @@
+"""
+Tests for chunked user sync against a fake SCIM writer
+Covers the mapping index, unchanged-record skipping, bulk persistence with one
+commit per chunk, bounded SCIM writes and read-ahead error propagation
+"""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app import sync_engine
+from app.database import SISResourceMapping, SyncJob, SyncOperation, SyncStatus, SyncType, TenantSISProvider
+from app.providers import PagingCheckpoint
+from app.providers.base import SISUser
+from app.rate_limit import TokenBucket
+from app.sync_engine import SyncEngine
+from app.sync_pipeline import MappingIndex, PhaseStats, payload_hash, read_ahead
+
+
+class FakeScimEngine(SyncEngine):
+    """SyncEngine whose SCIM calls are recorded instead of sent."""
+
+    def __init__(self, slots=4, latency=0.0, fail=()):
+        super().__init__()
+        self.scim_slots = asyncio.Semaphore(slots)
+        self.scim_rate_limiter = TokenBucket(100_000)
+        self.latency = latency
+        self.fail = set(fail)
+        self.created = []
+        self.updated = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _call(self, scim_data):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if scim_data["externalId"] in self.fail:
+            raise Exception("Failed to create SCIM user: 500 - unavailable")
+
+    async def _create_scim_user(self, scim_user_data, tenant_id):
+        await self._call(scim_user_data)
+        self.created.append(scim_user_data["externalId"])
+        return uuid4()
+
+    async def _update_scim_user(self, user_id, scim_user_data):
+        await self._call(scim_user_data)
+        self.updated.append(scim_user_data["externalId"])
+
+
+class FakeProvider:
+    """SIS provider serving a fixed list of users."""
+
+    def __init__(self, users):
+        self.users = users
+
+    async def get_users(self, limit=100, updated_since=None, checkpoint=None):
+        for user in self.users:
+            yield user
+
+
+def make_users(count, last_name="Learner"):
+    return [
+        SISUser(
+            id=f"user-{i}", username=f"user{i}", email=f"user{i}@school.example",
+            first_name=f"User{i}", last_name=last_name, role="student", active=True
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def job(db):
+    provider = TenantSISProvider(id=uuid4(), tenant_id=uuid4(), provider="clever", name="Clever", config={})
+    job = SyncJob(
+        id=uuid4(), provider_id=provider.id, tenant_id=provider.tenant_id,
+        sync_type=SyncType.FULL, status=SyncStatus.RUNNING, stats={}
+    )
+    db.add_all([provider, job])
+    db.commit()
+    return job
+
+
+async def sync_chunk(engine, job, users, db):
+    index = MappingIndex.load(db, job.tenant_id, "clever")
+    phase = PhaseStats("users")
+    await engine._sync_chunk(job, "user", users, index, phase, db)
+    db.commit()
+    return phase
+
+
+def mappings(db):
+    return {m.sis_resource_id: m for m in db.query(SISResourceMapping).all()}
+
+
+def test_mapping_index_load(db):
+    tenant_id = uuid4()
+    users = [
+        SISResourceMapping(
+            tenant_id=tenant_id, provider="clever", sis_resource_id="u1", sis_resource_type="user",
+            scim_resource_id=uuid4(), scim_resource_type="User", mapping_data={"payload_hash": "abc"}
+        ),
+        SISResourceMapping(
+            tenant_id=tenant_id, provider="clever", sis_resource_id="g1", sis_resource_type="group",
+            scim_resource_id=uuid4(), scim_resource_type="Group"
+        ),
+    ]
+    other_provider = SISResourceMapping(
+        tenant_id=tenant_id, provider="oneroster", sis_resource_id="u2", sis_resource_type="user",
+        scim_resource_id=uuid4(), scim_resource_type="User"
+    )
+    other_tenant = SISResourceMapping(
+        tenant_id=uuid4(), provider="clever", sis_resource_id="u3", sis_resource_type="user",
+        scim_resource_id=uuid4(), scim_resource_type="User"
+    )
+    db.add_all(users + [other_provider, other_tenant])
+    db.commit()
+
+    index = MappingIndex.load(db, tenant_id, "clever")
+
+    assert len(index) == 2
+    assert index.get("user", "u1") == (users[0].id, users[0].scim_resource_id, "abc")
+    assert index.get("group", "g1").payload_hash is None
+    assert index.get("user", "u2") is None and index.get("user", "u3") is None
+
+
+@pytest.mark.asyncio
+async def test_first_sync_creates_mappings_with_payload_hash(db, job):
+    engine = FakeScimEngine()
+    users = make_users(5)
+
+    phase = await sync_chunk(engine, job, users, db)
+
+    assert sorted(engine.created) == [u.id for u in users]
+    assert (phase.created, phase.updated, phase.unchanged, phase.failed) == (5, 0, 0, 0)
+    stored = mappings(db)
+    for user in users:
+        assert stored[user.id].mapping_data == {"payload_hash": payload_hash(engine._map_sis_user_to_scim(user))}
+    operations = db.query(SyncOperation).all()
+    assert {op.operation_type for op in operations} == {"create_user"}
+    assert all(op.status == "completed" and op.scim_resource_id for op in operations)
+
+
+@pytest.mark.asyncio
+async def test_unchanged_records_are_skipped_and_changed_ones_updated(db, job):
+    engine = FakeScimEngine()
+    await sync_chunk(engine, job, make_users(4), db)
+    first_synced = {key: m.last_synced_at for key, m in mappings(db).items()}
+    scim_ids = {key: m.scim_resource_id for key, m in mappings(db).items()}
+
+    engine.created.clear()
+    phase = await sync_chunk(engine, job, make_users(4), db)
+    assert engine.created == [] and engine.updated == []
+    assert (phase.created, phase.updated, phase.unchanged) == (0, 0, 4)
+    # Unchanged mappings still record that they were seen
+    assert all(m.last_synced_at > first_synced[key] for key, m in mappings(db).items())
+
+    changed = make_users(4)
+    changed[2].last_name = "Renamed"
+    phase = await sync_chunk(engine, job, changed, db)
+    assert engine.created == [] and engine.updated == ["user-2"]
+    assert (phase.created, phase.updated, phase.unchanged) == (0, 1, 3)
+    stored = mappings(db)
+    assert len(stored) == 4
+    assert stored["user-2"].scim_resource_id == scim_ids["user-2"]
+    assert stored["user-2"].mapping_data["payload_hash"] == payload_hash(engine._map_sis_user_to_scim(changed[2]))
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_recorded_without_mappings(db, job):
+    engine = FakeScimEngine(fail={"user-1"})
+
+    phase = await sync_chunk(engine, job, make_users(3), db)
+
+    assert (phase.created, phase.failed) == (2, 1)
+    assert "user-1" not in mappings(db)
+    failed = db.query(SyncOperation).filter(SyncOperation.status == "failed").one()
+    assert failed.resource_id == "user-1" and "500" in failed.error_message
+    assert job.stats["errors"] == 1
+
+    # Not in the index, so the next sync retries it as a create
+    engine.fail.clear()
+    await sync_chunk(engine, job, make_users(3), db)
+    assert engine.created[-1] == "user-1"
+
+
+@pytest.mark.asyncio
+async def test_scim_writes_bounded_by_slots(db, job):
+    engine = FakeScimEngine(slots=3, latency=0.01)
+
+    await sync_chunk(engine, job, make_users(20), db)
+
+    assert engine.max_in_flight == 3
+    assert len(engine.created) == 20
+
+
+@pytest.mark.asyncio
+async def test_bulk_writes_and_one_commit_per_chunk(db, job, monkeypatch):
+    monkeypatch.setattr(sync_engine.settings, "sync_chunk_size", 4)
+    calls = []
+    for name in ("bulk_insert_mappings", "bulk_update_mappings"):
+        original = getattr(db, name)
+
+        def spy(mapper, rows, _name=name, _original=original):
+            calls.append((_name, mapper.__name__, len(rows)))
+            return _original(mapper, rows)
+
+        monkeypatch.setattr(db, name, spy)
+    original_commit = db.commit
+    monkeypatch.setattr(db, "commit", lambda: (calls.append("commit"), original_commit()))
+
+    engine = FakeScimEngine()
+    index = MappingIndex.load(db, job.tenant_id, "clever")
+    await engine._sync_users(job, FakeProvider(make_users(10)), None, None, index, PagingCheckpoint(), db)
+
+    expected = []
+    for size in (4, 4, 2):
+        expected += [
+            ("bulk_insert_mappings", "SyncOperation", size),
+            ("bulk_insert_mappings", "SISResourceMapping", size),
+            ("bulk_update_mappings", "SISResourceMapping", 0),
+            "commit",
+        ]
+    assert calls == expected
+    assert db.query(SISResourceMapping).count() == 10
+    assert job.stats["users_processed"] == 10
+    assert job.stats["phases"]["users"]["created"] == 10
+    assert "users" in job.stats["checkpoints"]
+
+
+@pytest.mark.asyncio
+async def test_read_ahead_chunks_and_marks_positions():
+    async def records():
+        for i in range(7):
+            yield i
+
+    read = [0]
+
+    async def counted():
+        async for record in records():
+            read[0] = record + 1
+            yield record
+
+    chunks = [item async for item in read_ahead(counted(), 3, mark=lambda: read[0])]
+
+    assert chunks == [([0, 1, 2], 3), ([3, 4, 5], 6), ([6], 7)]
+
+
+@pytest.mark.asyncio
+async def test_read_ahead_passes_producer_error_to_consumer():
+    async def records():
+        for i in range(5):
+            yield i
+        raise RuntimeError("provider unavailable")
+
+    seen = []
+    with pytest.raises(RuntimeError, match="provider unavailable"):
+        async for chunk, _ in read_ahead(records(), 2):
+            seen.append(chunk)
+
+    assert seen == [[0, 1], [2, 3]]
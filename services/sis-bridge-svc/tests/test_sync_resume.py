@@ -0,0 +1,70 @@
+"""
+Tests for resuming a sync from the checkpoints of an interrupted job
+"""
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.config import get_settings
+from app.database import SyncJob, SyncStatus, SyncType, TenantSISProvider
+from app.sync_engine import SyncEngine
+
+CHECKPOINTS = {"users": {"students": 24, "teachers": 0}}
+
+
+@pytest.fixture
+def provider(db):
+    provider = TenantSISProvider(id=uuid4(), tenant_id=uuid4(), provider="clever", name="Clever", config={})
+    db.add(provider)
+    db.commit()
+    return provider
+
+
+def add_job(db, provider, status, age=timedelta(0), idle=timedelta(0)):
+    now = datetime.utcnow()
+    job = SyncJob(
+        id=uuid4(),
+        provider_id=provider.id,
+        tenant_id=provider.tenant_id,
+        sync_type=SyncType.FULL,
+        status=status,
+        created_at=now - age,
+        started_at=now - age,
+        updated_at=now - idle,
+        stats={"checkpoints": CHECKPOINTS}
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+@pytest.mark.parametrize("status,idle,resumes", [
+    (SyncStatus.FAILED, timedelta(0), True),
+    (SyncStatus.COMPLETED, timedelta(0), False),
+    # Still running: leave it alone and start over
+    (SyncStatus.RUNNING, timedelta(minutes=1), False),
+    # Running but silent past the staleness timeout: its process died
+    (SyncStatus.RUNNING, timedelta(seconds=get_settings().sync_stale_after + 60), True),
+])
+def test_resume_checkpoints(db, provider, status, idle, resumes):
+    previous = add_job(db, provider, status, age=timedelta(hours=2), idle=idle)
+    job = add_job(db, provider, SyncStatus.RUNNING)
+
+    checkpoints = SyncEngine()._resume_checkpoints(job, db)
+
+    if resumes:
+        assert checkpoints == CHECKPOINTS
+        assert job.stats["resumed_from"] == str(previous.id)
+    else:
+        assert checkpoints == {}
+        assert "resumed_from" not in job.stats
+
+
+def test_only_latest_job_of_same_type_counts(db, provider):
+    add_job(db, provider, SyncStatus.FAILED, age=timedelta(hours=3))
+    add_job(db, provider, SyncStatus.COMPLETED, age=timedelta(hours=2))
+    job = add_job(db, provider, SyncStatus.RUNNING)
+
+    assert SyncEngine()._resume_checkpoints(job, db) == {}